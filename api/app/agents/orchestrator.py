@@ -47,9 +47,9 @@ class OrchestratorAgent:
             HumanMessage(content=user_message),
         ]
 
-        logger.info(f"Orchestrator request: {user_message}")
+        logger.debug("Orchestrator request: %s", user_message)
         start_time = time.time()
         decision = self._llm.invoke(messages)
         elapsed = time.time() - start_time
-        logger.info(f"Orchestrator response ({elapsed:.2f}s): {decision.model_dump_json()}")
+        logger.debug("Orchestrator response (%.2fs): %r", elapsed, decision)
         return decision
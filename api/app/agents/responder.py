@@ -60,12 +60,12 @@ Please respond to the user's movie request, acknowledging any constraints found.
             HumanMessage(content=enhanced_message),
         ]
 
-        logger.info(f"MoviesResponder request: {enhanced_message}")
+        logger.debug("MoviesResponder request: %s", enhanced_message)
         start_time = time.time()
         response = self._llm.invoke(messages)
         elapsed = time.time() - start_time
         reply = str(response.content)
-        logger.info(f"MoviesResponder response ({elapsed:.2f}s): {reply}")
+        logger.debug("MoviesResponder response (%.2fs): %s", elapsed, reply)
         return reply
 
 
@@ -100,10 +100,10 @@ class SystemResponder:
             HumanMessage(content=user_message),
         ]
 
-        logger.info(f"SystemResponder request: {user_message}")
+        logger.debug("SystemResponder request: %s", user_message)
         start_time = time.time()
         response = self._llm.invoke(messages)
         elapsed = time.time() - start_time
         reply = str(response.content)
-        logger.info(f"SystemResponder response ({elapsed:.2f}s): {reply}")
+        logger.debug("SystemResponder response (%.2fs): %s", elapsed, reply)
         return reply
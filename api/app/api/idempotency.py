@@ -0,0 +1,203 @@
+"""Deduplication of repeated /chat requests.
+
+Double-submits from the UI and retries from gateways would otherwise each
+run the full workflow. :class:`ChatDeduplicator` prevents that in two ways:
+
+- identical requests that arrive while the first is still running wait
+  for it and share its response (a :class:`SingleFlight` map)
+- completed responses of requests with an ``Idempotency-Key`` header are
+  kept for a short window, so a retry that comes in just after the
+  original finished is answered from memory
+
+Requests are identified by their ``Idempotency-Key`` header when present,
+and otherwise by their session and normalized message. Without the header
+a repeated message may be a deliberate follow-up ("another one"), so such
+requests are only coalesced while the first one is still running. Requests
+with neither a header nor a session are never deduplicated.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from app.observability.metrics import Counter
+from app.resilience.singleflight import SingleFlight
+from app.schemas import ChatRequest, ChatResponse
+
+logger = logging.getLogger(__name__)
+
+DEDUPLICATED_REQUESTS = Counter(
+    "chat_deduplicated_requests_total",
+    "Chat requests answered without running the workflow again",
+    ["source"],
+)
+
+
+class IdempotencyKeyMismatch(Exception):
+    """An Idempotency-Key was reused for a different request."""
+
+
+def normalize_message(message: str) -> str:
+    """Lower-case ``message`` and collapse whitespace."""
+    return " ".join(message.lower().split())
+
+
+def request_fingerprint(request: ChatRequest) -> str:
+    """Digest of the parts of a request that determine its response."""
+    body = f"{request.session_id or ''}\n{normalize_message(request.message)}"
+    return hashlib.sha256(body.encode()).hexdigest()[:16]
+
+
+def dedup_key(request: ChatRequest, idempotency_key: str | None = None) -> str | None:
+    """Key under which equivalent requests are coalesced and cached.
+
+    Args:
+        request: The chat request.
+        idempotency_key: Value of the ``Idempotency-Key`` header, if any.
+
+    Returns:
+        The key, or None when the request cannot be deduplicated.
+    """
+    if idempotency_key:
+        return f"idem:{idempotency_key}"
+    if request.session_id is None:
+        return None
+    return f"{request.session_id}:{request_fingerprint(request)}"
+
+
+class ChatDeduplicator:
+    """Singleflight map plus a short-lived cache of completed responses."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024) -> None:
+        """Initialize the deduplicator.
+
+        Args:
+            ttl_seconds: How long completed responses are replayed (0
+                disables the cache but still coalesces in-flight requests).
+            max_entries: Least recently stored responses are evicted beyond this.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._inflight: SingleFlight[tuple[str, ChatResponse]] = SingleFlight()
+        self._completed: OrderedDict[str, tuple[float, str, ChatResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], ChatResponse],
+        replay: bool = True,
+    ) -> tuple[ChatResponse, bool]:
+        """Return the response for ``key``, running ``fn`` only if needed.
+
+        A request that joins a run in flight gets its response only if the
+        run succeeds; if it fails, the request runs ``fn`` itself rather
+        than inheriting another client's error.
+
+        Args:
+            key: Deduplication key from :func:`dedup_key`.
+            fingerprint: :func:`request_fingerprint` of the request, used to
+                reject idempotency keys reused for a different request.
+            fn: Produces the response when none is cached or in flight.
+            replay: Whether completed responses are cached and replayed.
+                When False, only a run still in flight for ``key`` is shared.
+
+        Returns:
+            The response and whether it was replayed rather than computed.
+
+        Raises:
+            IdempotencyKeyMismatch: If ``key`` was last used, or is being
+                used, with a different request.
+        """
+        cached = self._replay(key, fingerprint) if replay else None
+        if cached is not None:
+            return cached, True
+
+        outcome, shared = self._inflight.do(
+            key, lambda: (fingerprint, fn()), share_errors=False
+        )
+        return self._finish(key, fingerprint, outcome, shared, replay), shared
+
+    async def arun(
+        self,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], Awaitable[ChatResponse]],
+        replay: bool = True,
+    ) -> tuple[ChatResponse, bool]:
+        """Async variant of :meth:`run`.
+
+        Requests that join a run in flight wait for it on the event loop,
+        so they hold no thread however long the run takes.
+        """
+        cached = self._replay(key, fingerprint) if replay else None
+        if cached is not None:
+            return cached, True
+
+        async def call() -> tuple[str, ChatResponse]:
+            return fingerprint, await fn()
+
+        outcome, shared = await self._inflight.ado(key, call, share_errors=False)
+        return self._finish(key, fingerprint, outcome, shared, replay), shared
+
+    def _replay(self, key: str, fingerprint: str) -> ChatResponse | None:
+        """Return the cached response for ``key``, if any."""
+        cached = self._get(key)
+        if cached is None:
+            return None
+        stored_fingerprint, response = cached
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyKeyMismatch(key)
+        DEDUPLICATED_REQUESTS.labels(source="cache").inc()
+        logger.info("Replaying cached response for %s", key)
+        return response
+
+    def _finish(
+        self,
+        key: str,
+        fingerprint: str,
+        outcome: tuple[str, ChatResponse],
+        shared: bool,
+        replay: bool,
+    ) -> ChatResponse:
+        """Check and cache the response of a run this request ran or joined."""
+        run_fingerprint, response = outcome
+        if run_fingerprint != fingerprint:
+            raise IdempotencyKeyMismatch(key)
+        if shared:
+            DEDUPLICATED_REQUESTS.labels(source="inflight").inc()
+            logger.info("Coalesced request onto in-flight run %s", key)
+        elif replay:
+            self._put(key, fingerprint, response)
+        return response
+
+    def clear(self) -> None:
+        """Forget all completed responses."""
+        with self._lock:
+            self._completed.clear()
+
+    def _get(self, key: str) -> tuple[str, ChatResponse] | None:
+        with self._lock:
+            entry = self._completed.get(key)
+            if entry is None:
+                return None
+            stored_at, fingerprint, response = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._completed[key]
+                return None
+            return fingerprint, response
+
+    def _put(self, key: str, fingerprint: str, response: ChatResponse) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._completed[key] = (time.time(), fingerprint, response)
+            self._completed.move_to_end(key)
+            while len(self._completed) > self.max_entries:
+                self._completed.popitem(last=False)
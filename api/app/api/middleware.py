@@ -0,0 +1,141 @@
+"""HTTP middleware for the API.
+
+:class:`RequestTracingMiddleware` runs every request in a server span (see
+:mod:`app.observability.tracing`). A W3C ``traceparent`` header, such as
+the one the UI sends, makes the span a child of the caller's, so the
+request joins the caller's trace. The span's context is returned in the
+response's ``traceparent`` header.
+
+:class:`RequestIDMiddleware` gives every request a correlation ID, taken
+from its ``X-Request-ID`` header or generated, which is attached to each
+log record emitted while the request is handled (see
+:mod:`app.observability.logs`) and returned in the response's
+``X-Request-ID`` header.
+
+:class:`RequestMetricsMiddleware` observes the latency of every request in
+``http_request_duration_seconds``, labelled with the method, the matched
+route's path template (e.g. ``/chat/stream``) and the response status.
+Latency runs until the last byte of the body is sent, so streamed
+responses are measured in full. Requests that match no route share the
+``unmatched`` path label to keep the label set bounded.
+"""
+
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.observability.logs import REQUEST_ID_HEADER, new_request_id, request_id_scope
+from app.observability.metrics import Histogram
+from app.observability.tracing import begin_span, parse_traceparent, use_span
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests by method, route and status",
+    ["method", "path", "status"],
+)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request latency by route."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                path=getattr(route, "path", "unmatched"),
+                status=status,
+            ).observe(time.perf_counter() - started)
+
+
+class RequestTracingMiddleware:
+    """ASGI middleware running each request in a server span."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        span = begin_span(
+            f"{scope['method']} {scope['path']}",
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+            kind="server",
+            parent=parse_traceparent(traceparent),
+        )
+
+        async def send_with_context(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                span.set_attribute("http.response.status_code", status)
+                if status >= 500:
+                    span.set_error(f"HTTP {status}")
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"traceparent", span.context.traceparent.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            with use_span(span):
+                await self.app(scope, receive, send_with_context)
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.route", route.path)
+            span.end()
+
+
+class RequestIDMiddleware:
+    """ASGI middleware setting a correlation ID for each request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = REQUEST_ID_HEADER.lower().encode("latin-1")
+        headers = dict(scope.get("headers") or [])
+        request_id = new_request_id(headers.get(header, b"").decode("latin-1"))
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (header, request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        with request_id_scope(request_id):
+            await self.app(scope, receive, send_with_id)
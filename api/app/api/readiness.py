@@ -0,0 +1,107 @@
+"""Lazy workflow construction and readiness reporting.
+
+Building the workflow imports langchain, langgraph and the Azure OpenAI SDK
+and constructs every chat model, agent and the RAG index, which takes
+seconds. A :class:`WorkflowLoader` defers that work so the API can answer
+``/health`` immediately: the workflow is built on first use, or ahead of
+time by :meth:`WorkflowLoader.start_warmup`. ``/ready`` reports the
+loader's progress so orchestrators only route traffic once it is built.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from app.schemas import ReadinessResponse
+
+if TYPE_CHECKING:
+    from app.llm.workflow import MovieNightWorkflow
+
+logger = logging.getLogger(__name__)
+
+WorkflowFactory = Callable[[Callable[[str], None]], "MovieNightWorkflow"]
+
+
+class WorkflowLoader:
+    """Builds the workflow once, on first use or in a background warm-up."""
+
+    def __init__(self, factory: WorkflowFactory) -> None:
+        """Initialize the loader.
+
+        Args:
+            factory: Builds the workflow. It is passed a callback to report
+                each completed step by name.
+        """
+        self._factory = factory
+        self._workflow: MovieNightWorkflow | None = None
+        self._lock = threading.Lock()
+        self._state = "cold"
+        self._steps: list[str] = []
+        self._started_at: float | None = None
+        self._elapsed: float | None = None
+        self._error: str | None = None
+
+    def get(self) -> MovieNightWorkflow:
+        """Return the workflow, building it if needed.
+
+        Concurrent callers wait for a single build. A failed build is
+        retried by the next call.
+
+        Raises:
+            Exception: Whatever the factory raised.
+        """
+        if self._workflow is not None:
+            return self._workflow
+        with self._lock:
+            if self._workflow is None:
+                self._build()
+            return self._workflow
+
+    def start_warmup(self) -> threading.Thread:
+        """Build the workflow in a background thread."""
+        thread = threading.Thread(
+            target=self._warmup, name="workflow-warmup", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def status(self) -> ReadinessResponse:
+        """Report build progress."""
+        elapsed = self._elapsed
+        if elapsed is None and self._started_at is not None:
+            elapsed = time.perf_counter() - self._started_at
+        return ReadinessResponse(
+            status=self._state,
+            completed_steps=list(self._steps),
+            elapsed_seconds=round(elapsed, 3) if elapsed is not None else None,
+            error=self._error,
+        )
+
+    def _warmup(self) -> None:
+        try:
+            self.get()
+        except Exception:
+            pass  # recorded in status(); requests retry the build
+
+    def _build(self) -> None:
+        self._state = "warming"
+        self._steps = []
+        self._error = None
+        self._started_at = time.perf_counter()
+        self._elapsed = None
+        try:
+            workflow = self._factory(self._steps.append)
+        except Exception as e:
+            self._state = "failed"
+            self._error = str(e) or type(e).__name__
+            self._elapsed = time.perf_counter() - self._started_at
+            logger.error(f"Workflow build failed: {self._error}")
+            raise
+        self._elapsed = time.perf_counter() - self._started_at
+        self._workflow = workflow
+        self._state = "ready"
+        logger.info(f"Workflow ready in {self._elapsed:.2f}s")
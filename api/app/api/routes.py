@@ -1,42 +1,389 @@
 import logging
-from typing import Any
-
-from fastapi import APIRouter, HTTPException
-
-from app.llm.workflow import MovieNightWorkflow
-from app.observability import traced_chat
-from app.schemas import ChatRequest, ChatResponse, HealthResponse
-from app.schemas.chat import DebugInfo
+import os
+from collections.abc import Iterator
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Literal
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.api.idempotency import (
+    ChatDeduplicator,
+    IdempotencyKeyMismatch,
+    dedup_key,
+    request_fingerprint,
+)
+from app.api.readiness import WorkflowLoader
+from app.llm.workflow.formatters import build_debug_info, to_public_route
+from app.observability import CONTENT_TYPE_LATEST, render_latest, traced_chat
+from app.observability.process import memory_usage, update_memory_metrics
+from app.observability.profiling import (
+    ProfileInProgressError,
+    capture_cpu_profile,
+    capture_memory_profile,
+)
+from app.observability.tracing import set_span_attributes
+from app.resilience import (
+    DEFAULT_DEADLINE_SECONDS,
+    AdmissionController,
+    AdmissionRejected,
+    AdmissionTicket,
+    Deadline,
+    DegradationController,
+)
+from app.schemas import (
+    CacheStats,
+    ChatBatchItem,
+    ChatBatchRequest,
+    ChatRequest,
+    ChatResponse,
+    DegradationStatus,
+    HealthResponse,
+    ReadinessResponse,
+    StreamEvent,
+    WorkersResponse,
+    WorkerStats,
+)
+from app.sessions import SessionState, SessionStore
+
+if TYPE_CHECKING:
+    from app.cache import SharedCache
+    from app.llm.workflow import MovieNightWorkflow
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-workflow: MovieNightWorkflow | None = None
-
-
-def initialize_workflow(wf: MovieNightWorkflow) -> None:
+workflow: "MovieNightWorkflow | None" = None
+workflow_loader: WorkflowLoader | None = None
+deadline_seconds: float = DEFAULT_DEADLINE_SECONDS
+session_store: SessionStore | None = None
+max_session_turns: int = 6
+deduplicator: ChatDeduplicator = ChatDeduplicator()
+max_batch_items: int = 100
+max_batch_concurrency: int = 4
+shared_cache: "SharedCache | None" = None
+worker_report_interval: float = 15.0
+admission: AdmissionController | None = None
+degradation: DegradationController | None = None
+max_profile_seconds: float | None = None
+
+
+def initialize_workflow(
+    wf: "MovieNightWorkflow | None" = None,
+    chat_deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+    sessions: SessionStore | None = None,
+    session_max_turns: int = 6,
+    idempotency_ttl_seconds: float = 30.0,
+    batch_max_items: int = 100,
+    batch_concurrency: int = 4,
+    loader: WorkflowLoader | None = None,
+    cache: "SharedCache | None" = None,
+    worker_report_interval_seconds: float = 15.0,
+    admission_controller: AdmissionController | None = None,
+    profile_max_seconds: float | None = None,
+    degradation_controller: DegradationController | None = None,
+) -> None:
     """Initialize the route handlers with a workflow instance.
 
     Called during application startup.
 
     Args:
-        wf: The compiled MovieNightWorkflow instance.
+        wf: The compiled MovieNightWorkflow instance, if already built.
+        chat_deadline_seconds: Time budget for each /chat request.
+        sessions: Optional store for conversation sessions.
+        session_max_turns: Messages kept verbatim per session before older
+            ones are summarized.
+        idempotency_ttl_seconds: How long completed responses are replayed
+            for retries with the same ``Idempotency-Key``.
+        batch_max_items: Maximum number of messages per /chat/batch request.
+        batch_concurrency: Maximum messages of a batch processed at once.
+        loader: Builds the workflow on first use when ``wf`` is not given.
+        cache: Optional cache shared by all workers, where they also record
+            the reports served by /workers.
+        worker_report_interval_seconds: How often workers report; reports
+            older than three intervals are dropped from /workers.
+        admission_controller: Optional limit on concurrent chat requests;
+            without one, every request runs immediately.
+        profile_max_seconds: Longest capture the /debug/profile endpoints
+            allow; ``None`` disables them.
+        degradation_controller: Optional SLO-aware degradation controller,
+            whose state /health reports.
     """
-    global workflow
+    global workflow, deadline_seconds, session_store, max_session_turns, deduplicator
+    global max_batch_items, max_batch_concurrency, workflow_loader
+    global shared_cache, worker_report_interval, admission, max_profile_seconds
+    global degradation
     workflow = wf
+    workflow_loader = loader
+    deadline_seconds = chat_deadline_seconds
+    session_store = sessions
+    max_session_turns = session_max_turns
+    deduplicator = ChatDeduplicator(ttl_seconds=idempotency_ttl_seconds)
+    max_batch_items = batch_max_items
+    max_batch_concurrency = batch_concurrency
+    shared_cache = cache
+    worker_report_interval = worker_report_interval_seconds
+    admission = admission_controller
+    max_profile_seconds = profile_max_seconds
+    degradation = degradation_controller
 
 
 def cleanup_workflow() -> None:
     """Clean up workflow instance during shutdown."""
-    global workflow
+    global workflow, workflow_loader, session_store, shared_cache, admission
+    global max_profile_seconds, degradation
     workflow = None
+    workflow_loader = None
+    session_store = None
+    shared_cache = None
+    admission = None
+    max_profile_seconds = None
+    degradation = None
+    deduplicator.clear()
+
+
+def _ensure_workflow() -> None:
+    """Make sure the workflow is built, building it via the loader if needed.
+
+    Raises:
+        HTTPException: If the workflow is not initialized (500) or could
+            not be built (503).
+    """
+    global workflow
+    if workflow is None and workflow_loader is not None:
+        try:
+            workflow = workflow_loader.get()
+        except Exception:
+            raise HTTPException(
+                status_code=503,
+                detail="Service is starting up. Please try again later.",
+                headers={"Retry-After": "5"},
+            )
+    if workflow is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Workflow not initialized",
+        )
+
+
+async def _admit(
+    priority: str, deadline: Deadline | None, slots: int = 1
+) -> AdmissionTicket | None:
+    """Wait for admission of a request, if admission control is enabled.
+
+    The wait happens on the event loop, before the request takes a
+    threadpool thread, so queued requests leave the threads free for
+    other endpoints such as ``/health`` and ``/metrics``.
+
+    Args:
+        priority: The request's priority class.
+        deadline: The request's deadline, which bounds the wait.
+        slots: Concurrency slots the request needs.
+
+    Returns:
+        The ticket to release when done, or None without admission control.
+
+    Raises:
+        HTTPException: 429 if an upstream budget is exhausted, 503 if the
+            server is saturated, both with ``Retry-After``.
+    """
+    if admission is None:
+        return None
+    try:
+        return await admission.aadmit(priority, slots=slots, deadline=deadline)
+    except AdmissionRejected as e:
+        detail = (
+            "Upstream capacity exhausted. Please try again later."
+            if e.status_code == 429
+            else "Server is busy. Please try again later."
+        )
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
 
-@router.get("/health", response_model=HealthResponse)
+def _streaming_response(
+    body: Iterator[str], ticket: AdmissionTicket | None
+) -> StreamingResponse:
+    """Stream ``body`` as NDJSON, holding ``ticket`` until it is sent."""
+    if ticket is None:
+        return StreamingResponse(body, media_type="application/x-ndjson")
+
+    def held() -> Iterator[str]:
+        try:
+            yield from body
+        finally:
+            ticket.release()
+
+    # The background task releases the ticket if the body never started.
+    return StreamingResponse(
+        held(), media_type="application/x-ndjson", background=BackgroundTask(ticket.release)
+    )
+
+
+def _load_session(session_id: str | None) -> SessionState | None:
+    """Fetch the conversation session, starting a new one if unknown."""
+    if session_id is None or session_store is None:
+        return None
+    try:
+        session = session_store.get(session_id)
+    except Exception as e:
+        logger.warning("Failed to load session %s: %s", session_id, e)
+        return None
+    return session or SessionState(session_id=session_id)
+
+
+def _save_session(session: SessionState | None, user_message: str, result: dict) -> None:
+    """Record a completed turn in the conversation session."""
+    if session is None or session_store is None:
+        return
+    session.record_turn(user_message, result)
+    session.compact(max_session_turns)
+    try:
+        session_store.save(session)
+    except Exception as e:
+        logger.warning("Failed to save session %s: %s", session.session_id, e)
+
+
+@router.get("/health", response_model=HealthResponse, response_model_exclude_none=True)
 def health() -> HealthResponse:
-    """Health check endpoint."""
-    return HealthResponse(status="ok")
+    """Health check endpoint, with the degradation level when it is enabled."""
+    if degradation is None:
+        return HealthResponse(status="ok")
+    return HealthResponse(status="ok", degradation=DegradationStatus(**degradation.status()))
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+def ready(response: Response) -> ReadinessResponse:
+    """Readiness check: whether the workflow is built and can serve /chat.
+
+    Unlike ``/health``, this returns 503 until the workflow has been built,
+    reporting warm-up progress in the body.
+    """
+    if workflow is not None:
+        return ReadinessResponse(status="ready")
+    if workflow_loader is None:
+        response.status_code = 503
+        return ReadinessResponse(status="cold")
+    status = workflow_loader.status()
+    if status.status != "ready":
+        response.status_code = 503
+    return status
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    """Expose application metrics in the Prometheus text format."""
+    update_memory_metrics()
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/workers", response_model=WorkersResponse)
+def workers() -> WorkersResponse:
+    """Memory use and shared cache hit rates of each worker process.
+
+    Workers record their figures in the shared cache periodically, so any
+    worker answers for all of them. Without a shared cache, only the
+    process serving the request is reported.
+    """
+    if shared_cache is None:
+        memory = memory_usage()
+        return WorkersResponse(
+            workers=[
+                WorkerStats(
+                    pid=os.getpid(),
+                    rss_bytes=memory["rss"],
+                    private_bytes=memory.get("private"),
+                )
+            ]
+        )
+    reports = shared_cache.workers(max_age_seconds=3 * worker_report_interval)
+    return WorkersResponse(workers=[_worker_stats(report) for report in reports])
+
+
+def _worker_stats(report: dict[str, Any]) -> WorkerStats:
+    """Convert a stored worker report, adding cache hit rates."""
+    cache = {}
+    for namespace, counts in report.get("cache", {}).items():
+        hits, misses = counts.get("hits", 0), counts.get("misses", 0)
+        total = hits + misses
+        cache[namespace] = CacheStats(
+            hits=hits, misses=misses, hit_rate=round(hits / total, 3) if total else None
+        )
+    return WorkerStats(
+        pid=report["pid"],
+        rss_bytes=report["rss_bytes"],
+        private_bytes=report.get("private_bytes"),
+        cache=cache,
+        updated_at=report.get("updated_at"),
+    )
+
+
+def _check_profile_request(seconds: float) -> None:
+    """Reject profile requests when profiling is off or too long.
+
+    Raises:
+        HTTPException: 404 if profiling is disabled, 422 if ``seconds``
+            exceeds the configured maximum.
+    """
+    if max_profile_seconds is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if seconds > max_profile_seconds:
+        raise HTTPException(
+            status_code=422,
+            detail=f"seconds must be at most {max_profile_seconds:g}",
+        )
+
+
+@router.get("/debug/profile/cpu")
+def profile_cpu(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    format: Literal["collapsed", "json"] = "collapsed",
+    idle: bool = False,
+    limit: int = Query(20, ge=1),
+) -> Response:
+    """Sample the stacks of this worker's threads for ``seconds``.
+
+    Only served when profiling is enabled. ``collapsed`` output feeds
+    ``flamegraph.pl`` or speedscope directly; stacks of threads running a
+    graph node start with a ``node:<name>`` frame. ``idle`` keeps samples
+    of threads blocked in waits and reads.
+    """
+    _check_profile_request(seconds)
+    try:
+        profile = capture_cpu_profile(seconds, interval_ms / 1000, include_idle=idle)
+    except ProfileInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "json":
+        return JSONResponse(profile.to_dict(limit))
+    return PlainTextResponse(profile.collapsed())
+
+
+@router.get("/debug/profile/memory")
+def profile_memory(
+    seconds: float = Query(10.0, gt=0),
+    format: Literal["collapsed", "json"] = "json",
+    limit: int = Query(20, ge=1),
+) -> Response:
+    """Report which allocations grew over ``seconds`` using tracemalloc.
+
+    Only served when profiling is enabled. ``collapsed`` output weights
+    each allocation traceback by the bytes it grew.
+    """
+    _check_profile_request(seconds)
+    try:
+        profile = capture_memory_profile(seconds)
+    except ProfileInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "json":
+        return JSONResponse(profile.to_dict(limit))
+    return PlainTextResponse(profile.collapsed())
 
 
 def _enrich_trace_metadata(trace_meta: dict[str, Any], result: dict) -> None:
@@ -63,58 +410,34 @@ def _enrich_trace_metadata(trace_meta: dict[str, Any], result: dict) -> None:
     trace_meta["candidates_found"] = len(result.get("candidate_movies", []))
     trace_meta["contexts_retrieved"] = len(result.get("retrieved_contexts", []))
 
-
-def _build_debug_info(result: dict) -> DebugInfo:
-    """Extract debug information from workflow result.
-
-    Args:
-        result: The complete workflow state after execution.
-
-    Returns:
-        DebugInfo with relevant debugging data.
-    """
-    retrieved_contexts = []
-    for ctx in result.get("retrieved_contexts", []) or []:
-        retrieved_contexts.append({
-            "content": ctx.content[:200] + "..." if len(ctx.content) > 200 else ctx.content,
-            "source": ctx.metadata.get("source_file", ctx.source),
-            "title": ctx.metadata.get("title", "Unknown"),
-            "relevance_score": ctx.relevance_score,
-        })
-
-    selected_movie = None
-    draft = result.get("draft_recommendation")
-    if draft is not None:
-        selected_movie = {
-            "title": draft.movie.title,
-            "year": draft.movie.year,
-            "genres": draft.movie.genres,
-            "rating": draft.movie.rating,
-            "runtime_minutes": draft.movie.runtime_minutes,
+    if result.get("is_refinement"):
+        trace_meta["is_refinement"] = True
+
+    degraded = result.get("degraded_nodes")
+    if degraded:
+        trace_meta["degraded_nodes"] = degraded
+
+    usage = result.get("token_usage")
+    if usage:
+        trace_meta["llm_calls"] = usage["llm_calls"]
+        trace_meta["prompt_tokens"] = usage["prompt_tokens"]
+        trace_meta["completion_tokens"] = usage["completion_tokens"]
+        trace_meta["cached_tokens"] = usage["cached_tokens"]
+        trace_meta["cost_usd"] = usage["cost_usd"]
+        trace_meta["tokens_by_node"] = {
+            node: totals["total_tokens"]
+            for node, totals in usage["by_node"].items()
         }
 
-    evaluation = None
-    eval_result = result.get("evaluation_result")
-    if eval_result is not None:
-        evaluation = {
-            "passed": eval_result.passed,
-            "score": eval_result.score,
-            "feedback": eval_result.feedback,
-            "constraint_violations": eval_result.constraint_violations,
-        }
-
-    return DebugInfo(
-        rag_query=result.get("rag_query"),
-        retrieved_contexts=retrieved_contexts,
-        selected_movie=selected_movie,
-        evaluation=evaluation,
-        retry_count=result.get("retry_count", 0) or 0,
-        rejected_titles=result.get("rejected_titles", []) or [],
-    )
-
 
 @router.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
+async def chat(
+    request: ChatRequest,
+    response: Response,
+    idempotency_key: str | None = Header(
+        default=None, alias="Idempotency-Key", max_length=255
+    ),
+) -> ChatResponse:
     """Process a chat message through the LangGraph workflow.
 
     The workflow orchestrates intent classification, constraint extraction,
@@ -123,49 +446,123 @@ def chat(request: ChatRequest) -> ChatResponse:
     All LLM calls and workflow steps are traced in LangSmith when enabled,
     with metadata including route, constraints, and retry information.
 
+    Retries of a request (same ``Idempotency-Key``, or same session and
+    message) that arrive while it is running share its execution. Retries
+    with the same ``Idempotency-Key`` arriving shortly after it completed
+    get the same response; without the header the message is treated as a
+    new turn. Shared responses carry an ``Idempotent-Replayed: true``
+    header.
+
+    Admission and waiting for a shared run both happen on the event loop;
+    only a request that runs the workflow is admitted and takes a
+    threadpool thread. If the run it joined fails, a request runs the
+    workflow itself.
+
     Args:
         request: The chat request containing the user message.
+        response: The outgoing response, used to set headers.
+        idempotency_key: Optional client-chosen key identifying retries.
 
     Returns:
         The assistant's response with optional route and constraint info.
 
     Raises:
-        HTTPException: If workflow is not initialized (500) or execution fails (500).
+        HTTPException: If workflow is not initialized (500) or could not
+            be built (503), the Idempotency-Key was used for a different
+            request (422), the server or an upstream is saturated (503 or
+            429, with ``Retry-After``), or execution fails (500).
     """
-    if workflow is None:
+    await run_in_threadpool(_ensure_workflow)
+    deadline = Deadline.after(deadline_seconds)
+
+    key = dedup_key(request, idempotency_key)
+    if key is None:
+        return await _admitted_chat(request, None, deadline)
+
+    replay = bool(idempotency_key)
+    try:
+        result, replayed = await deduplicator.arun(
+            key,
+            request_fingerprint(request),
+            lambda: _admitted_chat(request, key if replay else None, deadline),
+            replay=replay,
+        )
+    except IdempotencyKeyMismatch:
         raise HTTPException(
-            status_code=500,
-            detail="Workflow not initialized",
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request.",
         )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
 
-    session_id = getattr(request, "session_id", None)
+async def _admitted_chat(
+    request: ChatRequest, run_key: str | None, deadline: Deadline
+) -> ChatResponse:
+    """Wait for admission, then run the workflow in a threadpool thread.
+
+    Raises:
+        HTTPException: If the request is not admitted (429 or 503) or
+            execution fails (500).
+    """
+    ticket = await _admit(request.priority, deadline)
+    with ticket or nullcontext():
+        return await run_in_threadpool(_run_chat, request, run_key, deadline)
+
+
+def _run_chat(
+    request: ChatRequest, run_key: str | None, deadline: Deadline
+) -> ChatResponse:
+    """Run the workflow for a chat request and build its response.
+
+    Args:
+        request: The chat request.
+        run_key: Checkpoint key under which an interrupted run resumes.
+            Only requests with an ``Idempotency-Key`` are checkpointed.
+        deadline: The request's deadline.
+
+    Returns:
+        The assistant's response.
+
+    Raises:
+        HTTPException: If execution fails (500).
+    """
+    session_id = request.session_id
+    session = _load_session(session_id)
 
     with traced_chat(request.message, session_id=session_id) as trace_meta:
         try:
-            logger.info(f"Processing chat request: {request.message[:50]}...")
+            logger.debug("Processing chat request: %s", request.message)
 
-            result = workflow.invoke(request.message)
+            result = workflow.invoke(
+                request.message,
+                deadline=deadline,
+                session=session,
+                run_key=run_key,
+            )
 
             final_response = result.get("final_response")
             if not final_response:
                 raise RuntimeError("Workflow did not produce a response")
 
+            _save_session(session, request.message, result)
+
             route = result.get("route")
             constraints = result.get("constraints")
 
             _enrich_trace_metadata(trace_meta, result)
+            set_span_attributes({
+                "chat.route": route,
+                "chat.retry_count": result.get("retry_count", 0),
+                "chat.session_id": session_id,
+            })
 
-            route_value = None
-            if route in ("movies", "rag", "hybrid"):
-                route_value = route
-            elif route == "clarification":
-                route_value = "movies"
-            elif route == "system":
-                route_value = "rag"
+            route_value = to_public_route(route)
 
-            debug_info = _build_debug_info(result)
+            debug_info = build_debug_info(result)
 
-            logger.info(f"Chat response generated successfully ({len(final_response)} chars)")
+            logger.debug("Chat response generated (%d chars)", len(final_response))
 
             return ChatResponse(
                 reply=final_response,
@@ -175,10 +572,122 @@ def chat(request: ChatRequest) -> ChatResponse:
             )
 
         except Exception as e:
-            logger.error(f"Chat processing failed: {e}")
+            logger.error("Chat processing failed: %s", e)
             trace_meta["error"] = str(e)
             raise HTTPException(
                 status_code=500,
                 detail="Failed to generate response. Please try again later.",
             )
 
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """Process a chat message with optimistic stream-then-verify output.
+
+    Returns newline-delimited JSON :class:`StreamEvent` objects. For the
+    movies route, recommendation text is streamed as ``token`` events
+    while the evaluator judges the completed draft; if it fails, a
+    ``retracted`` event tells the client to discard the shown text before
+    the retry is streamed. Every successful stream ends with a ``final``
+    event carrying the verified reply.
+
+    Args:
+        request: The chat request containing the user message.
+
+    Returns:
+        A streaming NDJSON response.
+
+    Raises:
+        HTTPException: If workflow is not initialized (500) or could not
+            be built (503), or the request is not admitted (429 or 503).
+    """
+    await run_in_threadpool(_ensure_workflow)
+    deadline = Deadline.after(deadline_seconds)
+    ticket = await _admit(request.priority, deadline)
+
+    logger.debug("Processing streaming chat request: %s", request.message)
+    events = workflow.stream(request.message, deadline=deadline)
+    return _streaming_response(_ndjson_events(events), ticket)
+
+
+@router.post("/chat/batch")
+async def chat_batch(request: ChatBatchRequest) -> StreamingResponse:
+    """Process many independent chat messages in one request.
+
+    Messages run through the workflow with bounded concurrency and share
+    identical sub-queries (see :meth:`MovieNightWorkflow.batch`). Results
+    are returned as NDJSON :class:`ChatBatchItem` lines in completion
+    order; a failed message yields an item with ``error`` set and does not
+    affect the others. Under admission control, the batch is admitted at
+    ``batch`` priority and holds one slot per concurrent message.
+
+    Args:
+        request: The messages and optional concurrency.
+
+    Returns:
+        A streaming NDJSON response with one line per message.
+
+    Raises:
+        HTTPException: If workflow is not initialized (500) or could not
+            be built (503), the batch has too many messages (422), or it is
+            not admitted (429 or 503).
+    """
+    await run_in_threadpool(_ensure_workflow)
+    if len(request.messages) > max_batch_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A batch can contain at most {max_batch_items} messages.",
+        )
+
+    concurrency = min(
+        request.max_concurrency or max_batch_concurrency, max_batch_concurrency
+    )
+    if admission is not None:
+        concurrency = min(concurrency, admission.max_concurrency)
+    ticket = await _admit("batch", None, slots=concurrency)
+    logger.debug(
+        "Processing chat batch: %d messages, concurrency=%d",
+        len(request.messages), concurrency,
+    )
+    results = workflow.batch(
+        request.messages,
+        max_concurrency=concurrency,
+        deadline_seconds=deadline_seconds,
+    )
+    return _streaming_response(_ndjson_batch_items(results), ticket)
+
+
+def _ndjson_batch_items(results: Iterator[tuple[int, Any]]) -> Iterator[str]:
+    """Serialize batch results as NDJSON lines."""
+    for index, result in results:
+        yield _batch_item(index, result).model_dump_json(exclude_none=True) + "\n"
+
+
+def _batch_item(index: int, result: dict | Exception) -> ChatBatchItem:
+    """Convert a batch result into its NDJSON item."""
+    if isinstance(result, Exception) or not result.get("final_response"):
+        return ChatBatchItem(
+            index=index,
+            error="Failed to generate response. Please try again later.",
+        )
+    return ChatBatchItem(
+        index=index,
+        reply=result["final_response"],
+        route=to_public_route(result.get("route")),
+        extracted_constraints=result.get("constraints"),
+        debug=build_debug_info(result),
+    )
+
+
+def _ndjson_events(events: Iterator[StreamEvent]) -> Iterator[str]:
+    """Serialize stream events as NDJSON, converting failures to an error event."""
+    try:
+        for event in events:
+            yield event.model_dump_json(exclude_none=True) + "\n"
+    except Exception as e:
+        logger.error("Streaming chat processing failed: %s", e)
+        error = StreamEvent(
+            event="error",
+            reason="Failed to generate response. Please try again later.",
+        )
+        yield error.model_dump_json(exclude_none=True) + "\n"
@@ -0,0 +1,312 @@
+"""Offline batch runner for the Movie Night Assistant.
+
+Reads prompts from a JSONL file, runs them through
+:class:`MovieNightWorkflow` on a worker pool and appends one JSON result per
+line to an output file as each prompt completes. Each result carries the
+reply, route, constraints, :class:`DebugInfo` and timings, or an error.
+
+The output file doubles as the progress checkpoint: when a run is
+interrupted and started again with the same output, prompts that already
+have a successful result are skipped and failed ones are retried.
+
+Input lines are JSON objects with the prompt in ``message``, ``prompt`` or
+``body`` and an optional ``id`` or ``request_id`` (defaulting to the line
+number), so files such as the repository's ``requests.jsonl`` can be used
+as-is.
+
+Usage (from ``api/``)::
+
+    python -m app.batch prompts.jsonl --output results.jsonl \\
+        [--concurrency 4] [--rate 2] [--deadline 45] [--stub]
+
+With ``--stub`` the workflow uses stub agents and makes no LLM or TMDB
+calls, which is useful for load-testing the non-LLM parts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TextIO
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from pydantic import BaseModel, Field
+
+from app.agents import MoviesResponder, SystemResponder
+from app.llm.evaluator_agent import StubEvaluatorAgent
+from app.llm.input_agent import StubInputOrchestratorAgent
+from app.llm.movie_finder_agent import StubMovieFinderAgent
+from app.llm.rag_agent import StubRAGAssistantAgent
+from app.llm.recommendation_agent import StubRecommendationWriterAgent
+from app.llm.workflow import MovieNightWorkflow, build_debug_info, to_public_route
+from app.rag.retriever import get_shared_retriever
+from app.resilience import BatchMemo, Deadline, RateLimiter, batch_memo_scope
+from app.schemas import Constraints, DebugInfo
+
+logger = logging.getLogger(__name__)
+
+PROMPT_FIELDS = ("message", "prompt", "body")
+ID_FIELDS = ("id", "request_id")
+
+
+class BatchPrompt(BaseModel):
+    """A prompt read from the input file."""
+
+    id: str
+    message: str
+
+
+class BatchRecord(BaseModel):
+    """A result line written to the output file."""
+
+    id: str = Field(..., description="Prompt identifier")
+    message: str = Field(..., description="The prompt")
+    reply: str | None = Field(default=None, description="Assistant's response")
+    route: str | None = Field(default=None, description="Public route")
+    extracted_constraints: Constraints | None = Field(default=None)
+    debug: DebugInfo | None = Field(default=None)
+    timings: dict[str, float] = Field(
+        default_factory=dict,
+        description="queued_seconds, rate_limited_seconds and elapsed_seconds",
+    )
+    error: str | None = Field(default=None, description="Why the prompt failed")
+
+
+def read_prompts(path: Path) -> list[BatchPrompt]:
+    """Read prompts from a JSONL file.
+
+    Args:
+        path: Input file; blank lines are skipped.
+
+    Returns:
+        The prompts in file order.
+
+    Raises:
+        ValueError: If a line is not a JSON object with a prompt field.
+    """
+    prompts = []
+    with path.open(encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            message = next((data[k] for k in PROMPT_FIELDS if data.get(k)), None)
+            if not isinstance(message, str):
+                raise ValueError(
+                    f"{path}:{line_number}: expected one of {', '.join(PROMPT_FIELDS)}"
+                )
+            prompt_id = next((data[k] for k in ID_FIELDS if data.get(k)), line_number)
+            prompts.append(BatchPrompt(id=str(prompt_id), message=message))
+    return prompts
+
+
+def completed_ids(path: Path) -> set[str]:
+    """IDs that already have a successful result in the output file."""
+    if not path.exists():
+        return set()
+    done = set()
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("reply") and not record.get("error"):
+                done.add(str(record["id"]))
+    return done
+
+
+def _ends_mid_line(path: Path) -> bool:
+    """Whether an interrupted run left a partial last line in ``path``."""
+    if not path.exists() or path.stat().st_size == 0:
+        return False
+    with path.open("rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) != b"\n"
+
+
+def create_stub_workflow() -> MovieNightWorkflow:
+    """Create a workflow whose agents make no LLM or TMDB calls."""
+    responder_llm = FakeListChatModel(responses=["(stub response)"])
+    return MovieNightWorkflow(
+        orchestrator=None,
+        movies_responder=MoviesResponder(responder_llm),
+        system_responder=SystemResponder(responder_llm),
+        input_agent=StubInputOrchestratorAgent(),
+        movie_finder=StubMovieFinderAgent(),
+        recommendation_writer=StubRecommendationWriterAgent(),
+        evaluator=StubEvaluatorAgent(),
+        rag_retriever=get_shared_retriever(),
+        rag_agent=StubRAGAssistantAgent(),
+    )
+
+
+class BatchRunner:
+    """Runs prompts through the workflow and streams results to a file."""
+
+    def __init__(
+        self,
+        workflow: MovieNightWorkflow,
+        concurrency: int = 4,
+        rate_limiter: RateLimiter | None = None,
+        deadline_seconds: float | None = None,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            workflow: The workflow to run prompts through.
+            concurrency: Number of prompts processed at once.
+            rate_limiter: Optional limit on how often prompts start.
+            deadline_seconds: Optional time budget per prompt.
+        """
+        self.workflow = workflow
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = rate_limiter
+        self.deadline_seconds = deadline_seconds
+        self._memo = BatchMemo()
+
+    def run(self, prompts: Iterable[BatchPrompt]) -> Iterator[BatchRecord]:
+        """Process prompts, yielding records in completion order."""
+        submitted_at = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="batch-cli"
+        ) as pool:
+            futures = [
+                pool.submit(self._run_one, prompt, submitted_at) for prompt in prompts
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _run_one(self, prompt: BatchPrompt, submitted_at: float) -> BatchRecord:
+        queued = time.perf_counter() - submitted_at
+        limited = self.rate_limiter.acquire() if self.rate_limiter else 0.0
+        start = time.perf_counter()
+        deadline = (
+            Deadline.after(self.deadline_seconds) if self.deadline_seconds else None
+        )
+        record = BatchRecord(id=prompt.id, message=prompt.message)
+        try:
+            with batch_memo_scope(self._memo):
+                result = self.workflow.invoke(prompt.message, deadline=deadline)
+            if not result.get("final_response"):
+                raise RuntimeError("Workflow did not produce a response")
+            record.reply = result["final_response"]
+            record.route = to_public_route(result.get("route"))
+            record.extracted_constraints = result.get("constraints")
+            record.debug = build_debug_info(result)
+        except Exception as e:
+            logger.warning("Prompt %s failed: %s", prompt.id, e)
+            record.error = str(e) or type(e).__name__
+        record.timings = {
+            "queued_seconds": round(queued, 4),
+            "rate_limited_seconds": round(limited, 4),
+            "elapsed_seconds": round(time.perf_counter() - start, 4),
+        }
+        return record
+
+
+def write_records(records: Iterable[BatchRecord], out: TextIO) -> dict[str, int]:
+    """Append records to ``out``, flushing each line.
+
+    Returns:
+        Counts of ``succeeded`` and ``failed`` records.
+    """
+    counts = {"succeeded": 0, "failed": 0}
+    for record in records:
+        out.write(record.model_dump_json(exclude_none=True) + "\n")
+        out.flush()
+        counts["failed" if record.error else "succeeded"] += 1
+        total = counts["succeeded"] + counts["failed"]
+        logger.info("[%d] %s: %s", total, record.id, "error" if record.error else "ok")
+    return counts
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch",
+        description="Run JSONL prompts through the Movie Night workflow.",
+    )
+    parser.add_argument("input", type=Path, help="JSONL file with prompts")
+    parser.add_argument(
+        "--output", "-o", type=Path, required=True, help="JSONL file for results"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Prompts processed at once"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Maximum prompts started per second (0 for no limit)",
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None, help="Time budget per prompt in seconds"
+    )
+    parser.add_argument(
+        "--stub", action="store_true", help="Use stub agents (no LLM or TMDB calls)"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore existing results and overwrite the output file",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the batch CLI.
+
+    Returns:
+        0 if every prompt succeeded, 1 otherwise.
+    """
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    prompts = read_prompts(args.input)
+    done = set() if args.restart else completed_ids(args.output)
+    pending = [p for p in prompts if p.id not in done]
+    logger.info(
+        "%d prompts, %d already completed, %d to run",
+        len(prompts), len(done), len(pending),
+    )
+
+    if args.stub:
+        workflow = create_stub_workflow()
+    else:
+        from app.factory import create_workflow
+        from app.settings import get_settings
+
+        workflow = create_workflow(get_settings())
+
+    runner = BatchRunner(
+        workflow,
+        concurrency=args.concurrency,
+        rate_limiter=RateLimiter(args.rate, burst=args.concurrency)
+        if args.rate > 0
+        else None,
+        deadline_seconds=args.deadline,
+    )
+    mode = "w" if args.restart else "a"
+    with args.output.open(mode, encoding="utf-8") as out:
+        if mode == "a" and _ends_mid_line(args.output):
+            out.write("\n")
+        counts = write_records(runner.run(pending), out)
+
+    logger.info(
+        "Batch finished: %d succeeded, %d failed",
+        counts["succeeded"], counts["failed"],
+    )
+    return 0 if counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""Caches shared by the worker processes of a multi-worker deployment.
+
+This module provides a SQLite-backed cache that TMDB and LLM responses are
+stored in so every gunicorn worker on a host benefits from the others'
+upstream calls, and where workers record their memory use and cache hit
+counts for the ``/workers`` endpoint.
+"""
+
+from app.cache.store import SHARED_CACHE_LOOKUPS, SharedCache
+
+__all__ = [
+    "SHARED_CACHE_LOOKUPS",
+    "SharedCache",
+]
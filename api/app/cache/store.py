@@ -0,0 +1,162 @@
+"""Cache shared by the worker processes on one host.
+
+With several gunicorn workers, process-local caches are duplicated and
+cold in every worker. :class:`SharedCache` keeps cached values in one
+SQLite file in WAL mode, so all workers read each other's entries and a
+writer does not block readers. Every operation opens its own connection,
+so an instance created before workers fork remains safe to use in them.
+
+The same file holds a small table where each worker periodically records
+its resident memory and cache hit counts (see
+:class:`app.observability.process.WorkerReporter`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from typing import Any
+
+from app.observability.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_LOOKUPS = Counter(
+    "shared_cache_lookups_total",
+    "Shared cache lookups by namespace and whether they hit",
+    ["namespace", "result"],
+)
+SHARED_CACHE_HIT_RATIO = Gauge(
+    "shared_cache_hit_ratio",
+    "Fraction of this process's shared cache lookups that hit",
+    ["namespace"],
+)
+
+
+class SharedCache:
+    """JSON values with a TTL, keyed by namespace and key, in a SQLite file."""
+
+    _PURGE_EVERY = 500
+
+    def __init__(self, path: str, ttl_seconds: float = 3600.0) -> None:
+        """Initialize the cache, creating its tables if needed.
+
+        Args:
+            path: Database file path (``":memory:"`` is not supported since
+                every operation opens its own connection).
+            ttl_seconds: Entries older than this are treated as missing.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+        self._counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "pid INTEGER PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and is closed afterwards."""
+        with closing(sqlite3.connect(self.path, timeout=5.0)) as conn, conn:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        """Return the cached value, or None if missing or expired."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value FROM cache "
+                    "WHERE namespace = ? AND key = ? AND stored_at >= ?",
+                    (namespace, key, time.time() - self.ttl_seconds),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            row = None
+        self._count(namespace, "hit" if row is not None else "miss")
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """Store a JSON-serializable value, replacing any previous one."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, stored_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), time.time()),
+                )
+                with self._lock:
+                    self._writes += 1
+                    purge = self._writes % self._PURGE_EVERY == 0
+                if purge:
+                    conn.execute(
+                        "DELETE FROM cache WHERE stored_at < ?",
+                        (time.time() - self.ttl_seconds,),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write failed: {e}")
+
+    def clear(self, namespace: str | None = None) -> None:
+        """Remove all entries, or those of one namespace."""
+        with self._connect() as conn:
+            if namespace is None:
+                conn.execute("DELETE FROM cache")
+            else:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Hits and misses of this process's lookups, by namespace."""
+        with self._lock:
+            return {namespace: dict(counts) for namespace, counts in self._counts.items()}
+
+    def record_worker(self, pid: int, data: dict[str, Any]) -> None:
+        """Store a worker's latest report, replacing its previous one."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (pid, data, updated_at) VALUES (?, ?, ?)",
+                (pid, json.dumps(data), time.time()),
+            )
+
+    def workers(self, max_age_seconds: float) -> list[dict[str, Any]]:
+        """Reports of workers seen within ``max_age_seconds``, by pid.
+
+        Reports of workers that stopped reporting are deleted.
+        """
+        cutoff = time.time() - max_age_seconds
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE updated_at < ?", (cutoff,))
+            rows = conn.execute(
+                "SELECT pid, data, updated_at FROM workers ORDER BY pid"
+            ).fetchall()
+        return [
+            {"pid": pid, **json.loads(data), "updated_at": updated_at}
+            for pid, data, updated_at in rows
+        ]
+
+    def _count(self, namespace: str, result: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(namespace, {"hits": 0, "misses": 0})
+            counts["hits" if result == "hit" else "misses"] += 1
+        SHARED_CACHE_LOOKUPS.labels(namespace=namespace, result=result).inc()
+        hits = SHARED_CACHE_LOOKUPS.labels(namespace=namespace, result="hit").value
+        misses = SHARED_CACHE_LOOKUPS.labels(namespace=namespace, result="miss").value
+        SHARED_CACHE_HIT_RATIO.labels(namespace=namespace).set(hits / (hits + misses))
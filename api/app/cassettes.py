@@ -0,0 +1,295 @@
+"""Record and replay of LLM and TMDB calls.
+
+A :class:`Cassette` sits between the application and its upstreams: the
+chat models from :func:`app.llm.create_chat_model` and the HTTP requests of
+:class:`app.integrations.tmdb_client.TMDBClient`.
+
+- In ``record`` mode calls go upstream as usual and every response is
+  appended to the cassette file with the time it took.
+- In ``replay`` mode no call leaves the process. The response recorded for
+  an identical request is returned after the recorded time multiplied by
+  ``time_scale``: 1 replays at recorded speed, 0.1 ten times faster and 0
+  instantly. A request that was never recorded raises
+  :class:`CassetteMissError`.
+
+Production slowness can thus be captured once (``CASSETTE_MODE=record``)
+and replayed offline by tests and benchmarks, deterministically and with
+no network.
+
+Cassettes are JSON lines, gzip-compressed when the path ends in ``.gz``,
+one interaction per line::
+
+    {"kind": "tmdb", "key": "9f2c...", "seconds": 0.084,
+     "request": {"endpoint": "/movie/603", "params": {}}, "response": {...}}
+
+Streamed completions store ``chunks``, each with its offset in seconds
+from the start of the stream, instead of a ``response``; recorded
+failures store an ``error``. A request recorded several times is
+replayed in recorded order, starting over once all were used.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, Any, TypeVar
+
+T = TypeVar("T")
+
+
+class CassetteMissError(LookupError):
+    """Raised when a replayed request was never recorded."""
+
+
+def request_key(*parts: Any) -> str:
+    """Digest identifying a request by the parts that determine its response."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+@dataclass
+class Interaction:
+    """One recorded call.
+
+    Attributes:
+        kind: The upstream, ``llm`` or ``tmdb``.
+        key: Digest of the request, see :func:`request_key`.
+        seconds: Time the call took.
+        request: Short description of the request, for people reading the
+            cassette and for miss errors.
+        response: The encoded response.
+        chunks: For streamed calls, ``[offset_seconds, chunk]`` pairs.
+        error: Message of the exception the call raised.
+    """
+
+    kind: str
+    key: str
+    seconds: float
+    request: dict[str, Any] | None = None
+    response: Any = None
+    chunks: list[list[Any]] | None = None
+    error: str | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {k: v for k, v in asdict(self).items() if v is not None},
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+class Cassette:
+    """Recorded request/response pairs of LLM and TMDB calls.
+
+    A replaying cassette is loaded once; a recording cassette starts a new
+    file and appends each interaction as soon as it is complete, so a
+    recording survives the process being killed. Record with a single
+    worker process: workers would write over each other.
+
+    Args:
+        path: Cassette file (``.jsonl`` or ``.jsonl.gz``).
+        mode: ``record`` or ``replay``.
+        time_scale: Factor applied to recorded times when replaying.
+        sleep: Function used to wait out replayed times (for tests).
+
+    Raises:
+        ValueError: For an unknown mode or a negative time scale.
+        FileNotFoundError: When replaying a file that does not exist.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "replay",
+        time_scale: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected record or replay)")
+        if time_scale < 0:
+            raise ValueError("Cassette time scale must not be negative")
+        self.path = Path(path)
+        self.mode = mode
+        self.time_scale = time_scale
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._interactions: dict[tuple[str, str], list[Interaction]] = {}
+        self._cursors: dict[tuple[str, str], int] = {}
+        if mode == "replay":
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            _open(self.path, "w").close()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def __len__(self) -> int:
+        return sum(len(recorded) for recorded in self._interactions.values())
+
+    def _load(self) -> None:
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    interaction = Interaction(**json.loads(line))
+                    key = (interaction.kind, interaction.key)
+                    self._interactions.setdefault(key, []).append(interaction)
+
+    def _record(self, interaction: Interaction) -> None:
+        with self._lock:
+            key = (interaction.kind, interaction.key)
+            self._interactions.setdefault(key, []).append(interaction)
+            with _open(self.path, "a") as f:
+                f.write(interaction.to_json() + "\n")
+
+    def _next(self, kind: str, key: str, request: dict[str, Any] | None) -> Interaction:
+        with self._lock:
+            recorded = self._interactions.get((kind, key))
+            if not recorded:
+                raise CassetteMissError(
+                    f"No recorded {kind} call for {json.dumps(request, default=str)} "
+                    f"(key {key}) in {self.path}"
+                )
+            cursor = self._cursors.get((kind, key), 0)
+            self._cursors[(kind, key)] = cursor + 1
+            return recorded[cursor % len(recorded)]
+
+    def _delay(self, seconds: float) -> float:
+        return max(0.0, seconds * self.time_scale)
+
+    def _replayed(self, interaction: Interaction, decode: Callable[[Any], T] | None,
+                  error_type: type[Exception] | None) -> T:
+        if interaction.error is not None:
+            raise (error_type or RuntimeError)(interaction.error)
+        return decode(interaction.response) if decode else interaction.response
+
+    def play(
+        self,
+        kind: str,
+        key: str,
+        call: Callable[[], T],
+        request: dict[str, Any] | None = None,
+        encode: Callable[[T], Any] | None = None,
+        decode: Callable[[Any], T] | None = None,
+        error_type: type[Exception] | None = None,
+    ) -> T:
+        """Make a call and record it, or replay its recorded response.
+
+        Args:
+            kind: The upstream, ``llm`` or ``tmdb``.
+            key: Digest of the request.
+            call: Makes the call upstream; only used when recording.
+            request: Short description of the request.
+            encode: Converts the response to JSON-compatible data.
+            decode: Converts recorded data back into a response.
+            error_type: Exceptions of this type are recorded and raised
+                again, with the same message, when replayed.
+
+        Returns:
+            The response.
+
+        Raises:
+            CassetteMissError: When replaying a request never recorded.
+        """
+        if self.replaying:
+            interaction = self._next(kind, key, request)
+            delay = self._delay(interaction.seconds)
+            if delay:
+                self._sleep(delay)
+            return self._replayed(interaction, decode, error_type)
+
+        started = time.perf_counter()
+        try:
+            response = call()
+        except Exception as e:
+            if error_type is not None and isinstance(e, error_type):
+                self._record(Interaction(
+                    kind, key, round(time.perf_counter() - started, 4), request, error=str(e)
+                ))
+            raise
+        self._record(Interaction(
+            kind, key, round(time.perf_counter() - started, 4), request,
+            response=encode(response) if encode else response,
+        ))
+        return response
+
+    async def aplay(
+        self,
+        kind: str,
+        key: str,
+        call: Callable[[], Awaitable[T]],
+        request: dict[str, Any] | None = None,
+        encode: Callable[[T], Any] | None = None,
+        decode: Callable[[Any], T] | None = None,
+    ) -> T:
+        """Async variant of :meth:`play`; failures are not recorded."""
+        if self.replaying:
+            interaction = self._next(kind, key, request)
+            delay = self._delay(interaction.seconds)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._replayed(interaction, decode, None)
+
+        started = time.perf_counter()
+        response = await call()
+        self._record(Interaction(
+            kind, key, round(time.perf_counter() - started, 4), request,
+            response=encode(response) if encode else response,
+        ))
+        return response
+
+    def stream(
+        self,
+        kind: str,
+        key: str,
+        call: Callable[[], Iterator[T]],
+        request: dict[str, Any] | None = None,
+        encode: Callable[[T], Any] | None = None,
+        decode: Callable[[Any], T] | None = None,
+    ) -> Iterator[T]:
+        """Stream a call and record its chunks, or replay them.
+
+        Replayed chunks arrive at their recorded offsets, scaled by
+        ``time_scale``. Streams that fail or are not read to the end are
+        not recorded.
+
+        Yields:
+            The response chunks.
+        """
+        if self.replaying:
+            interaction = self._next(kind, key, request)
+            started = time.perf_counter()
+            for offset, chunk in interaction.chunks or []:
+                delay = self._delay(offset) - (time.perf_counter() - started)
+                if delay > 0:
+                    self._sleep(delay)
+                yield decode(chunk) if decode else chunk
+            return
+
+        started = time.perf_counter()
+        chunks = []
+        for chunk in call():
+            chunks.append([
+                round(time.perf_counter() - started, 4),
+                encode(chunk) if encode else chunk,
+            ])
+            yield chunk
+        self._record(Interaction(
+            kind, key, round(time.perf_counter() - started, 4), request, chunks=chunks
+        ))
+
@@ -0,0 +1,284 @@
+"""Construction of the workflow and its agents from settings.
+
+Importing this module pulls in langchain, langgraph and the Azure OpenAI
+SDK, so :mod:`app.main` only imports it when the workflow is first built
+(see :class:`app.api.readiness.WorkflowLoader`).
+"""
+
+import logging
+from collections.abc import Callable
+
+from langchain_openai import AzureChatOpenAI
+
+from app.agents import MoviesResponder, SystemResponder
+from app.cache import SharedCache
+from app.cassettes import Cassette
+from app.integrations.tmdb_client import TMDBClient
+from app.llm import StubMovieFinderAgent, TMDBMovieFinderAgent, create_chat_model
+from app.llm.evaluator_agent import LLMEvaluatorAgent
+from app.llm.input_agent import InputOrchestratorAgent
+from app.llm.movie_finder_agent import MovieFinderAgent
+from app.llm.prompt_budget import PromptBudget, budget_for_agent
+from app.llm.rag_agent import LLMRAGAssistantAgent
+from app.llm.recommendation_agent import LLMRecommendationWriterAgent
+from app.llm.tiering import EscalationPolicy
+from app.llm.workflow import MovieNightWorkflow
+from app.llm.workflow.checkpointing import create_checkpointer
+from app.rag.retriever import get_shared_retriever
+from app.resilience.hedging import DEFAULT_HEDGE_WORKERS, set_hedge_workers
+from app.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+_tmdb_client: TMDBClient | None = None
+
+
+def create_cassette(settings: Settings) -> Cassette | None:
+    """Create the cassette LLM and TMDB calls are recorded to or replayed from.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The cassette, or None when ``settings.cassette_mode`` is ``off``.
+    """
+    mode = settings.cassette_mode.lower()
+    if mode == "off":
+        return None
+    action = "recorded to" if mode == "record" else "replayed from"
+    logger.warning(
+        f"Cassette {mode} mode: LLM and TMDB calls are {action} {settings.cassette_path}"
+    )
+    return Cassette(settings.cassette_path, mode, settings.cassette_time_scale)
+
+
+def create_movie_finder(
+    settings: Settings,
+    cache: SharedCache | None = None,
+    cassette: Cassette | None = None,
+) -> MovieFinderAgent:
+    """Create the appropriate movie finder based on settings.
+
+    Args:
+        settings: Application settings.
+        cache: Optional cache of TMDB responses shared by all workers.
+        cassette: Optional cassette TMDB requests are recorded to or
+            replayed from.
+
+    Returns:
+        MovieFinderAgent instance (TMDB or Stub).
+    """
+    global _tmdb_client
+    mode = settings.movie_finder_mode.lower()
+
+    if mode == "stub":
+        logger.info("Using StubMovieFinderAgent (explicit config)")
+        return StubMovieFinderAgent()
+
+    if mode == "tmdb" or (mode == "auto" and settings.tmdb_api_key):
+        if not settings.tmdb_api_key:
+            logger.warning("TMDB mode requested but no API key; falling back to stub")
+            return StubMovieFinderAgent()
+
+        logger.info("Using TMDBMovieFinderAgent")
+        _tmdb_client = TMDBClient(
+            api_key=settings.tmdb_api_key,
+            coalesce=settings.upstream_coalescing,
+            cache=cache,
+            base_url=settings.tmdb_base_url,
+            cassette=cassette,
+        )
+        return TMDBMovieFinderAgent(_tmdb_client)
+
+    logger.info("Using StubMovieFinderAgent (no TMDB key)")
+    return StubMovieFinderAgent()
+
+
+def create_prompt_budget(settings: Settings, agent: str) -> PromptBudget:
+    """Create the prompt token budget for an agent from settings.
+
+    Args:
+        settings: Application settings.
+        agent: Agent name (writer, evaluator or rag).
+
+    Returns:
+        The agent's PromptBudget.
+    """
+    return budget_for_agent(
+        agent,
+        budgets=settings.prompt_token_budgets,
+        overview_tokens=settings.prompt_overview_tokens,
+        context_tokens=settings.prompt_context_tokens,
+        tokenizer=settings.prompt_tokenizer,
+    )
+
+
+def create_escalation_model(
+    settings: Settings,
+    agent: str,
+    temperature: float,
+    cassette: Cassette | None = None,
+) -> AzureChatOpenAI | None:
+    """Create the large model a tiered agent escalates to.
+
+    Escalation is only enabled for agents configured with their own
+    deployment (see ``AGENT_MODELS``) that differs from the escalation
+    deployment.
+
+    Args:
+        settings: Application settings.
+        agent: Agent name.
+        temperature: Temperature for the escalation model.
+        cassette: Optional cassette completions are recorded to or
+            replayed from.
+
+    Returns:
+        The escalation model, or None when the agent is not tiered.
+    """
+    escalation = settings.escalation_deployment or settings.azure_openai_deployment
+    configured = settings.model_for_agent(agent).deployment
+    if configured is None or configured == escalation:
+        return None
+    logger.info(f"Agent '{agent}' uses {configured}, escalating to {escalation}")
+    return create_chat_model(
+        settings,
+        temperature=temperature,
+        agent=agent,
+        deployment=escalation,
+        cassette=cassette,
+    )
+
+
+def create_escalation_policy(settings: Settings) -> EscalationPolicy:
+    """Create the escalation thresholds from settings."""
+    return EscalationPolicy(
+        input_confidence=settings.input_escalation_confidence,
+        uncertainty_band=settings.evaluator_uncertainty_band,
+    )
+
+
+def configure_hedging(settings: Settings) -> None:
+    """Size the hedging thread pool from settings.
+
+    A hedged call holds a thread for the first request and another for its
+    duplicate, so unless ``settings.llm_hedge_max_workers`` is set the pool
+    allows two per request that admission control lets run at once.
+    """
+    workers = settings.llm_hedge_max_workers
+    if workers is None:
+        concurrency = settings.admission_max_concurrency
+        workers = 2 * concurrency if concurrency else DEFAULT_HEDGE_WORKERS
+    set_hedge_workers(workers)
+
+
+def cleanup_tmdb_client() -> None:
+    """Close the TMDB client if it exists."""
+    global _tmdb_client
+    if _tmdb_client is not None:
+        _tmdb_client.close()
+        _tmdb_client = None
+        logger.info("TMDB client closed")
+
+
+def create_workflow(
+    settings: Settings,
+    progress: Callable[[str], None] | None = None,
+    cache: SharedCache | None = None,
+) -> MovieNightWorkflow:
+    """Create the full workflow with LLM-backed agents from settings.
+
+    The RAG index is the process-wide one (see
+    :func:`app.rag.retriever.get_shared_retriever`), so it is only built
+    here if the server did not preload it.
+
+    Args:
+        settings: Application settings.
+        progress: Optional callback told the name of each completed step
+            (``chat_models``, ``agents``, ``rag_index``, ``graph``).
+        cache: Optional cache shared by all workers. TMDB responses are
+            always cached in it; temperature-0 LLM completions only when
+            ``settings.llm_response_cache`` is enabled. LLM and TMDB calls
+            are recorded or replayed when ``settings.cassette_mode`` says so.
+
+    Returns:
+        The configured MovieNightWorkflow.
+    """
+    report = progress or (lambda step: None)
+    response_cache = cache if settings.llm_response_cache else None
+    if settings.llm_hedging:
+        configure_hedging(settings)
+    cassette = create_cassette(settings)
+
+    llm = create_chat_model(settings, agent="responder", cassette=cassette)
+    input_agent_llm = create_chat_model(
+        settings,
+        temperature=0.0,
+        agent="input",
+        response_cache=response_cache,
+        cassette=cassette,
+    )
+    writer_llm = create_chat_model(
+        settings, temperature=0.3, agent="writer", cassette=cassette
+    )
+    evaluator_llm = create_chat_model(
+        settings,
+        temperature=0.0,
+        agent="evaluator",
+        response_cache=response_cache,
+        cassette=cassette,
+    )
+    rag_llm = create_chat_model(settings, temperature=0.3, agent="rag", cassette=cassette)
+    report("chat_models")
+
+    policy = create_escalation_policy(settings)
+    input_agent = InputOrchestratorAgent(
+        input_agent_llm,
+        escalation_llm=create_escalation_model(settings, "input", 0.0, cassette),
+        policy=policy,
+    )
+    movies_responder = MoviesResponder(llm)
+    system_responder = SystemResponder(llm)
+    movie_finder = create_movie_finder(settings, cache=cache, cassette=cassette)
+    recommendation_writer = LLMRecommendationWriterAgent(
+        writer_llm, budget=create_prompt_budget(settings, "writer")
+    )
+    evaluator = LLMEvaluatorAgent(
+        evaluator_llm,
+        budget=create_prompt_budget(settings, "evaluator"),
+        escalation_llm=create_escalation_model(settings, "evaluator", 0.0, cassette),
+        policy=policy,
+    )
+    rag_agent = LLMRAGAssistantAgent(
+        rag_llm, budget=create_prompt_budget(settings, "rag")
+    )
+    report("agents")
+
+    rag_retriever = get_shared_retriever()
+    logger.info(
+        f"RAG retriever initialized with {len(rag_retriever._documents)} documents"
+    )
+    report("rag_index")
+
+    workflow = MovieNightWorkflow(
+        orchestrator=None,
+        movies_responder=movies_responder,
+        system_responder=system_responder,
+        input_agent=input_agent,
+        movie_finder=movie_finder,
+        recommendation_writer=recommendation_writer,
+        evaluator=evaluator,
+        rag_retriever=rag_retriever,
+        rag_agent=rag_agent,
+        checkpointer=create_checkpointer(
+            settings.workflow_checkpointer,
+            path=settings.checkpoint_db_path,
+            ttl_seconds=settings.checkpoint_ttl_seconds,
+        ),
+    )
+    logger.info(
+        f"Movie Assistant workflow initialized successfully "
+        f"(finder: {type(movie_finder).__name__}, RAG: enabled)"
+    )
+    report("graph")
+    return workflow
@@ -5,18 +5,51 @@ handling authentication, request formatting, and response normalization
 to the internal MovieResult model.
 """
 
+import functools
+import json
 import logging
-from typing import Any
+import re
+import time
+from typing import TYPE_CHECKING, Any
 
 import httpx
 
+from app.cassettes import request_key
+from app.observability.metrics import Counter, Histogram
+from app.observability.tracing import set_span_attributes, start_span
+from app.resilience.admission import charge_downstream
+from app.resilience.degradation import observe_upstream_latency
+from app.resilience.memo import memoized
+from app.resilience.singleflight import SingleFlight
 from app.schemas.domain import MovieResult
 
+if TYPE_CHECKING:
+    from app.cache import SharedCache
+    from app.cassettes import Cassette
+
 logger = logging.getLogger(__name__)
 
 TMDB_BASE_URL = "https://api.themoviedb.org/3"
 TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
 
+TMDB_REQUESTS = Counter(
+    "tmdb_requests_total",
+    "HTTP requests sent to TMDB by endpoint and status (HTTP code or error)",
+    ["endpoint", "status"],
+)
+TMDB_LATENCY = Histogram(
+    "tmdb_request_duration_seconds",
+    "Latency of HTTP requests sent to TMDB",
+    ["endpoint"],
+)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _endpoint_label(endpoint: str) -> str:
+    """Endpoint path with numeric IDs replaced, e.g. ``/movie/{id}``."""
+    return _NUMERIC_SEGMENT.sub("/{id}", endpoint)
+
 GENRE_NAME_TO_ID: dict[str, int] = {
     "action": 28,
     "adventure": 12,
@@ -74,18 +107,44 @@ class TMDBClient:
 
     Handles authentication and provides methods for discovering
     and searching movies with constraints.
+
+    Identical GET requests issued concurrently (e.g. many users asking for
+    the same trending actor) share a single HTTP call. With a shared cache,
+    responses are also reused across requests and worker processes. With a
+    cassette, HTTP requests are recorded to it or replayed from it (see
+    :mod:`app.cassettes`).
     """
 
-    def __init__(self, api_key: str, timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = 10.0,
+        coalesce: bool = True,
+        cache: "SharedCache | None" = None,
+        base_url: str = TMDB_BASE_URL,
+        cassette: "Cassette | None" = None,
+    ) -> None:
         """Initialize the TMDB client.
 
         Args:
             api_key: TMDB API key (v3 auth).
             timeout: Request timeout in seconds.
+            coalesce: Whether concurrent identical requests share one call.
+            cache: Optional cache of responses shared by all workers.
+            base_url: API root URL. Benchmarks and load tests point it at a
+                local stand-in server.
+            cassette: Optional cassette HTTP requests are recorded to or
+                replayed from. Failed requests are recorded too.
         """
         self._api_key = api_key
+        self._base_url = base_url.rstrip("/")
         self._timeout = timeout
+        self._cache = cache
+        self._cassette = cassette
         self._client = httpx.Client(timeout=timeout)
+        self._inflight: SingleFlight[dict] | None = (
+            SingleFlight(name="tmdb") if coalesce else None
+        )
 
     def close(self) -> None:
         """Close the HTTP client."""
@@ -100,6 +159,17 @@ class TMDBClient:
     def _get(self, endpoint: str, params: dict[str, Any] | None = None) -> dict:
         """Make a GET request to the TMDB API.
 
+        If the same request is already in flight, waits for it and returns
+        its response instead. The response is shared, so callers must not
+        modify it. Within a batch (see :mod:`app.resilience.memo`), each
+        distinct request is made only once. With a shared cache, a response
+        fetched by any worker is reused until it expires.
+
+        Each call is traced as a client span with the endpoint, the HTTP
+        status and response size, and whether the shared cache had it. A
+        call answered by a concurrent or earlier identical call is marked
+        ``tmdb.shared``.
+
         Args:
             endpoint: API endpoint path (without base URL).
             params: Query parameters.
@@ -110,13 +180,67 @@ class TMDBClient:
         Raises:
             TMDBClientError: If the request fails.
         """
-        url = f"{TMDB_BASE_URL}{endpoint}"
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+        def fetch() -> dict:
+            if self._inflight is None:
+                return self._fetch_cached(key, endpoint, params)
+            data, _ = self._inflight.do(
+                key, lambda: self._fetch_cached(key, endpoint, params)
+            )
+            return data
+
+        label = _endpoint_label(endpoint)
+        with start_span(f"GET {label}", {"tmdb.endpoint": label}, kind="client") as span:
+            data = memoized("tmdb", key, fetch)
+            if "tmdb.cache_hit" not in span.attributes:
+                span.set_attribute("tmdb.shared", True)
+            return data
+
+    def _fetch_cached(
+        self, key: tuple, endpoint: str, params: dict[str, Any] | None
+    ) -> dict:
+        """Return the shared cache's response, fetching and storing it if missing."""
+        if self._cache is None:
+            set_span_attributes({"tmdb.cache_hit": False})
+            return self._fetch(endpoint, params)
+        cache_key = json.dumps(key)
+        data = self._cache.get("tmdb", cache_key)
+        set_span_attributes({"tmdb.cache_hit": data is not None})
+        if data is None:
+            data = self._fetch(endpoint, params)
+            self._cache.set("tmdb", cache_key, data)
+        return data
+
+    def _fetch(self, endpoint: str, params: dict[str, Any] | None = None) -> dict:
+        """Perform the HTTP GET request behind :meth:`_get`, or replay it."""
+        if self._cassette is None:
+            return self._fetch_http(endpoint, params)
+        return self._cassette.play(
+            "tmdb",
+            request_key(endpoint, sorted((k, str(v)) for k, v in (params or {}).items())),
+            functools.partial(self._fetch_http, endpoint, params),
+            request={"endpoint": endpoint, "params": params or {}},
+            error_type=TMDBClientError,
+        )
+
+    def _fetch_http(self, endpoint: str, params: dict[str, Any] | None = None) -> dict:
+        """Send a GET request to TMDB."""
+        url = f"{self._base_url}{endpoint}"
         request_params = {"api_key": self._api_key}
         if params:
             request_params.update(params)
+        charge_downstream("tmdb")
 
+        started = time.perf_counter()
+        status = "error"
         try:
             response = self._client.get(url, params=request_params)
+            status = str(response.status_code)
+            set_span_attributes({
+                "http.response.status_code": response.status_code,
+                "http.response.body.size": len(response.content),
+            })
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
@@ -125,6 +249,12 @@ class TMDBClient:
         except httpx.RequestError as e:
             logger.error(f"TMDB request failed: {e}")
             raise TMDBClientError(f"TMDB request failed: {e}") from e
+        finally:
+            label = _endpoint_label(endpoint)
+            elapsed = time.perf_counter() - started
+            TMDB_REQUESTS.labels(endpoint=label, status=status).inc()
+            TMDB_LATENCY.labels(endpoint=label).observe(elapsed)
+            observe_upstream_latency("tmdb", elapsed)
 
     def search_person(self, name: str) -> int | None:
         """Search for a person (actor/director) by name and return their TMDB ID.
@@ -148,9 +278,9 @@ class TMDBClient:
             if results:
                 person = results[0]
                 person_id = person.get("id")
-                logger.debug(f"Resolved '{name}' to person ID: {person_id}")
+                logger.debug("Resolved '%s' to person ID: %s", name, person_id)
                 return person_id
-            logger.debug(f"No person found for: {name}")
+            logger.debug("No person found for: %s", name)
             return None
         except TMDBClientError as e:
             logger.warning(f"Person search failed for '{name}': {e}")
@@ -248,7 +378,7 @@ class TMDBClient:
         if with_original_language:
             params["with_original_language"] = with_original_language
 
-        logger.debug(f"TMDB discover params: {params}")
+        logger.debug("TMDB discover params: %s", params)
         data = self._get("/discover/movie", params)
 
         results = []
@@ -275,7 +405,7 @@ class TMDBClient:
             results = data.get("results", [])
             if results:
                 keyword_id = results[0].get("id")
-                logger.debug(f"Resolved keyword '{keyword}' to ID: {keyword_id}")
+                logger.debug("Resolved keyword '%s' to ID: %s", keyword, keyword_id)
                 return keyword_id
             return None
         except TMDBClientError as e:
@@ -1,50 +1,104 @@
-from app.llm.candidate_selector import (
-    build_deterministic_recommendation_text,
-    build_reasoning,
-    detect_constraint_violations,
-    filter_candidates,
-    prioritize_candidates,
-    select_best_candidate,
-)
-from app.llm.client import create_chat_model
-from app.llm.evaluator_agent import (
-    EvaluatorAgent,
-    LLMEvaluatorAgent,
-    StubEvaluatorAgent,
-)
-from app.llm.movie_finder_agent import (
-    MovieFinderAgent,
-    StubMovieFinderAgent,
-    TMDBMovieFinderAgent,
-)
-from app.llm.prompts import (
-    EVALUATOR_SYSTEM_PROMPT,
-    INPUT_ORCHESTRATOR_SYSTEM_PROMPT,
-    MOVIES_RESPONDER_SYSTEM_PROMPT,
-    ORCHESTRATOR_SYSTEM_PROMPT,
-    RAG_ASSISTANT_SYSTEM_PROMPT,
-    RECOMMENDATION_WRITER_SYSTEM_PROMPT,
-    SYSTEM_RESPONDER_SYSTEM_PROMPT,
-)
-from app.llm.rag_agent import (
-    LLMRAGAssistantAgent,
-    RAGAssistantAgent,
-    StubRAGAssistantAgent,
-)
-from app.llm.recommendation_agent import (
-    LLMRecommendationWriterAgent,
-    RecommendationWriterAgent,
-    StubRecommendationWriterAgent,
-)
-from app.llm.state import (
-    MAX_MOVIE_SEARCHES,
-    MAX_RETRIES,
-    PASS_THRESHOLD,
-    MovieNightState,
-    RouteType,
-    create_initial_state,
-)
-from app.schemas.orchestrator import MovieSearchQuery
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# Submodules pull in langchain, langgraph and the Azure OpenAI SDK, so
+# exports are imported on first access to keep ``import app`` cheap.
+if TYPE_CHECKING:
+    from app.llm.candidate_selector import (
+        build_deterministic_recommendation_text,
+        build_reasoning,
+        detect_constraint_violations,
+        filter_candidates,
+        prioritize_candidates,
+        select_best_candidate,
+    )
+    from app.llm.client import create_chat_model
+    from app.llm.evaluator_agent import (
+        EvaluatorAgent,
+        LLMEvaluatorAgent,
+        StubEvaluatorAgent,
+    )
+    from app.llm.movie_finder_agent import (
+        MovieFinderAgent,
+        StubMovieFinderAgent,
+        cap_search_query,
+        TMDBMovieFinderAgent,
+    )
+    from app.llm.prompts import (
+        EVALUATOR_SYSTEM_PROMPT,
+        INPUT_ORCHESTRATOR_SYSTEM_PROMPT,
+        MOVIES_RESPONDER_SYSTEM_PROMPT,
+        ORCHESTRATOR_SYSTEM_PROMPT,
+        RAG_ASSISTANT_SYSTEM_PROMPT,
+        RECOMMENDATION_WRITER_SYSTEM_PROMPT,
+        SYSTEM_RESPONDER_SYSTEM_PROMPT,
+    )
+    from app.llm.rag_agent import (
+        LLMRAGAssistantAgent,
+        RAGAssistantAgent,
+        StubRAGAssistantAgent,
+    )
+    from app.llm.recommendation_agent import (
+        LLMRecommendationWriterAgent,
+        RecommendationWriterAgent,
+        StubRecommendationWriterAgent,
+    )
+    from app.llm.state import (
+        MAX_MOVIE_SEARCHES,
+        MAX_RETRIES,
+        PASS_THRESHOLD,
+        MovieNightState,
+        RouteType,
+        create_initial_state,
+    )
+    from app.schemas.orchestrator import MovieSearchQuery
+
+_LAZY_IMPORTS = {
+    "build_deterministic_recommendation_text": "app.llm.candidate_selector",
+    "build_reasoning": "app.llm.candidate_selector",
+    "detect_constraint_violations": "app.llm.candidate_selector",
+    "filter_candidates": "app.llm.candidate_selector",
+    "prioritize_candidates": "app.llm.candidate_selector",
+    "select_best_candidate": "app.llm.candidate_selector",
+    "create_chat_model": "app.llm.client",
+    "EvaluatorAgent": "app.llm.evaluator_agent",
+    "LLMEvaluatorAgent": "app.llm.evaluator_agent",
+    "StubEvaluatorAgent": "app.llm.evaluator_agent",
+    "MovieFinderAgent": "app.llm.movie_finder_agent",
+    "cap_search_query": "app.llm.movie_finder_agent",
+    "StubMovieFinderAgent": "app.llm.movie_finder_agent",
+    "TMDBMovieFinderAgent": "app.llm.movie_finder_agent",
+    "EVALUATOR_SYSTEM_PROMPT": "app.llm.prompts",
+    "INPUT_ORCHESTRATOR_SYSTEM_PROMPT": "app.llm.prompts",
+    "MOVIES_RESPONDER_SYSTEM_PROMPT": "app.llm.prompts",
+    "ORCHESTRATOR_SYSTEM_PROMPT": "app.llm.prompts",
+    "RAG_ASSISTANT_SYSTEM_PROMPT": "app.llm.prompts",
+    "RECOMMENDATION_WRITER_SYSTEM_PROMPT": "app.llm.prompts",
+    "SYSTEM_RESPONDER_SYSTEM_PROMPT": "app.llm.prompts",
+    "LLMRAGAssistantAgent": "app.llm.rag_agent",
+    "RAGAssistantAgent": "app.llm.rag_agent",
+    "StubRAGAssistantAgent": "app.llm.rag_agent",
+    "LLMRecommendationWriterAgent": "app.llm.recommendation_agent",
+    "RecommendationWriterAgent": "app.llm.recommendation_agent",
+    "StubRecommendationWriterAgent": "app.llm.recommendation_agent",
+    "MAX_MOVIE_SEARCHES": "app.llm.state",
+    "MAX_RETRIES": "app.llm.state",
+    "PASS_THRESHOLD": "app.llm.state",
+    "MovieNightState": "app.llm.state",
+    "RouteType": "app.llm.state",
+    "create_initial_state": "app.llm.state",
+    "MovieSearchQuery": "app.schemas.orchestrator",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "create_chat_model",
@@ -55,6 +109,7 @@ __all__ = [
     "build_deterministic_recommendation_text",
     "detect_constraint_violations",
     "MovieFinderAgent",
+    "cap_search_query",
     "StubMovieFinderAgent",
     "TMDBMovieFinderAgent",
     "RecommendationWriterAgent",
@@ -1,28 +1,429 @@
+import functools
+import hashlib
+import json
 import logging
+from typing import Any
 
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from langchain_openai import AzureChatOpenAI
+from pydantic import Field, PrivateAttr
 
+from app.cache import SharedCache
+from app.cassettes import Cassette, request_key
+from app.observability.usage import SERVED_FROM, UsageCallbackHandler
+from app.resilience import (
+    AsyncSingleFlight,
+    LatencyTracker,
+    SingleFlight,
+    get_current_deadline,
+    hedged_call,
+)
 from app.settings import Settings
 
 logger = logging.getLogger(__name__)
 
 
-def create_chat_model(settings: Settings, temperature: float | None = None) -> AzureChatOpenAI:
+class ResilientAzureChatOpenAI(AzureChatOpenAI):
+    """AzureChatOpenAI that respects the request deadline and hedges slow calls.
+
+    Every completion's timeout is capped at the time left before the
+    current request deadline (see :mod:`app.resilience.deadline`). When
+    ``hedging`` is enabled, non-streaming completions that take longer than
+    the model's recent ``hedge_quantile`` latency are duplicated and the
+    first answer wins. When ``coalesce`` is enabled, identical
+    non-streaming completions at temperature 0 issued concurrently (same
+    messages and options) share one upstream call; callers that joined
+    another's call report no token usage of their own. A caller waits for
+    the shared call no longer than its own timeout, and makes its own call
+    if the shared one fails. When ``response_cache`` is set,
+    non-streaming completions at temperature 0 are stored in it and reused
+    by every worker process; cached answers report no token usage either.
+    When ``cassette`` is set, completions are recorded to it or replayed
+    from it (see :mod:`app.cassettes`); a replayed completion makes no
+    call and reports the token usage that was recorded. Completions that
+    were cached, shared or replayed are marked with
+    :data:`~app.observability.usage.SERVED_FROM`, so they are not counted
+    as upstream calls or latency samples.
+    """
+
+    hedging: bool = False
+    hedge_quantile: float = 0.95
+    hedge_initial_delay: float = 5.0
+    coalesce: bool = False
+    response_cache: SharedCache | None = Field(default=None, exclude=True)
+    cassette: Cassette | None = Field(default=None, exclude=True)
+
+    _latency: LatencyTracker | None = PrivateAttr(default=None)
+    _inflight: SingleFlight[ChatResult] = PrivateAttr(
+        default_factory=lambda: SingleFlight(name="llm")
+    )
+    _ainflight: AsyncSingleFlight[ChatResult] = PrivateAttr(
+        default_factory=lambda: AsyncSingleFlight(name="llm")
+    )
+
+    @property
+    def latency_tracker(self) -> LatencyTracker:
+        """Latency history used to choose the hedging delay."""
+        if self._latency is None:
+            self._latency = LatencyTracker(
+                quantile=self.hedge_quantile,
+                initial_delay=self.hedge_initial_delay,
+            )
+        return self._latency
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._apply_deadline(kwargs)
+        if self.cassette is None:
+            return self._generate_upstream(messages, stop, run_manager, **kwargs)
+        result = self.cassette.play(
+            "llm",
+            self._cassette_key(messages, stop, kwargs),
+            functools.partial(self._generate_upstream, messages, stop, run_manager, **kwargs),
+            request=self._cassette_request(messages),
+            encode=_result_to_dict,
+            decode=_result_from_dict,
+        )
+        return _served(result, "cassette") if self.cassette.replaying else result
+
+    def _generate_upstream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Get a completion from the shared cache, a concurrent call or Azure."""
+        call = functools.partial(self._complete, messages, stop, run_manager, kwargs)
+        key = self._call_key(messages, stop, kwargs)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        if not self._coalesces(kwargs):
+            result, shared = call(), False
+        else:
+            result, shared = self._inflight.do(
+                key, call, timeout=self._wait_limit(kwargs), share_errors=False
+            )
+        if not shared:
+            self._store_response(key, result)
+        return _served(_without_usage(result), "shared") if shared else result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._apply_deadline(kwargs)
+        if self.cassette is None:
+            return await self._agenerate_upstream(messages, stop, run_manager, **kwargs)
+        result = await self.cassette.aplay(
+            "llm",
+            self._cassette_key(messages, stop, kwargs),
+            functools.partial(self._agenerate_upstream, messages, stop, run_manager, **kwargs),
+            request=self._cassette_request(messages),
+            encode=_result_to_dict,
+            decode=_result_from_dict,
+        )
+        return _served(result, "cassette") if self.cassette.replaying else result
+
+    async def _agenerate_upstream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Async variant of :meth:`_generate_upstream`."""
+        call = functools.partial(self._acomplete, messages, stop, run_manager, kwargs)
+        key = self._call_key(messages, stop, kwargs)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        if not self._coalesces(kwargs):
+            result, shared = await call(), False
+        else:
+            result, shared = await self._ainflight.do(
+                key, call, timeout=self._wait_limit(kwargs), share_errors=False
+            )
+        if not shared:
+            self._store_response(key, result)
+        return _served(_without_usage(result), "shared") if shared else result
+
+    def _complete(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None,
+        run_manager: CallbackManagerForLLMRun | None,
+        kwargs: dict[str, Any],
+    ) -> ChatResult:
+        """Call Azure, hedged if enabled, within the time left before the deadline.
+
+        The deadline is applied again since a caller may have spent part of
+        its budget waiting for a concurrent call that then failed.
+        """
+        self._apply_deadline(kwargs)
+        call = functools.partial(
+            super()._generate, messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        if not self.hedging:
+            return call()
+        return hedged_call(
+            call,
+            self.latency_tracker,
+            max_wait=kwargs.get("timeout"),
+            label=self.deployment_name or "default",
+        )
+
+    async def _acomplete(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None,
+        run_manager: AsyncCallbackManagerForLLMRun | None,
+        kwargs: dict[str, Any],
+    ) -> ChatResult:
+        """Async variant of :meth:`_complete`, without hedging."""
+        self._apply_deadline(kwargs)
+        return await super()._agenerate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+
+    def _coalesces(self, kwargs: dict[str, Any]) -> bool:
+        """Whether a completion may share a concurrent identical call.
+
+        Only deterministic (temperature 0) completions are shared, so that
+        concurrent users do not all get the same sampled answer.
+        """
+        return self.coalesce and kwargs.get("temperature", self.temperature) == 0
+
+    def _wait_limit(self, kwargs: dict[str, Any]) -> float | None:
+        """Longest time a completion may wait for a concurrent identical call."""
+        timeout = kwargs.get("timeout", self.request_timeout)
+        return timeout if isinstance(timeout, (int, float)) else None
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ):
+        self._apply_deadline(kwargs)
+        if self.cassette is None:
+            yield from super()._stream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            return
+        chunks = self.cassette.stream(
+            "llm",
+            self._cassette_key(messages, stop, kwargs),
+            functools.partial(
+                super()._stream, messages, stop=stop, run_manager=run_manager, **kwargs
+            ),
+            request=self._cassette_request(messages),
+            encode=_chunk_to_dict,
+            decode=_chunk_from_dict,
+        )
+        for chunk in chunks:
+            if run_manager is not None and self.cassette.replaying:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _call_key(
+        self, messages: list[BaseMessage], stop: list[str] | None, kwargs: dict[str, Any]
+    ) -> str:
+        """Digest identifying completions that would get the same answer.
+
+        The timeout is left out since it varies with each request's deadline.
+        """
+        options = {k: v for k, v in kwargs.items() if k != "timeout"}
+        payload = json.dumps(
+            [[m.model_dump() for m in messages], stop, options],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cassette_key(
+        self, messages: list[BaseMessage], stop: list[str] | None, kwargs: dict[str, Any]
+    ) -> str:
+        """Cassette key of a completion: the call key and the deployment."""
+        return request_key(self.deployment_name, self._call_key(messages, stop, kwargs))
+
+    def _cassette_request(self, messages: list[BaseMessage]) -> dict[str, Any]:
+        """Short description of a completion request stored in the cassette."""
+        prompt = str(messages[-1].content) if messages else ""
+        return {"model": self.deployment_name, "prompt": prompt[:200]}
+
+    def _response_cache_key(self, key: str) -> str | None:
+        """Shared cache key of a completion, or None if it is not cached.
+
+        Only temperature-0 completions are cached, keyed by deployment so
+        models of different tiers never answer for each other.
+        """
+        if self.response_cache is None or self.temperature != 0:
+            return None
+        return f"{self.deployment_name}:{key}"
+
+    def _cached_response(self, key: str) -> ChatResult | None:
+        """Return a cached completion, without token usage, if there is one."""
+        cache_key = self._response_cache_key(key)
+        if cache_key is None:
+            return None
+        cached = self.response_cache.get("llm", cache_key)
+        if cached is None:
+            return None
+        return _served(_result_from_dict(cached), "cache")
+
+    def _store_response(self, key: str, result: ChatResult) -> None:
+        """Store a completion in the shared cache, without its token usage."""
+        cache_key = self._response_cache_key(key)
+        if cache_key is None:
+            return
+        self.response_cache.set("llm", cache_key, _result_to_dict(_without_usage(result)))
+
+    def _apply_deadline(self, kwargs: dict[str, Any]) -> None:
+        """Cap the request timeout at the time left before the deadline."""
+        deadline = get_current_deadline()
+        if deadline is None:
+            return
+        configured = kwargs.get("timeout", self.request_timeout)
+        if not isinstance(configured, (int, float)):
+            configured = None
+        kwargs["timeout"] = deadline.cap(configured)
+
+
+def _result_to_dict(result: ChatResult) -> dict[str, Any]:
+    """JSON-compatible form of a completion, for the shared cache and cassettes."""
+    data: dict[str, Any] = {
+        "messages": messages_to_dict([g.message for g in result.generations]),
+        "generation_info": [g.generation_info for g in result.generations],
+    }
+    if result.llm_output:
+        data["llm_output"] = result.llm_output
+    return data
+
+
+def _result_from_dict(data: dict[str, Any]) -> ChatResult:
+    """Rebuild a completion stored by :func:`_result_to_dict`."""
+    return ChatResult(
+        generations=[
+            ChatGeneration(message=message, generation_info=info)
+            for message, info in zip(
+                messages_from_dict(data["messages"]), data["generation_info"]
+            )
+        ],
+        llm_output=data.get("llm_output"),
+    )
+
+
+def _chunk_to_dict(chunk: ChatGenerationChunk) -> dict[str, Any]:
+    data: dict[str, Any] = {"message": messages_to_dict([chunk.message])[0]}
+    if chunk.generation_info:
+        data["generation_info"] = chunk.generation_info
+    return data
+
+
+def _chunk_from_dict(data: dict[str, Any]) -> ChatGenerationChunk:
+    return ChatGenerationChunk(
+        message=messages_from_dict([data["message"]])[0],
+        generation_info=data.get("generation_info"),
+    )
+
+
+def _without_usage(result: ChatResult) -> ChatResult:
+    """Copy of a shared result whose token usage is attributed elsewhere."""
+    result = result.model_copy(deep=True)
+    for generation in result.generations:
+        generation.message.usage_metadata = None
+    if result.llm_output:
+        result.llm_output.pop("token_usage", None)
+    return result
+
+
+def _served(result: ChatResult, source: str) -> ChatResult:
+    """Mark a completion that was not made upstream with where it came from."""
+    for generation in result.generations:
+        generation.generation_info = {**(generation.generation_info or {}), SERVED_FROM: source}
+    return result
+
+
+def create_chat_model(
+    settings: Settings,
+    temperature: float | None = None,
+    agent: str = "default",
+    deployment: str | None = None,
+    response_cache: SharedCache | None = None,
+    cassette: Cassette | None = None,
+) -> AzureChatOpenAI:
     """Create an Azure OpenAI chat model instance.
 
+    Every model carries a :class:`UsageCallbackHandler` so token usage,
+    latency and estimated cost are recorded per request, node and agent.
+    Calls are bounded by the current request deadline, retried at most
+    ``settings.llm_max_retries`` times, hedged when ``settings.llm_hedging``
+    is enabled and, at temperature 0, coalesced across concurrent requests
+    when ``settings.upstream_coalescing`` is enabled.
+
+    Per-agent overrides from ``settings.agent_models`` take precedence over
+    the arguments, which take precedence over the global settings.
+
     Args:
         settings: Application settings with Azure OpenAI configuration.
         temperature: Optional temperature override. Uses settings.temperature if not provided.
+        agent: Name of the agent the model serves, used to attribute usage
+            and to look up per-agent model overrides.
+        deployment: Optional deployment override (e.g. the escalation model).
+            Takes precedence over the agent's configured deployment.
+        response_cache: Optional cache of temperature-0 completions shared
+            by all workers.
+        cassette: Optional cassette the model's completions are recorded to
+            or replayed from.
 
     Returns:
-        Configured AzureChatOpenAI instance.
+        Configured ResilientAzureChatOpenAI instance.
     """
-    return AzureChatOpenAI(
+    overrides = settings.model_for_agent(agent)
+    deployment = deployment or overrides.deployment or settings.azure_openai_deployment
+    if overrides.temperature is not None:
+        temperature = overrides.temperature
+    timeout = overrides.timeout or settings.llm_timeout_seconds
+
+    logger.info(f"Chat model for agent '{agent}': deployment={deployment}")
+
+    return ResilientAzureChatOpenAI(
         azure_endpoint=settings.azure_openai_endpoint,
         api_key=settings.azure_openai_api_key,
         api_version=settings.azure_openai_api_version,
-        azure_deployment=settings.azure_openai_deployment,
+        azure_deployment=deployment,
         temperature=temperature if temperature is not None else settings.temperature,
-        max_tokens=settings.max_tokens,
+        max_tokens=overrides.max_tokens or settings.max_tokens,
+        timeout=timeout,
+        max_retries=settings.llm_max_retries,
+        hedging=settings.llm_hedging,
+        hedge_quantile=settings.llm_hedge_quantile,
+        hedge_initial_delay=settings.llm_hedge_initial_delay_seconds,
+        coalesce=settings.upstream_coalescing,
+        response_cache=response_cache,
+        cassette=cassette,
+        stream_usage=True,
+        callbacks=[
+            UsageCallbackHandler(
+                agent=agent,
+                model=deployment,
+                pricing=settings.llm_pricing,
+            )
+        ],
     )
-
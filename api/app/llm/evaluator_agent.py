@@ -21,6 +21,7 @@ final pass/fail decision alongside the agent's own ``passed`` flag.
 
 from __future__ import annotations
 
+import dataclasses
 import logging
 import time
 from abc import ABC, abstractmethod
@@ -29,12 +30,24 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
 
 from app.llm.candidate_selector import detect_constraint_violations
+from app.llm.prompt_budget import (
+    PromptBudget,
+    PromptSection,
+    assemble_prompt,
+    movie_section,
+)
 from app.llm.prompts import EVALUATOR_SYSTEM_PROMPT
+from app.llm.tiering import EscalationPolicy, record_escalation
 from app.schemas.domain import DraftRecommendation, EvaluationResult
 from app.schemas.orchestrator import Constraints
 
 logger = logging.getLogger(__name__)
 
+EVALUATOR_TASK_INSTRUCTION = (
+    "Evaluate the draft recommendation below and return the structured JSON "
+    "verdict."
+)
+
 
 class EvaluatorAgent(ABC):
     """Abstract evaluator that judges a :class:`DraftRecommendation`.
@@ -63,6 +76,15 @@ class EvaluatorAgent(ABC):
             A valid :class:`EvaluationResult`.
         """
 
+    def set_pass_threshold(self, pass_threshold: float) -> None:
+        """Use the score the workflow requires to accept a draft.
+
+        Evaluators whose behavior does not depend on it ignore the call.
+
+        Args:
+            pass_threshold: Minimum evaluator score for a draft to pass.
+        """
+
 
 class StubEvaluatorAgent(EvaluatorAgent):
     """Deterministic, LLM-free evaluator suitable for tests and offline mode.
@@ -92,9 +114,9 @@ class StubEvaluatorAgent(EvaluatorAgent):
         violations = detect_constraint_violations(draft, constraints, rejected_titles)
 
         if violations:
-            logger.info(
-                f"StubEvaluator: draft for '{draft.movie.title}' failed "
-                f"with {len(violations)} violation(s)"
+            logger.debug(
+                "StubEvaluator: draft for '%s' failed with %d violation(s)",
+                draft.movie.title, len(violations),
             )
             return EvaluationResult(
                 passed=False,
@@ -106,9 +128,9 @@ class StubEvaluatorAgent(EvaluatorAgent):
                 ],
             )
 
-        logger.info(
-            f"StubEvaluator: draft for '{draft.movie.title}' passed "
-            f"(score={self._default_score:.2f})"
+        logger.debug(
+            "StubEvaluator: draft for '%s' passed (score=%.2f)",
+            draft.movie.title, self._default_score,
         )
         return EvaluationResult(
             passed=True,
@@ -125,15 +147,39 @@ class LLMEvaluatorAgent(EvaluatorAgent):
     A deterministic pre-check still runs first: if the draft violates a hard
     constraint, we fail fast without calling the LLM. Otherwise we delegate
     the quality judgment to the LLM.
+
+    When an ``escalation_llm`` is given, ``llm`` is treated as the small
+    model and borderline verdicts are re-judged by the large one.
     """
 
-    def __init__(self, llm: AzureChatOpenAI) -> None:
+    def __init__(
+        self,
+        llm: AzureChatOpenAI,
+        budget: PromptBudget | None = None,
+        escalation_llm: AzureChatOpenAI | None = None,
+        policy: EscalationPolicy | None = None,
+    ) -> None:
         """Initialize with a chat model.
 
         Args:
             llm: Azure OpenAI chat model instance.
+            budget: Optional prompt token budget; defaults to no overall
+                limit with truncated overviews.
+            escalation_llm: Optional larger model for uncertain verdicts.
+            policy: Escalation thresholds (defaults to :class:`EscalationPolicy`).
         """
         self._llm = llm.with_structured_output(EvaluationResult)
+        self._budget = budget or PromptBudget()
+        self._escalation_llm = (
+            escalation_llm.with_structured_output(EvaluationResult)
+            if escalation_llm is not None
+            else None
+        )
+        self._policy = policy or EscalationPolicy()
+
+    def set_pass_threshold(self, pass_threshold: float) -> None:
+        """Escalate verdicts that are uncertain relative to ``pass_threshold``."""
+        self._policy = dataclasses.replace(self._policy, pass_threshold=pass_threshold)
 
     def evaluate(
         self,
@@ -144,9 +190,10 @@ class LLMEvaluatorAgent(EvaluatorAgent):
     ) -> EvaluationResult:
         violations = detect_constraint_violations(draft, constraints, rejected_titles)
         if violations:
-            logger.info(
-                f"LLMEvaluator: draft for '{draft.movie.title}' failed "
-                f"deterministic pre-check with {len(violations)} violation(s)"
+            logger.debug(
+                "LLMEvaluator: draft for '%s' failed deterministic pre-check "
+                "with %d violation(s)",
+                draft.movie.title, len(violations),
             )
             return EvaluationResult(
                 passed=False,
@@ -178,9 +225,23 @@ class LLMEvaluatorAgent(EvaluatorAgent):
                 improvement_suggestions=[],
             )
 
-        logger.info(
-            f"LLMEvaluator: draft for '{draft.movie.title}' scored "
-            f"{result.score:.2f}, passed={result.passed}"
+        reason = self._policy.evaluation_escalation_reason(result)
+        if reason and self._escalation_llm is not None:
+            record_escalation("evaluator", reason)
+            try:
+                result = self._call_llm(
+                    user_message, constraints, draft, rejected_titles,
+                    llm=self._escalation_llm,
+                )
+            except Exception as exc:
+                logger.warning(
+                    f"LLMEvaluator escalation failed ({exc}); "
+                    "keeping the small model's verdict"
+                )
+
+        logger.debug(
+            "LLMEvaluator: draft for '%s' scored %.2f, passed=%s",
+            draft.movie.title, result.score, result.passed,
         )
         return result
 
@@ -190,8 +251,13 @@ class LLMEvaluatorAgent(EvaluatorAgent):
         constraints: Constraints,
         draft: DraftRecommendation,
         rejected_titles: list[str] | None,
+        llm=None,
     ) -> EvaluationResult:
-        """Call the LLM to produce a structured :class:`EvaluationResult`."""
+        """Call the LLM to produce a structured :class:`EvaluationResult`.
+
+        ``llm`` selects the structured model to use (defaults to the
+        primary one).
+        """
         human_content = self._build_prompt(
             user_message, constraints, draft, rejected_titles
         )
@@ -202,12 +268,9 @@ class LLMEvaluatorAgent(EvaluatorAgent):
         ]
 
         start = time.time()
-        result = self._llm.invoke(messages)
+        result = (llm or self._llm).invoke(messages)
         elapsed = time.time() - start
-        logger.info(
-            f"LLMEvaluator response ({elapsed:.2f}s): "
-            f"{result.model_dump_json()}"
-        )
+        logger.debug("LLMEvaluator response (%.2fs): %r", elapsed, result)
         return result
 
     def _build_prompt(
@@ -217,23 +280,38 @@ class LLMEvaluatorAgent(EvaluatorAgent):
         draft: DraftRecommendation,
         rejected_titles: list[str] | None,
     ) -> str:
-        """Build the user prompt for the LLM."""
-        constraints_text = self._format_constraints(constraints)
-        movie_block = self._format_movie(draft.movie)
-        rejected_block = ", ".join(rejected_titles) if rejected_titles else "(none)"
-
-        return (
-            f"User request: {user_message}\n\n"
-            f"User constraints:\n{constraints_text}\n\n"
-            f"Selected movie (the only movie to judge):\n{movie_block}\n\n"
-            f"Rejected titles (must not be picked):\n{rejected_block}\n\n"
-            f"Recommendation text produced by the writer:\n"
-            f'"""\n{draft.recommendation_text}\n"""\n\n'
-            "Evaluate the draft now and return the structured JSON verdict."
+        """Build the user prompt for the LLM.
+
+        The static instruction comes first so consecutive requests share
+        the longest possible prompt prefix; empty sections are omitted. The
+        draft text itself is never truncated.
+        """
+        sections = [
+            PromptSection(EVALUATOR_TASK_INSTRUCTION, static=True),
+            PromptSection(f"User request: {user_message}"),
+            PromptSection(self._format_constraints(constraints)),
+            movie_section(
+                "Selected movie (the only movie to judge):",
+                draft.movie,
+                self._budget,
+            ),
+        ]
+        if rejected_titles:
+            sections.append(
+                PromptSection(
+                    f"Rejected titles (must not be picked):\n{', '.join(rejected_titles)}"
+                )
+            )
+        sections.append(
+            PromptSection(
+                "Recommendation text produced by the writer:\n"
+                f'"""\n{draft.recommendation_text}\n"""'
+            )
         )
+        return assemble_prompt(sections, self._budget)
 
     def _format_constraints(self, constraints: Constraints) -> str:
-        """Format constraints for the prompt."""
+        """Format constraints for the prompt (empty when none were detected)."""
         lines: list[str] = []
         if constraints.genres:
             lines.append(f"- genres: {', '.join(constraints.genres)}")
@@ -241,24 +319,4 @@ class LLMEvaluatorAgent(EvaluatorAgent):
             lines.append(f"- max runtime: {constraints.max_runtime_minutes} min")
         if constraints.min_runtime_minutes:
             lines.append(f"- min runtime: {constraints.min_runtime_minutes} min")
-        return "\n".join(lines) if lines else "- (none detected)"
-
-    def _format_movie(self, movie) -> str:
-        """Format movie data for the prompt."""
-        lines = [
-            f"- title: {movie.title}",
-            f"- year: {movie.year if movie.year is not None else 'unknown'}",
-            f"- genres: {', '.join(movie.genres) if movie.genres else 'unknown'}",
-            (
-                f"- runtime: {movie.runtime_minutes} min"
-                if movie.runtime_minutes is not None
-                else "- runtime: unknown"
-            ),
-            (
-                f"- rating: {movie.rating:.1f}/10"
-                if movie.rating is not None
-                else "- rating: unknown"
-            ),
-            f"- overview: {movie.overview or 'not available'}",
-        ]
-        return "\n".join(lines)
+        return "User constraints:\n" + "\n".join(lines) if lines else ""
@@ -5,13 +5,18 @@ classification with support for movies, rag, and hybrid routes.
 """
 
 import logging
+import re
 import time
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
 
-from app.llm.prompts import INPUT_ORCHESTRATOR_SYSTEM_PROMPT
-from app.schemas.orchestrator import InputDecision
+from app.llm.prompts import (
+    INPUT_CONVERSATION_CONTEXT_TEMPLATE,
+    INPUT_ORCHESTRATOR_SYSTEM_PROMPT,
+)
+from app.llm.tiering import EscalationPolicy, record_escalation
+from app.schemas.orchestrator import Constraints, InputDecision
 
 logger = logging.getLogger(__name__)
 
@@ -24,21 +29,39 @@ class InputOrchestratorAgent:
     - Extracts movie constraints (genres, runtime)
     - Detects clarification needs
     - Generates RAG queries when applicable
+
+    When an ``escalation_llm`` is given, ``llm`` is treated as the small
+    model and low-confidence decisions are repeated on the large one.
     """
 
-    def __init__(self, llm: AzureChatOpenAI) -> None:
+    def __init__(
+        self,
+        llm: AzureChatOpenAI,
+        escalation_llm: AzureChatOpenAI | None = None,
+        policy: EscalationPolicy | None = None,
+    ) -> None:
         """Initialize the input orchestrator with a chat model.
 
         Args:
             llm: Azure OpenAI chat model instance.
+            escalation_llm: Optional larger model for uncertain decisions.
+            policy: Escalation thresholds (defaults to :class:`EscalationPolicy`).
         """
         self._llm = llm.with_structured_output(InputDecision)
+        self._escalation_llm = (
+            escalation_llm.with_structured_output(InputDecision)
+            if escalation_llm is not None
+            else None
+        )
+        self._policy = policy or EscalationPolicy()
 
-    def decide(self, user_message: str) -> InputDecision:
+    def decide(self, user_message: str, history: str | None = None) -> InputDecision:
         """Analyze a user message and produce a structured routing decision.
 
         Args:
             user_message: The user's input message.
+            history: Optional rendering of the conversation so far, used to
+                recognize follow-ups that refine the previous request.
 
         Returns:
             InputDecision with route, constraints, clarification info,
@@ -47,23 +70,41 @@ class InputOrchestratorAgent:
         Raises:
             Exception: If the LLM call fails or output parsing fails.
         """
-        messages = [
-            SystemMessage(content=INPUT_ORCHESTRATOR_SYSTEM_PROMPT),
-            HumanMessage(content=user_message),
-        ]
-
-        logger.info(f"InputOrchestrator request: {user_message}")
-        start_time = time.time()
-        decision = self._llm.invoke(messages)
-        elapsed = time.time() - start_time
-        logger.info(
-            f"InputOrchestrator response ({elapsed:.2f}s): {decision.model_dump_json()}"
-        )
+        messages = [SystemMessage(content=INPUT_ORCHESTRATOR_SYSTEM_PROMPT)]
+        if history:
+            messages.append(
+                HumanMessage(
+                    content=INPUT_CONVERSATION_CONTEXT_TEMPLATE.format(history=history)
+                )
+            )
+        messages.append(HumanMessage(content=user_message))
+
+        logger.debug("InputOrchestrator request: %s", user_message)
+        decision = self._invoke(self._llm, messages)
+
+        reason = self._policy.decision_escalation_reason(decision)
+        if reason and self._escalation_llm is not None:
+            record_escalation("input", reason)
+            try:
+                decision = self._invoke(self._escalation_llm, messages)
+            except Exception as exc:
+                logger.warning(
+                    f"InputOrchestrator escalation failed ({exc}); "
+                    "keeping the small model's decision"
+                )
 
         decision = self._validate_decision(decision)
 
         return decision
 
+    def _invoke(self, llm, messages: list) -> InputDecision:
+        """Run one structured-output call and log its latency."""
+        start_time = time.time()
+        decision = llm.invoke(messages)
+        elapsed = time.time() - start_time
+        logger.debug("InputOrchestrator response (%.2fs): %r", elapsed, decision)
+        return decision
+
     def _validate_decision(self, decision: InputDecision) -> InputDecision:
         """Validate and normalize the decision output.
 
@@ -84,3 +125,62 @@ class InputOrchestratorAgent:
             decision.needs_recommendation = True
 
         return decision
+
+
+STUB_GENRES = (
+    "action", "adventure", "animation", "comedy", "crime", "documentary",
+    "drama", "family", "fantasy", "history", "horror", "music", "mystery",
+    "romance", "sci-fi", "science fiction", "thriller", "war", "western",
+)
+STUB_RAG_PHRASES = (
+    "how do you", "how does", "what data", "where do", "tmdb", "limitation",
+    "this app", "this assistant",
+)
+_RUNTIME_PATTERN = re.compile(r"under (\d+) min")
+
+
+class StubInputOrchestratorAgent(InputOrchestratorAgent):
+    """Keyword-based input orchestrator for testing and load runs.
+
+    Routes questions about the assistant itself to ``rag``, everything else
+    to ``movies`` (``hybrid`` when both apply), and extracts genres and an
+    "under N minutes" runtime limit by simple matching. Makes no LLM calls.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the stub orchestrator."""
+        self._policy = EscalationPolicy()
+
+    def decide(self, user_message: str, history: str | None = None) -> InputDecision:
+        """Classify a message with keyword rules.
+
+        Args:
+            user_message: The user's input message.
+            history: Ignored.
+
+        Returns:
+            InputDecision with route, constraints and optional rag_query.
+        """
+        text = user_message.lower()
+        genres = [genre for genre in STUB_GENRES if genre in text]
+        runtime = _RUNTIME_PATTERN.search(text)
+        is_rag = any(phrase in text for phrase in STUB_RAG_PHRASES)
+        is_movies = bool(genres or runtime) or not is_rag
+
+        if is_rag and is_movies:
+            route = "hybrid"
+        elif is_rag:
+            route = "rag"
+        else:
+            route = "movies"
+
+        decision = InputDecision(
+            route=route,
+            constraints=Constraints(
+                genres=genres,
+                max_runtime_minutes=int(runtime.group(1)) if runtime else None,
+            ),
+            confidence=1.0,
+            rag_query=user_message if is_rag else None,
+        )
+        return self._validate_decision(decision)
@@ -49,6 +49,34 @@ LANGUAGE_NAME_TO_CODE: dict[str, str] = {
 }
 
 
+def cap_search_query(query: MovieSearchQuery, max_lookups: int) -> MovieSearchQuery:
+    """Limit the TMDB lookups a search query leads to.
+
+    Each actor, director and keyword is resolved with a request of its own,
+    and a free-text query adds a search. The first ``max_lookups`` names
+    and keywords, in that order, are kept and the free-text query is
+    dropped; filters that cost no request (year, language) are kept.
+
+    Args:
+        query: The search query.
+        max_lookups: Maximum number of person and keyword lookups.
+
+    Returns:
+        The capped query (``query`` itself if nothing had to be cut).
+    """
+    remaining = max_lookups
+    updates: dict[str, list[str] | None] = {}
+    for field in ("actors", "directors", "keywords"):
+        values = getattr(query, field)
+        kept = values[:remaining]
+        remaining -= len(kept)
+        if len(kept) < len(values):
+            updates[field] = kept
+    if query.text_query:
+        updates["text_query"] = None
+    return query.model_copy(update=updates) if updates else query
+
+
 class MovieFinderAgent(ABC):
     """Abstract base class for movie finder agents.
 
@@ -250,9 +278,10 @@ class StubMovieFinderAgent(MovieFinderAgent):
         Returns:
             List of matching MovieResult objects.
         """
-        logger.info(f"StubMovieFinder searching with constraints: {constraints}")
-        if search_query:
-            logger.info(f"StubMovieFinder search_query: {search_query.model_dump_json()}")
+        logger.debug(
+            "StubMovieFinder searching with constraints: %r, search_query: %r",
+            constraints, search_query,
+        )
 
         excluded = set(t.lower() for t in (excluded_titles or []))
 
@@ -272,7 +301,7 @@ class StubMovieFinderAgent(MovieFinderAgent):
             if len(results) >= limit:
                 break
 
-        logger.info(f"StubMovieFinder found {len(results)} movies")
+        logger.debug("StubMovieFinder found %d movies", len(results))
         return results
 
     def _matches_constraints(self, movie: MovieResult, constraints: Constraints) -> bool:
@@ -379,9 +408,10 @@ class TMDBMovieFinderAgent(MovieFinderAgent):
         Returns:
             List of matching MovieResult objects from TMDB.
         """
-        logger.info(f"TMDBMovieFinder searching with constraints: {constraints}")
-        if search_query:
-            logger.info(f"TMDBMovieFinder search_query: {search_query.model_dump_json()}")
+        logger.debug(
+            "TMDBMovieFinder searching with constraints: %r, search_query: %r",
+            constraints, search_query,
+        )
 
         excluded = set(t.lower() for t in (excluded_titles or []))
         query = search_query or MovieSearchQuery()
@@ -418,7 +448,7 @@ class TMDBMovieFinderAgent(MovieFinderAgent):
                 if len(results) >= limit:
                     break
 
-            logger.info(f"TMDBMovieFinder found {len(results)} movies")
+            logger.debug("TMDBMovieFinder found %d movies", len(results))
             return results
 
         except Exception as e:
@@ -448,11 +478,11 @@ class TMDBMovieFinderAgent(MovieFinderAgent):
 
         if query.actors:
             cast_ids = self._client.search_persons(query.actors)
-            logger.debug(f"Resolved actors {query.actors} to IDs: {cast_ids}")
+            logger.debug("Resolved actors %s to IDs: %s", query.actors, cast_ids)
 
         if query.directors:
             crew_ids = self._client.search_persons(query.directors)
-            logger.debug(f"Resolved directors {query.directors} to IDs: {crew_ids}")
+            logger.debug("Resolved directors %s to IDs: %s", query.directors, crew_ids)
 
         if not cast_ids and not crew_ids:
             return []
@@ -491,7 +521,7 @@ class TMDBMovieFinderAgent(MovieFinderAgent):
         keyword_ids: list[int] | None = None
         if query.keywords:
             keyword_ids = self._client.search_keywords(query.keywords)
-            logger.debug(f"Resolved keywords {query.keywords} to IDs: {keyword_ids}")
+            logger.debug("Resolved keywords %s to IDs: %s", query.keywords, keyword_ids)
 
         return self._client.discover_movies(
             genres=constraints.genres,
@@ -0,0 +1,287 @@
+"""Prompt assembly with token budgets and a prefix-cache-friendly layout.
+
+Azure OpenAI caches prompt prefixes automatically, but only while the
+beginning of the prompt is byte-for-byte identical between calls. This
+module assembles the user prompts of the agents so that:
+
+- static sections (instructions that never change between requests) come
+  first, directly after the static system prompt, and dynamic sections
+  (user request, movie data, retrieved documentation) come last
+- compressible sections (movie overviews, retrieved documentation) are
+  truncated so the prompt fits a per-agent token budget
+
+Token counts use a fast character-based estimate by default. Setting
+``PROMPT_TOKENIZER=tiktoken`` switches to exact counts when the optional
+``tiktoken`` encodings are available locally.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.schemas.domain import MovieResult
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+ELLIPSIS = "…"
+
+TokenCounter = Callable[[str], int]
+
+DEFAULT_AGENT_BUDGETS: dict[str, int] = {
+    "writer": 600,
+    "evaluator": 800,
+    "rag": 1500,
+}
+
+
+def approximate_token_count(text: str) -> int:
+    """Estimate the number of tokens in ``text`` (~4 characters per token)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def create_token_counter(tokenizer: str = "approx") -> TokenCounter:
+    """Create a token counter.
+
+    Args:
+        tokenizer: ``"approx"`` for the character-based estimate or
+            ``"tiktoken"`` for exact counts. Falls back to the estimate if
+            tiktoken or its encoding cannot be loaded.
+
+    Returns:
+        A function mapping text to a token count.
+    """
+    if tokenizer != "tiktoken":
+        return approximate_token_count
+
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        logger.warning(f"tiktoken unavailable ({exc}); using approximate token counts")
+        return approximate_token_count
+
+    return lambda text: len(encoding.encode(text)) if text else 0
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    counter: TokenCounter = approximate_token_count,
+) -> str:
+    """Truncate ``text`` at a word boundary so it fits ``max_tokens``.
+
+    Args:
+        text: Text to shorten.
+        max_tokens: Token limit for the result (including the ellipsis).
+        counter: Token counter to use.
+
+    Returns:
+        The original text if it fits, otherwise a shortened copy ending in
+        an ellipsis. Returns an empty string for non-positive limits.
+    """
+    if max_tokens <= 0:
+        return ""
+    if counter(text) <= max_tokens:
+        return text
+
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if counter(text[:mid].rstrip() + ELLIPSIS) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+
+    cut = text[:low]
+    space = cut.rfind(" ")
+    if space > len(cut) // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,.;:") + ELLIPSIS
+
+
+@dataclass
+class PromptSection:
+    """One block of a user prompt.
+
+    Attributes:
+        text: The section text.
+        static: Identical across requests; placed before dynamic sections.
+        compressible: May be truncated to satisfy the budget.
+        min_tokens: Compressible sections are never cut below this size.
+    """
+
+    text: str
+    static: bool = False
+    compressible: bool = False
+    min_tokens: int = 16
+
+
+@dataclass
+class PromptBudget:
+    """Token budgets applied when assembling an agent's prompts.
+
+    Attributes:
+        max_prompt_tokens: Budget for the assembled user prompt of one agent
+            (the static system prompt is not counted). ``None`` disables it.
+        overview_tokens: Maximum tokens kept from a movie overview.
+        context_tokens: Total tokens shared by retrieved documentation chunks.
+        counter: Token counter used for all measurements.
+    """
+
+    max_prompt_tokens: int | None = None
+    overview_tokens: int = 80
+    context_tokens: int = 1000
+    counter: TokenCounter = field(default=approximate_token_count, repr=False)
+
+    def count(self, text: str) -> int:
+        """Count tokens in ``text`` with this budget's counter."""
+        return self.counter(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Truncate ``text`` to ``max_tokens`` with this budget's counter."""
+        return truncate_to_tokens(text, max_tokens, self.counter)
+
+
+def assemble_prompt(
+    sections: list[PromptSection],
+    budget: PromptBudget | None = None,
+    separator: str = "\n\n",
+) -> str:
+    """Join prompt sections with static content first, within budget.
+
+    Sections keep their relative order within the static and dynamic
+    groups. If the result exceeds ``budget.max_prompt_tokens``, the largest
+    compressible sections are truncated first; non-compressible sections
+    are never modified, so the budget is a target rather than a guarantee.
+
+    Args:
+        sections: Prompt sections in logical order.
+        budget: Optional budget to enforce.
+        separator: Text placed between sections.
+
+    Returns:
+        The assembled prompt.
+    """
+    ordered = [s for s in sections if s.static] + [s for s in sections if not s.static]
+    texts = [s.text for s in ordered if s.text]
+    compressible = [s.compressible for s in ordered if s.text]
+    minimums = [s.min_tokens for s in ordered if s.text]
+
+    limit = budget.max_prompt_tokens if budget is not None else None
+    if limit is None:
+        return separator.join(texts)
+
+    counter = budget.counter
+    sizes = [counter(t) for t in texts]
+    overflow = sum(sizes) + counter(separator) * (len(texts) - 1) - limit
+
+    while overflow > 0:
+        candidates = [
+            i for i, ok in enumerate(compressible) if ok and sizes[i] > minimums[i]
+        ]
+        if not candidates:
+            logger.debug("Prompt exceeds budget by %d tokens; nothing left to compress", overflow)
+            break
+        i = max(candidates, key=lambda idx: sizes[idx])
+        target = max(minimums[i], sizes[i] - overflow)
+        texts[i] = truncate_to_tokens(texts[i], target, counter)
+        new_size = counter(texts[i])
+        overflow -= sizes[i] - new_size
+        if new_size == sizes[i]:
+            compressible[i] = False
+        sizes[i] = new_size
+
+    return separator.join(texts)
+
+
+def format_movie_block(movie: MovieResult, budget: PromptBudget | None = None) -> str:
+    """Format a movie as a compact bullet list for a prompt.
+
+    Fields without a value are omitted rather than rendered as ``unknown``,
+    and the overview is truncated to ``budget.overview_tokens``.
+
+    Args:
+        movie: The movie to describe.
+        budget: Optional budget controlling overview truncation.
+
+    Returns:
+        One ``- field: value`` line per known field.
+    """
+    lines = [f"- title: {movie.title}"]
+    if movie.year is not None:
+        lines.append(f"- year: {movie.year}")
+    if movie.genres:
+        lines.append(f"- genres: {', '.join(movie.genres)}")
+    if movie.runtime_minutes is not None:
+        lines.append(f"- runtime: {movie.runtime_minutes} min")
+    if movie.rating is not None:
+        lines.append(f"- rating: {movie.rating:.1f}/10")
+    if movie.overview:
+        overview = movie.overview.strip()
+        if budget is not None:
+            overview = budget.truncate(overview, budget.overview_tokens)
+        lines.append(f"- overview: {overview}")
+    return "\n".join(lines)
+
+
+def movie_section(
+    heading: str, movie: MovieResult, budget: PromptBudget | None = None
+) -> PromptSection:
+    """Build a compressible prompt section describing one movie.
+
+    Only the overview (the last line) may be truncated when the prompt is
+    over budget; the structured fields are always kept.
+
+    Args:
+        heading: Line placed above the movie fields.
+        movie: The movie to describe.
+        budget: Optional budget controlling truncation.
+
+    Returns:
+        The movie section.
+    """
+    counter = budget.counter if budget is not None else approximate_token_count
+    fields_only = format_movie_block(movie.model_copy(update={"overview": None}))
+    return PromptSection(
+        f"{heading}\n{format_movie_block(movie, budget)}",
+        compressible=bool(movie.overview),
+        min_tokens=counter(f"{heading}\n{fields_only}\n- overview: ") + 8,
+    )
+
+
+def budget_for_agent(
+    agent: str,
+    budgets: dict[str, int] | None = None,
+    overview_tokens: int = 80,
+    context_tokens: int = 1000,
+    tokenizer: str = "approx",
+) -> PromptBudget:
+    """Build the :class:`PromptBudget` for an agent.
+
+    Args:
+        agent: Agent name (``writer``, ``evaluator`` or ``rag``).
+        budgets: Per-agent prompt budgets overriding
+            :data:`DEFAULT_AGENT_BUDGETS`.
+        overview_tokens: Maximum tokens kept from a movie overview.
+        context_tokens: Total tokens for retrieved documentation.
+        tokenizer: Token counter to use, see :func:`create_token_counter`.
+
+    Returns:
+        The agent's budget.
+    """
+    merged = {**DEFAULT_AGENT_BUDGETS, **(budgets or {})}
+    return PromptBudget(
+        max_prompt_tokens=merged.get(agent),
+        overview_tokens=overview_tokens,
+        context_tokens=context_tokens,
+        counter=create_token_counter(tokenizer),
+    )
@@ -214,7 +214,22 @@ The clarification_question should be concise and helpful. Ask about what type of
 3. When in doubt between "movies" and "hybrid", prefer "movies" for simpler requests
 4. Always populate rag_query for "rag" and "hybrid" routes
 5. Always extract BOTH constraints AND search_query for "movies" and "hybrid" routes
-6. Extract as much search-relevant information as possible - this improves movie discovery"""
+6. Extract as much search-relevant information as possible - this improves movie discovery
+7. Set confidence (0.0 to 1.0) to how sure you are about the route and extracted constraints
+
+## Follow-up Messages
+
+The conversation so far may be given before the user's message. When the message
+refines the previous movie request (e.g. "something shorter", "not that one",
+"same but funnier"), set is_refinement=true and extract only the constraints and
+search signals the message adds or changes; the previous ones are kept automatically.
+A message that starts a new, unrelated request is not a refinement."""
+
+
+INPUT_CONVERSATION_CONTEXT_TEMPLATE = """Conversation so far:
+{history}
+
+Classify the next message in this conversation."""
 
 
 MOVIES_RESPONDER_SYSTEM_PROMPT = """You are the Movie Night Assistant, helping users find movies to watch.
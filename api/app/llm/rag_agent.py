@@ -11,12 +11,18 @@ from abc import ABC, abstractmethod
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
 
+from app.llm.prompt_budget import PromptBudget, PromptSection, assemble_prompt
 from app.llm.prompts import RAG_ASSISTANT_SYSTEM_PROMPT
 from app.rag.retriever import DocumentRetriever
 from app.schemas.domain import RetrievedContext
 
 logger = logging.getLogger(__name__)
 
+RAG_TASK_INSTRUCTIONS = """## Instructions
+Answer the user's question based on the retrieved documentation below.
+If the documentation doesn't contain relevant information, say so honestly.
+Do not make up information that isn't in the documentation."""
+
 
 class RAGAssistantAgent(ABC):
     """Abstract base class for RAG assistant agents.
@@ -89,13 +95,18 @@ class LLMRAGAssistantAgent(RAGAssistantAgent):
     context from the knowledge base.
     """
 
-    def __init__(self, llm: AzureChatOpenAI) -> None:
+    def __init__(
+        self, llm: AzureChatOpenAI, budget: PromptBudget | None = None
+    ) -> None:
         """Initialize the RAG assistant with a chat model.
 
         Args:
             llm: Azure OpenAI chat model instance.
+            budget: Optional prompt token budget. ``context_tokens`` caps
+                the retrieved documentation included in the prompt.
         """
         self._llm = llm
+        self._budget = budget or PromptBudget()
 
     def answer(
         self,
@@ -120,20 +131,24 @@ class LLMRAGAssistantAgent(RAGAssistantAgent):
             HumanMessage(content=user_prompt),
         ]
 
-        logger.info(f"RAGAssistant request: {query}")
+        logger.debug("RAGAssistant request: %s", query)
         start_time = time.time()
         response = self._llm.invoke(messages)
         elapsed = time.time() - start_time
         reply = str(response.content)
-        logger.info(f"RAGAssistant response ({elapsed:.2f}s): {reply[:100]}...")
+        logger.debug("RAGAssistant response (%.2fs): %s", elapsed, reply)
 
         return reply
 
     def _format_contexts(self, contexts: list[RetrievedContext]) -> str:
         """Format retrieved contexts for the prompt.
 
+        Contexts share ``budget.context_tokens``: each one gets an equal
+        share of what is left, so tokens unused by short chunks flow to the
+        ones after them. Chunks over their share are truncated.
+
         Args:
-            contexts: List of retrieved contexts.
+            contexts: List of retrieved contexts, most relevant first.
 
         Returns:
             Formatted context string.
@@ -141,22 +156,34 @@ class LLMRAGAssistantAgent(RAGAssistantAgent):
         if not contexts:
             return "No relevant documentation found."
 
+        remaining = self._budget.context_tokens
         formatted_parts = []
         for i, ctx in enumerate(contexts, 1):
             title = ctx.metadata.get("title", "Unknown")
             source = ctx.metadata.get("source_file", "unknown")
             score = ctx.relevance_score or 0.0
+            header = f"[Context {i}] Source: {source} | Title: {title} | Relevance: {score:.2f}"
 
-            formatted_parts.append(
-                f"[Context {i}] Source: {source} | Title: {title} | Relevance: {score:.2f}\n"
-                f"{ctx.content}"
+            share = remaining // (len(contexts) - i + 1)
+            content = self._budget.truncate(
+                ctx.content.strip(), share - self._budget.count(header)
             )
+            if not content:
+                logger.debug("RAGAssistant: context budget exhausted at context %d", i)
+                break
+            remaining -= self._budget.count(header) + self._budget.count(content)
+            formatted_parts.append(f"{header}\n{content}")
 
+        if not formatted_parts:
+            return "No relevant documentation found."
         return "\n\n---\n\n".join(formatted_parts)
 
     def _build_user_prompt(self, query: str, context_text: str) -> str:
         """Build the user prompt with query and context.
 
+        The static instructions come first so consecutive requests share
+        the longest possible prompt prefix.
+
         Args:
             query: The user's question.
             context_text: Formatted context text.
@@ -164,13 +191,15 @@ class LLMRAGAssistantAgent(RAGAssistantAgent):
         Returns:
             The complete user prompt.
         """
-        return f"""## User Question
-{query}
-
-## Retrieved Documentation
-{context_text}
-
-## Instructions
-Answer the user's question based on the retrieved documentation above.
-If the documentation doesn't contain relevant information, say so honestly.
-Do not make up information that isn't in the documentation."""
+        return assemble_prompt(
+            [
+                PromptSection(RAG_TASK_INSTRUCTIONS, static=True),
+                PromptSection(f"## User Question\n{query}"),
+                PromptSection(
+                    f"## Retrieved Documentation\n{context_text}",
+                    compressible=True,
+                    min_tokens=64,
+                ),
+            ],
+            self._budget,
+        )
@@ -13,6 +13,10 @@ Implementations:
     - :class:`RecommendationWriterAgent`: abstract base
     - :class:`StubRecommendationWriterAgent`: deterministic, LLM-free
     - :class:`LLMRecommendationWriterAgent`: deterministic selection + LLM text
+
+Writers can also produce a :class:`DraftStream`, which exposes the selected
+movie up front and yields the recommendation text incrementally. The
+optimistic streaming path uses it to show text before evaluation finishes.
 """
 
 from __future__ import annotations
@@ -20,6 +24,8 @@ from __future__ import annotations
 import logging
 import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
@@ -31,13 +37,25 @@ from app.llm.candidate_selector import (
     prioritize_candidates,
     select_best_candidate,
 )
+from app.llm.prompt_budget import (
+    PromptBudget,
+    PromptSection,
+    assemble_prompt,
+    movie_section,
+)
 from app.llm.prompts import RECOMMENDATION_WRITER_SYSTEM_PROMPT
 from app.schemas.domain import DraftRecommendation, MovieResult
 from app.schemas.orchestrator import Constraints
 
 logger = logging.getLogger(__name__)
 
+WRITER_TASK_INSTRUCTION = (
+    "Write the recommendation text for the selected movie below, "
+    "following the grounding and style rules."
+)
+
 __all__ = [
+    "DraftStream",
     "RecommendationWriterAgent",
     "StubRecommendationWriterAgent",
     "LLMRecommendationWriterAgent",
@@ -48,6 +66,21 @@ __all__ = [
 ]
 
 
+@dataclass
+class DraftStream:
+    """A draft whose text is produced incrementally.
+
+    Attributes:
+        movie: The selected movie (known before any text is produced).
+        reasoning: Deterministic reasoning for the selection.
+        chunks: Iterator yielding pieces of the recommendation text.
+    """
+
+    movie: MovieResult
+    reasoning: str
+    chunks: Iterator[str]
+
+
 class RecommendationWriterAgent(ABC):
     """Abstract writer that turns candidates into a :class:`DraftRecommendation`.
 
@@ -76,6 +109,32 @@ class RecommendationWriterAgent(ABC):
             candidate could be selected (caller should handle gracefully).
         """
 
+    def write_stream(
+        self,
+        user_message: str,
+        constraints: Constraints,
+        candidates: list[MovieResult],
+        rejected_titles: list[str] | None = None,
+    ) -> DraftStream | None:
+        """Produce a draft whose text is yielded incrementally.
+
+        The default implementation calls :meth:`write` and yields the full
+        text as a single chunk. Writers backed by a streaming model should
+        override it.
+
+        Returns:
+            A :class:`DraftStream`, or ``None`` if no candidate could be
+            selected.
+        """
+        draft = self.write(user_message, constraints, candidates, rejected_titles)
+        if draft is None:
+            return None
+        return DraftStream(
+            movie=draft.movie,
+            reasoning=draft.reasoning or "",
+            chunks=iter([draft.recommendation_text]),
+        )
+
 
 class StubRecommendationWriterAgent(RecommendationWriterAgent):
     """Deterministic, LLM-free writer suitable for tests and offline mode.
@@ -92,14 +151,14 @@ class StubRecommendationWriterAgent(RecommendationWriterAgent):
         candidates: list[MovieResult],
         rejected_titles: list[str] | None = None,
     ) -> DraftRecommendation | None:
-        logger.info(
-            "StubRecommendationWriter composing draft "
-            f"(candidates={len(candidates)}, rejected={len(rejected_titles or [])})"
+        logger.debug(
+            "StubRecommendationWriter composing draft (candidates=%d, rejected=%d)",
+            len(candidates), len(rejected_titles or []),
         )
 
         movie = select_best_candidate(candidates, constraints, rejected_titles)
         if movie is None:
-            logger.info("StubRecommendationWriter: no candidate survived filtering")
+            logger.debug("StubRecommendationWriter: no candidate survived filtering")
             return None
 
         text = build_deterministic_recommendation_text(movie, constraints)
@@ -120,13 +179,18 @@ class LLMRecommendationWriterAgent(RecommendationWriterAgent):
     behavior is predictable and easy to reason about.
     """
 
-    def __init__(self, llm: AzureChatOpenAI) -> None:
+    def __init__(
+        self, llm: AzureChatOpenAI, budget: PromptBudget | None = None
+    ) -> None:
         """Initialize with a chat model.
 
         Args:
             llm: Azure OpenAI chat model instance.
+            budget: Optional prompt token budget; defaults to no overall
+                limit with truncated overviews.
         """
         self._llm = llm
+        self._budget = budget or PromptBudget()
 
     def write(
         self,
@@ -135,14 +199,14 @@ class LLMRecommendationWriterAgent(RecommendationWriterAgent):
         candidates: list[MovieResult],
         rejected_titles: list[str] | None = None,
     ) -> DraftRecommendation | None:
-        logger.info(
-            "LLMRecommendationWriter composing draft "
-            f"(candidates={len(candidates)}, rejected={len(rejected_titles or [])})"
+        logger.debug(
+            "LLMRecommendationWriter composing draft (candidates=%d, rejected=%d)",
+            len(candidates), len(rejected_titles or []),
         )
 
         movie = select_best_candidate(candidates, constraints, rejected_titles)
         if movie is None:
-            logger.info("LLMRecommendationWriter: no candidate survived filtering")
+            logger.debug("LLMRecommendationWriter: no candidate survived filtering")
             return None
 
         reasoning = build_reasoning(movie, constraints)
@@ -162,6 +226,76 @@ class LLMRecommendationWriterAgent(RecommendationWriterAgent):
             reasoning=reasoning,
         )
 
+    def write_stream(
+        self,
+        user_message: str,
+        constraints: Constraints,
+        candidates: list[MovieResult],
+        rejected_titles: list[str] | None = None,
+    ) -> DraftStream | None:
+        logger.debug(
+            "LLMRecommendationWriter streaming draft (candidates=%d, rejected=%d)",
+            len(candidates), len(rejected_titles or []),
+        )
+
+        movie = select_best_candidate(candidates, constraints, rejected_titles)
+        if movie is None:
+            logger.debug("LLMRecommendationWriter: no candidate survived filtering")
+            return None
+
+        return DraftStream(
+            movie=movie,
+            reasoning=build_reasoning(movie, constraints),
+            chunks=self._stream_text(
+                user_message, constraints, movie, rejected_titles
+            ),
+        )
+
+    def _stream_text(
+        self,
+        user_message: str,
+        constraints: Constraints,
+        movie: MovieResult,
+        rejected_titles: list[str] | None,
+    ) -> Iterator[str]:
+        """Stream the grounded recommendation text from the LLM.
+
+        If the model fails before producing any text, the deterministic
+        text is yielded instead. Failures after the first token propagate
+        so the caller can retract what was already shown.
+        """
+        messages = [
+            SystemMessage(content=RECOMMENDATION_WRITER_SYSTEM_PROMPT),
+            HumanMessage(
+                content=self._build_prompt(
+                    user_message, constraints, movie, rejected_titles
+                )
+            ),
+        ]
+
+        start = time.time()
+        emitted = False
+        try:
+            for chunk in self._llm.stream(messages):
+                text = str(chunk.content)
+                if not text:
+                    continue
+                emitted = True
+                yield text
+        except Exception as exc:
+            if emitted:
+                raise
+            logger.warning(
+                f"LLMRecommendationWriter stream failed ({exc}); "
+                "falling back to deterministic text"
+            )
+
+        if not emitted:
+            yield build_deterministic_recommendation_text(movie, constraints)
+            return
+
+        logger.debug("LLMRecommendationWriter stream completed (%.2fs)", time.time() - start)
+
     def _write_text(
         self,
         user_message: str,
@@ -183,7 +317,7 @@ class LLMRecommendationWriterAgent(RecommendationWriterAgent):
         response = self._llm.invoke(messages)
         elapsed = time.time() - start
         reply = str(response.content).strip()
-        logger.info(f"LLMRecommendationWriter response ({elapsed:.2f}s): {reply}")
+        logger.debug("LLMRecommendationWriter response (%.2fs): %s", elapsed, reply)
 
         if not reply:
             logger.warning("LLM returned empty text; falling back to deterministic")
@@ -198,21 +332,31 @@ class LLMRecommendationWriterAgent(RecommendationWriterAgent):
         movie: MovieResult,
         rejected_titles: list[str] | None,
     ) -> str:
-        """Build the user prompt for the LLM."""
-        constraints_text = self._format_constraints(constraints)
-        movie_block = self._format_movie(movie)
-        rejected_block = ", ".join(rejected_titles) if rejected_titles else "(none)"
-
-        return (
-            f"User request: {user_message}\n\n"
-            f"User constraints:\n{constraints_text}\n\n"
-            f"Selected movie (you MUST only talk about this movie):\n{movie_block}\n\n"
-            f"Rejected titles (never mention):\n{rejected_block}\n\n"
-            "Write the recommendation text now."
-        )
+        """Build the user prompt for the LLM.
+
+        The static instruction comes first so consecutive requests share
+        the longest possible prompt prefix; empty sections are omitted.
+        """
+        sections = [
+            PromptSection(WRITER_TASK_INSTRUCTION, static=True),
+            PromptSection(f"User request: {user_message}"),
+            PromptSection(self._format_constraints(constraints)),
+            movie_section(
+                "Selected movie (you MUST only talk about this movie):",
+                movie,
+                self._budget,
+            ),
+        ]
+        if rejected_titles:
+            sections.append(
+                PromptSection(
+                    f"Rejected titles (never mention):\n{', '.join(rejected_titles)}"
+                )
+            )
+        return assemble_prompt(sections, self._budget)
 
     def _format_constraints(self, constraints: Constraints) -> str:
-        """Format constraints for the prompt."""
+        """Format constraints for the prompt (empty when none were detected)."""
         lines: list[str] = []
         if constraints.genres:
             lines.append(f"- genres: {', '.join(constraints.genres)}")
@@ -220,24 +364,4 @@ class LLMRecommendationWriterAgent(RecommendationWriterAgent):
             lines.append(f"- max runtime: {constraints.max_runtime_minutes} min")
         if constraints.min_runtime_minutes:
             lines.append(f"- min runtime: {constraints.min_runtime_minutes} min")
-        return "\n".join(lines) if lines else "- (none detected)"
-
-    def _format_movie(self, movie: MovieResult) -> str:
-        """Format movie data for the prompt."""
-        lines = [
-            f"- title: {movie.title}",
-            f"- year: {movie.year if movie.year is not None else 'unknown'}",
-            f"- genres: {', '.join(movie.genres) if movie.genres else 'unknown'}",
-            (
-                f"- runtime: {movie.runtime_minutes} min"
-                if movie.runtime_minutes is not None
-                else "- runtime: unknown"
-            ),
-            (
-                f"- rating: {movie.rating:.1f}/10"
-                if movie.rating is not None
-                else "- rating: unknown"
-            ),
-            f"- overview: {movie.overview or 'not available'}",
-        ]
-        return "\n".join(lines)
+        return "User constraints:\n" + "\n".join(lines) if lines else ""
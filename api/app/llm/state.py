@@ -5,7 +5,7 @@ workflow to maintain state across nodes. It also defines configuration
 constants for the workflow behavior.
 """
 
-from typing import Annotated, Literal, TypedDict
+from typing import Annotated, Any, Literal, TypedDict
 
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
@@ -17,10 +17,14 @@ from app.schemas.domain import (
     RetrievedContext,
 )
 from app.schemas.orchestrator import Constraints, MovieSearchQuery
+from app.sessions.models import SessionState
 
 MAX_RETRIES: int = 3
 PASS_THRESHOLD: float = 0.7
 MAX_MOVIE_SEARCHES: int = 5
+MIN_LLM_NODE_SECONDS: float = 3.0
+DEGRADED_FINDER_LOOKUPS: int = 2
+RAG_ANSWER_CACHE_SIZE: int = 256
 
 RouteType = Literal["movies", "rag", "hybrid", "clarification"]
 
@@ -48,6 +52,19 @@ class MovieNightState(TypedDict, total=False):
         rejected_titles: Movie titles that were rejected during evaluation.
         final_response: The final response to return to the user.
         error: Error message if something went wrong.
+        token_usage: Aggregated LLM token usage and cost for the request.
+        timings: Per-request timing breakdown (nodes, LLM calls, TMDB
+            requests and a waterfall), see :mod:`app.observability.timings`.
+        deadline_at: Wall-clock time (``time.time()``) by which the request
+            must be answered, or None for no deadline.
+        degraded_nodes: Nodes that skipped their LLM call (or, for
+            ``find_movies``, some of its lookups) to meet the deadline or
+            because the workflow is degraded.
+        degradation_level: Degradation level the request runs at, see
+            :mod:`app.resilience.degradation`.
+        session: Conversation memory of the request's session, if any.
+        is_refinement: Whether the message refines the session's previous
+            movie request.
     """
 
     messages: Annotated[list[BaseMessage], add_messages]
@@ -65,6 +82,13 @@ class MovieNightState(TypedDict, total=False):
     rejected_titles: list[str]
     final_response: str | None
     error: str | None
+    token_usage: dict[str, Any] | None
+    timings: dict[str, Any] | None
+    deadline_at: float | None
+    degraded_nodes: list[str]
+    degradation_level: int
+    session: SessionState | None
+    is_refinement: bool
 
 
 def create_initial_state(user_message: str) -> MovieNightState:
@@ -92,4 +116,11 @@ def create_initial_state(user_message: str) -> MovieNightState:
         rejected_titles=[],
         final_response=None,
         error=None,
+        token_usage=None,
+        timings=None,
+        deadline_at=None,
+        degraded_nodes=[],
+        degradation_level=0,
+        session=None,
+        is_refinement=False,
     )
@@ -0,0 +1,73 @@
+"""Adaptive model tiering for the Movie Night Assistant.
+
+Routing and evaluation run on a small, fast deployment by default (see
+``AGENT_MODELS``). An :class:`EscalationPolicy` decides when an answer from
+the small model is too uncertain to trust, in which case the agent repeats
+the call on the large deployment:
+
+- the input agent escalates when its routing ``confidence`` is below
+  ``input_confidence`` (a missing confidence is not treated as low)
+- the evaluator escalates when its score lies within ``uncertainty_band``
+  of the workflow's pass threshold (:data:`app.llm.state.PASS_THRESHOLD`
+  unless the workflow sets another), or when its ``passed`` flag
+  disagrees with the threshold
+
+Escalations are counted in the ``llm_escalations_total`` metric.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+from app.llm.state import PASS_THRESHOLD
+from app.observability.metrics import Counter
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import InputDecision
+
+logger = logging.getLogger(__name__)
+
+LLM_ESCALATIONS = Counter(
+    "llm_escalations_total",
+    "LLM calls repeated on the escalation deployment",
+    ["agent", "reason"],
+)
+
+
+@dataclass(frozen=True)
+class EscalationPolicy:
+    """Thresholds for escalating from the small to the large model.
+
+    Attributes:
+        input_confidence: Routing confidence below which the input agent
+            escalates.
+        uncertainty_band: Maximum distance between an evaluator score and
+            ``pass_threshold`` that is considered uncertain.
+        pass_threshold: Score the workflow requires to accept a draft.
+    """
+
+    input_confidence: float = 0.6
+    uncertainty_band: float = 0.1
+    pass_threshold: float = PASS_THRESHOLD
+
+    def decision_escalation_reason(self, decision: InputDecision) -> str | None:
+        """Return why a routing decision should be escalated, or None."""
+        if decision.confidence is not None and decision.confidence < self.input_confidence:
+            return "low_confidence"
+        return None
+
+    def evaluation_escalation_reason(self, result: EvaluationResult) -> str | None:
+        """Return why an evaluation should be escalated, or None."""
+        if result.constraint_violations:
+            return None
+        if abs(result.score - self.pass_threshold) <= self.uncertainty_band:
+            return "borderline_score"
+        if result.passed != (result.score >= self.pass_threshold):
+            return "inconsistent_verdict"
+        return None
+
+
+def record_escalation(agent: str, reason: str) -> None:
+    """Count an escalation and log it."""
+    LLM_ESCALATIONS.labels(agent=agent, reason=reason).inc()
+    logger.info("Escalating %s call to the large model (%s)", agent, reason)
@@ -5,6 +5,7 @@ This package contains the workflow implementation split into focused modules:
 - :mod:`nodes`: Node creation functions for each workflow step
 - :mod:`routing`: Routing decision functions for conditional edges
 - :mod:`formatters`: Response formatting utilities
+- :mod:`streaming`: Optimistic stream-then-verify execution for the movies route
 - :mod:`graph_builder`: The main MovieNightWorkflow class
 
 Example usage::
@@ -22,29 +23,75 @@ Example usage::
     result = workflow.invoke("Recommend a comedy movie")
 """
 
-from app.llm.workflow.formatters import (
-    NO_MOVIES_FOUND_MESSAGE,
-    RETRY_EXHAUSTED_FALLBACK_MESSAGE,
-    format_candidate_list_response,
-)
-from app.llm.workflow.graph_builder import MovieNightWorkflow
-from app.llm.workflow.nodes import (
-    create_evaluate_node,
-    create_find_movies_node,
-    create_input_orchestrate_node,
-    create_orchestrate_node,
-    create_rag_respond_node,
-    create_rag_retrieve_node,
-    create_respond_node,
-    create_write_recommendation_node,
-)
-from app.llm.workflow.routing import (
-    route_after_evaluate,
-    route_after_orchestrate,
-    route_after_orchestrate_with_rag,
-    route_after_find_movies_for_hybrid,
-    should_respond,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# Submodules pull in langchain, langgraph and the Azure OpenAI SDK, so
+# exports are imported on first access to keep ``import app`` cheap.
+if TYPE_CHECKING:
+    from app.llm.workflow.formatters import (
+        NO_MOVIES_FOUND_MESSAGE,
+        RETRY_EXHAUSTED_FALLBACK_MESSAGE,
+        build_debug_info,
+        format_candidate_list_response,
+        to_public_route,
+    )
+    from app.llm.workflow.graph_builder import MovieNightWorkflow
+    from app.llm.workflow.nodes import (
+        create_evaluate_node,
+        create_find_movies_node,
+        create_input_orchestrate_node,
+        create_orchestrate_node,
+        create_rag_respond_node,
+        create_rag_retrieve_node,
+        create_respond_node,
+        create_write_recommendation_node,
+        instrument_node,
+    )
+    from app.llm.workflow.routing import (
+        create_route_after_evaluate,
+        route_after_evaluate,
+        route_after_orchestrate,
+        route_after_orchestrate_with_rag,
+        route_after_find_movies_for_hybrid,
+        should_respond,
+    )
+    from app.llm.workflow.streaming import stream_movie_recommendation
+
+_LAZY_IMPORTS = {
+    "NO_MOVIES_FOUND_MESSAGE": "app.llm.workflow.formatters",
+    "RETRY_EXHAUSTED_FALLBACK_MESSAGE": "app.llm.workflow.formatters",
+    "build_debug_info": "app.llm.workflow.formatters",
+    "format_candidate_list_response": "app.llm.workflow.formatters",
+    "to_public_route": "app.llm.workflow.formatters",
+    "MovieNightWorkflow": "app.llm.workflow.graph_builder",
+    "create_evaluate_node": "app.llm.workflow.nodes",
+    "create_find_movies_node": "app.llm.workflow.nodes",
+    "create_input_orchestrate_node": "app.llm.workflow.nodes",
+    "create_orchestrate_node": "app.llm.workflow.nodes",
+    "create_rag_respond_node": "app.llm.workflow.nodes",
+    "create_rag_retrieve_node": "app.llm.workflow.nodes",
+    "create_respond_node": "app.llm.workflow.nodes",
+    "create_write_recommendation_node": "app.llm.workflow.nodes",
+    "instrument_node": "app.llm.workflow.nodes",
+    "create_route_after_evaluate": "app.llm.workflow.routing",
+    "route_after_evaluate": "app.llm.workflow.routing",
+    "route_after_orchestrate": "app.llm.workflow.routing",
+    "route_after_orchestrate_with_rag": "app.llm.workflow.routing",
+    "route_after_find_movies_for_hybrid": "app.llm.workflow.routing",
+    "should_respond": "app.llm.workflow.routing",
+    "stream_movie_recommendation": "app.llm.workflow.streaming",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "MovieNightWorkflow",
@@ -56,12 +103,17 @@ __all__ = [
     "create_evaluate_node",
     "create_rag_retrieve_node",
     "create_rag_respond_node",
+    "instrument_node",
+    "create_route_after_evaluate",
     "route_after_evaluate",
     "route_after_orchestrate",
     "route_after_orchestrate_with_rag",
     "route_after_find_movies_for_hybrid",
     "should_respond",
     "format_candidate_list_response",
+    "build_debug_info",
+    "to_public_route",
+    "stream_movie_recommendation",
     "NO_MOVIES_FOUND_MESSAGE",
     "RETRY_EXHAUSTED_FALLBACK_MESSAGE",
 ]
@@ -0,0 +1,465 @@
+"""Checkpointing for resumable workflow runs.
+
+When the workflow is built with a checkpointer, every completed node is
+saved under the run's key. A request that failed or timed out part-way can
+then be retried with the same key and resumes after the last completed
+node, instead of repeating orchestration, TMDB searches and LLM calls.
+
+Two savers are available through :func:`create_checkpointer`:
+
+- ``memory``: :class:`ExpiringMemorySaver`, private to one process
+- ``sqlite``: :class:`SQLiteCheckpointSaver`, which also survives restarts
+
+Completed runs are deleted by the workflow. Runs that failed and were
+never retried are purged once they are older than the saver's TTL.
+
+Both use :class:`CompactSerializer`, which stores the workflow's domain
+models as msgpack arrays of field values instead of pydantic dumps with
+repeated module, class and field names. Values are validated when they are
+loaded; a checkpoint that no longer validates (e.g. written before a model
+changed) is discarded and the run starts over.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import closing, contextmanager
+from typing import Any
+
+import ormsgpack
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from pydantic import BaseModel
+
+from app.schemas.domain import (
+    DraftRecommendation,
+    EvaluationResult,
+    MovieResult,
+    RetrievedContext,
+)
+from app.schemas.orchestrator import Constraints, MovieSearchQuery
+from app.sessions.models import SessionState, SessionTurn
+
+logger = logging.getLogger(__name__)
+
+COMPACT_TYPE = "compact"
+_MODEL_EXT = 1
+
+# Append-only: codes are persisted, so never renumber or reuse them.
+COMPACT_MODELS: dict[int, type[BaseModel]] = {
+    1: MovieResult,
+    2: DraftRecommendation,
+    3: EvaluationResult,
+    4: RetrievedContext,
+    5: Constraints,
+    6: MovieSearchQuery,
+    7: SessionState,
+    8: SessionTurn,
+}
+
+
+class CheckpointDecodeError(ValueError):
+    """Raised when a stored checkpoint value cannot be decoded or validated."""
+
+
+class CompactSerializer:
+    """Checkpoint serializer with interned fields for the domain models.
+
+    Models listed in :data:`COMPACT_MODELS` are encoded as a msgpack
+    extension holding the model's code and its field values in declaration
+    order, so field names are stored once in the code rather than in every
+    record. Values containing anything else (e.g. LangChain messages) fall
+    back to LangGraph's default serializer.
+    """
+
+    def __init__(self, fallback: Any | None = None) -> None:
+        """Initialize the serializer.
+
+        Args:
+            fallback: Serializer for values the compact encoding cannot
+                handle (defaults to LangGraph's ``JsonPlusSerializer``).
+        """
+        self._fallback = fallback or JsonPlusSerializer()
+        self._codes = {model: code for code, model in COMPACT_MODELS.items()}
+        self._fields = {
+            model: tuple(model.model_fields) for model in COMPACT_MODELS.values()
+        }
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        try:
+            return COMPACT_TYPE, ormsgpack.packb(obj, default=self._default)
+        except TypeError:
+            return self._fallback.dumps_typed(obj)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == COMPACT_TYPE:
+            try:
+                return ormsgpack.unpackb(payload, ext_hook=self._ext_hook)
+            except ValueError as e:
+                raise CheckpointDecodeError(str(e)) from e
+        return self._fallback.loads_typed(data)
+
+    def _default(self, obj: Any) -> Any:
+        code = self._codes.get(type(obj))
+        if code is None:
+            raise TypeError(f"Cannot compact {type(obj).__name__}")
+        values = [getattr(obj, name) for name in self._fields[type(obj)]]
+        return ormsgpack.Ext(
+            _MODEL_EXT, ormsgpack.packb([code, values], default=self._default)
+        )
+
+    def _ext_hook(self, tag: int, payload: bytes) -> Any:
+        if tag != _MODEL_EXT:
+            raise ValueError(f"Unknown checkpoint extension {tag}")
+        code, values = ormsgpack.unpackb(payload, ext_hook=self._ext_hook)
+        model = COMPACT_MODELS.get(code)
+        if model is None:
+            raise ValueError(f"Unknown checkpoint model code {code}")
+        return model.model_validate(dict(zip(self._fields[model], values)))
+
+
+class ExpiringMemorySaver(InMemorySaver):
+    """``InMemorySaver`` that forgets abandoned threads.
+
+    Threads whose first checkpoint is older than ``ttl_seconds`` are
+    purged. Purging happens while checkpoints are written, at most once per
+    ``purge_interval_seconds``, so no background thread is needed. Reads,
+    writes and deletes share one lock, so a purge never removes a thread
+    while another request is reading or writing it. A thread whose latest
+    checkpoint cannot be decoded is deleted and reported as missing.
+    """
+
+    def __init__(
+        self,
+        serde: Any | None = None,
+        ttl_seconds: float = 3600.0,
+        purge_interval_seconds: float = 60.0,
+    ) -> None:
+        """Initialize the saver.
+
+        Args:
+            serde: Serializer (defaults to :class:`CompactSerializer`).
+            ttl_seconds: Age after which abandoned threads are purged.
+            purge_interval_seconds: Minimum time between two purges.
+        """
+        super().__init__(serde=serde or CompactSerializer())
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self._started: dict[str, float] = {}
+        self._next_purge = time.time() + purge_interval_seconds
+        self._lock = threading.RLock()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with self._lock:
+            try:
+                return super().get_tuple(config)
+            except CheckpointDecodeError as e:
+                self._discard(config["configurable"]["thread_id"], e)
+                return None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            try:
+                return iter([
+                    *super().list(config, filter=filter, before=before, limit=limit)
+                ])
+            except CheckpointDecodeError as e:
+                if config is None:
+                    raise
+                self._discard(config["configurable"]["thread_id"], e)
+                return iter([])
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        now = time.time()
+        with self._lock:
+            self._maybe_purge(now)
+            self._started.setdefault(config["configurable"]["thread_id"], now)
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._started.pop(thread_id, None)
+
+    def purge_expired(self) -> None:
+        """Delete threads whose first checkpoint is older than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                thread_id
+                for thread_id, started in self._started.items()
+                if started < cutoff
+            ]
+            for thread_id in expired:
+                self.delete_thread(thread_id)
+        if expired:
+            logger.info(f"Purged {len(expired)} expired checkpoint threads")
+
+    def _maybe_purge(self, now: float) -> None:
+        """Purge expired threads if the purge interval has elapsed."""
+        with self._lock:
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval_seconds
+            self.purge_expired()
+
+    def _discard(self, thread_id: str, error: CheckpointDecodeError) -> None:
+        """Delete a thread whose checkpoint can no longer be loaded."""
+        logger.warning(
+            "Discarding checkpoint thread %s that cannot be loaded: %s", thread_id, error
+        )
+        self.delete_thread(thread_id)
+
+
+class SQLiteCheckpointSaver(ExpiringMemorySaver):
+    """Checkpoint saver that writes through to a SQLite database.
+
+    Checkpoints are kept in memory like ``InMemorySaver`` and every write is
+    also stored in SQLite. A thread that is not in memory (e.g. after a
+    restart, or when another worker served the first attempt) is loaded from
+    the database on first access. Threads older than ``ttl_seconds`` are
+    purged on startup and then periodically while checkpoints are written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        serde: Any | None = None,
+        ttl_seconds: float = 3600.0,
+        purge_interval_seconds: float = 60.0,
+    ) -> None:
+        """Initialize the saver, creating its tables if needed.
+
+        Args:
+            path: Database file path.
+            serde: Serializer (defaults to :class:`CompactSerializer`).
+            ttl_seconds: Age after which abandoned threads are purged.
+            purge_interval_seconds: Minimum time between two purges.
+        """
+        super().__init__(
+            serde=serde,
+            ttl_seconds=ttl_seconds,
+            purge_interval_seconds=purge_interval_seconds,
+        )
+        self.path = path
+        self._loaded: set[str] = set()
+        with self._connect() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT,"
+                " type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB,"
+                " parent_id TEXT, created_at REAL,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " thread_id TEXT, checkpoint_ns TEXT, channel TEXT, version TEXT,"
+                " type TEXT, value BLOB,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+                "CREATE TABLE IF NOT EXISTS writes ("
+                " thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT,"
+                " task_id TEXT, idx INTEGER, channel TEXT, type TEXT, value BLOB,"
+                " task_path TEXT,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+            )
+        self.purge_expired()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and is closed afterwards."""
+        with closing(sqlite3.connect(self.path, timeout=5.0)) as conn, conn:
+            yield conn
+
+    def purge_expired(self) -> None:
+        """Delete threads whose first stored checkpoint is older than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            with self._connect() as conn:
+                expired = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT thread_id FROM checkpoints GROUP BY thread_id "
+                        "HAVING MIN(created_at) < ?",
+                        (cutoff,),
+                    )
+                ]
+            for thread_id in expired:
+                self.delete_thread(thread_id)
+        if expired:
+            logger.info(f"Purged {len(expired)} expired checkpoint threads")
+
+    def _hydrate(self, thread_id: str) -> None:
+        """Load a thread's rows into memory unless already loaded."""
+        with self._lock:
+            if thread_id in self._loaded:
+                return
+            self._loaded.add(thread_id)
+            with self._connect() as conn:
+                for ns, cid, type_, data, mtype, mdata, parent in conn.execute(
+                    "SELECT checkpoint_ns, checkpoint_id, type, checkpoint,"
+                    " metadata_type, metadata, parent_id FROM checkpoints"
+                    " WHERE thread_id = ?",
+                    (thread_id,),
+                ):
+                    self.storage[thread_id][ns][cid] = (
+                        (type_, data),
+                        (mtype, mdata),
+                        parent,
+                    )
+                for ns, channel, version, type_, value in conn.execute(
+                    "SELECT checkpoint_ns, channel, version, type, value FROM blobs"
+                    " WHERE thread_id = ?",
+                    (thread_id,),
+                ):
+                    self.blobs[(thread_id, ns, channel, version)] = (type_, value)
+                for ns, cid, task_id, idx, channel, type_, value, path in conn.execute(
+                    "SELECT checkpoint_ns, checkpoint_id, task_id, idx, channel,"
+                    " type, value, task_path FROM writes WHERE thread_id = ?",
+                    (thread_id,),
+                ):
+                    self.writes[(thread_id, ns, cid)][(task_id, idx)] = (
+                        task_id,
+                        channel,
+                        (type_, value),
+                        path,
+                    )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with self._lock:
+            self._hydrate(config["configurable"]["thread_id"])
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config is not None:
+                self._hydrate(config["configurable"]["thread_id"])
+            return super().list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._hydrate(thread_id)
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            ns = config["configurable"]["checkpoint_ns"]
+            (type_, data), (mtype, mdata), parent = self.storage[thread_id][ns][
+                checkpoint["id"]
+            ]
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint["id"], type_, data, mtype, mdata, parent,
+                     time.time()),
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (thread_id, ns, channel, str(version),
+                         *self.blobs[(thread_id, ns, channel, version)])
+                        for channel, version in new_versions.items()
+                    ],
+                )
+        return saved
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._hydrate(thread_id)
+            super().put_writes(config, writes, task_id, task_path)
+            ns = config["configurable"].get("checkpoint_ns", "")
+            checkpoint_id = config["configurable"]["checkpoint_id"]
+            stored = self.writes.get((thread_id, ns, checkpoint_id), {})
+            rows = [
+                (thread_id, ns, checkpoint_id, tid, idx, channel, type_, value, path)
+                for (tid, idx), (_, channel, (type_, value), path) in stored.items()
+                if tid == task_id
+            ]
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._loaded.discard(thread_id)
+            with self._connect() as conn:
+                for table in ("checkpoints", "blobs", "writes"):
+                    conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+
+def create_checkpointer(
+    backend: str, path: str = "checkpoints.db", ttl_seconds: float = 3600.0
+) -> BaseCheckpointSaver | None:
+    """Create a checkpoint saver for the workflow.
+
+    Args:
+        backend: ``"memory"``, ``"sqlite"`` or ``"none"``.
+        path: Database file for the sqlite backend.
+        ttl_seconds: Age after which abandoned threads are purged.
+
+    Returns:
+        The checkpoint saver, or None when checkpointing is disabled.
+    """
+    backend = backend.lower()
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        logger.info(f"Using SQLite workflow checkpoints at {path}")
+        return SQLiteCheckpointSaver(path, ttl_seconds=ttl_seconds)
+    if backend != "memory":
+        logger.warning(f"Unknown checkpointer '{backend}'; using memory")
+    return ExpiringMemorySaver(ttl_seconds=ttl_seconds)
@@ -5,10 +5,32 @@ responses. It is deliberately separated from workflow orchestration to
 keep formatting logic isolated and testable.
 """
 
-from app.schemas.domain import MovieResult
+from app.schemas.chat import DebugInfo
+from app.schemas.domain import MovieResult, RetrievedContext
 from app.schemas.orchestrator import Constraints
 
 
+def to_public_route(route: str | None) -> str | None:
+    """Map an internal workflow route to the route exposed by the API.
+
+    Clarifications are reported as ``movies`` and legacy ``system`` routes
+    as ``rag``; unknown routes map to ``None``.
+
+    Args:
+        route: The route stored in workflow state.
+
+    Returns:
+        The API-facing route value.
+    """
+    if route in ("movies", "rag", "hybrid"):
+        return route
+    if route == "clarification":
+        return "movies"
+    if route == "system":
+        return "rag"
+    return None
+
+
 def format_candidate_list_response(
     candidates: list[MovieResult],
     constraints: Constraints,
@@ -51,6 +73,34 @@ def format_candidate_list_response(
     return "\n".join(lines)
 
 
+def format_context_excerpt_response(contexts: list[RetrievedContext]) -> str:
+    """Answer a system question with excerpts from the retrieved contexts.
+
+    This is a fallback formatter used when there is no time left for the
+    RAG assistant's LLM call.
+
+    Args:
+        contexts: Retrieved contexts, most relevant first.
+
+    Returns:
+        Formatted response string.
+    """
+    if not contexts:
+        return (
+            "I don't have specific information about that in my knowledge base. "
+            "This is a Movie Night Assistant that helps you discover movies to watch."
+        )
+
+    lines = ["Here is what my knowledge base says about that:\n"]
+    for ctx in contexts[:2]:
+        content = ctx.content.strip()
+        excerpt = content[:400] + "..." if len(content) > 400 else content
+        lines.append(excerpt)
+        lines.append("")
+
+    return "\n".join(lines)
+
+
 NO_MOVIES_FOUND_MESSAGE = (
     "I couldn't find any movies matching your criteria. "
     "Try broadening your search or specifying different preferences."
@@ -61,3 +111,55 @@ RETRY_EXHAUSTED_FALLBACK_MESSAGE = (
     "quality bar for your request. Could you rephrase or loosen your "
     "preferences a little?"
 )
+
+
+def build_debug_info(result: dict) -> DebugInfo:
+    """Extract debug information from workflow result.
+
+    Args:
+        result: The complete workflow state after execution.
+
+    Returns:
+        DebugInfo with relevant debugging data.
+    """
+    retrieved_contexts = []
+    for ctx in result.get("retrieved_contexts", []) or []:
+        retrieved_contexts.append({
+            "content": ctx.content[:200] + "..." if len(ctx.content) > 200 else ctx.content,
+            "source": ctx.metadata.get("source_file", ctx.source),
+            "title": ctx.metadata.get("title", "Unknown"),
+            "relevance_score": ctx.relevance_score,
+        })
+
+    selected_movie = None
+    draft = result.get("draft_recommendation")
+    if draft is not None:
+        selected_movie = {
+            "title": draft.movie.title,
+            "year": draft.movie.year,
+            "genres": draft.movie.genres,
+            "rating": draft.movie.rating,
+            "runtime_minutes": draft.movie.runtime_minutes,
+        }
+
+    evaluation = None
+    eval_result = result.get("evaluation_result")
+    if eval_result is not None:
+        evaluation = {
+            "passed": eval_result.passed,
+            "score": eval_result.score,
+            "feedback": eval_result.feedback,
+            "constraint_violations": eval_result.constraint_violations,
+        }
+
+    return DebugInfo(
+        rag_query=result.get("rag_query"),
+        retrieved_contexts=retrieved_contexts,
+        selected_movie=selected_movie,
+        evaluation=evaluation,
+        retry_count=result.get("retry_count", 0) or 0,
+        rejected_titles=result.get("rejected_titles", []) or [],
+        token_usage=result.get("token_usage"),
+        timings=result.get("timings"),
+        degraded_nodes=result.get("degraded_nodes", []) or [],
+    )
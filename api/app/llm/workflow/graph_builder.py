@@ -6,12 +6,20 @@ manages the LangGraph StateGraph for the recommendation workflow.
 
 from __future__ import annotations
 
+import contextvars
 import logging
+import time
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import TYPE_CHECKING
 
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 
-from app.llm.state import MovieNightState
+from app.llm.state import MAX_RETRIES, PASS_THRESHOLD, MovieNightState
+from app.llm.workflow.formatters import to_public_route
 from app.llm.workflow.nodes import (
     create_evaluate_node,
     create_find_movies_node,
@@ -21,15 +29,36 @@ from app.llm.workflow.nodes import (
     create_rag_retrieve_node,
     create_respond_node,
     create_write_recommendation_node,
+    instrument_node,
 )
 from app.llm.workflow.routing import (
-    route_after_evaluate,
+    create_route_after_evaluate,
     route_after_orchestrate,
     route_after_orchestrate_with_rag,
     route_after_find_movies_for_hybrid,
     should_respond,
 )
+from app.llm.workflow.streaming import stream_movie_recommendation
+from app.observability.logs import current_request_id, request_id_scope
+from app.observability.metrics import Histogram
+from app.observability.timings import summarize_timings
+from app.observability.tracing import (
+    InMemorySpanExporter,
+    current_span,
+    record_spans,
+    start_span,
+)
+from app.observability.usage import UsageLedger, usage_ledger
+from app.resilience import (
+    BatchMemo,
+    Deadline,
+    batch_memo_scope,
+    current_degradation_level,
+    deadline_scope,
+)
+from app.schemas.chat import StreamEvent
 from app.schemas.orchestrator import Constraints
+from app.sessions import SessionState
 
 if TYPE_CHECKING:
     from app.agents import MoviesResponder, OrchestratorAgent, SystemResponder
@@ -42,6 +71,16 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Routes that get their own precompiled graph, dispatched to after
+# orchestration instead of going through the full graph's conditional edges.
+ROUTE_GRAPHS = ("movies", "hybrid", "rag")
+
+WORKFLOW_RUN_SECONDS = Histogram(
+    "workflow_run_duration_seconds",
+    "Time to run the workflow for one message, by the route it took",
+    ["route"],
+)
+
 
 class MovieNightWorkflow:
     """Wrapper class for the Movie Night Assistant LangGraph workflow.
@@ -70,6 +109,9 @@ class MovieNightWorkflow:
         evaluator: EvaluatorAgent | None = None,
         rag_retriever: DocumentRetriever | None = None,
         rag_agent: RAGAssistantAgent | None = None,
+        checkpointer: BaseCheckpointSaver | None = None,
+        max_retries: int = MAX_RETRIES,
+        pass_threshold: float = PASS_THRESHOLD,
     ) -> None:
         """Initialize the workflow with agent instances.
 
@@ -90,6 +132,15 @@ class MovieNightWorkflow:
                 Enables RAG-based responses for system questions.
             rag_agent: The RAGAssistantAgent for grounded answers from docs.
                 Must be provided with rag_retriever for RAG functionality.
+            checkpointer: Optional checkpoint saver. Runs invoked with a
+                ``run_key`` save each completed node and, when retried with
+                the same key after a failure, resume after the last one.
+            max_retries: Number of failed evaluations after which the
+                evaluator's retry loop gives up and the safe fallback is
+                returned.
+            pass_threshold: Minimum evaluator score for a draft to pass.
+                The evaluator is told the threshold too, so that it
+                escalates verdicts close to it.
         """
         self._orchestrator = orchestrator
         self._input_agent = input_agent
@@ -100,7 +151,18 @@ class MovieNightWorkflow:
         self._evaluator = evaluator
         self._rag_retriever = rag_retriever
         self._rag_agent = rag_agent
+        self._checkpointer = checkpointer
+        self._max_retries = max_retries
+        self._pass_threshold = pass_threshold
+        if evaluator is not None:
+            evaluator.set_pass_threshold(pass_threshold)
+        self._route_after_evaluate = create_route_after_evaluate(max_retries)
         self._graph = self._build_graph()
+        self._resumable_graph = (
+            self._builder.compile(checkpointer=checkpointer)
+            if checkpointer is not None
+            else None
+        )
 
     def _build_graph(self) -> StateGraph:
         """Build and compile the workflow graph.
@@ -112,20 +174,25 @@ class MovieNightWorkflow:
         RAG retrieval and response nodes are added for system questions
         and hybrid routes when rag_retriever and rag_agent are provided.
 
+        The builder is kept so a checkpointed variant can be compiled from it.
+        The per-route graphs used by :meth:`invoke` are compiled alongside
+        (see :meth:`_compile_route_graph`).
+
         Returns:
             Compiled StateGraph ready for execution.
         """
         builder = StateGraph(MovieNightState)
+        self._nodes = self._create_nodes()
 
-        orchestrate_node = self._create_orchestrate_node()
-        respond_node = create_respond_node(
-            self._movies_responder, self._system_responder
-        )
+        self._orchestrate_node = self._nodes["orchestrate"]
+        self._respond_node = self._nodes["respond"]
+        self._find_movies_node = self._nodes.get("find_movies")
+        self._evaluate_node = self._nodes.get("evaluate")
 
-        builder.add_node("orchestrate", orchestrate_node)
-        builder.add_node("respond", respond_node)
+        builder.add_node("orchestrate", self._orchestrate_node)
+        builder.add_node("respond", self._respond_node)
 
-        has_rag = self._rag_retriever is not None and self._rag_agent is not None
+        has_rag = "rag_retrieve" in self._nodes
 
         if has_rag:
             self._add_rag_nodes(builder)
@@ -135,30 +202,145 @@ class MovieNightWorkflow:
         else:
             self._build_graph_without_movie_finder(builder, has_rag)
 
+        self._builder = builder
+        self._route_graphs = {
+            route: self._compile_route_graph(route) for route in ROUTE_GRAPHS
+        }
+        return builder.compile()
+
+    def _create_nodes(self) -> dict[str, Callable[[MovieNightState], dict]]:
+        """Create the instrumented node functions for the configured agents.
+
+        Each node is created once and shared by the full graph and the
+        per-route graphs.
+        """
+        nodes = {
+            "orchestrate": instrument_node(
+                "orchestrate", self._create_orchestrate_node()
+            ),
+            "respond": instrument_node(
+                "respond",
+                create_respond_node(
+                    self._movies_responder, self._system_responder, self._max_retries
+                ),
+            ),
+        }
+        has_rag = self._rag_retriever is not None and self._rag_agent is not None
+        if has_rag:
+            nodes["rag_retrieve"] = instrument_node(
+                "rag_retrieve", create_rag_retrieve_node(self._rag_retriever)
+            )
+            nodes["rag_respond"] = instrument_node(
+                "rag_respond", create_rag_respond_node(self._rag_agent)
+            )
+        if self._movie_finder is None:
+            return nodes
+
+        nodes["find_movies"] = instrument_node(
+            "find_movies", create_find_movies_node(self._movie_finder)
+        )
+        if self._recommendation_writer is None:
+            return nodes
+
+        nodes["write_recommendation"] = instrument_node(
+            "write_recommendation",
+            create_write_recommendation_node(self._recommendation_writer),
+        )
+        if has_rag:
+            nodes["rag_retrieve_hybrid"] = instrument_node(
+                "rag_retrieve_hybrid", create_rag_retrieve_node(self._rag_retriever)
+            )
+        if self._evaluator is not None:
+            nodes["evaluate"] = instrument_node(
+                "evaluate",
+                create_evaluate_node(
+                    self._evaluator, self._max_retries, self._pass_threshold
+                ),
+            )
+        return nodes
+
+    def _route_steps(self, route: str) -> list[str]:
+        """The nodes a request on ``route`` runs through after orchestration.
+
+        Mirrors the conditional edges of the full graph for the configured
+        agents, so dispatching on the route gives the same result.
+        """
+        if route == "rag":
+            if "rag_retrieve" in self._nodes:
+                return ["rag_retrieve", "rag_respond"]
+            return ["respond"]
+
+        steps = []
+        if "find_movies" in self._nodes:
+            steps.append("find_movies")
+            if "write_recommendation" in self._nodes:
+                if route == "hybrid" and "rag_retrieve_hybrid" in self._nodes:
+                    steps.append("rag_retrieve_hybrid")
+                steps.append("write_recommendation")
+                if "evaluate" in self._nodes:
+                    steps.append("evaluate")
+        steps.append("respond")
+        return steps
+
+    def _compile_route_graph(self, route: str) -> CompiledStateGraph:
+        """Compile the graph for one route, without orchestration.
+
+        The steps run in a fixed order; the only conditional edge is the
+        evaluator's retry loop.
+        """
+        builder = StateGraph(MovieNightState)
+        steps = self._route_steps(route)
+        for name in steps:
+            builder.add_node(name, self._nodes[name])
+
+        builder.add_edge(START, steps[0])
+        for current, following in zip(steps, steps[1:]):
+            if current == "evaluate":
+                builder.add_conditional_edges(
+                    "evaluate",
+                    self._route_after_evaluate,
+                    {
+                        "respond": "respond",
+                        "write_recommendation": "write_recommendation",
+                    },
+                )
+            else:
+                builder.add_edge(current, following)
+        builder.add_edge(steps[-1], END)
         return builder.compile()
 
     def _create_orchestrate_node(self):
-        """Create the appropriate orchestrate node based on available agents."""
+        """Create the appropriate orchestrate node based on available agents.
+
+        The returned node is a no-op when the incoming state already carries
+        a route, so callers that ran orchestration themselves (e.g.
+        :meth:`stream`) can hand the state to the graph without paying for
+        a second classification.
+        """
         if self._input_agent is not None:
-            return create_input_orchestrate_node(self._input_agent)
+            node = create_input_orchestrate_node(self._input_agent)
         elif self._orchestrator is not None:
-            return create_orchestrate_node(self._orchestrator)
+            node = create_orchestrate_node(self._orchestrator)
         else:
             raise ValueError("Either orchestrator or input_agent must be provided")
 
+        def orchestrate(state: MovieNightState) -> dict:
+            if state.get("route") is not None:
+                return {}
+            return node(state)
+
+        return orchestrate
+
     def _add_rag_nodes(self, builder: StateGraph) -> None:
         """Add RAG retrieval and response nodes to the graph."""
-        rag_retrieve_node = create_rag_retrieve_node(self._rag_retriever)
-        rag_respond_node = create_rag_respond_node(self._rag_agent)
-        builder.add_node("rag_retrieve", rag_retrieve_node)
-        builder.add_node("rag_respond", rag_respond_node)
+        builder.add_node("rag_retrieve", self._nodes["rag_retrieve"])
+        builder.add_node("rag_respond", self._nodes["rag_respond"])
 
     def _build_graph_with_movie_finder(
         self, builder: StateGraph, has_rag: bool
     ) -> None:
         """Build graph edges when movie finder is available."""
-        find_movies_node = create_find_movies_node(self._movie_finder)
-        builder.add_node("find_movies", find_movies_node)
+        builder.add_node("find_movies", self._find_movies_node)
 
         builder.add_edge(START, "orchestrate")
 
@@ -193,8 +375,7 @@ class MovieNightWorkflow:
         self, builder: StateGraph, has_rag: bool
     ) -> None:
         """Add recommendation writer and optional evaluator nodes."""
-        write_node = create_write_recommendation_node(self._recommendation_writer)
-        builder.add_node("write_recommendation", write_node)
+        builder.add_node("write_recommendation", self._nodes["write_recommendation"])
 
         if has_rag:
             builder.add_conditional_edges(
@@ -205,8 +386,7 @@ class MovieNightWorkflow:
                     "write_recommendation": "write_recommendation",
                 },
             )
-            rag_retrieve_hybrid_node = create_rag_retrieve_node(self._rag_retriever)
-            builder.add_node("rag_retrieve_hybrid", rag_retrieve_hybrid_node)
+            builder.add_node("rag_retrieve_hybrid", self._nodes["rag_retrieve_hybrid"])
             builder.add_edge("rag_retrieve_hybrid", "write_recommendation")
         else:
             builder.add_edge("find_movies", "write_recommendation")
@@ -218,12 +398,11 @@ class MovieNightWorkflow:
 
     def _add_evaluator_pipeline(self, builder: StateGraph) -> None:
         """Add evaluator node with retry loop."""
-        evaluate_node = create_evaluate_node(self._evaluator)
-        builder.add_node("evaluate", evaluate_node)
+        builder.add_node("evaluate", self._evaluate_node)
         builder.add_edge("write_recommendation", "evaluate")
         builder.add_conditional_edges(
             "evaluate",
-            route_after_evaluate,
+            self._route_after_evaluate,
             {
                 "respond": "respond",
                 "write_recommendation": "write_recommendation",
@@ -253,16 +432,291 @@ class MovieNightWorkflow:
 
         builder.add_edge("respond", END)
 
-    def invoke(self, user_message: str) -> MovieNightState:
+    def invoke(
+        self,
+        user_message: str,
+        deadline: Deadline | None = None,
+        session: SessionState | None = None,
+        run_key: str | None = None,
+    ) -> MovieNightState:
         """Execute the workflow with a user message.
 
+        Orchestration runs first and the request is then dispatched to the
+        precompiled graph for its route. Checkpointed runs (``run_key`` with
+        a checkpointer) use the full graph so they can resume at any node.
+
         Args:
             user_message: The user's input message.
+            deadline: Optional request deadline. Nodes budget their LLM calls
+                against it and fall back to deterministic behavior when too
+                little time is left; LLM timeouts are capped at it.
+            session: Optional conversation memory. Follow-up messages that
+                refine the session's previous movie request reuse its
+                constraints and cached candidates.
+            run_key: Optional key identifying this request across client
+                retries. With a checkpointer configured, a retry of a run
+                that failed part-way resumes after its last completed node.
 
         Returns:
             The final workflow state containing the response.
         """
-        initial_state: MovieNightState = {
+        initial_state = self._initial_state(user_message, session)
+        if deadline is not None:
+            initial_state["deadline_at"] = deadline.expires_at
+
+        logger.debug("Workflow invoked with message: %s", user_message)
+        started_at = time.time()
+        started = time.perf_counter()
+        with usage_ledger() as ledger, deadline_scope(deadline), record_spans() as spans:
+            if run_key is not None and self._resumable_graph is not None:
+                result = self._invoke_resumable(initial_state, run_key)
+            else:
+                result = self._run_routed(initial_state)
+        self._finish_run(
+            "Workflow completed", result, ledger, spans,
+            started_at, time.perf_counter() - started,
+        )
+        return result
+
+    def _finish_run(
+        self,
+        message: str,
+        result: MovieNightState,
+        ledger: UsageLedger,
+        spans: InMemorySpanExporter,
+        started_at: float,
+        elapsed: float,
+    ) -> None:
+        """Add a run's token usage and timings to its final state and log it."""
+        result["token_usage"] = ledger.summary()
+        result["timings"] = summarize_timings(
+            spans.spans, started_at, elapsed, retries=result.get("retry_count", 0) or 0
+        )
+        WORKFLOW_RUN_SECONDS.labels(route=result.get("route") or "none").observe(elapsed)
+        logger.info(
+            message,
+            extra={
+                "route": result.get("route"),
+                "seconds": round(elapsed, 4),
+                "retries": result["timings"]["retries"],
+                "llm_calls": len(ledger.calls),
+                "tokens": result["token_usage"]["total_tokens"],
+                "nodes": {
+                    name: node["seconds"] for name, node in result["timings"]["nodes"].items()
+                },
+            },
+        )
+
+    def _run_routed(self, state: MovieNightState) -> MovieNightState:
+        """Orchestrate, then run the precompiled graph for the chosen route.
+
+        Routes without their own graph (e.g. clarification) go through the
+        full graph, whose orchestrate node is a no-op once a route is set.
+        """
+        state.update(self._orchestrate_node(state))
+        graph = self._route_graphs.get(state.get("route"), self._graph)
+        return graph.invoke(state)
+
+    def _invoke_resumable(
+        self, initial_state: MovieNightState, run_key: str
+    ) -> MovieNightState:
+        """Run the checkpointed graph, resuming an interrupted run if any.
+
+        The run's checkpoints are deleted once it completes, so a later
+        request with the same key starts fresh.
+        """
+        config = {"configurable": {"thread_id": run_key}}
+        snapshot = self._resumable_graph.get_state(config)
+
+        if snapshot.next:
+            logger.info("Resuming run %s at %s", run_key, list(snapshot.next))
+            self._resumable_graph.update_state(
+                config, {"deadline_at": initial_state.get("deadline_at")}
+            )
+            result = self._resumable_graph.invoke(None, config)
+        else:
+            result = self._resumable_graph.invoke(initial_state, config)
+
+        self._checkpointer.delete_thread(run_key)
+        return result
+
+    def batch(
+        self,
+        user_messages: Sequence[str],
+        max_concurrency: int = 4,
+        deadline_seconds: float | None = None,
+    ) -> Iterator[tuple[int, MovieNightState | Exception]]:
+        """Execute the workflow for many independent messages.
+
+        Messages run concurrently on up to ``max_concurrency`` threads and
+        share a :class:`BatchMemo`, so identical sub-queries across the
+        batch (orchestrator calls, TMDB requests, knowledge-base
+        retrievals) are computed once. A failing message does not affect
+        the others.
+
+        Args:
+            user_messages: The messages to process.
+            max_concurrency: Maximum number of messages in flight.
+            deadline_seconds: Optional time budget for each message,
+                counted from when it starts.
+
+        Yields:
+            ``(index, result)`` pairs in completion order, where ``result``
+            is the final state or the exception the message raised.
+        """
+        memo = BatchMemo()
+        parent = current_span()
+        request_id = current_request_id()
+
+        def run(index: int, user_message: str) -> MovieNightState:
+            deadline = (
+                Deadline.after(deadline_seconds) if deadline_seconds is not None else None
+            )
+            with (
+                start_span(
+                    "batch_item",
+                    {"batch.index": index},
+                    parent=parent.context if parent is not None else None,
+                ),
+                batch_memo_scope(memo),
+                request_id_scope(request_id),
+            ):
+                return self.invoke(user_message, deadline=deadline)
+
+        logger.debug(
+            "Workflow batch started: %d messages, concurrency=%d",
+            len(user_messages), max_concurrency,
+        )
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrency), thread_name_prefix="batch"
+        )
+        try:
+            futures = {
+                pool.submit(run, index, message): index
+                for index, message in enumerate(user_messages)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    yield index, future.result()
+                except Exception as e:
+                    logger.warning("Batch item %d failed: %s", index, e)
+                    yield index, e
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        logger.info(
+            "Workflow batch completed",
+            extra={
+                "messages": len(user_messages),
+                "memo_hits": memo.hits,
+                "memo_misses": memo.misses,
+            },
+        )
+
+    def stream(
+        self, user_message: str, deadline: Deadline | None = None
+    ) -> Iterator[StreamEvent]:
+        """Execute the workflow, streaming the movies route optimistically.
+
+        Orchestration runs first and a ``route`` event is emitted. For the
+        pure ``movies`` route (when a finder and writer are configured) the
+        writer's text is streamed as ``token`` events while evaluation runs
+        on the completed text; failed drafts are followed by a
+        ``retracted`` event and the retry's stream. All other routes run
+        through the compiled graph and emit a single ``final`` event.
+
+        As with :meth:`invoke`, nodes budget against ``deadline`` and the
+        run's token usage and node timings are recorded. The events are
+        produced in a context of their own, so the deadline, usage ledger
+        and spans carry over from one event to the next even when the
+        consumer (e.g. a streaming response) resumes the iterator from
+        different threads.
+
+        Args:
+            user_message: The user's input message.
+            deadline: Optional request deadline, as for :meth:`invoke`.
+
+        Yields:
+            :class:`StreamEvent` objects, ending with ``final``.
+        """
+        context = contextvars.copy_context()
+        events = self._stream(user_message, deadline)
+        try:
+            while True:
+                try:
+                    event = context.run(next, events)
+                except StopIteration:
+                    return
+                yield event
+        finally:
+            context.run(events.close)
+
+    def _stream(
+        self, user_message: str, deadline: Deadline | None
+    ) -> Iterator[StreamEvent]:
+        """The events of :meth:`stream`, run inside the request's scopes."""
+        state = self._initial_state(user_message)
+        if deadline is not None:
+            state["deadline_at"] = deadline.expires_at
+
+        logger.debug("Workflow streaming message: %s", user_message)
+        started_at = time.time()
+        started = time.perf_counter()
+        with usage_ledger() as ledger, deadline_scope(deadline), record_spans() as spans:
+            state.update(self._orchestrate_node(state))
+            route = state.get("route")
+
+            yield StreamEvent(
+                event="route",
+                route=to_public_route(route),
+                extracted_constraints=state.get("constraints"),
+            )
+
+            optimistic = (
+                route == "movies"
+                and self._find_movies_node is not None
+                and self._recommendation_writer is not None
+            )
+            if optimistic:
+                yield from stream_movie_recommendation(
+                    state,
+                    find_movies=self._find_movies_node,
+                    writer=self._recommendation_writer,
+                    evaluate=self._evaluate_node,
+                    respond=self._respond_node,
+                    max_retries=self._max_retries,
+                )
+                result = state
+            else:
+                result = self._route_graphs.get(route, self._graph).invoke(state)
+        self._finish_run(
+            "Workflow stream completed", result, ledger, spans,
+            started_at, time.perf_counter() - started,
+        )
+        if optimistic:
+            return
+
+        yield StreamEvent(
+            event="final",
+            route=to_public_route(result.get("route")),
+            reply=result.get("final_response"),
+            extracted_constraints=result.get("constraints"),
+        )
+
+    def _initial_state(
+        self, user_message: str, session: SessionState | None = None
+    ) -> MovieNightState:
+        """Build the initial state for a workflow run."""
+        messages = []
+        if session is not None:
+            messages = [
+                HumanMessage(content=turn.content)
+                if turn.role == "user"
+                else AIMessage(content=turn.content)
+                for turn in session.turns
+            ]
+        return {
+            "messages": messages,
             "user_message": user_message,
             "route": None,
             "constraints": None,
@@ -277,14 +731,15 @@ class MovieNightWorkflow:
             "rejected_titles": [],
             "final_response": None,
             "error": None,
+            "token_usage": None,
+            "timings": None,
+            "deadline_at": None,
+            "degraded_nodes": [],
+            "degradation_level": current_degradation_level(),
+            "session": session,
+            "is_refinement": False,
         }
 
-        logger.info(f"Workflow invoked with message: {user_message[:50]}...")
-        result = self._graph.invoke(initial_state)
-        logger.info("Workflow completed")
-
-        return result
-
     def get_response(
         self, user_message: str
     ) -> tuple[str, str | None, Constraints | None]:
@@ -8,17 +8,35 @@ on state.
 
 from __future__ import annotations
 
+import functools
 import logging
+import threading
+import time
+from collections import OrderedDict
 from typing import TYPE_CHECKING, Callable
 
-from app.llm.state import MAX_RETRIES, PASS_THRESHOLD, MovieNightState
+from app.llm.state import (
+    DEGRADED_FINDER_LOOKUPS,
+    MAX_RETRIES,
+    MIN_LLM_NODE_SECONDS,
+    PASS_THRESHOLD,
+    RAG_ANSWER_CACHE_SIZE,
+    MovieNightState,
+)
 from app.llm.workflow.formatters import (
     NO_MOVIES_FOUND_MESSAGE,
     RETRY_EXHAUSTED_FALLBACK_MESSAGE,
     format_candidate_list_response,
+    format_context_excerpt_response,
 )
+from app.observability.metrics import Counter, Gauge, Histogram
+from app.observability.profiling import profile_node
+from app.observability.tracing import start_span
+from app.observability.usage import node_scope
+from app.resilience import deadline_from_state, measure_active, memoized
 from app.schemas.domain import DraftRecommendation, EvaluationResult
 from app.schemas.orchestrator import Constraints
+from app.sessions import merge_constraints
 
 if TYPE_CHECKING:
     from app.agents import MoviesResponder, OrchestratorAgent, SystemResponder
@@ -31,6 +49,110 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+WORKFLOW_NODE_SECONDS = Histogram(
+    "workflow_node_duration_seconds",
+    "Time spent in each workflow node by outcome (ok, error)",
+    ["node", "outcome"],
+)
+EVALUATOR_VERDICTS = Counter(
+    "evaluator_verdicts_total",
+    "Draft recommendations judged by the evaluator (passed, failed)",
+    ["result"],
+)
+EVALUATOR_PASS_RATIO = Gauge(
+    "evaluator_pass_ratio",
+    "Fraction of draft recommendations that passed evaluation",
+)
+WORKFLOW_RETRIES = Histogram(
+    "workflow_recommendation_retries",
+    "Rewrites a recommendation needed before it passed or retries ran out",
+    buckets=tuple(range(MAX_RETRIES + 1)),
+)
+
+
+def instrument_node(
+    name: str,
+    node: Callable[[MovieNightState], dict],
+) -> Callable[[MovieNightState], dict]:
+    """Wrap a node so work done inside it is attributed to ``name``.
+
+    LLM calls made while the node runs are recorded against the node in the
+    request's usage ledger and in the exported metrics. The node runs in a
+    trace span of its own, its duration is observed in
+    ``workflow_node_duration_seconds`` and the CPU time of its thread in
+    ``workflow_node_cpu_seconds_total``.
+
+    Args:
+        name: The graph node name.
+        node: The node function to wrap.
+
+    Returns:
+        A node function with the same signature.
+    """
+
+    @functools.wraps(node)
+    def instrumented(state: MovieNightState) -> dict:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with (
+                start_span(name, {"workflow.node": name}),
+                node_scope(name),
+                profile_node(name),
+            ):
+                updates = node(state)
+            outcome = "ok"
+            return updates
+        finally:
+            WORKFLOW_NODE_SECONDS.labels(node=name, outcome=outcome).observe(
+                time.perf_counter() - started
+            )
+
+    return instrumented
+
+
+def _record_verdict(passed: bool) -> None:
+    """Count an evaluator verdict and refresh the pass ratio."""
+    EVALUATOR_VERDICTS.labels(result="passed" if passed else "failed").inc()
+    passes = EVALUATOR_VERDICTS.labels(result="passed").value
+    failures = EVALUATOR_VERDICTS.labels(result="failed").value
+    EVALUATOR_PASS_RATIO.set(passes / (passes + failures))
+
+
+def _short_on_time(state: MovieNightState, node: str) -> bool:
+    """Whether too little of the request deadline is left for an LLM call.
+
+    Args:
+        state: Current workflow state.
+        node: Name of the node asking, for logging.
+
+    Returns:
+        True when the node should use its deterministic fallback.
+    """
+    deadline = deadline_from_state(state)
+    if deadline is None or deadline.has_at_least(MIN_LLM_NODE_SECONDS):
+        return False
+    logger.warning(
+        f"{node} node: {deadline.remaining():.1f}s left before the deadline; "
+        "skipping LLM call"
+    )
+    return True
+
+
+def _degraded_to(state: MovieNightState, measure: str) -> bool:
+    """Whether the request's degradation level applies ``measure``.
+
+    See :mod:`app.resilience.degradation` for the levels.
+    """
+    return measure_active(state.get("degradation_level", 0) or 0, measure)
+
+
+def _mark_degraded(state: MovieNightState, node: str) -> list[str]:
+    degraded = list(state.get("degraded_nodes", []) or [])
+    if node not in degraded:
+        degraded.append(node)
+    return degraded
+
 
 def create_orchestrate_node(
     orchestrator: OrchestratorAgent,
@@ -50,13 +172,13 @@ def create_orchestrate_node(
 
     def orchestrate(state: MovieNightState) -> dict:
         user_message = state["user_message"]
-        logger.info(f"Orchestrate node processing: {user_message[:50]}...")
+        logger.debug("Orchestrate node processing: %s", user_message)
 
         decision = orchestrator.decide(user_message)
 
         logger.debug(
-            f"Orchestrate decision: route={decision.intent}, "
-            f"needs_clarification={decision.needs_clarification}"
+            "Orchestrate decision: route=%s, needs_clarification=%s",
+            decision.intent, decision.needs_clarification,
         )
 
         if decision.needs_clarification:
@@ -86,6 +208,12 @@ def create_input_orchestrate_node(
     This node uses the InputOrchestratorAgent to classify routes as
     movies, rag, or hybrid, extract constraints, and generate RAG queries.
 
+    When the state carries a session with history, the conversation is
+    passed to the agent. If it classifies the message as a refinement of
+    the previous movie request, the new constraints and search signals are
+    merged onto the previous ones and the previously recommended title is
+    rejected so a different movie is picked.
+
     Args:
         input_agent: The InputOrchestratorAgent instance.
 
@@ -95,24 +223,23 @@ def create_input_orchestrate_node(
 
     def input_orchestrate(state: MovieNightState) -> dict:
         user_message = state["user_message"]
-        logger.info(f"Input orchestrate node processing: {user_message[:50]}...")
-
-        decision = input_agent.decide(user_message)
+        session = state.get("session")
+        logger.debug("Input orchestrate node processing: %s", user_message)
+
+        history = session.history_text() if session and session.has_history() else None
+        decision = memoized(
+            "input",
+            (user_message, history),
+            lambda: input_agent.decide(user_message, history=history),
+        )
 
         logger.debug(
-            f"Input decision: route={decision.route}, "
-            f"needs_clarification={decision.needs_clarification}, "
-            f"needs_recommendation={decision.needs_recommendation}"
+            "Input decision: route=%s, needs_clarification=%s, needs_recommendation=%s",
+            decision.route, decision.needs_clarification, decision.needs_recommendation,
         )
 
         if decision.search_query and not decision.search_query.is_empty():
-            logger.info(
-                f"Extracted search query: actors={decision.search_query.actors}, "
-                f"directors={decision.search_query.directors}, "
-                f"year={decision.search_query.year}, "
-                f"year_range=({decision.search_query.year_start}, {decision.search_query.year_end}), "
-                f"keywords={decision.search_query.keywords}"
-            )
+            logger.debug("Extracted search query: %r", decision.search_query)
 
         if decision.needs_clarification:
             clarification = (
@@ -128,7 +255,7 @@ def create_input_orchestrate_node(
                 "final_response": clarification,
             }
 
-        return {
+        updates = {
             "route": decision.route,
             "constraints": decision.constraints,
             "search_query": decision.search_query,
@@ -136,12 +263,40 @@ def create_input_orchestrate_node(
             "rag_query": decision.rag_query,
         }
 
+        refines = (
+            decision.is_refinement
+            and decision.route in ("movies", "hybrid")
+            and session is not None
+            and session.constraints is not None
+        )
+        if refines:
+            rejected = list(session.rejected_titles)
+            if session.last_recommendation and session.last_recommendation not in rejected:
+                rejected.append(session.last_recommendation)
+            search_query = decision.search_query
+            if search_query is None or search_query.is_empty():
+                search_query = session.search_query
+            updates.update(
+                constraints=merge_constraints(session.constraints, decision.constraints),
+                search_query=search_query,
+                rejected_titles=rejected,
+                is_refinement=True,
+            )
+            logger.debug(
+                "Input orchestrate node: refinement of previous request "
+                "(rejecting %d titles)",
+                len(rejected),
+            )
+
+        return updates
+
     return input_orchestrate
 
 
 def create_respond_node(
     movies_responder: MoviesResponder,
     system_responder: SystemResponder,
+    max_retries: int = MAX_RETRIES,
 ) -> Callable[[MovieNightState], dict]:
     """Create the respond node that generates the final response.
 
@@ -154,6 +309,8 @@ def create_respond_node(
     Args:
         movies_responder: The MoviesResponder instance (fallback for simple responses).
         system_responder: The SystemResponder instance (fallback for RAG routes).
+        max_retries: The evaluator retry limit; once reached without a
+            passing draft, the safe fallback message is returned.
 
     Returns:
         A node function that generates the response based on route.
@@ -171,16 +328,14 @@ def create_respond_node(
         retry_count = state.get("retry_count", 0)
 
         if route == "clarification":
-            logger.info("Respond node: clarification already set, skipping")
+            logger.debug("Respond node: clarification already set, skipping")
             return {}
 
-        logger.info(
-            f"Respond node processing: route={route}, "
-            f"candidates={len(candidate_movies)}, "
-            f"rejected={len(rejected_titles)}, "
-            f"has_draft={draft is not None}, "
-            f"retry_count={retry_count}, "
-            f"has_evaluation={evaluation_result is not None}"
+        logger.debug(
+            "Respond node processing: route=%s, candidates=%d, rejected=%d, "
+            "has_draft=%s, retry_count=%d, has_evaluation=%s",
+            route, len(candidate_movies), len(rejected_titles),
+            draft is not None, retry_count, evaluation_result is not None,
         )
 
         if route in ("movies", "hybrid"):
@@ -211,8 +366,8 @@ def create_respond_node(
         if draft is not None:
             return draft.recommendation_text
 
-        if evaluation_result is not None and retry_count >= MAX_RETRIES:
-            logger.info(
+        if evaluation_result is not None and retry_count >= max_retries:
+            logger.debug(
                 "Respond node: retries exhausted after evaluation failures; "
                 "returning safe fallback"
             )
@@ -238,6 +393,14 @@ def create_find_movies_node(
     based on user constraints and rich search query. The candidates are
     stored in state for subsequent processing by the response node.
 
+    For a refinement that keeps the session's search query and genres, the
+    session's cached candidates that still satisfy the merged constraints are reused
+    and the finder is not called.
+
+    While the workflow is degraded to ``capped_finder``, the search query
+    is cut to :data:`DEGRADED_FINDER_LOOKUPS` person and keyword lookups
+    without a free-text search.
+
     Args:
         movie_finder: The MovieFinderAgent instance.
 
@@ -245,15 +408,43 @@ def create_find_movies_node(
         A node function that populates candidate_movies in state.
     """
 
+    from app.llm.movie_finder_agent import cap_search_query
+    from app.llm.recommendation_agent import filter_candidates
+
     def find_movies(state: MovieNightState) -> dict:
         constraints = state.get("constraints") or Constraints()
         search_query = state.get("search_query")
         rejected_titles = state.get("rejected_titles", [])
+        session = state.get("session")
+
+        if (
+            state.get("is_refinement")
+            and session is not None
+            and session.candidate_movies
+            and search_query == session.search_query
+            and constraints.genres == (session.constraints or Constraints()).genres
+        ):
+            cached = filter_candidates(
+                session.candidate_movies, constraints, rejected_titles
+            )
+            if cached:
+                logger.debug(
+                    "Find movies node: reusing %d cached session candidates; "
+                    "skipping finder",
+                    len(cached),
+                )
+                return {"candidate_movies": cached}
+
+        updates: dict = {}
+        if search_query is not None and _degraded_to(state, "capped_finder"):
+            capped = cap_search_query(search_query, DEGRADED_FINDER_LOOKUPS)
+            if capped is not search_query:
+                search_query = capped
+                updates["degraded_nodes"] = _mark_degraded(state, "find_movies")
 
-        logger.info(
-            f"Find movies node: constraints={constraints}, "
-            f"search_query={search_query is not None}, "
-            f"rejected={len(rejected_titles)} titles"
+        logger.debug(
+            "Find movies node: constraints=%r, search_query=%s, rejected=%d titles",
+            constraints, search_query is not None, len(rejected_titles),
         )
 
         candidates = movie_finder.find_movies(
@@ -263,9 +454,9 @@ def create_find_movies_node(
             search_query=search_query,
         )
 
-        logger.info(f"Find movies node found {len(candidates)} candidates")
+        logger.debug("Find movies node found %d candidates", len(candidates))
 
-        return {"candidate_movies": candidates}
+        return {**updates, "candidate_movies": candidates}
 
     return find_movies
 
@@ -282,12 +473,17 @@ def create_write_recommendation_node(
     The draft is stored in state under ``draft_recommendation`` and is
     consumed by the respond node.
 
+    When less than :data:`MIN_LLM_NODE_SECONDS` remain before the request
+    deadline, or the workflow is degraded to ``template_writer``, the draft
+    is written deterministically instead.
+
     Args:
         writer: The RecommendationWriterAgent instance.
 
     Returns:
         A node function that populates ``draft_recommendation`` in state.
     """
+    from app.llm.recommendation_agent import StubRecommendationWriterAgent
 
     def write_recommendation(state: MovieNightState) -> dict:
         user_message = state.get("user_message", "")
@@ -295,17 +491,24 @@ def create_write_recommendation_node(
         candidate_movies = state.get("candidate_movies", [])
         rejected_titles = state.get("rejected_titles", [])
 
-        logger.info(
-            "Write recommendation node: "
-            f"candidates={len(candidate_movies)}, "
-            f"rejected={len(rejected_titles)}"
+        logger.debug(
+            "Write recommendation node: candidates=%d, rejected=%d",
+            len(candidate_movies), len(rejected_titles),
         )
 
         if not candidate_movies:
-            logger.info("Write recommendation node: no candidates, skipping")
+            logger.debug("Write recommendation node: no candidates, skipping")
             return {"draft_recommendation": None}
 
-        draft = writer.write(
+        updates: dict = {}
+        active_writer = writer
+        if _degraded_to(state, "template_writer") or _short_on_time(
+            state, "write_recommendation"
+        ):
+            active_writer = StubRecommendationWriterAgent()
+            updates["degraded_nodes"] = _mark_degraded(state, "write_recommendation")
+
+        draft = active_writer.write(
             user_message=user_message,
             constraints=constraints,
             candidates=candidate_movies,
@@ -313,25 +516,25 @@ def create_write_recommendation_node(
         )
 
         if draft is None:
-            logger.info("Write recommendation node: writer returned None")
-            return {"draft_recommendation": None}
+            logger.debug("Write recommendation node: writer returned None")
+            return {**updates, "draft_recommendation": None}
 
-        logger.info(
-            f"Write recommendation node: drafted movie='{draft.movie.title}'"
-        )
-        return {"draft_recommendation": draft}
+        logger.debug("Write recommendation node: drafted movie='%s'", draft.movie.title)
+        return {**updates, "draft_recommendation": draft}
 
     return write_recommendation
 
 
 def create_evaluate_node(
     evaluator: EvaluatorAgent,
+    max_retries: int = MAX_RETRIES,
+    pass_threshold: float = PASS_THRESHOLD,
 ) -> Callable[[MovieNightState], dict]:
     """Create the evaluate node that validates draft recommendations.
 
     On each run, this node asks the :class:`EvaluatorAgent` to score the
     current ``draft_recommendation``. The evaluator's ``passed`` flag is
-    combined with :data:`PASS_THRESHOLD` to determine whether the draft is
+    combined with ``pass_threshold`` to determine whether the draft is
     accepted. On failure, the node updates state so the workflow can loop
     back into the writer with a different candidate:
 
@@ -344,13 +547,21 @@ def create_evaluate_node(
     because no candidates survived filtering), the node returns no updates
     so ``respond`` can handle the empty case.
 
+    When less than :data:`MIN_LLM_NODE_SECONDS` remain before the request
+    deadline, or the workflow is degraded to ``rules_evaluator``, only the
+    deterministic hard-constraint checks are run.
+
     Args:
         evaluator: The :class:`EvaluatorAgent` instance.
+        max_retries: Number of failed evaluations after which the workflow
+            stops retrying.
+        pass_threshold: Minimum evaluator score for a draft to pass.
 
     Returns:
         A node function that updates ``evaluation_result``, and optionally
         ``retry_count``, ``rejected_titles`` and ``draft_recommendation``.
     """
+    from app.llm.evaluator_agent import StubEvaluatorAgent
 
     def evaluate(state: MovieNightState) -> dict:
         draft: DraftRecommendation | None = state.get("draft_recommendation")
@@ -360,44 +571,55 @@ def create_evaluate_node(
         user_message = state.get("user_message", "")
 
         if draft is None:
-            logger.info(
+            logger.debug(
                 "Evaluate node: no draft to evaluate; marking retries as "
                 "exhausted so the workflow proceeds to respond"
             )
-            return {"retry_count": MAX_RETRIES}
+            WORKFLOW_RETRIES.observe(retry_count)
+            return {"retry_count": max_retries}
 
-        logger.info(
-            f"Evaluate node: judging draft for '{draft.movie.title}' "
-            f"(retry_count={retry_count}, rejected={len(rejected_titles)})"
+        logger.debug(
+            "Evaluate node: judging draft for '%s' (retry_count=%d, rejected=%d)",
+            draft.movie.title, retry_count, len(rejected_titles),
         )
 
-        result = evaluator.evaluate(
+        updates: dict = {}
+        active_evaluator = evaluator
+        if _degraded_to(state, "rules_evaluator") or _short_on_time(state, "evaluate"):
+            active_evaluator = StubEvaluatorAgent()
+            updates["degraded_nodes"] = _mark_degraded(state, "evaluate")
+
+        result = active_evaluator.evaluate(
             user_message=user_message,
             constraints=constraints,
             draft=draft,
             rejected_titles=rejected_titles,
         )
 
-        passed = result.passed and result.score >= PASS_THRESHOLD
+        passed = result.passed and result.score >= pass_threshold
+        _record_verdict(passed)
 
-        updates: dict = {"evaluation_result": result}
+        updates["evaluation_result"] = result
 
         if passed:
-            logger.info(
-                f"Evaluate node: draft for '{draft.movie.title}' PASSED "
-                f"(score={result.score:.2f})"
+            WORKFLOW_RETRIES.observe(retry_count)
+            logger.debug(
+                "Evaluate node: draft for '%s' PASSED (score=%.2f)",
+                draft.movie.title, result.score,
             )
             return updates
 
-        logger.info(
-            f"Evaluate node: draft for '{draft.movie.title}' FAILED "
-            f"(score={result.score:.2f}, passed={result.passed}); "
-            f"incrementing retry_count and appending to rejected_titles"
+        logger.debug(
+            "Evaluate node: draft for '%s' FAILED (score=%.2f, passed=%s); "
+            "incrementing retry_count and appending to rejected_titles",
+            draft.movie.title, result.score, result.passed,
         )
 
         if draft.movie.title not in rejected_titles:
             rejected_titles.append(draft.movie.title)
 
+        if retry_count + 1 >= max_retries:
+            WORKFLOW_RETRIES.observe(retry_count + 1)
         updates["retry_count"] = retry_count + 1
         updates["rejected_titles"] = rejected_titles
         updates["draft_recommendation"] = None
@@ -428,11 +650,11 @@ def create_rag_retrieve_node(
 
         query = rag_query or user_message
 
-        logger.info(f"RAG retrieve node: query='{query[:50]}...'")
+        logger.debug("RAG retrieve node: query='%s'", query)
 
-        contexts = retriever.retrieve(query)
+        contexts = memoized("rag", query, lambda: retriever.retrieve(query))
 
-        logger.info(f"RAG retrieve node: found {len(contexts)} relevant contexts")
+        logger.debug("RAG retrieve node: found %d relevant contexts", len(contexts))
 
         return {"retrieved_contexts": contexts}
 
@@ -446,6 +668,14 @@ def create_rag_respond_node(
 
     This node uses the RAGAssistantAgent to generate an answer based on
     retrieved contexts. It is used for pure RAG routes (system questions).
+    When the request deadline is too close for an LLM call, or the call
+    fails after the deadline has passed, the answer is built from excerpts
+    of the retrieved contexts instead.
+
+    The latest :data:`RAG_ANSWER_CACHE_SIZE` answers are kept by question.
+    While the workflow is degraded to ``cached_rag``, a repeated question
+    gets its earlier answer and a new one the excerpts, without an LLM
+    call.
 
     Args:
         rag_agent: The RAGAssistantAgent instance.
@@ -453,6 +683,22 @@ def create_rag_respond_node(
     Returns:
         A node function that populates ``final_response`` in state.
     """
+    answers: OrderedDict[str, str] = OrderedDict()
+    answers_lock = threading.Lock()
+
+    def cached_answer(key: str) -> str | None:
+        with answers_lock:
+            answer = answers.get(key)
+            if answer is not None:
+                answers.move_to_end(key)
+            return answer
+
+    def remember_answer(key: str, answer: str) -> None:
+        with answers_lock:
+            answers[key] = answer
+            answers.move_to_end(key)
+            while len(answers) > RAG_ANSWER_CACHE_SIZE:
+                answers.popitem(last=False)
 
     def rag_respond(state: MovieNightState) -> dict:
         user_message = state.get("user_message", "")
@@ -461,14 +707,38 @@ def create_rag_respond_node(
 
         query = rag_query or user_message
 
-        logger.info(
-            f"RAG respond node: query='{query[:50]}...', "
-            f"contexts={len(contexts)}"
-        )
+        logger.debug("RAG respond node: query='%s', contexts=%d", query, len(contexts))
+        answer_key = " ".join(query.lower().split())
 
-        answer = rag_agent.answer(query=query, contexts=contexts)
+        if _degraded_to(state, "cached_rag"):
+            answer = cached_answer(answer_key)
+            logger.debug("RAG respond node: degraded, cached answer=%s", answer is not None)
+            return {
+                "final_response": answer or format_context_excerpt_response(contexts),
+                "degraded_nodes": _mark_degraded(state, "rag_respond"),
+            }
+
+        if _short_on_time(state, "rag_respond"):
+            return {
+                "final_response": format_context_excerpt_response(contexts),
+                "degraded_nodes": _mark_degraded(state, "rag_respond"),
+            }
+
+        try:
+            answer = rag_agent.answer(query=query, contexts=contexts)
+        except Exception:
+            deadline = deadline_from_state(state)
+            if deadline is None or not deadline.expired():
+                raise
+            logger.warning("RAG respond node: LLM call ran past the deadline")
+            return {
+                "final_response": format_context_excerpt_response(contexts),
+                "degraded_nodes": _mark_degraded(state, "rag_respond"),
+            }
 
-        logger.info(f"RAG respond node: generated answer length={len(answer)}")
+        logger.debug("RAG respond node: generated answer length=%d", len(answer))
+        if answer:
+            remember_answer(answer_key, answer)
 
         return {"final_response": answer}
 
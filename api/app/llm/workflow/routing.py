@@ -7,6 +7,8 @@ the next node or END marker.
 
 import logging
 
+from collections.abc import Callable
+
 from langgraph.graph import END
 
 from app.llm.state import MAX_RETRIES, MovieNightState
@@ -14,7 +16,7 @@ from app.llm.state import MAX_RETRIES, MovieNightState
 logger = logging.getLogger(__name__)
 
 
-def route_after_evaluate(state: MovieNightState) -> str:
+def route_after_evaluate(state: MovieNightState, max_retries: int = MAX_RETRIES) -> str:
     """Decide what happens after the evaluate node.
 
     Routes to:
@@ -27,6 +29,8 @@ def route_after_evaluate(state: MovieNightState) -> str:
 
     Args:
         state: Current workflow state.
+        max_retries: Number of failed evaluations after which the workflow
+            stops retrying.
 
     Returns:
         Next node name.
@@ -41,20 +45,40 @@ def route_after_evaluate(state: MovieNightState) -> str:
     if evaluation_result is None:
         return "respond"
 
-    if retry_count < MAX_RETRIES:
-        logger.info(
-            f"Evaluate routing: retry {retry_count}/{MAX_RETRIES}; "
-            "looping back to write_recommendation"
+    if retry_count < max_retries:
+        logger.debug(
+            "Evaluate routing: retry %d/%d; looping back to write_recommendation",
+            retry_count, max_retries,
         )
         return "write_recommendation"
 
-    logger.info(
-        f"Evaluate routing: retries exhausted at {retry_count}; "
-        "proceeding to respond with safe fallback"
+    logger.debug(
+        "Evaluate routing: retries exhausted at %d; "
+        "proceeding to respond with safe fallback",
+        retry_count,
     )
     return "respond"
 
 
+def create_route_after_evaluate(
+    max_retries: int = MAX_RETRIES,
+) -> Callable[[MovieNightState], str]:
+    """Create the evaluate routing function for a retry limit.
+
+    Args:
+        max_retries: Number of failed evaluations after which the workflow
+            stops retrying.
+
+    Returns:
+        A routing function for the evaluate node's conditional edge.
+    """
+
+    def route(state: MovieNightState) -> str:
+        return route_after_evaluate(state, max_retries)
+
+    return route
+
+
 def route_after_orchestrate(state: MovieNightState) -> str:
     """Determine the next node after orchestration (without RAG components).
 
@@ -0,0 +1,203 @@
+"""Optimistic stream-then-verify execution for the movies route.
+
+The regular workflow only returns text after the evaluator has judged the
+draft. For the pure ``movies`` route this module streams the writer's text
+to the client as it is produced and runs the evaluation once the text is
+complete:
+
+1. The writer selects a candidate; the deterministic
+   :func:`detect_constraint_violations` pre-check runs on the selection
+   before any text is shown, so drafts that can never pass are skipped
+   without being streamed.
+2. Text chunks are emitted as ``token`` events.
+3. The completed draft goes through the same evaluate node as the graph.
+   On failure a ``retracted`` event is emitted and the retry's text is
+   streamed, following the same retry accounting as the graph.
+4. A ``final`` event carries the reply produced by the respond node.
+
+Perceived latency is a single LLM call while the quality gate is kept.
+While the workflow is degraded to ``template_writer`` or below (see
+:mod:`app.resilience.degradation`), or less than
+:data:`app.llm.state.MIN_LLM_NODE_SECONDS` are left before the request
+deadline, the deterministic text is streamed instead of the writer's.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Callable
+
+from app.llm.candidate_selector import (
+    build_deterministic_recommendation_text,
+    detect_constraint_violations,
+)
+from app.llm.state import MAX_RETRIES, MIN_LLM_NODE_SECONDS
+from app.llm.workflow.formatters import to_public_route
+from app.llm.workflow.routing import route_after_evaluate
+from app.resilience import deadline_from_state, measure_active
+from app.schemas.chat import StreamEvent
+from app.schemas.domain import DraftRecommendation
+from app.schemas.orchestrator import Constraints
+
+if TYPE_CHECKING:
+    from app.llm.recommendation_agent import RecommendationWriterAgent
+    from app.llm.state import MovieNightState
+
+logger = logging.getLogger(__name__)
+
+NodeFn = Callable[["MovieNightState"], dict]
+
+
+def stream_movie_recommendation(
+    state: MovieNightState,
+    find_movies: NodeFn,
+    writer: RecommendationWriterAgent,
+    evaluate: NodeFn | None,
+    respond: NodeFn,
+    max_retries: int = MAX_RETRIES,
+) -> Iterator[StreamEvent]:
+    """Run find → write → evaluate → respond, streaming the writer's text.
+
+    ``state`` is updated in place so the caller can inspect the final
+    workflow state (e.g. for debug info) after the iterator is exhausted.
+
+    Args:
+        state: Workflow state after orchestration (route must be ``movies``).
+        find_movies: The find_movies node function.
+        writer: The recommendation writer used to stream drafts.
+        evaluate: The evaluate node function, or ``None`` to skip evaluation.
+        respond: The respond node function.
+        max_retries: The evaluator retry limit the nodes were created with.
+
+    Yields:
+        ``token``, ``retracted`` and ``final`` :class:`StreamEvent` objects.
+    """
+    state.update(find_movies(state))
+
+    verified = evaluate is None
+    while True:
+        draft = yield from _stream_draft(state, _draft_writer(state, writer))
+        state["draft_recommendation"] = draft
+
+        if evaluate is None or draft is None:
+            if evaluate is not None:
+                state.update(evaluate(state))
+            break
+
+        state.update(evaluate(state))
+        if state.get("draft_recommendation") is not None:
+            verified = True
+            break
+
+        evaluation = state.get("evaluation_result")
+        logger.debug(
+            "Stream-then-verify: retracting draft for '%s' (retry_count=%d)",
+            draft.movie.title, state.get("retry_count", 0),
+        )
+        yield StreamEvent(
+            event="retracted",
+            title=draft.movie.title,
+            reason=evaluation.feedback if evaluation is not None else None,
+        )
+
+        if route_after_evaluate(state, max_retries) != "write_recommendation":
+            break
+
+    state.update(respond(state))
+    yield StreamEvent(
+        event="final",
+        route=to_public_route(state.get("route")),
+        reply=state.get("final_response"),
+        verified=verified and state.get("draft_recommendation") is not None,
+        extracted_constraints=state.get("constraints"),
+    )
+
+
+def _draft_writer(
+    state: MovieNightState, writer: RecommendationWriterAgent
+) -> RecommendationWriterAgent:
+    """The writer for the next draft: the deterministic one when degraded or short on time."""
+    from app.llm.recommendation_agent import StubRecommendationWriterAgent
+
+    deadline = deadline_from_state(state)
+    degraded = measure_active(state.get("degradation_level", 0) or 0, "template_writer")
+    if not degraded and (deadline is None or deadline.has_at_least(MIN_LLM_NODE_SECONDS)):
+        return writer
+
+    if not degraded:
+        logger.warning(
+            "Stream-then-verify: %.1fs left before the deadline; "
+            "streaming the deterministic text",
+            deadline.remaining(),
+        )
+    nodes = list(state.get("degraded_nodes", []) or [])
+    if "write_recommendation" not in nodes:
+        state["degraded_nodes"] = [*nodes, "write_recommendation"]
+    return StubRecommendationWriterAgent()
+
+
+def _stream_draft(
+    state: MovieNightState,
+    writer: RecommendationWriterAgent,
+) -> Iterator[StreamEvent]:
+    """Stream one draft and return the completed :class:`DraftRecommendation`.
+
+    Candidates whose selection already violates a hard constraint are
+    rejected without streaming any text. If the writer's stream breaks
+    after text was shown, the partial text is retracted and replaced with
+    the deterministic text for the same movie.
+    """
+    constraints = state.get("constraints") or Constraints()
+    rejected_titles = list(state.get("rejected_titles", []) or [])
+
+    while True:
+        stream = writer.write_stream(
+            user_message=state.get("user_message", ""),
+            constraints=constraints,
+            candidates=state.get("candidate_movies", []),
+            rejected_titles=rejected_titles,
+        )
+        if stream is None:
+            return None
+
+        probe = DraftRecommendation(
+            movie=stream.movie, recommendation_text="-", reasoning=stream.reasoning
+        )
+        if not detect_constraint_violations(probe, constraints, state.get("rejected_titles")):
+            break
+
+        if stream.movie.title in rejected_titles:
+            return None
+
+        logger.debug(
+            "Stream-then-verify: '%s' fails the deterministic pre-check; "
+            "selecting another candidate before streaming",
+            stream.movie.title,
+        )
+        rejected_titles.append(stream.movie.title)
+
+    parts: list[str] = []
+    try:
+        for chunk in stream.chunks:
+            parts.append(chunk)
+            yield StreamEvent(event="token", text=chunk)
+    except Exception as exc:
+        logger.warning(
+            "Stream-then-verify: writer stream interrupted (%s); "
+            "replacing with deterministic text",
+            exc,
+        )
+        yield StreamEvent(
+            event="retracted",
+            title=stream.movie.title,
+            reason="The response was interrupted and has been regenerated.",
+        )
+        parts = [build_deterministic_recommendation_text(stream.movie, constraints)]
+        yield StreamEvent(event="token", text=parts[0])
+
+    return DraftRecommendation(
+        movie=stream.movie,
+        recommendation_text="".join(parts).strip(),
+        reasoning=stream.reasoning,
+    )
@@ -1,70 +1,178 @@
 import logging
-import os
+import sys
+from collections.abc import Callable
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
 from fastapi import FastAPI
 from pydantic import ValidationError
 
-from app.agents import MoviesResponder, SystemResponder
+from app.api.middleware import (
+    RequestIDMiddleware,
+    RequestMetricsMiddleware,
+    RequestTracingMiddleware,
+)
+from app.api.readiness import WorkflowLoader
 from app.api.routes import cleanup_workflow, initialize_workflow, router
-from app.integrations.tmdb_client import TMDBClient
-from app.llm import StubMovieFinderAgent, TMDBMovieFinderAgent, create_chat_model
-from app.llm.evaluator_agent import LLMEvaluatorAgent
-from app.llm.input_agent import InputOrchestratorAgent
-from app.llm.movie_finder_agent import MovieFinderAgent
-from app.llm.rag_agent import LLMRAGAssistantAgent
-from app.llm.recommendation_agent import LLMRecommendationWriterAgent
-from app.llm.workflow import MovieNightWorkflow
+from app.cache import SharedCache
 from app.observability import configure_langsmith, get_tracing_status
-from app.rag.retriever import create_retriever
+from app.observability.logs import configure_logging_from_env
+from app.observability.process import WorkerReporter
+from app.observability.tracing import configure_tracing, shutdown_tracing
+from app.resilience import (
+    AdmissionController,
+    DegradationController,
+    DownstreamBudget,
+    set_degradation_controller,
+    set_downstream_budgets,
+)
+from app.sessions import InMemorySessionStore, SessionStore, SQLiteSessionStore
 from app.settings import Settings, get_settings
 
-logging.basicConfig(
-    level=os.getenv("LOG_LEVEL", "INFO"),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+if TYPE_CHECKING:
+    from app.llm.workflow import MovieNightWorkflow
+
+configure_logging_from_env()
 logger = logging.getLogger(__name__)
 
 
-_tmdb_client: TMDBClient | None = None
+def create_session_store(settings: Settings) -> SessionStore | None:
+    """Create the conversation session store based on settings.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The configured SessionStore, or None when sessions are disabled.
+    """
+    backend = settings.session_store.lower()
+
+    if backend == "none":
+        logger.info("Conversation sessions disabled")
+        return None
+
+    if backend == "sqlite":
+        logger.info(f"Using SQLiteSessionStore at {settings.session_db_path}")
+        return SQLiteSessionStore(
+            settings.session_db_path, ttl_seconds=settings.session_ttl_seconds
+        )
+
+    if backend != "memory":
+        logger.warning(f"Unknown SESSION_STORE '{backend}'; using memory")
+    return InMemorySessionStore(
+        max_sessions=settings.session_max_sessions,
+        ttl_seconds=settings.session_ttl_seconds,
+    )
 
 
-def create_movie_finder(settings: Settings) -> MovieFinderAgent:
-    """Create the appropriate movie finder based on settings.
+def create_shared_cache(settings: Settings) -> SharedCache | None:
+    """Create the cache shared by all worker processes based on settings.
 
     Args:
         settings: Application settings.
 
     Returns:
-        MovieFinderAgent instance (TMDB or Stub).
+        The SharedCache, or None when SHARED_CACHE_PATH is not set.
     """
-    global _tmdb_client
-    mode = settings.movie_finder_mode.lower()
+    if not settings.shared_cache_path:
+        return None
+    logger.info(f"Using shared cache at {settings.shared_cache_path}")
+    return SharedCache(
+        settings.shared_cache_path, ttl_seconds=settings.shared_cache_ttl_seconds
+    )
+
+
+def create_admission_controller(settings: Settings) -> AdmissionController | None:
+    """Create the admission controller and downstream budgets from settings.
 
-    if mode == "stub":
-        logger.info("Using StubMovieFinderAgent (explicit config)")
-        return StubMovieFinderAgent()
+    The budgets are also installed so LLM and TMDB usage is charged to them.
 
-    if mode == "tmdb" or (mode == "auto" and settings.tmdb_api_key):
-        if not settings.tmdb_api_key:
-            logger.warning("TMDB mode requested but no API key; falling back to stub")
-            return StubMovieFinderAgent()
+    Args:
+        settings: Application settings.
+
+    Returns:
+        The AdmissionController, or None when ADMISSION_MAX_CONCURRENCY is 0.
+    """
+    budgets = []
+    if settings.admission_llm_tokens_per_minute:
+        tokens = settings.admission_llm_tokens_per_minute
+        budgets.append(DownstreamBudget("llm", rate=tokens / 60, capacity=tokens))
+    if settings.admission_tmdb_requests_per_second:
+        qps = settings.admission_tmdb_requests_per_second
+        budgets.append(DownstreamBudget("tmdb", rate=qps, capacity=max(1.0, qps)))
+    set_downstream_budgets(budgets)
+
+    if settings.admission_max_concurrency == 0:
+        logger.info("Admission control disabled")
+        return None
+    logger.info(
+        f"Admission control: concurrency={settings.admission_max_concurrency}, "
+        f"queue={settings.admission_max_queue}, "
+        f"budgets={[budget.name for budget in budgets]}"
+    )
+    return AdmissionController(
+        max_concurrency=settings.admission_max_concurrency,
+        max_queue=settings.admission_max_queue,
+        max_wait_seconds=settings.admission_max_wait_seconds,
+        budgets=budgets,
+    )
+
+
+def create_degradation_controller(settings: Settings) -> DegradationController | None:
+    """Create and install the SLO-aware degradation controller from settings.
+
+    Args:
+        settings: Application settings.
 
-        logger.info("Using TMDBMovieFinderAgent")
-        _tmdb_client = TMDBClient(api_key=settings.tmdb_api_key)
-        return TMDBMovieFinderAgent(_tmdb_client)
+    Returns:
+        The DegradationController, or None when DEGRADATION_ENABLED is false.
+    """
+    if not settings.degradation_enabled:
+        set_degradation_controller(None)
+        return None
+    logger.info(
+        f"Degradation control: llm p95 SLO={settings.degradation_llm_p95_seconds}s, "
+        f"tmdb p95 SLO={settings.degradation_tmdb_p95_seconds}s, "
+        f"max level={settings.degradation_max_level}"
+    )
+    controller = DegradationController(
+        slos={
+            "llm": settings.degradation_llm_p95_seconds,
+            "tmdb": settings.degradation_tmdb_p95_seconds,
+        },
+        window_seconds=settings.degradation_window_seconds,
+        step_seconds=settings.degradation_step_seconds,
+        recovery_seconds=settings.degradation_recovery_seconds,
+        max_level=settings.degradation_max_level,
+    )
+    set_degradation_controller(controller)
+    return controller
+
+
+def build_workflow(
+    settings: Settings,
+    progress: Callable[[str], None],
+    cache: SharedCache | None = None,
+) -> "MovieNightWorkflow":
+    """Import the workflow factory and build the workflow.
+
+    The import is deferred to here so the API starts serving ``/health``
+    without loading langchain, langgraph or the Azure OpenAI SDK. When the
+    server preloaded the factory (see :mod:`app.serving`), the import is
+    already done.
 
-    logger.info("Using StubMovieFinderAgent (no TMDB key)")
-    return StubMovieFinderAgent()
+    Args:
+        settings: Application settings.
+        progress: Told the name of each completed step.
+        cache: Optional cache shared by all workers.
 
+    Returns:
+        The configured MovieNightWorkflow.
+    """
+    from app.factory import create_workflow
 
-def cleanup_tmdb_client() -> None:
-    """Close the TMDB client if it exists."""
-    global _tmdb_client
-    if _tmdb_client is not None:
-        _tmdb_client.close()
-        _tmdb_client = None
-        logger.info("TMDB client closed")
+    progress("imports")
+    return create_workflow(settings, progress=progress, cache=cache)
 
 
 @asynccontextmanager
@@ -77,42 +185,34 @@ async def lifespan(app: FastAPI):
         if tracing_enabled:
             status = get_tracing_status()
             logger.info(f"LangSmith tracing active: project={status['project']}")
+        configure_tracing(settings)
 
-        llm = create_chat_model(settings)
-        input_agent_llm = create_chat_model(settings, temperature=0.0)
-        writer_llm = create_chat_model(settings, temperature=0.3)
-        evaluator_llm = create_chat_model(settings, temperature=0.0)
-        rag_llm = create_chat_model(settings, temperature=0.3)
-
-        input_agent = InputOrchestratorAgent(input_agent_llm)
-        movies_responder = MoviesResponder(llm)
-        system_responder = SystemResponder(llm)
-        movie_finder = create_movie_finder(settings)
-        recommendation_writer = LLMRecommendationWriterAgent(writer_llm)
-        evaluator = LLMEvaluatorAgent(evaluator_llm)
-
-        rag_retriever = create_retriever()
-        rag_agent = LLMRAGAssistantAgent(rag_llm)
-        logger.info(
-            f"RAG retriever initialized with {len(rag_retriever._documents)} documents"
-        )
-
-        workflow = MovieNightWorkflow(
-            orchestrator=None,
-            movies_responder=movies_responder,
-            system_responder=system_responder,
-            input_agent=input_agent,
-            movie_finder=movie_finder,
-            recommendation_writer=recommendation_writer,
-            evaluator=evaluator,
-            rag_retriever=rag_retriever,
-            rag_agent=rag_agent,
+        cache = create_shared_cache(settings)
+        loader = WorkflowLoader(
+            lambda progress: build_workflow(settings, progress, cache=cache)
         )
-        initialize_workflow(workflow)
-        logger.info(
-            f"Movie Assistant workflow initialized successfully "
-            f"(finder: {type(movie_finder).__name__}, RAG: enabled)"
+        initialize_workflow(
+            chat_deadline_seconds=settings.chat_deadline_seconds,
+            sessions=create_session_store(settings),
+            session_max_turns=settings.session_max_turns,
+            idempotency_ttl_seconds=settings.idempotency_ttl_seconds,
+            batch_max_items=settings.batch_max_items,
+            batch_concurrency=settings.batch_concurrency,
+            loader=loader,
+            cache=cache,
+            worker_report_interval_seconds=settings.worker_report_interval_seconds,
+            admission_controller=create_admission_controller(settings),
+            profile_max_seconds=(
+                settings.profiling_max_seconds if settings.profiling_enabled else None
+            ),
+            degradation_controller=create_degradation_controller(settings),
         )
+        if settings.workflow_warmup:
+            loader.start_warmup()
+        reporter = None
+        if cache is not None:
+            reporter = WorkerReporter(cache, settings.worker_report_interval_seconds)
+            reporter.start()
 
     except ValidationError as e:
         logger.error(f"Configuration error: {e}")
@@ -120,8 +220,15 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    if reporter is not None:
+        reporter.stop()
     cleanup_workflow()
-    cleanup_tmdb_client()
+    set_downstream_budgets([])
+    set_degradation_controller(None)
+    shutdown_tracing()
+    factory = sys.modules.get("app.factory")
+    if factory is not None:  # only imported once the workflow was built
+        factory.cleanup_tmdb_client()
     logger.info("Movie Assistant workflow cleaned up")
 
 
@@ -131,4 +238,7 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(RequestTracingMiddleware)
+app.add_middleware(RequestIDMiddleware)
 app.include_router(router)
@@ -1,7 +1,9 @@
 """Observability module for the Movie Night Assistant.
 
 This module provides tracing and monitoring capabilities through LangSmith
-integration. It centralizes observability configuration and utilities.
+integration, OpenTelemetry-compatible spans, token usage accounting and
+Prometheus metrics. It centralizes
+observability configuration and utilities.
 """
 
 from app.observability.langsmith import (
@@ -9,9 +11,35 @@ from app.observability.langsmith import (
     get_tracing_status,
     traced_chat,
 )
+from app.observability.metrics import CONTENT_TYPE_LATEST, REGISTRY, render_latest
+from app.observability.tracing import (
+    InMemorySpanExporter,
+    OTLPSpanExporter,
+    configure_tracing,
+    current_span,
+    start_span,
+)
+from app.observability.usage import (
+    UsageCallbackHandler,
+    UsageLedger,
+    node_scope,
+    usage_ledger,
+)
 
 __all__ = [
     "configure_langsmith",
     "get_tracing_status",
     "traced_chat",
+    "CONTENT_TYPE_LATEST",
+    "REGISTRY",
+    "render_latest",
+    "InMemorySpanExporter",
+    "OTLPSpanExporter",
+    "configure_tracing",
+    "current_span",
+    "start_span",
+    "UsageCallbackHandler",
+    "UsageLedger",
+    "node_scope",
+    "usage_ledger",
 ]
@@ -19,6 +19,8 @@ import os
 from contextlib import contextmanager
 from typing import TYPE_CHECKING, Any, Generator
 
+from app.observability.tracing import current_span
+
 if TYPE_CHECKING:
     from app.settings import Settings
 
@@ -26,6 +28,15 @@ logger = logging.getLogger(__name__)
 
 _tracing_enabled: bool = False
 
+_USAGE_METADATA_KEYS = (
+    "llm_calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "cached_tokens",
+    "cost_usd",
+    "tokens_by_node",
+)
+
 
 def configure_langsmith(settings: Settings) -> bool:
     """Configure LangSmith tracing from application settings.
@@ -121,6 +132,8 @@ def traced_chat(
 
     The context yields a metadata dictionary that can be updated during
     processing to add information discovered during execution (like route).
+    The ``trace_id`` of the active OpenTelemetry span, if any, is included
+    so the LangSmith trace can be found from a distributed trace.
 
     Usage:
         with traced_chat(message, session_id) as trace_meta:
@@ -135,9 +148,12 @@ def traced_chat(
     Yields:
         A mutable metadata dictionary that will be attached to the trace.
     """
+    span = current_span()
+    trace_id = span.context.trace_id if span is not None else None
     trace_meta: dict[str, Any] = {
         "session_id": session_id,
         "message_preview": user_message[:100] if user_message else "",
+        "trace_id": trace_id,
     }
 
     if not _tracing_enabled:
@@ -150,7 +166,7 @@ def traced_chat(
         with trace(
             name="chat_request",
             inputs={"user_message": user_message},
-            metadata=_build_trace_metadata(session_id=session_id),
+            metadata=_build_trace_metadata(session_id=session_id, trace_id=trace_id),
         ) as run:
             yield trace_meta
 
@@ -160,6 +176,12 @@ def traced_chat(
                 has_constraints=trace_meta.get("has_constraints", False),
                 retry_count=trace_meta.get("retry_count", 0),
                 recommendation_generated=trace_meta.get("recommendation_generated", False),
+                trace_id=trace_id,
+                **{
+                    key: trace_meta[key]
+                    for key in _USAGE_METADATA_KEYS
+                    if key in trace_meta
+                },
             ))
 
     except ImportError:
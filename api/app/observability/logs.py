@@ -0,0 +1,348 @@
+"""Structured, sampled logging with per-request correlation IDs.
+
+:func:`configure_logging` installs a single root handler that:
+
+- writes one JSON object per line (or ``key=value`` text for local use)
+  with the time, level, logger, message, the request's correlation ID, its
+  trace and span IDs, and any fields passed as ``extra``
+- samples records below WARNING per logger, e.g. keeping 10% of
+  ``app.llm`` records, so chatty loggers can stay on under load
+- redacts secrets (API keys, bearer tokens, passwords) and truncates long
+  strings such as LLM replies before they are written
+
+Messages are formatted only once a record has passed the level check and
+the sampling filter, so log calls should pass arguments lazily::
+
+    logger.debug("TMDB discover params: %s", params)
+
+rather than as f-strings, which are built even when the record is dropped.
+
+The correlation ID comes from the ``X-Request-ID`` request header, or is
+generated, and is set for the request by
+:class:`app.api.middleware.RequestIDMiddleware`.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import uuid
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import IO, Any
+
+from pydantic import BaseModel
+
+from app.observability.tracing import current_span
+
+REQUEST_ID_HEADER = "X-Request-ID"
+DEFAULT_MAX_FIELD_CHARS = 500
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+REDACTED = "[REDACTED]"
+
+# Attributes every LogRecord has; anything else was passed in ``extra``.
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "request_id", "trace_id", "span_id", "taskName"}
+
+SENSITIVE_KEYS = frozenset({
+    "api_key", "apikey", "authorization", "password", "secret", "token",
+    "access_token", "refresh_token", "cookie", "set-cookie",
+})
+SECRET_PATTERNS = (
+    re.compile(r"(?i)(\bbearer\s+)[A-Za-z0-9._~+/=-]+"),
+    re.compile(
+        r"(?i)(\b(?:api[_-]?key|access_token|password|secret)[\"']?\s*[:=]\s*[\"']?)"
+        r"[^\s&\"',;]+"
+    ),
+)
+# Cheap substring check run before the patterns, which are comparatively slow.
+_SECRET_HINTS = ("bearer", "key", "token", "password", "secret")
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+def current_request_id() -> str | None:
+    """Return the correlation ID of the request being handled, if any."""
+    return _request_id.get()
+
+
+def new_request_id(candidate: str | None = None) -> str:
+    """Accept a caller's correlation ID, or generate one.
+
+    Args:
+        candidate: ID sent by the caller, e.g. in ``X-Request-ID``. It is
+            used if it is a short token of letters, digits and ``._:-``,
+            so it cannot inject text into log lines.
+
+    Returns:
+        The correlation ID to use.
+    """
+    if candidate and _VALID_REQUEST_ID.fullmatch(candidate):
+        return candidate
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def request_id_scope(request_id: str | None = None) -> Iterator[str]:
+    """Set the correlation ID for log records emitted inside the block.
+
+    Args:
+        request_id: The ID to use; a new one is generated if not given.
+
+    Yields:
+        The active correlation ID.
+    """
+    request_id = request_id or new_request_id()
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+def redact(text: str) -> str:
+    """Mask bearer tokens and ``api_key=...``-style secrets in text."""
+    lowered = text.lower()
+    if not any(hint in lowered for hint in _SECRET_HINTS):
+        return text
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(rf"\g<1>{REDACTED}", text)
+    return text
+
+
+def truncate(text: str, limit: int) -> str:
+    """Shorten text to ``limit`` characters and redact what is kept.
+
+    Cut text ends with a note of how much was cut; a ``limit`` of 0 keeps
+    everything.
+    """
+    if limit <= 0 or len(text) <= limit:
+        return redact(text)
+    return f"{redact(text[:limit])}... [{len(text) - limit} more chars]"
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_sensitive(key: str) -> bool:
+    key = key.lower()
+    return key in SENSITIVE_KEYS or key.endswith(("_api_key", "_secret", "_password"))
+
+
+def record_fields(record: logging.LogRecord) -> dict[str, Any]:
+    """Fields passed to a log call in ``extra``."""
+    return {
+        key: value
+        for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES and not key.startswith("_")
+    }
+
+
+class ContextFilter(logging.Filter):
+    """Adds the correlation ID and the active span's trace IDs to records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        span = current_span()
+        record.trace_id = span.context.trace_id if span is not None else None
+        record.span_id = span.context.span_id if span is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of each logger's records below WARNING.
+
+    Rates apply to a logger and its children; the most specific configured
+    name wins, and loggers without a rate keep every record. Warnings and
+    errors are always kept.
+
+    Args:
+        rates: Fraction of records to keep by logger name, e.g.
+            ``{"app.llm": 0.1, "app.llm.tiering": 1.0}``.
+        rng: Random source (for tests).
+    """
+
+    def __init__(self, rates: Mapping[str, float], rng: random.Random | None = None):
+        super().__init__()
+        self._rates = dict(rates)
+        self._random = (rng or random.Random()).random
+        self._resolved: dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        """The sampling rate applied to a logger."""
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            logger_name = name
+            while logger_name:
+                if logger_name in self._rates:
+                    rate = self._rates[logger_name]
+                    break
+                logger_name = logger_name.rpartition(".")[0]
+            else:
+                rate = self._rates.get("root", 1.0)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or self._random() < rate
+
+
+class _SanitizingFormatter(logging.Formatter):
+    """Base for formatters that redact and truncate what they write."""
+
+    def __init__(self, max_field_chars: int = DEFAULT_MAX_FIELD_CHARS, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_field_chars = max_field_chars
+
+    def clean(self, text: str) -> str:
+        return truncate(text, self.max_field_chars)
+
+    def field(self, key: str, value: Any) -> Any:
+        """JSON-compatible, redacted and truncated form of an extra field."""
+        if _is_sensitive(key):
+            return REDACTED
+        if isinstance(value, BaseModel):
+            value = value.model_dump(mode="json")
+        if isinstance(value, str):
+            return self.clean(value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, Mapping):
+            return {str(k): self.field(str(k), v) for k, v in value.items()}
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return [self.field("", v) for v in value]
+        return self.clean(str(value))
+
+
+class JSONFormatter(_SanitizingFormatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": self.clean(record.getMessage()),
+        }
+        for key in ("request_id", "trace_id", "span_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in record_fields(record).items():
+            entry[key] = self.field(key, value)
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(_SanitizingFormatter):
+    """Formats records as text lines followed by ``key=value`` fields."""
+
+    def __init__(self, max_field_chars: int = DEFAULT_MAX_FIELD_CHARS):
+        super().__init__(max_field_chars, fmt=TEXT_FORMAT)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:  # noqa: N802
+        record.message = self.clean(record.message)
+        line = super().formatMessage(record)
+        fields = {
+            key: self.field(key, value) for key, value in record_fields(record).items()
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            fields["request_id"] = request_id
+        if fields:
+            line += " " + " ".join(
+                f"{key}={json.dumps(value, ensure_ascii=False, default=str)}"
+                for key, value in fields.items()
+            )
+        return line
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parse ``LOG_SAMPLE_RATES``, e.g. ``"app.llm=0.1,app.rag=0.5"``.
+
+    Raises:
+        ValueError: If an entry is not ``logger=rate`` with a rate in [0, 1].
+    """
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, value = entry.partition("=")
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = -1.0
+        if not sep or not name.strip() or not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Invalid log sample rate '{entry}' (expected logger=0..1)")
+        rates[name.strip()] = rate
+    return rates
+
+
+_handler: logging.Handler | None = None
+
+
+def configure_logging(
+    level: str | int = "INFO",
+    log_format: str = "json",
+    sample_rates: Mapping[str, float] | None = None,
+    max_field_chars: int = DEFAULT_MAX_FIELD_CHARS,
+    stream: IO[str] | None = None,
+) -> logging.Handler:
+    """Install the application's log handler on the root logger.
+
+    Calling it again replaces the handler installed by the previous call.
+
+    Args:
+        level: Root log level.
+        log_format: ``json`` or ``text``.
+        sample_rates: Fraction of records below WARNING to keep, by logger.
+        max_field_chars: Longest string written per message or field.
+        stream: Where to write (default: stderr).
+
+    Returns:
+        The installed handler.
+    """
+    global _handler
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(ContextFilter())
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    if log_format == "text":
+        handler.setFormatter(TextFormatter(max_field_chars))
+    else:
+        handler.setFormatter(JSONFormatter(max_field_chars))
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    root.addHandler(handler)
+    root.setLevel(level)
+    _handler = handler
+    return handler
+
+
+def configure_logging_from_env() -> logging.Handler:
+    """Configure logging from ``LOG_LEVEL``, ``LOG_FORMAT``,
+    ``LOG_SAMPLE_RATES`` and ``LOG_MAX_FIELD_CHARS``.
+
+    Logging is set up before the application settings are loaded, so that
+    settings errors are logged too; hence the environment is read directly.
+    """
+    return configure_logging(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        log_format=os.getenv("LOG_FORMAT", "json").lower(),
+        sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")),
+        max_field_chars=int(os.getenv("LOG_MAX_FIELD_CHARS", str(DEFAULT_MAX_FIELD_CHARS))),
+    )
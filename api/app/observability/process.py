@@ -0,0 +1,120 @@
+"""Per-process memory and cache reporting for multi-worker serving.
+
+Each worker measures its own memory: resident set size, and on Linux the
+private part of it. Pages a worker still shares copy-on-write with the
+gunicorn master (such as the preloaded RAG index) count towards RSS but
+not towards private memory, so the private figure shows what each extra
+worker really costs.
+
+A :class:`WorkerReporter` thread records these figures together with the
+worker's shared cache hit counts in the :class:`~app.cache.SharedCache`,
+so any worker can answer ``/workers`` for all of them.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import resource
+import sys
+import threading
+from typing import TYPE_CHECKING, Any
+
+from app.observability.metrics import Gauge
+
+if TYPE_CHECKING:
+    from app.cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+PROCESS_MEMORY = Gauge(
+    "process_memory_bytes",
+    "Memory of this worker process by kind (rss, private)",
+    ["kind"],
+)
+
+
+def memory_usage() -> dict[str, int]:
+    """Measure this process's memory in bytes.
+
+    Returns:
+        ``rss`` always; ``private`` (resident pages not shared with any
+        other process) where ``/proc/self/smaps_rollup`` is available.
+        Without ``/proc``, ``rss`` is the peak resident set size.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {
+                name: int(value.split()[0]) * 1024
+                for name, value in (line.split(":", 1) for line in f if ":" in line)
+                if value.strip().endswith("kB")
+            }
+        return {
+            "rss": fields["Rss"],
+            "private": fields["Private_Clean"] + fields["Private_Dirty"],
+        }
+    except (OSError, KeyError, ValueError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return {"rss": peak if sys.platform == "darwin" else peak * 1024}
+
+
+def update_memory_metrics() -> dict[str, int]:
+    """Measure this process's memory and export it as gauges."""
+    usage = memory_usage()
+    for kind, value in usage.items():
+        PROCESS_MEMORY.labels(kind=kind).set(value)
+    return usage
+
+
+class WorkerReporter:
+    """Periodically records this worker's memory and cache hits."""
+
+    def __init__(self, cache: SharedCache, interval_seconds: float = 15.0) -> None:
+        """Initialize the reporter.
+
+        Args:
+            cache: Shared cache the report is stored in and whose hit
+                counts are reported.
+            interval_seconds: Seconds between reports.
+        """
+        self._cache = cache
+        self._interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def report(self) -> dict[str, Any]:
+        """Record and return this worker's current figures."""
+        memory = update_memory_metrics()
+        data = {
+            "rss_bytes": memory["rss"],
+            "private_bytes": memory.get("private"),
+            "cache": self._cache.stats(),
+        }
+        self._cache.record_worker(os.getpid(), data)
+        return data
+
+    def start(self) -> None:
+        """Report now and then every interval in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="worker-reporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop reporting."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.report()
+            except Exception as e:
+                logger.warning(f"Worker report failed: {e}")
+            if self._stop.wait(self._interval):
+                return
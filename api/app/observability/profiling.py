@@ -0,0 +1,381 @@
+"""CPU and memory profiling of a running worker.
+
+Two tools help find out why a worker is slow under real traffic:
+
+- Per-node CPU accounting, always on: :func:`profile_node` measures the
+  CPU time of the thread running each graph node (``time.thread_time``,
+  which costs well under a microsecond) and exports it as
+  ``workflow_node_cpu_seconds_total``, as the ``workflow.node.cpu_seconds``
+  span attribute and in ``debug.timings``. A node whose wall time is mostly
+  CPU rather than waiting on the LLM or TMDB is the one to profile.
+- On-demand captures, served by the opt-in ``/debug/profile`` endpoints:
+  :func:`capture_cpu_profile` samples the stacks of every thread at a fixed
+  interval, like py-spy, and :func:`capture_memory_profile` diffs two
+  ``tracemalloc`` snapshots taken some seconds apart.
+
+Both captures render as collapsed stacks (one ``frame;frame;frame count``
+line per stack), the input format of ``flamegraph.pl``, speedscope and
+``py-spy --format raw``. CPU stacks of threads running a graph node start
+with a ``node:<name>`` frame, so a flame graph splits by node first.
+"""
+
+from __future__ import annotations
+
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any
+
+from app.observability.metrics import Counter
+from app.observability.tracing import set_span_attributes
+
+DEFAULT_INTERVAL_SECONDS = 0.01
+MAX_STACK_DEPTH = 128
+
+NODE_CPU_SECONDS = Counter(
+    "workflow_node_cpu_seconds_total",
+    "CPU time spent by the thread running each workflow node",
+    ["node"],
+)
+
+# Innermost frames of threads that are blocked rather than running: lock and
+# queue waits, the event loop's select and blocking socket reads. Samples
+# ending in one of these are skipped unless idle stacks are asked for.
+IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    # SimpleQueue.get is implemented in C, so an idle executor worker's
+    # innermost Python frame is the worker loop itself.
+    ("concurrent/futures/thread.py", "_worker"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("ssl.py", "read"),
+    ("ssl.py", "recv_into"),
+    ("socketserver.py", "serve_forever"),
+    ("_backends/sync.py", "read"),
+})
+
+# Thread ident -> name of the graph node the thread is running.
+_thread_nodes: dict[int, str] = {}
+_capture_lock = threading.Lock()
+
+
+class ProfileInProgressError(RuntimeError):
+    """Raised when a capture is requested while another one is running."""
+
+
+@contextmanager
+def profile_node(name: str) -> Iterator[None]:
+    """Attribute the CPU time of the calling thread to a graph node.
+
+    While the context is active, CPU profile samples of the thread are
+    tagged with the node. On exit the thread's CPU time is added to
+    ``workflow_node_cpu_seconds_total`` and set on the active span.
+
+    Args:
+        name: The graph node name.
+    """
+    ident = threading.get_ident()
+    previous = _thread_nodes.get(ident)
+    _thread_nodes[ident] = name
+    started = time.thread_time()
+    try:
+        yield
+    finally:
+        cpu_seconds = time.thread_time() - started
+        NODE_CPU_SECONDS.labels(node=name).inc(cpu_seconds)
+        set_span_attributes({"workflow.node.cpu_seconds": round(cpu_seconds, 6)})
+        if previous is None:
+            _thread_nodes.pop(ident, None)
+        else:
+            _thread_nodes[ident] = previous
+
+
+@functools.cache
+def _short_path(filename: str) -> str:
+    """A file path relative to the ``sys.path`` entry containing it."""
+    roots = sorted((p for p in sys.path if p), key=len, reverse=True)
+    for root in roots:
+        prefix = root.rstrip(os.sep) + os.sep
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({_short_path(code.co_filename)})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return any(
+        code.co_name == function and code.co_filename.endswith(os.sep + suffix)
+        for suffix, function in IDLE_FRAMES
+    )
+
+
+@dataclass
+class CPUProfile:
+    """Stack samples gathered by :class:`SamplingProfiler`.
+
+    Attributes:
+        stacks: Sample count per collapsed stack, root frame first.
+        ticks: Number of times the threads were sampled.
+        interval_seconds: Time between ticks.
+        seconds: Wall time of the capture.
+    """
+
+    stacks: collections.Counter[str] = field(default_factory=collections.Counter)
+    ticks: int = 0
+    interval_seconds: float = DEFAULT_INTERVAL_SECONDS
+    seconds: float = 0.0
+
+    def collapsed(self) -> str:
+        """Render the samples as collapsed stacks, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Functions by the samples in which they were the innermost frame.
+
+        Args:
+            limit: Number of functions to return.
+
+        Returns:
+            Rows with the ``function``, its ``self_samples`` and the
+            ``total_samples`` in which it was on the stack.
+        """
+        own: collections.Counter[str] = collections.Counter()
+        total: collections.Counter[str] = collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = [f for f in stack.split(";") if not f.startswith("node:")]
+            if frames:
+                own[frames[-1]] += count
+            for function in set(frames):
+                total[function] += count
+        return [
+            {"function": function, "self_samples": count, "total_samples": total[function]}
+            for function, count in own.most_common(limit)
+        ]
+
+    def by_node(self) -> dict[str, int]:
+        """Sample counts per graph node, with ``none`` for other work."""
+        counts: collections.Counter[str] = collections.Counter()
+        for stack, count in self.stacks.items():
+            root = stack.split(";", 1)[0]
+            counts[root.removeprefix("node:") if root.startswith("node:") else "none"] += count
+        return dict(counts.most_common())
+
+    def to_dict(self, limit: int = 20) -> dict[str, Any]:
+        """Summarize the capture as JSON-serializable data."""
+        return {
+            "seconds": round(self.seconds, 3),
+            "interval_seconds": self.interval_seconds,
+            "ticks": self.ticks,
+            "samples": sum(self.stacks.values()),
+            "by_node": self.by_node(),
+            "top_functions": self.top_functions(limit),
+            "stacks": dict(self.stacks.most_common()),
+        }
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of all threads from a background thread.
+
+    Sampling reads ``sys._current_frames()``, so the profiled code runs
+    unmodified and the cost is paid only by the sampler thread.
+
+    Args:
+        interval_seconds: Time between samples.
+        include_idle: Keep samples of threads blocked in a wait or read.
+        exclude: Idents of further threads not to sample.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        include_idle: bool = False,
+        exclude: Iterable[int] = (),
+    ):
+        self.profile = CPUProfile(interval_seconds=interval_seconds)
+        self._include_idle = include_idle
+        self._exclude = set(exclude)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> CPUProfile:
+        """Stop sampling and return the samples."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.profile.seconds = time.perf_counter() - self._started
+        return self.profile
+
+    def _run(self) -> None:
+        self._exclude.add(threading.get_ident())
+        while not self._stop.wait(self.profile.interval_seconds):
+            self.sample()
+
+    def sample(self) -> None:
+        """Record the current stack of every thread once."""
+        self.profile.ticks += 1
+        for ident, frame in sys._current_frames().items():
+            if ident in self._exclude:
+                continue
+            if not self._include_idle and _is_idle(frame):
+                continue
+            frames = []
+            current: FrameType | None = frame
+            while current is not None and len(frames) < MAX_STACK_DEPTH:
+                frames.append(_frame_label(current))
+                current = current.f_back
+            node = _thread_nodes.get(ident)
+            if node is not None:
+                frames.append(f"node:{node}")
+            self.profile.stacks[";".join(reversed(frames))] += 1
+
+
+@contextmanager
+def _exclusive_capture() -> Iterator[None]:
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfileInProgressError("A profile is already being captured")
+    try:
+        yield
+    finally:
+        _capture_lock.release()
+
+
+def capture_cpu_profile(
+    seconds: float,
+    interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+    include_idle: bool = False,
+) -> CPUProfile:
+    """Sample the stacks of all other threads for a while.
+
+    Blocks the calling thread for ``seconds``; that thread is not sampled.
+
+    Args:
+        seconds: How long to sample.
+        interval_seconds: Time between samples.
+        include_idle: Keep samples of blocked threads.
+
+    Returns:
+        The gathered samples.
+
+    Raises:
+        ProfileInProgressError: If another capture is running.
+    """
+    with _exclusive_capture():
+        profiler = SamplingProfiler(
+            interval_seconds, include_idle, exclude=[threading.get_ident()]
+        )
+        profiler.start()
+        try:
+            time.sleep(seconds)
+        finally:
+            profile = profiler.stop()
+    return profile
+
+
+@dataclass
+class MemoryProfile:
+    """Allocation growth between two ``tracemalloc`` snapshots.
+
+    Attributes:
+        stats: Tracebacks with their ``size_diff`` and ``count_diff``,
+            largest growth first.
+        seconds: Time between the snapshots.
+        traced_bytes: Memory traced at the end of the capture.
+    """
+
+    stats: list[tracemalloc.StatisticDiff]
+    seconds: float
+    traced_bytes: int
+
+    def collapsed(self) -> str:
+        """Render the growth as collapsed stacks weighted by bytes."""
+        lines = []
+        for stat in self.stats:
+            if stat.size_diff > 0:
+                frames = ";".join(
+                    f"{_short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback
+                )
+                lines.append(f"{frames} {stat.size_diff}\n")
+        return "".join(lines)
+
+    def to_dict(self, limit: int = 20) -> dict[str, Any]:
+        """Summarize the capture as JSON-serializable data."""
+        return {
+            "seconds": round(self.seconds, 3),
+            "traced_bytes": self.traced_bytes,
+            "growth_bytes": sum(stat.size_diff for stat in self.stats),
+            "top_allocations": [
+                {
+                    "location": f"{_short_path(stat.traceback[-1].filename)}"
+                    f":{stat.traceback[-1].lineno}",
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in self.stats[:limit]
+            ],
+        }
+
+
+_MEMORY_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def capture_memory_profile(seconds: float, frames: int = 16) -> MemoryProfile:
+    """Trace allocations for a while and report what grew.
+
+    Tracing slows allocation-heavy code down noticeably, so it runs only
+    during the capture unless ``tracemalloc`` was already started (e.g.
+    with ``PYTHONTRACEMALLOC``).
+
+    Args:
+        seconds: Time between the two snapshots.
+        frames: Stack depth to record per allocation.
+
+    Returns:
+        Allocation growth grouped by traceback.
+
+    Raises:
+        ProfileInProgressError: If another capture is running.
+    """
+    with _exclusive_capture():
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(frames)
+        try:
+            before = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+            started = time.perf_counter()
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+            elapsed = time.perf_counter() - started
+            traced_bytes, _ = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+    stats = [stat for stat in after.compare_to(before, "traceback") if stat.size_diff]
+    return MemoryProfile(stats=stats, seconds=elapsed, traced_bytes=traced_bytes)
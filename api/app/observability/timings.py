@@ -0,0 +1,105 @@
+"""Per-request timing breakdown built from a request's trace spans.
+
+:meth:`app.llm.workflow.MovieNightWorkflow.invoke` records the spans that
+end while it runs (see :func:`app.observability.tracing.record_spans`) and
+summarizes them with :func:`summarize_timings`. The summary is returned in
+``debug.timings`` so slow requests can be diagnosed from the UI without
+trace tooling.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from app.observability.tracing import Span
+
+
+def summarize_timings(
+    spans: Iterable[Span],
+    started_at: float,
+    total_seconds: float,
+    retries: int = 0,
+) -> dict[str, Any]:
+    """Summarize a request's spans.
+
+    Args:
+        spans: Finished spans recorded during the request.
+        started_at: Epoch time at which the request started; waterfall
+            offsets are relative to it.
+        total_seconds: Wall time of the whole request.
+        retries: Recommendation rewrites the evaluator asked for.
+
+    Returns:
+        A dictionary with ``total_seconds``, a ``waterfall`` of spans in
+        start order (with nesting ``depth``), wall and CPU time per node
+        in ``nodes``, ``llm_calls`` with their latency and tokens, ``tmdb``
+        request counts, latency and cache hits, and ``retries``.
+    """
+    spans = sorted(spans, key=lambda span: span.start_time)
+    by_id = {span.context.span_id: span for span in spans}
+
+    nodes: dict[str, dict[str, Any]] = {}
+    llm_calls = []
+    tmdb = {"requests": 0, "upstream_calls": 0, "cache_hits": 0, "shared": 0, "seconds": 0.0}
+    waterfall = []
+    for span in spans:
+        attributes = span.attributes
+        duration = span.duration_seconds or 0.0
+        waterfall.append({
+            "name": span.name,
+            "kind": span.kind,
+            "depth": _depth(span, by_id),
+            "start_seconds": round(span.start_time - started_at, 4),
+            "duration_seconds": round(duration, 4),
+            "status": span.status,
+        })
+
+        if "gen_ai.operation.name" in attributes:
+            llm_calls.append({
+                "node": attributes.get("workflow.node"),
+                "agent": attributes.get("llm.agent"),
+                "model": attributes.get("gen_ai.response.model")
+                or attributes.get("gen_ai.request.model"),
+                "latency_seconds": round(duration, 4),
+                "prompt_tokens": attributes.get("gen_ai.usage.input_tokens", 0),
+                "completion_tokens": attributes.get("gen_ai.usage.output_tokens", 0),
+                "status": span.status,
+            })
+        elif "workflow.node" in attributes:
+            node = nodes.setdefault(
+                str(attributes["workflow.node"]), {"runs": 0, "seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            node["runs"] += 1
+            node["seconds"] = round(node["seconds"] + duration, 4)
+            node["cpu_seconds"] = round(
+                node["cpu_seconds"] + float(attributes.get("workflow.node.cpu_seconds", 0.0)), 4
+            )
+        elif "tmdb.endpoint" in attributes:
+            tmdb["requests"] += 1
+            tmdb["seconds"] = round(tmdb["seconds"] + duration, 4)
+            if attributes.get("tmdb.cache_hit") is True:
+                tmdb["cache_hits"] += 1
+            elif attributes.get("tmdb.shared"):
+                tmdb["shared"] += 1
+            else:
+                tmdb["upstream_calls"] += 1
+
+    return {
+        "total_seconds": round(total_seconds, 4),
+        "waterfall": waterfall,
+        "nodes": nodes,
+        "llm_calls": llm_calls,
+        "tmdb": tmdb,
+        "retries": retries,
+    }
+
+
+def _depth(span: Span, by_id: dict[str, Span]) -> int:
+    """Number of the span's ancestors among the recorded spans."""
+    depth = 0
+    parent = by_id.get(span.parent_span_id or "")
+    while parent is not None:
+        depth += 1
+        parent = by_id.get(parent.parent_span_id or "")
+    return depth
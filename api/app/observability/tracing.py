@@ -0,0 +1,489 @@
+"""Distributed tracing with W3C trace context and OTLP export.
+
+This module implements the small subset of OpenTelemetry tracing the
+application needs, in the same spirit as :mod:`app.observability.metrics`:
+spans with attributes and a status, parented through a context variable,
+and exporters that receive each span when it ends. Apart from httpx, which
+the OTLP exporter sends with, it has no dependencies.
+
+Spans are created for:
+
+- every HTTP request (``RequestTracingMiddleware``), continuing the trace of
+  an incoming W3C ``traceparent`` header
+- every workflow node (:func:`app.llm.workflow.nodes.instrument_node`)
+- every LLM completion (:class:`app.observability.usage.UsageCallbackHandler`)
+- every TMDB request (:meth:`app.integrations.tmdb_client.TMDBClient._get`)
+
+Finished spans go to the installed exporters (see
+:func:`set_span_exporters`), and to the recorder activated with
+:func:`record_spans`, which collects one request's spans whether or not
+they are sampled. :class:`OTLPSpanExporter` sends them to any
+OpenTelemetry collector or backend over OTLP/HTTP, and
+:class:`InMemorySpanExporter` keeps them for tests. LangSmith tracing
+(:mod:`app.observability.langsmith`) is configured separately and keeps
+recording LLM run trees; its chat traces carry the ``trace_id`` so both can
+be joined.
+
+Usage::
+
+    from app.observability.tracing import start_span
+
+    with start_span("rerank", {"candidates": 20}) as span:
+        ranked = rerank(candidates)
+        span.set_attribute("kept", len(ranked))
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import secrets
+import threading
+import time
+from collections.abc import Generator, Iterable, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+if TYPE_CHECKING:
+    from app.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+AttributeValue = str | int | float | bool
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span within a trace."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    @property
+    def traceparent(self) -> str:
+        """The context as a W3C ``traceparent`` header value."""
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id}-{self.span_id}-{flags}"
+
+
+def parse_traceparent(header: str | None) -> SpanContext | None:
+    """Parse a W3C ``traceparent`` header.
+
+    Args:
+        header: The header value, e.g.
+            ``00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01``.
+
+    Returns:
+        The remote parent's context, or None if the header is missing or
+        invalid.
+    """
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    context: SpanContext
+    parent_span_id: str | None = None
+    kind: str = "internal"
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+    start_time: float = field(default_factory=time.time)
+    end_time: float | None = None
+    status: str = "unset"
+    status_message: str | None = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    _ended: float | None = field(default=None, repr=False)
+
+    @property
+    def duration_seconds(self) -> float | None:
+        """Seconds the span was open, or None while it still is."""
+        return None if self._ended is None else self._ended - self._started
+
+    def set_attribute(self, key: str, value: AttributeValue | None) -> None:
+        """Set an attribute; None values are ignored."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Mapping[str, AttributeValue | None]) -> None:
+        """Set several attributes; None values are ignored."""
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_error(self, error: BaseException | str) -> None:
+        """Mark the span as failed."""
+        self.status = "error"
+        self.status_message = str(error)
+
+    def end(self) -> None:
+        """End the span and hand it to the exporters. Safe to call twice."""
+        if self._ended is not None:
+            return
+        self._ended = time.perf_counter()
+        self.end_time = self.start_time + (self._ended - self._started)
+        if self.status == "unset":
+            self.status = "ok"
+        recorder = _current_recorder.get()
+        if recorder is not None:
+            recorder.export(self)
+        if self.context.sampled:
+            _export(self)
+
+
+class SpanExporter:
+    """Receives finished spans."""
+
+    def export(self, span: Span) -> None:
+        """Export one finished span. Must not block for long."""
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Flush pending spans and release resources."""
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in memory, for tests."""
+
+    def __init__(self) -> None:
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    @property
+    def spans(self) -> list[Span]:
+        """Finished spans in the order they ended."""
+        with self._lock:
+            return list(self._spans)
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def by_name(self, name: str) -> list[Span]:
+        """Finished spans with the given name."""
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        """Forget all spans."""
+        with self._lock:
+            self._spans.clear()
+
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+_OTLP_STATUS = {"unset": 0, "ok": 1, "error": 2}
+
+
+class OTLPSpanExporter(SpanExporter):
+    """Sends spans to an OpenTelemetry collector over OTLP/HTTP (JSON).
+
+    Spans are buffered and sent in batches from a background thread, so
+    ending a span never waits on the network. When the buffer is full,
+    new spans are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str = "movie-night-api",
+        headers: Mapping[str, str] | None = None,
+        flush_interval_seconds: float = 5.0,
+        max_queue: int = 2048,
+        max_batch: int = 512,
+        client: httpx.Client | None = None,
+    ) -> None:
+        """Initialize the exporter and start its sender thread.
+
+        Args:
+            endpoint: Collector base URL; spans are posted to
+                ``{endpoint}/v1/traces``.
+            service_name: Value of the ``service.name`` resource attribute.
+            headers: Extra request headers (e.g. an API key).
+            flush_interval_seconds: Longest time a span waits to be sent.
+            max_queue: Spans buffered before new ones are dropped.
+            max_batch: Spans sent per request.
+            client: HTTP client to use (overridable for tests).
+        """
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.service_name = service_name
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._client = client or httpx.Client(headers=dict(headers or {}), timeout=10.0)
+        self._queue: list[Span] = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="otlp-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self) -> None:
+        """Send all buffered spans now."""
+        while True:
+            with self._cond:
+                batch = self._queue[: self.max_batch]
+                del self._queue[: self.max_batch]
+            if not batch:
+                return
+            self._send(batch)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=self.flush_interval_seconds + 5)
+        self.flush()
+        self._client.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopped and len(self._queue) < self.max_batch:
+                    self._cond.wait(self.flush_interval_seconds)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def _send(self, spans: list[Span]) -> None:
+        try:
+            response = self._client.post(self.url, json=self.encode(spans))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Dropped {len(spans)} spans: OTLP export failed: {e}")
+
+    def encode(self, spans: Iterable[Span]) -> dict[str, Any]:
+        """Encode spans as an OTLP ``ExportTraceServiceRequest`` in JSON."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes({"service.name": self.service_name})
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app"},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    encoded: dict[str, Any] = {
+        "traceId": span.context.trace_id,
+        "spanId": span.context.span_id,
+        "name": span.name,
+        "kind": _OTLP_KINDS.get(span.kind, 1),
+        "startTimeUnixNano": str(int(span.start_time * 1e9)),
+        "endTimeUnixNano": str(int((span.end_time or span.start_time) * 1e9)),
+        "attributes": _otlp_attributes(span.attributes),
+        "status": {"code": _OTLP_STATUS[span.status]},
+    }
+    if span.parent_span_id:
+        encoded["parentSpanId"] = span.parent_span_id
+    if span.status_message:
+        encoded["status"]["message"] = span.status_message
+    return encoded
+
+
+def _otlp_attributes(attributes: Mapping[str, AttributeValue]) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+_exporters: list[SpanExporter] = []
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_current_recorder: ContextVar[InMemorySpanExporter | None] = ContextVar(
+    "span_recorder", default=None
+)
+
+
+def set_span_exporters(exporters: Iterable[SpanExporter]) -> None:
+    """Make ``exporters`` the ones finished spans are sent to."""
+    global _exporters
+    _exporters = list(exporters)
+
+
+def get_span_exporters() -> list[SpanExporter]:
+    """Return the installed exporters."""
+    return list(_exporters)
+
+
+def _export(span: Span) -> None:
+    for exporter in _exporters:
+        try:
+            exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Span export failed (non-fatal): {e}")
+
+
+@contextmanager
+def record_spans() -> Generator[InMemorySpanExporter, None, None]:
+    """Collect the spans that end in the current context within the block."""
+    recorder = InMemorySpanExporter()
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+def current_span() -> Span | None:
+    """Return the span active in the current context, if any."""
+    return _current_span.get()
+
+
+def set_span_attributes(attributes: Mapping[str, AttributeValue | None]) -> None:
+    """Set attributes on the active span, if any."""
+    span = current_span()
+    if span is not None:
+        span.set_attributes(attributes)
+
+
+def begin_span(
+    name: str,
+    attributes: Mapping[str, AttributeValue | None] | None = None,
+    kind: str = "internal",
+    parent: SpanContext | None = None,
+) -> Span:
+    """Start a span without making it the active one.
+
+    For operations whose start and end are reported separately (e.g. by
+    callbacks). The caller must call :meth:`Span.end`.
+
+    Args:
+        name: Span name.
+        attributes: Initial attributes.
+        kind: ``internal``, ``server`` or ``client``.
+        parent: Explicit parent (e.g. from a ``traceparent`` header);
+            defaults to the active span.
+
+    Returns:
+        The started span.
+    """
+    if parent is None:
+        active = current_span()
+        parent = active.context if active is not None else None
+    if parent is None:
+        context = SpanContext(secrets.token_hex(16), secrets.token_hex(8))
+    else:
+        context = SpanContext(parent.trace_id, secrets.token_hex(8), parent.sampled)
+    span = Span(
+        name=name,
+        context=context,
+        parent_span_id=parent.span_id if parent is not None else None,
+        kind=kind,
+    )
+    if attributes:
+        span.set_attributes(attributes)
+    return span
+
+
+@contextmanager
+def use_span(span: Span) -> Generator[Span, None, None]:
+    """Make ``span`` the active span within the block, without ending it."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    attributes: Mapping[str, AttributeValue | None] | None = None,
+    kind: str = "internal",
+    parent: SpanContext | None = None,
+) -> Generator[Span, None, None]:
+    """Run the block in a new span, active for anything started inside it.
+
+    An exception leaving the block marks the span as failed.
+
+    Args:
+        name: Span name.
+        attributes: Initial attributes.
+        kind: ``internal``, ``server`` or ``client``.
+        parent: Explicit parent; defaults to the active span.
+
+    Yields:
+        The span.
+    """
+    span = begin_span(name, attributes, kind=kind, parent=parent)
+    try:
+        with use_span(span):
+            yield span
+    except BaseException as e:
+        span.set_error(e)
+        raise
+    finally:
+        span.end()
+
+
+def configure_tracing(settings: Settings) -> list[str]:
+    """Install the span exporters enabled in settings.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        Names of the installed exporters.
+    """
+    exporters: list[SpanExporter] = []
+    if settings.otel_exporter_otlp_endpoint:
+        exporters.append(
+            OTLPSpanExporter(
+                settings.otel_exporter_otlp_endpoint,
+                service_name=settings.otel_service_name,
+            )
+        )
+        logger.info(f"Exporting spans over OTLP to {settings.otel_exporter_otlp_endpoint}")
+    set_span_exporters(exporters)
+    return [type(exporter).__name__ for exporter in exporters]
+
+
+def shutdown_tracing() -> None:
+    """Flush and remove the installed exporters."""
+    exporters = get_span_exporters()
+    set_span_exporters([])
+    for exporter in exporters:
+        exporter.shutdown()
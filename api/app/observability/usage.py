@@ -0,0 +1,377 @@
+"""Token and cost accounting for LLM calls.
+
+Every chat model built by :func:`app.llm.client.create_chat_model` carries a
+:class:`UsageCallbackHandler`. The handler records prompt, completion and
+cached-prompt tokens, latency and the model name for each completion and
+attributes the call to:
+
+- the **agent** the model was created for (``input``, ``writer``, ...)
+- the **workflow node** that was executing (see :func:`node_scope`)
+- the **request**, via the :class:`UsageLedger` activated with
+  :func:`usage_ledger` for the duration of a workflow run
+
+Totals are also exported as Prometheus counters, and each completion is
+traced as a client span carrying its model and token counts.
+
+Completions that did not reach the LLM (answered from the shared response
+cache, by a concurrent identical call, or by a replaying cassette) are
+marked with :data:`SERVED_FROM` in their ``generation_info``. They are
+kept in the ledger but left out of the call count, the latency histogram,
+the admission token budget and the degradation controller's samples,
+whose near-zero latencies would otherwise hide a slow upstream.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.observability.metrics import Counter, Histogram
+from app.observability.tracing import Span, begin_span
+# Imported as a module: app.resilience imports this package while it loads.
+from app.resilience import admission, degradation
+
+logger = logging.getLogger(__name__)
+
+UNATTRIBUTED_NODE = "unattributed"
+
+# generation_info key naming where a completion not made upstream came from
+SERVED_FROM = "served_from"
+
+LLM_CALLS = Counter(
+    "llm_calls_total", "LLM completions", ["node", "agent", "model"]
+)
+LLM_PROMPT_TOKENS = Counter(
+    "llm_prompt_tokens_total", "Prompt tokens sent to the LLM", ["node", "agent", "model"]
+)
+LLM_COMPLETION_TOKENS = Counter(
+    "llm_completion_tokens_total",
+    "Completion tokens produced by the LLM",
+    ["node", "agent", "model"],
+)
+LLM_CACHED_TOKENS = Counter(
+    "llm_cached_prompt_tokens_total",
+    "Prompt tokens served from the provider's prompt cache",
+    ["node", "agent", "model"],
+)
+LLM_COST = Counter(
+    "llm_cost_usd_total", "Estimated LLM cost in USD", ["node", "agent", "model"]
+)
+LLM_LATENCY = Histogram(
+    "llm_call_latency_seconds", "LLM completion latency", ["node", "agent", "model"]
+)
+
+
+@dataclass
+class LLMCallUsage:
+    """Usage recorded for a single LLM completion."""
+
+    node: str
+    agent: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    latency_seconds: float = 0.0
+    cost_usd: float = 0.0
+    served_from: str | None = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class UsageLedger:
+    """Collects the LLM usage of a single request.
+
+    The ledger is thread-safe so nodes running in worker threads can record
+    into the same request.
+    """
+
+    def __init__(self) -> None:
+        self._calls: list[LLMCallUsage] = []
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> list[LLMCallUsage]:
+        """Recorded calls in completion order."""
+        with self._lock:
+            return list(self._calls)
+
+    def record(self, usage: LLMCallUsage) -> None:
+        """Add a completed call to the ledger."""
+        with self._lock:
+            self._calls.append(usage)
+
+    def summary(self) -> dict[str, Any]:
+        """Aggregate the recorded calls.
+
+        Returns:
+            A dictionary with request totals plus ``by_node``, ``by_agent``
+            and ``by_model`` breakdowns and the individual ``calls``.
+        """
+        calls = self.calls
+        return {
+            **_totals(calls),
+            "by_node": _group(calls, "node"),
+            "by_agent": _group(calls, "agent"),
+            "by_model": _group(calls, "model"),
+            "calls": [asdict(call) for call in calls],
+        }
+
+
+_current_ledger: ContextVar[UsageLedger | None] = ContextVar(
+    "usage_ledger", default=None
+)
+_current_node: ContextVar[str | None] = ContextVar("workflow_node", default=None)
+
+
+@contextmanager
+def usage_ledger() -> Generator[UsageLedger, None, None]:
+    """Activate a fresh :class:`UsageLedger` for the current context."""
+    ledger = UsageLedger()
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def get_current_ledger() -> UsageLedger | None:
+    """Return the ledger active in the current context, if any."""
+    return _current_ledger.get()
+
+
+@contextmanager
+def node_scope(node: str) -> Generator[None, None, None]:
+    """Attribute LLM calls made inside the block to a workflow node."""
+    token = _current_node.set(node)
+    try:
+        yield
+    finally:
+        _current_node.reset(token)
+
+
+def get_current_node() -> str | None:
+    """Return the workflow node executing in the current context, if any."""
+    return _current_node.get()
+
+
+def estimate_cost(
+    pricing: dict[str, float] | None,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+) -> float:
+    """Estimate the USD cost of a completion.
+
+    Args:
+        pricing: USD per 1M tokens with keys ``prompt``, ``completion`` and
+            optionally ``cached_prompt`` (defaults to the prompt price).
+        prompt_tokens: Total prompt tokens, including cached ones.
+        completion_tokens: Completion tokens.
+        cached_tokens: Prompt tokens served from the prompt cache.
+
+    Returns:
+        Estimated cost, or 0.0 when no pricing is configured.
+    """
+    if not pricing:
+        return 0.0
+    prompt_price = pricing.get("prompt", 0.0)
+    cached_price = pricing.get("cached_prompt", prompt_price)
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (
+        uncached * prompt_price
+        + cached_tokens * cached_price
+        + completion_tokens * pricing.get("completion", 0.0)
+    ) / 1_000_000
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that records token usage per call.
+
+    Args:
+        agent: Name of the agent the model serves (metric label).
+        model: Deployment name, used when the response does not report one.
+        pricing: Optional per-model pricing, see :func:`estimate_cost`.
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        model: str,
+        pricing: dict[str, dict[str, float]] | None = None,
+    ) -> None:
+        self.agent = agent
+        self.model = model
+        self._pricing = pricing or {}
+        self._starts: dict[UUID, tuple[float, Span]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: list, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._start(run_id)
+
+    def on_llm_start(
+        self, serialized: dict[str, Any], prompts: list[str], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._start(run_id)
+
+    def _start(self, run_id: UUID) -> None:
+        span = begin_span(
+            f"chat {self.model}",
+            {
+                "gen_ai.operation.name": "chat",
+                "gen_ai.request.model": self.model,
+                "llm.agent": self.agent,
+                "workflow.node": get_current_node(),
+            },
+            kind="client",
+        )
+        with self._lock:
+            self._starts[run_id] = (time.perf_counter(), span)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            _, span = self._starts.pop(run_id, (None, None))
+        if span is not None:
+            span.set_error(error)
+            span.end()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            start, span = self._starts.pop(run_id, (None, None))
+        latency = time.perf_counter() - start if start is not None else 0.0
+
+        prompt_tokens, completion_tokens, cached_tokens, model = _extract_usage(response)
+        model = model or self.model
+        pricing = self._pricing.get(model) or self._pricing.get(self.model)
+
+        usage = LLMCallUsage(
+            node=get_current_node() or UNATTRIBUTED_NODE,
+            agent=self.agent,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            latency_seconds=latency,
+            cost_usd=estimate_cost(
+                pricing, prompt_tokens, completion_tokens, cached_tokens
+            ),
+            served_from=_served_from(response),
+        )
+        record_usage(usage)
+        if span is not None:
+            span.set_attributes({
+                "gen_ai.response.model": model,
+                "gen_ai.usage.input_tokens": prompt_tokens,
+                "gen_ai.usage.output_tokens": completion_tokens,
+                "gen_ai.usage.cached_input_tokens": cached_tokens,
+            })
+            span.end()
+
+
+def record_usage(usage: LLMCallUsage) -> None:
+    """Record a call in the active ledger, the Prometheus counters, the
+    LLM token budget used for admission control and the degradation
+    controller's latency samples.
+
+    Completions with ``served_from`` set only go to the ledger and the
+    token counters."""
+    ledger = get_current_ledger()
+    if ledger is not None:
+        ledger.record(usage)
+    upstream = usage.served_from is None
+    if upstream:
+        admission.charge_downstream("llm", usage.total_tokens)
+        degradation.observe_upstream_latency("llm", usage.latency_seconds)
+
+    labels = {"node": usage.node, "agent": usage.agent, "model": usage.model}
+    LLM_PROMPT_TOKENS.labels(**labels).inc(usage.prompt_tokens)
+    LLM_COMPLETION_TOKENS.labels(**labels).inc(usage.completion_tokens)
+    LLM_CACHED_TOKENS.labels(**labels).inc(usage.cached_tokens)
+    LLM_COST.labels(**labels).inc(usage.cost_usd)
+    if upstream:
+        LLM_CALLS.labels(**labels).inc()
+        LLM_LATENCY.labels(**labels).observe(usage.latency_seconds)
+
+    logger.debug(
+        "LLM usage: node=%s agent=%s model=%s prompt=%d completion=%d "
+        "cached=%d latency=%.2fs served_from=%s",
+        usage.node, usage.agent, usage.model, usage.prompt_tokens,
+        usage.completion_tokens, usage.cached_tokens, usage.latency_seconds,
+        usage.served_from or "upstream",
+    )
+
+
+def _served_from(response: LLMResult) -> str | None:
+    """Where a completion not made upstream came from, if it is marked."""
+    for generations in response.generations:
+        for generation in generations:
+            source = (generation.generation_info or {}).get(SERVED_FROM)
+            if source:
+                return source
+    return None
+
+
+def _extract_usage(response: LLMResult) -> tuple[int, int, int, str | None]:
+    """Pull token counts and model name out of an :class:`LLMResult`.
+
+    Prefers the standardized ``usage_metadata`` on the generated message
+    and falls back to the provider's ``token_usage`` block.
+    """
+    llm_output = response.llm_output or {}
+    model = llm_output.get("model_name")
+
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                details = usage.get("input_token_details") or {}
+                metadata = getattr(message, "response_metadata", None) or {}
+                return (
+                    usage.get("input_tokens", 0),
+                    usage.get("output_tokens", 0),
+                    details.get("cache_read", 0) or 0,
+                    model or metadata.get("model_name"),
+                )
+
+    token_usage = llm_output.get("token_usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return (
+        token_usage.get("prompt_tokens", 0) or 0,
+        token_usage.get("completion_tokens", 0) or 0,
+        details.get("cached_tokens", 0) or 0,
+        model,
+    )
+
+
+def _totals(calls: list[LLMCallUsage]) -> dict[str, Any]:
+    return {
+        "llm_calls": len(calls),
+        "prompt_tokens": sum(c.prompt_tokens for c in calls),
+        "completion_tokens": sum(c.completion_tokens for c in calls),
+        "cached_tokens": sum(c.cached_tokens for c in calls),
+        "total_tokens": sum(c.total_tokens for c in calls),
+        "latency_seconds": round(sum(c.latency_seconds for c in calls), 4),
+        "cost_usd": round(sum(c.cost_usd for c in calls), 6),
+    }
+
+
+def _group(calls: list[LLMCallUsage], attr: str) -> dict[str, dict[str, Any]]:
+    groups: dict[str, list[LLMCallUsage]] = {}
+    for call in calls:
+        groups.setdefault(getattr(call, attr), []).append(call)
+    return {key: _totals(group) for key, group in groups.items()}
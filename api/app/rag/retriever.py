@@ -7,6 +7,7 @@ using simple TF-IDF-based similarity scoring.
 import logging
 import math
 import re
+import threading
 from collections import Counter
 from dataclasses import dataclass
 
@@ -18,6 +19,9 @@ logger = logging.getLogger(__name__)
 DEFAULT_TOP_K = 3
 MIN_RELEVANCE_SCORE = 0.1
 
+_shared_retriever: "DocumentRetriever | None" = None
+_shared_lock = threading.Lock()
+
 
 @dataclass
 class ScoredDocument:
@@ -180,14 +184,14 @@ class DocumentRetriever:
             self.initialize()
 
         if not self._documents:
-            logger.info("No documents available for retrieval")
+            logger.debug("No documents available for retrieval")
             return []
 
         k = top_k if top_k is not None else self._top_k
         query_vec = self._tokenize(query)
 
         if not query_vec:
-            logger.info(f"Query produced no tokens: {query}")
+            logger.debug("Query produced no tokens: %s", query)
             return []
 
         scored_docs = []
@@ -202,9 +206,7 @@ class DocumentRetriever:
         scored_docs.sort(key=lambda x: x.score, reverse=True)
         top_docs = scored_docs[:k]
 
-        logger.info(
-            f"Retrieved {len(top_docs)} documents for query: {query[:50]}..."
-        )
+        logger.debug("Retrieved %d documents for query: %s", len(top_docs), query)
 
         return [
             RetrievedContext(
@@ -268,3 +270,22 @@ def create_retriever(
     )
     retriever.initialize()
     return retriever
+
+
+def get_shared_retriever() -> DocumentRetriever:
+    """Return the process-wide retriever, building it on first use.
+
+    The index is read-only once built, so every workflow in the process can
+    share it. When the server preloads it before forking workers (see
+    :mod:`app.serving`), the workers share the parent's copy of the index
+    instead of each building their own.
+
+    Returns:
+        The initialized DocumentRetriever with default settings.
+    """
+    global _shared_retriever
+    if _shared_retriever is None:
+        with _shared_lock:
+            if _shared_retriever is None:
+                _shared_retriever = create_retriever()
+    return _shared_retriever
@@ -0,0 +1,80 @@
+"""Resilience utilities for the Movie Night Assistant.
+
+This module bounds request latency and duplicate work: per-request
+deadlines that workflow nodes budget against, hedged requests that cut
+the latency tail of slow LLM calls, coalescing of identical concurrent
+calls, sharing of identical sub-queries within a batch, rate limits
+for bulk jobs, and admission control that keeps surges within the
+server's and its upstreams' capacity, and a controller that degrades
+the workflow step by step while upstream latency exceeds its SLO.
+"""
+
+from app.resilience.admission import (
+    PRIORITIES,
+    AdmissionController,
+    AdmissionRejected,
+    AdmissionTicket,
+    DownstreamBudget,
+    charge_downstream,
+    set_downstream_budgets,
+)
+
+from app.resilience.deadline import (
+    DEFAULT_DEADLINE_SECONDS,
+    Deadline,
+    DeadlineExceeded,
+    deadline_from_state,
+    deadline_scope,
+    get_current_deadline,
+)
+from app.resilience.degradation import (
+    DEGRADATION_LEVELS,
+    DegradationController,
+    current_degradation_level,
+    get_degradation_controller,
+    measure_active,
+    observe_upstream_latency,
+    set_degradation_controller,
+)
+from app.resilience.hedging import LatencyTracker, hedged_call, set_hedge_workers
+from app.resilience.memo import (
+    BatchMemo,
+    batch_memo_scope,
+    get_current_memo,
+    memoized,
+)
+from app.resilience.ratelimit import RateLimiter
+from app.resilience.singleflight import AsyncSingleFlight, SingleFlight
+
+__all__ = [
+    "DEFAULT_DEADLINE_SECONDS",
+    "Deadline",
+    "DeadlineExceeded",
+    "deadline_from_state",
+    "deadline_scope",
+    "get_current_deadline",
+    "LatencyTracker",
+    "hedged_call",
+    "set_hedge_workers",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "BatchMemo",
+    "batch_memo_scope",
+    "get_current_memo",
+    "memoized",
+    "RateLimiter",
+    "PRIORITIES",
+    "AdmissionController",
+    "AdmissionRejected",
+    "AdmissionTicket",
+    "DownstreamBudget",
+    "charge_downstream",
+    "set_downstream_budgets",
+    "DEGRADATION_LEVELS",
+    "DegradationController",
+    "current_degradation_level",
+    "get_degradation_controller",
+    "measure_active",
+    "observe_upstream_latency",
+    "set_degradation_controller",
+]
@@ -0,0 +1,429 @@
+"""Admission control for chat requests.
+
+Without admission control, a traffic surge puts every request into the
+server's thread pool at once. Each one then waits longer for the LLM,
+upstream rate limits trip, and all requests fail together. An
+:class:`AdmissionController` sits in front of the workflow:
+
+- At most ``max_concurrency`` requests run at once. A batch takes as many
+  slots as the messages it runs concurrently.
+- Further requests wait in a bounded queue, ordered by priority class
+  (``interactive`` before ``batch``) and then by arrival. A request never
+  waits longer than ``max_wait_seconds`` or past its own deadline.
+- Requests are also held back while a :class:`DownstreamBudget` is used up.
+  The LLM tokens-per-minute budget and the TMDB requests-per-second budget
+  are charged with actual usage through :func:`charge_downstream`, as it
+  happens.
+- A request that cannot be admitted fails fast with
+  :class:`AdmissionRejected`, which carries the HTTP status (429 when a
+  downstream budget is exhausted, 503 when the server is saturated) and a
+  ``Retry-After`` estimate.
+
+Async endpoints wait with :meth:`AdmissionController.aadmit`, which does
+not hold a thread while queued. Waiting with the blocking
+:meth:`AdmissionController.admit` in a sync endpoint would keep one of the
+server's threadpool threads per queued request, and a full queue would
+leave none for other endpoints.
+
+Queue depth, in-flight slots, queue wait times, decisions and budget
+levels are exported as metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+
+from app.observability.metrics import Counter, Gauge, Histogram
+from app.resilience.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES: tuple[str, ...] = ("interactive", "batch")
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for admission", ["priority"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight_slots", "Concurrency slots held by admitted requests"
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time requests waited in the admission queue",
+    ["priority"],
+)
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "Admission decisions by priority and outcome "
+    "(admitted, queue_full, budget_exhausted, timed_out)",
+    ["priority", "outcome"],
+)
+DOWNSTREAM_BUDGET_LEVEL = Gauge(
+    "downstream_budget_level",
+    "Units left in each downstream budget (negative while overdrawn)",
+    ["downstream"],
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted.
+
+    Attributes:
+        status_code: 429 if a downstream budget is exhausted, 503 if the
+            server is saturated.
+        retry_after: Suggested whole seconds before retrying.
+        reason: ``queue_full``, ``budget_exhausted`` or ``timed_out``.
+    """
+
+    def __init__(self, status_code: int, retry_after: float, reason: str) -> None:
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+        super().__init__(f"Request not admitted: {reason}")
+
+
+class DownstreamBudget:
+    """Token bucket for usage of one downstream that may be overdrawn.
+
+    Usage is charged after the fact, since the cost of a call (e.g. its
+    token count) is only known once it completes. The level can therefore
+    go negative. Requests are admitted only while it is positive.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a full budget.
+
+        Args:
+            name: Downstream name used by :func:`charge_downstream`.
+            rate: Units restored per second.
+            capacity: Maximum units, the burst the downstream accepts.
+            clock: Monotonic time source (overridable for tests).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._level = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def charge(self, amount: float) -> None:
+        """Deduct used units."""
+        with self._lock:
+            self._refill()
+            self._level -= amount
+            level = self._level
+        DOWNSTREAM_BUDGET_LEVEL.labels(downstream=self.name).set(level)
+
+    def level(self) -> float:
+        """Units currently available."""
+        with self._lock:
+            self._refill()
+            return self._level
+
+    def seconds_until_available(self) -> float:
+        """Seconds until the level is positive again (0 if it is now)."""
+        level = self.level()
+        return 0.0 if level > 0 else (1 - level) / self.rate
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+_budgets: dict[str, DownstreamBudget] = {}
+
+
+def set_downstream_budgets(budgets: Iterable[DownstreamBudget]) -> None:
+    """Make ``budgets`` the ones :func:`charge_downstream` charges."""
+    global _budgets
+    _budgets = {budget.name: budget for budget in budgets}
+
+
+def charge_downstream(name: str, amount: float = 1.0) -> None:
+    """Charge usage of a downstream to its budget, if one is configured."""
+    budget = _budgets.get(name)
+    if budget is not None:
+        budget.charge(amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    slots: int = field(compare=False)
+    priority: str = field(compare=False)
+    started: float = field(compare=False)
+    max_wait: float = field(compare=False)
+    wake: Callable[[], None] = field(compare=False)
+
+
+class AdmissionTicket:
+    """Concurrency slots held by an admitted request until released."""
+
+    def __init__(self, controller: AdmissionController, slots: int, priority: str) -> None:
+        self.slots = slots
+        self.priority = priority
+        self._controller = controller
+        self._admitted_at = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """Give the slots back. Safe to call more than once."""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._controller._release(self.slots, time.monotonic() - self._admitted_at)
+
+    def __enter__(self) -> AdmissionTicket:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded priority wait queue."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int = 32,
+        max_wait_seconds: float = 10.0,
+        budgets: Sequence[DownstreamBudget] = (),
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            max_concurrency: Slots available to running requests.
+            max_queue: Requests allowed to wait; further ones are rejected.
+            max_wait_seconds: Longest time a request waits for admission.
+            budgets: Downstream budgets that must not be exhausted for a
+                request to be admitted.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.budgets = list(budgets)
+        self._in_flight = 0
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._service_time = 1.0  # moving average of seconds a slot is held
+
+    @property
+    def in_flight(self) -> int:
+        """Slots currently held."""
+        return self._in_flight
+
+    def queue_depth(self, priority: str | None = None) -> int:
+        """Requests waiting, optionally of one priority class."""
+        with self._lock:
+            return sum(1 for w in self._queue if priority in (None, w.priority))
+
+    def admit(
+        self,
+        priority: str = "interactive",
+        slots: int = 1,
+        deadline: Deadline | None = None,
+    ) -> AdmissionTicket:
+        """Wait for admission and return the ticket holding the slots.
+
+        Blocks the calling thread while queued; async code should use
+        :meth:`aadmit` instead.
+
+        Args:
+            priority: Priority class, one of :data:`PRIORITIES`.
+            slots: Concurrency slots needed (capped at ``max_concurrency``).
+            deadline: The request's deadline; the wait never outlasts it.
+
+        Returns:
+            The ticket to release once the request is done.
+
+        Raises:
+            AdmissionRejected: If the queue is full, a downstream budget
+                will not recover in time, or the wait timed out.
+            ValueError: If ``priority`` is unknown.
+        """
+        woken = threading.Event()
+        entry = self._enter(priority, slots, deadline, woken.set)
+        if isinstance(entry, AdmissionTicket):
+            return entry
+        try:
+            while True:
+                woken.clear()
+                ticket, wait = self._poll(entry)
+                if ticket is not None:
+                    return ticket
+                woken.wait(wait)
+        finally:
+            self._leave(entry)
+
+    async def aadmit(
+        self,
+        priority: str = "interactive",
+        slots: int = 1,
+        deadline: Deadline | None = None,
+    ) -> AdmissionTicket:
+        """Async variant of :meth:`admit` that waits on the event loop.
+
+        Slots freed from other threads wake the waiter through its loop. A
+        waiter that is cancelled leaves the queue without taking a slot.
+        """
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def wake() -> None:
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:  # the loop has closed
+                pass
+
+        entry = self._enter(priority, slots, deadline, wake)
+        if isinstance(entry, AdmissionTicket):
+            return entry
+        try:
+            while True:
+                woken.clear()
+                ticket, wait = self._poll(entry)
+                if ticket is not None:
+                    return ticket
+                try:
+                    await asyncio.wait_for(woken.wait(), wait)
+                except TimeoutError:
+                    pass
+        finally:
+            self._leave(entry)
+
+    def _enter(
+        self,
+        priority: str,
+        slots: int,
+        deadline: Deadline | None,
+        wake: Callable[[], None],
+    ) -> AdmissionTicket | _Waiter:
+        """Admit a request right away, reject it, or put it in the queue."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        slots = max(1, min(slots, self.max_concurrency))
+        max_wait = self.max_wait_seconds
+        if deadline is not None:
+            max_wait = min(max_wait, max(0.0, deadline.remaining()))
+        started = time.monotonic()
+
+        with self._lock:
+            if not self._queue and self._can_start(slots):
+                return self._start(slots, priority, started)
+
+            budget_wait = self._budget_wait()
+            if budget_wait > max_wait:
+                self._reject(priority, "budget_exhausted")
+                raise AdmissionRejected(429, budget_wait, "budget_exhausted")
+            if len(self._queue) >= self.max_queue:
+                self._reject(priority, "queue_full")
+                raise AdmissionRejected(503, self._retry_estimate(), "queue_full")
+
+            waiter = _Waiter(
+                PRIORITIES.index(priority), next(self._seq), slots, priority,
+                started, max_wait, wake,
+            )
+            heapq.heappush(self._queue, waiter)
+        ADMISSION_QUEUE_DEPTH.labels(priority=priority).inc()
+        return waiter
+
+    def _poll(self, waiter: _Waiter) -> tuple[AdmissionTicket | None, float]:
+        """Admit a queued request if it is next and fits.
+
+        Returns:
+            The ticket, or None and the seconds to wait before polling again.
+
+        Raises:
+            AdmissionRejected: If the request has waited as long as it may.
+        """
+        with self._lock:
+            if self._queue[0] is waiter and self._can_start(waiter.slots):
+                heapq.heappop(self._queue)
+                self._wake_waiters()
+                return self._start(waiter.slots, waiter.priority, waiter.started), 0.0
+            remaining = waiter.started + waiter.max_wait - time.monotonic()
+            budget_wait = self._budget_wait()
+            if remaining > 0:
+                return None, min(remaining, budget_wait) if budget_wait else remaining
+
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            self._wake_waiters()
+            if budget_wait > 0:
+                self._reject(waiter.priority, "budget_exhausted")
+                raise AdmissionRejected(429, budget_wait, "budget_exhausted")
+            self._reject(waiter.priority, "timed_out")
+            raise AdmissionRejected(503, self._retry_estimate(), "timed_out")
+
+    def _leave(self, waiter: _Waiter) -> None:
+        """Take a request that stopped waiting out of the queue."""
+        with self._lock:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+                self._wake_waiters()
+        ADMISSION_QUEUE_DEPTH.labels(priority=waiter.priority).dec()
+
+    def _wake_waiters(self) -> None:
+        """Have every queued request check again whether it can start."""
+        for waiter in self._queue:
+            waiter.wake()
+
+    def _can_start(self, slots: int) -> bool:
+        return (
+            self._in_flight + slots <= self.max_concurrency
+            and self._budget_wait() == 0
+        )
+
+    def _budget_wait(self) -> float:
+        """Seconds until every downstream budget is available again."""
+        return max((b.seconds_until_available() for b in self.budgets), default=0.0)
+
+    def _start(self, slots: int, priority: str, started: float) -> AdmissionTicket:
+        self._in_flight += slots
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+        ADMISSION_WAIT.labels(priority=priority).observe(time.monotonic() - started)
+        ADMISSION_DECISIONS.labels(priority=priority, outcome="admitted").inc()
+        return AdmissionTicket(self, slots, priority)
+
+    def _reject(self, priority: str, reason: str) -> None:
+        ADMISSION_DECISIONS.labels(priority=priority, outcome=reason).inc()
+        logger.warning(
+            f"Rejected {priority} request ({reason}): in_flight={self._in_flight}, "
+            f"queued={len(self._queue)}"
+        )
+
+    def _retry_estimate(self) -> float:
+        """Seconds until the current queue has likely drained."""
+        return self._service_time * (len(self._queue) + 1) / self.max_concurrency
+
+    def _release(self, slots: int, held_seconds: float) -> None:
+        with self._lock:
+            self._in_flight -= slots
+            self._service_time = 0.8 * self._service_time + 0.2 * held_seconds
+            ADMISSION_IN_FLIGHT.set(self._in_flight)
+            self._wake_waiters()
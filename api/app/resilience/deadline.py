@@ -0,0 +1,89 @@
+"""Per-request deadlines.
+
+A :class:`Deadline` is created when a chat request arrives and travels with
+the request in two ways:
+
+- as ``deadline_at`` in :class:`~app.llm.state.MovieNightState`, so workflow
+  nodes can check how much time is left and degrade gracefully
+- as a context variable (see :func:`deadline_scope`), so LLM calls made
+  anywhere inside the request cap their timeout at the remaining budget
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+DEFAULT_DEADLINE_SECONDS = 45.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started after the request deadline has passed."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """An absolute point in time by which a request must be answered.
+
+    Attributes:
+        expires_at: Wall-clock expiry time (``time.time()`` seconds).
+    """
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> Deadline:
+        """Create a deadline ``seconds`` from now."""
+        return cls(time.time() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (negative once expired)."""
+        return self.expires_at - time.time()
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.remaining() <= 0
+
+    def has_at_least(self, seconds: float) -> bool:
+        """Whether at least ``seconds`` remain."""
+        return self.remaining() >= seconds
+
+    def cap(self, timeout: float | None) -> float:
+        """Return ``timeout`` capped at the remaining time.
+
+        Raises:
+            DeadlineExceeded: If the deadline has already passed.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | None) -> Generator[None, None, None]:
+    """Make ``deadline`` the current request deadline inside the block."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def get_current_deadline() -> Deadline | None:
+    """Return the deadline of the request running in this context, if any."""
+    return _current_deadline.get()
+
+
+def deadline_from_state(state: dict) -> Deadline | None:
+    """Rebuild the request deadline stored in workflow state, if any."""
+    expires_at = state.get("deadline_at")
+    return Deadline(expires_at) if expires_at is not None else None
@@ -0,0 +1,261 @@
+"""SLO-aware degradation of the workflow while upstreams are slow.
+
+When Azure OpenAI or TMDB slow down, every request still makes all of its
+calls (orchestrator, finder fan-out, writer, evaluator and its retries),
+and every request blows its latency budget. A
+:class:`DegradationController` watches the latency of upstream calls as
+they complete. While an upstream's recent p95 latency exceeds its SLO, the
+controller steps the workflow down one level at a time. Each level keeps
+the measures of the levels before it:
+
+1. ``rules_evaluator``: the evaluator LLM is skipped and drafts are only
+   checked by :func:`app.llm.candidate_selector.detect_constraint_violations`.
+2. ``template_writer``: recommendations are written with
+   :func:`app.llm.candidate_selector.build_deterministic_recommendation_text`
+   instead of the writer LLM.
+3. ``capped_finder``: the movie finder makes at most
+   :data:`app.llm.state.DEGRADED_FINDER_LOOKUPS` person and keyword lookups
+   and no free-text search.
+4. ``cached_rag``: knowledge-base questions are answered with an earlier
+   answer to the same question, or with excerpts of the retrieved
+   documents, instead of the RAG LLM.
+
+The controller steps back up one level once every upstream's p95 has
+stayed below ``recovery_ratio`` times its SLO for ``recovery_seconds``.
+Level changes are at least ``step_seconds`` apart, and the gap between
+the two thresholds keeps the level from flapping.
+
+A request reads the level once, when it starts (see
+:func:`current_degradation_level`), so it never changes behavior half-way.
+The level is exported as ``workflow_degradation_level`` and reported by
+``/health``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from app.observability.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+DEGRADATION_LEVELS: tuple[str, ...] = (
+    "full",
+    "rules_evaluator",
+    "template_writer",
+    "capped_finder",
+    "cached_rag",
+)
+
+DEGRADATION_LEVEL = Gauge(
+    "workflow_degradation_level",
+    "Current degradation level of the workflow (0: full)",
+)
+DEGRADATION_CHANGES = Counter(
+    "workflow_degradation_changes_total",
+    "Degradation level changes by direction (down, up)",
+    ["direction"],
+)
+UPSTREAM_LATENCY_QUANTILE = Gauge(
+    "degradation_upstream_latency_seconds",
+    "Recent upstream latency quantile the degradation controller acts on",
+    ["upstream"],
+)
+
+
+def measure_active(level: int, measure: str) -> bool:
+    """Whether a workflow running at ``level`` applies ``measure``.
+
+    Args:
+        level: Degradation level, an index into :data:`DEGRADATION_LEVELS`.
+        measure: A level name, e.g. ``template_writer``.
+    """
+    return level >= DEGRADATION_LEVELS.index(measure)
+
+
+class DegradationController:
+    """Steps the workflow's degradation level with upstream latency.
+
+    Args:
+        slos: Latency SLO in seconds per upstream, e.g.
+            ``{"llm": 8.0, "tmdb": 2.0}``. Other upstreams are ignored.
+        quantile: Latency quantile compared with the SLOs.
+        window_seconds: Age of the oldest latency sample considered.
+        min_samples: Samples an upstream needs in the window before its
+            quantile is trusted.
+        step_seconds: Minimum time between two level changes.
+        recovery_seconds: How long latency must stay below
+            ``recovery_ratio`` times the SLOs before stepping up.
+        recovery_ratio: Fraction of the SLOs latency must be under to
+            count as recovered.
+        max_level: Deepest level the controller may reach.
+        check_interval: Minimum time between two evaluations of the level.
+        clock: Monotonic time source (for tests).
+    """
+
+    def __init__(
+        self,
+        slos: Mapping[str, float],
+        quantile: float = 0.95,
+        window_seconds: float = 60.0,
+        min_samples: int = 20,
+        step_seconds: float = 15.0,
+        recovery_seconds: float = 60.0,
+        recovery_ratio: float = 0.7,
+        max_level: int = len(DEGRADATION_LEVELS) - 1,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 <= max_level < len(DEGRADATION_LEVELS):
+            raise ValueError(f"max_level must be between 0 and {len(DEGRADATION_LEVELS) - 1}")
+        self.slos = dict(slos)
+        self.quantile = quantile
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.step_seconds = step_seconds
+        self.recovery_seconds = recovery_seconds
+        self.recovery_ratio = recovery_ratio
+        self.max_level = max_level
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[tuple[float, float]]] = {
+            upstream: deque() for upstream in self.slos
+        }
+        self._level = 0
+        self._changed_at = clock()
+        self._next_step_at = float("-inf")
+        self._healthy_since: float | None = None
+        self._checked_at = float("-inf")
+        DEGRADATION_LEVEL.set(0)
+
+    @property
+    def level(self) -> int:
+        """The current level, re-evaluated if it is due."""
+        self._maybe_update(self._clock())
+        return self._level
+
+    @property
+    def level_name(self) -> str:
+        return DEGRADATION_LEVELS[self.level]
+
+    def observe(self, upstream: str, seconds: float) -> None:
+        """Record the latency of a completed upstream call."""
+        samples = self._samples.get(upstream)
+        if samples is None:
+            return
+        now = self._clock()
+        with self._lock:
+            samples.append((now, seconds))
+        self._maybe_update(now)
+
+    def latency_quantiles(self) -> dict[str, float | None]:
+        """Recent latency quantile per upstream; None without enough samples."""
+        now = self._clock()
+        with self._lock:
+            return {upstream: self._quantile(upstream, now) for upstream in self.slos}
+
+    def status(self) -> dict[str, Any]:
+        """The level, its measures, and the latencies and SLOs behind it."""
+        now = self._clock()
+        self._maybe_update(now, force=True)
+        quantiles = self.latency_quantiles()
+        return {
+            "level": self._level,
+            "name": DEGRADATION_LEVELS[self._level],
+            "measures": list(DEGRADATION_LEVELS[1:self._level + 1]),
+            "seconds_at_level": round(now - self._changed_at, 1),
+            "latency_seconds": {
+                upstream: None if value is None else round(value, 3)
+                for upstream, value in quantiles.items()
+            },
+            "slo_seconds": dict(self.slos),
+        }
+
+    def _quantile(self, upstream: str, now: float) -> float | None:
+        samples = self._samples[upstream]
+        while samples and samples[0][0] < now - self.window_seconds:
+            samples.popleft()
+        if len(samples) < self.min_samples:
+            return None
+        ordered = sorted(seconds for _, seconds in samples)
+        return ordered[min(int(self.quantile * len(ordered)), len(ordered) - 1)]
+
+    def _maybe_update(self, now: float, force: bool = False) -> None:
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            pressure = 0.0
+            for upstream, slo in self.slos.items():
+                value = self._quantile(upstream, now)
+                UPSTREAM_LATENCY_QUANTILE.labels(upstream=upstream).set(value or 0.0)
+                if value is not None:
+                    pressure = max(pressure, value / slo)
+            self._step(now, pressure)
+
+    def _step(self, now: float, pressure: float) -> None:
+        """Move one level down or up given the worst latency/SLO ratio."""
+        if pressure < self.recovery_ratio:
+            if self._healthy_since is None:
+                self._healthy_since = now
+        else:
+            self._healthy_since = None
+
+        if now < self._next_step_at:
+            return
+        if pressure > 1.0 and self._level < self.max_level:
+            self._set_level(self._level + 1, now, pressure)
+        elif (
+            self._level > 0
+            and self._healthy_since is not None
+            and now - self._healthy_since >= self.recovery_seconds
+        ):
+            self._set_level(self._level - 1, now, pressure)
+            self._healthy_since = now
+
+    def _set_level(self, level: int, now: float, pressure: float) -> None:
+        direction = "down" if level > self._level else "up"
+        self._level = level
+        self._changed_at = now
+        self._next_step_at = now + self.step_seconds
+        DEGRADATION_LEVEL.set(level)
+        DEGRADATION_CHANGES.labels(direction=direction).inc()
+        logger.warning(
+            "Workflow degradation %s to level %d (%s); worst upstream latency at %.0f%% of SLO",
+            "stepped down" if direction == "down" else "stepped up",
+            level, DEGRADATION_LEVELS[level], pressure * 100,
+        )
+
+
+_controller: DegradationController | None = None
+
+
+def set_degradation_controller(controller: DegradationController | None) -> None:
+    """Make ``controller`` the one upstream latencies are reported to."""
+    global _controller
+    _controller = controller
+    DEGRADATION_LEVEL.set(0 if controller is None else controller.level)
+
+
+def get_degradation_controller() -> DegradationController | None:
+    """Return the installed controller, if any."""
+    return _controller
+
+
+def observe_upstream_latency(upstream: str, seconds: float) -> None:
+    """Report the latency of a completed upstream call, if a controller is installed."""
+    controller = _controller
+    if controller is not None:
+        controller.observe(upstream, seconds)
+
+
+def current_degradation_level() -> int:
+    """The level new requests run at: 0 without a controller."""
+    controller = _controller
+    return 0 if controller is None else controller.level
@@ -0,0 +1,184 @@
+"""Hedged requests for slow upstream calls.
+
+A hedged call starts the request, waits for a delay derived from the
+recent latency distribution (by default its p95), and if no answer has
+arrived by then, issues a duplicate request. Whichever finishes first
+wins; the slower one is left to finish in the background and its result
+is discarded. This trades a few percent of extra calls for a much
+shorter latency tail.
+
+Both calls run in a thread pool shared by the process. Each hedge holds
+one of its threads and a second upstream call, so the pool is sized with
+:func:`set_hedge_workers` (the factory allows two per admitted request)
+and hedging is off unless ``LLM_HEDGING`` is set.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TypeVar
+
+from app.observability.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGED_REQUESTS = Counter(
+    "llm_hedged_requests_total",
+    "Duplicate LLM requests issued because the first was slow",
+    ["model", "winner"],
+)
+
+DEFAULT_HEDGE_WORKERS = 16
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def set_hedge_workers(max_workers: int) -> None:
+    """Size the thread pool hedged calls run in.
+
+    Calls already running finish in the previous pool.
+
+    Args:
+        max_workers: Threads shared by all primary and duplicate calls.
+    """
+    global _executor
+    with _executor_lock:
+        previous = _executor
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+    if previous is not None:
+        previous.shutdown(wait=False)
+    logger.info("Hedged calls run in up to %d threads", max_workers)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to pick the hedging delay.
+
+    Args:
+        quantile: Latency quantile after which to hedge (e.g. 0.95).
+        initial_delay: Delay used until ``min_samples`` latencies are known.
+        min_delay: Lower bound on the delay, so fast calls are not doubled.
+        window: Number of recent latencies kept.
+        min_samples: Samples required before the quantile is trusted.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        initial_delay: float = 5.0,
+        min_delay: float = 0.5,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        self.quantile = quantile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of a completed call."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait before issuing a duplicate request."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        index = min(int(self.quantile * len(samples)), len(samples) - 1)
+        return max(samples[index], self.min_delay)
+
+
+def hedged_call(
+    fn: Callable[[], T],
+    tracker: LatencyTracker,
+    max_wait: float | None = None,
+    label: str = "default",
+) -> T:
+    """Run ``fn``, issuing one duplicate if it is slower than usual.
+
+    The calls run in worker threads with a copy of the caller's context,
+    so context variables (request deadline, usage ledger) are visible to
+    them.
+
+    Args:
+        fn: The call to make. Must be safe to run twice concurrently.
+        tracker: Latency history that determines the hedging delay.
+        max_wait: Optional overall time limit; no hedge is started if the
+            delay would exceed it.
+        label: Metric label identifying the upstream (e.g. the model).
+
+    Returns:
+        The result of whichever call finished first successfully.
+
+    Raises:
+        TimeoutError: If ``max_wait`` elapses with no result.
+        Exception: The error of the last call to fail if all calls failed.
+    """
+    start = time.perf_counter()
+    primary = _submit(fn)
+    delay = tracker.hedge_delay()
+
+    if max_wait is not None and delay >= max_wait:
+        return _finish(primary, tracker, start, max_wait)
+
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return _finish(primary, tracker, start)
+
+    logger.info("Hedging call to %s after %.2fs", label, delay)
+    hedge = _submit(fn)
+    pending: set[Future] = {primary, hedge}
+    error: BaseException | None = None
+    remaining = None if max_wait is None else max(max_wait - delay, 0.0)
+
+    while pending:
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError(f"Hedged call to {label} timed out")
+        for future in done:
+            if future.exception() is None:
+                winner = "primary" if future is primary else "hedge"
+                HEDGED_REQUESTS.labels(model=label, winner=winner).inc()
+                tracker.observe(time.perf_counter() - start)
+                return future.result()
+            error = future.exception()
+        if remaining is not None:
+            remaining = max(max_wait - (time.perf_counter() - start), 0.0)
+
+    HEDGED_REQUESTS.labels(model=label, winner="none").inc()
+    raise error
+
+
+def _submit(fn: Callable[[], T]) -> Future:
+    global _executor
+    context = contextvars.copy_context()
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_HEDGE_WORKERS, thread_name_prefix="hedge"
+            )
+        executor = _executor
+    return executor.submit(context.run, fn)
+
+
+def _finish(
+    future: Future, tracker: LatencyTracker, start: float, timeout: float | None = None
+):
+    try:
+        result = future.result(timeout=timeout)
+    except TimeoutError as exc:
+        raise TimeoutError("Call timed out") from exc
+    tracker.observe(time.perf_counter() - start)
+    return result
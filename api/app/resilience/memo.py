@@ -0,0 +1,120 @@
+"""Sharing of identical sub-queries across the items of a batch.
+
+Items of a bulk job often repeat each other's work: the same orchestrator
+prompt, the same TMDB discover parameters, the same knowledge-base query.
+While a :class:`BatchMemo` is active (see :func:`batch_memo_scope`), call
+sites wrapped in :func:`memoized` compute each distinct sub-query once per
+batch; concurrent identical calls wait for the first one. Outside a batch,
+:func:`memoized` simply calls through.
+
+Values are returned as deep copies so items cannot see each other's
+modifications.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+from collections.abc import Callable, Generator, Hashable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from app.observability.metrics import Counter, Gauge
+from app.resilience.singleflight import SingleFlight
+
+T = TypeVar("T")
+
+BATCH_MEMO_LOOKUPS = Counter(
+    "batch_memo_lookups_total",
+    "Batch sub-queries by whether they were computed or reused",
+    ["namespace", "result"],
+)
+BATCH_MEMO_HIT_RATIO = Gauge(
+    "batch_memo_hit_ratio",
+    "Fraction of batch sub-queries that reused a memoized result",
+    ["namespace"],
+)
+
+_current_memo: ContextVar[BatchMemo | None] = ContextVar("batch_memo", default=None)
+
+
+class BatchMemo:
+    """Results of sub-queries shared by the items of one batch."""
+
+    def __init__(self) -> None:
+        self._values: dict[tuple[str, Hashable], Any] = {}
+        self._inflight: SingleFlight[Any] = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, namespace: str, key: Hashable, fn: Callable[[], T]) -> T:
+        """Return the memoized value for ``key``, computing it at most once.
+
+        Args:
+            namespace: Kind of sub-query (e.g. ``"tmdb"``), used in metrics.
+            key: Identifies the sub-query within the namespace.
+            fn: Computes the value on first use. Failures are not memoized.
+
+        Returns:
+            A deep copy of the value.
+        """
+        full_key = (namespace, key)
+        with self._lock:
+            found = full_key in self._values
+            value = self._values.get(full_key)
+        if not found:
+            value, found = self._inflight.do(
+                full_key, lambda: self._compute(full_key, fn)
+            )
+
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        result = "reused" if found else "computed"
+        BATCH_MEMO_LOOKUPS.labels(namespace=namespace, result=result).inc()
+        reused = BATCH_MEMO_LOOKUPS.labels(namespace=namespace, result="reused").value
+        computed = BATCH_MEMO_LOOKUPS.labels(namespace=namespace, result="computed").value
+        BATCH_MEMO_HIT_RATIO.labels(namespace=namespace).set(reused / (reused + computed))
+        return copy.deepcopy(value)
+
+    def _compute(self, full_key: tuple[str, Hashable], fn: Callable[[], T]) -> T:
+        value = fn()
+        with self._lock:
+            self._values[full_key] = value
+        return value
+
+
+@contextmanager
+def batch_memo_scope(memo: BatchMemo) -> Generator[BatchMemo, None, None]:
+    """Make ``memo`` the active batch memo within the block."""
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+
+
+def get_current_memo() -> BatchMemo | None:
+    """Return the active batch memo, if any."""
+    return _current_memo.get()
+
+
+def memoized(namespace: str, key: Hashable, fn: Callable[[], T]) -> T:
+    """Call ``fn``, sharing its result across the active batch if any.
+
+    Args:
+        namespace: Kind of sub-query, used in metrics.
+        key: Identifies the sub-query within the namespace.
+        fn: Computes the value.
+
+    Returns:
+        The value of ``fn()`` (a copy when a batch memo is active).
+    """
+    memo = _current_memo.get()
+    if memo is None:
+        return fn()
+    return memo.get_or_compute(namespace, key, fn)
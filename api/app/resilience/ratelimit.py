@@ -0,0 +1,70 @@
+"""Token-bucket rate limiting.
+
+A :class:`RateLimiter` lets calls start at a steady ``rate`` per second,
+allowing short bursts of up to ``burst`` calls. It is used to keep bulk
+jobs within upstream quotas (e.g. Azure OpenAI requests per minute).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class RateLimiter:
+    """Thread-safe token bucket."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initialize the limiter with a full bucket.
+
+        Args:
+            rate: Tokens added per second; calls start at most this often.
+            burst: Bucket capacity, the number of calls that may start at once.
+            clock: Monotonic time source (overridable for tests).
+            sleep: Sleep function (overridable for tests).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        return self._reserve() == 0.0
+
+    def acquire(self) -> float:
+        """Take a token, waiting until one is available.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        waited = 0.0
+        while (wait := self._reserve()) > 0:
+            self._sleep(wait)
+            waited += wait
+        return waited
+
+    def _reserve(self) -> float:
+        """Take a token and return 0, or return the wait until one is due."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
@@ -0,0 +1,293 @@
+"""Coalescing of identical concurrent calls.
+
+A singleflight group runs at most one call per key at a time. Callers that
+arrive while a call with the same key is in flight wait for it and share
+its result (or exception) instead of starting their own, so a burst of
+duplicate work costs a single execution. Nothing is cached: once a call
+completes, the next caller with the same key starts a new one.
+
+Waiters can bound how long they wait, and can opt out of sharing failures:
+they then run the work themselves when the call they joined fails, so one
+caller's short timeout does not fail everybody else.
+
+:class:`SingleFlight` is for threads, and its :meth:`SingleFlight.ado` lets
+coroutines on any event loop share calls with them without blocking a
+thread. :class:`AsyncSingleFlight` is for coroutines on one event loop. Groups created with a ``name`` count their
+calls in ``singleflight_calls_total`` and keep
+``singleflight_coalescing_ratio`` (shared calls / all calls) up to date.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from app.observability.metrics import Counter, Gauge
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Upstream calls by whether they ran or shared a concurrent identical call",
+    ["upstream", "result"],
+)
+SINGLEFLIGHT_RATIO = Gauge(
+    "singleflight_coalescing_ratio",
+    "Fraction of upstream calls served by a concurrent identical call",
+    ["upstream"],
+)
+
+
+def _record(name: str | None, shared: bool) -> None:
+    """Count a call and refresh the coalescing ratio for ``name``."""
+    if name is None:
+        return
+    result = "shared" if shared else "executed"
+    SINGLEFLIGHT_CALLS.labels(upstream=name, result=result).inc()
+    executed = SINGLEFLIGHT_CALLS.labels(upstream=name, result="executed").value
+    coalesced = SINGLEFLIGHT_CALLS.labels(upstream=name, result="shared").value
+    SINGLEFLIGHT_RATIO.labels(upstream=name).set(coalesced / (executed + coalesced))
+
+
+class _Call(Generic[T]):
+    """An in-flight call and the outcome its waiters share."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+        self._wakers: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def finish(self) -> None:
+        """Mark the call done and wake its waiters."""
+        with self._lock:
+            self.done.set()
+            wakers, self._wakers = self._wakers, []
+        for wake in wakers:
+            wake()
+
+    async def wait(self) -> None:
+        """Wait for the call on the running event loop."""
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+
+        def resolve() -> None:
+            if not finished.done():
+                finished.set_result(None)
+
+        def wake() -> None:
+            try:
+                loop.call_soon_threadsafe(resolve)
+            except RuntimeError:  # the loop has closed
+                pass
+
+        with self._lock:
+            if self.done.is_set():
+                return
+            self._wakers.append(wake)
+        await finished
+
+
+class SingleFlight(Generic[T]):
+    """Thread-safe map of in-flight calls keyed by the work they do."""
+
+    def __init__(self, name: str | None = None) -> None:
+        """Initialize the group.
+
+        Args:
+            name: Upstream label for the coalescing metrics; unnamed groups
+                are not counted.
+        """
+        self.name = name
+        self._calls: dict[Hashable, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], T],
+        timeout: float | None = None,
+        share_errors: bool = True,
+    ) -> tuple[T, bool]:
+        """Run ``fn`` unless a call with the same key is already in flight.
+
+        Args:
+            key: Identifies calls whose results are interchangeable.
+            fn: The work to run if no call for ``key`` is in flight.
+            timeout: Longest time to wait for another caller's call (None
+                waits until it completes).
+            share_errors: Whether another caller's failure is re-raised in
+                this one. When False, this caller runs ``fn`` itself instead.
+
+        Returns:
+            The call's result and whether it was shared with an earlier
+            caller rather than computed by this one.
+
+        Raises:
+            TimeoutError: If ``timeout`` elapses while waiting for another
+                caller's call.
+            Exception: Whatever ``fn`` raised, re-raised in every caller
+                that shares errors.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        _record(self.name, shared=not leader)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Timed out waiting for an in-flight call")
+            if call.error is None:
+                return call.result, True
+            if share_errors:
+                raise call.error
+            return fn(), False
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.finish()
+        return call.result, False
+
+    async def ado(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        share_errors: bool = True,
+    ) -> tuple[T, bool]:
+        """Async variant of :meth:`do`.
+
+        Waiters await the call on their own event loop rather than blocking
+        a thread. Callers may run on different loops and threads, and share
+        calls with callers of :meth:`do`.
+
+        Args:
+            key: Identifies calls whose results are interchangeable.
+            fn: Returns the awaitable to run if no call for ``key`` is in flight.
+            share_errors: Whether another caller's failure is re-raised in
+                this one. When False, this caller awaits ``fn()`` itself instead.
+
+        Returns:
+            The call's result and whether it was shared with an earlier
+            caller rather than computed by this one.
+
+        Raises:
+            Exception: Whatever ``fn`` raised, re-raised in every caller
+                that shares errors.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        _record(self.name, shared=not leader)
+
+        if not leader:
+            await call.wait()
+            if call.error is None:
+                return call.result, True
+            if share_errors:
+                raise call.error
+            return await fn(), False
+
+        try:
+            call.result = await fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.finish()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight(Generic[T]):
+    """Map of in-flight coroutine calls on a single event loop."""
+
+    def __init__(self, name: str | None = None) -> None:
+        """Initialize the group.
+
+        Args:
+            name: Upstream label for the coalescing metrics; unnamed groups
+                are not counted.
+        """
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+        share_errors: bool = True,
+    ) -> tuple[T, bool]:
+        """Await ``fn()`` unless a call with the same key is already in flight.
+
+        A waiter that is cancelled or times out does not cancel the shared
+        call; if the caller running it is cancelled, its waiters are
+        cancelled too.
+
+        Args:
+            key: Identifies calls whose results are interchangeable.
+            fn: Returns the awaitable to run if no call for ``key`` is in flight.
+            timeout: Longest time to wait for another caller's call (None
+                waits until it completes).
+            share_errors: Whether another caller's failure is re-raised in
+                this one. When False, this caller awaits ``fn()`` itself instead.
+
+        Returns:
+            The call's result and whether it was shared with an earlier
+            caller rather than computed by this one.
+
+        Raises:
+            TimeoutError: If ``timeout`` elapses while waiting for another
+                caller's call.
+            Exception: Whatever ``fn`` raised, re-raised in every caller
+                that shares errors.
+        """
+        future = self._calls.get(key)
+        _record(self.name, shared=future is not None)
+        if future is not None:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+            if not done:
+                raise TimeoutError("Timed out waiting for an in-flight call")
+            if share_errors or future.cancelled() or future.exception() is None:
+                return future.result(), True
+            return await fn(), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._calls[key]
+        return result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        return len(self._calls)
@@ -1,4 +1,17 @@
-from app.schemas.chat import ChatRequest, ChatResponse, DebugInfo, HealthResponse
+from app.schemas.chat import (
+    CacheStats,
+    ChatBatchItem,
+    ChatBatchRequest,
+    ChatRequest,
+    ChatResponse,
+    DebugInfo,
+    DegradationStatus,
+    HealthResponse,
+    ReadinessResponse,
+    StreamEvent,
+    WorkersResponse,
+    WorkerStats,
+)
 from app.schemas.domain import (
     DraftRecommendation,
     EvaluationResult,
@@ -14,10 +27,18 @@ from app.schemas.orchestrator import (
 )
 
 __all__ = [
+    "CacheStats",
+    "ChatBatchItem",
+    "ChatBatchRequest",
     "ChatRequest",
     "ChatResponse",
     "DebugInfo",
+    "DegradationStatus",
     "HealthResponse",
+    "ReadinessResponse",
+    "StreamEvent",
+    "WorkersResponse",
+    "WorkerStats",
     "Constraints",
     "InputDecision",
     "MovieSearchQuery",
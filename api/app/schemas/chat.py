@@ -13,6 +13,21 @@ class ChatRequest(BaseModel):
         min_length=1,
         description="User message to send to the assistant",
     )
+    session_id: str | None = Field(
+        default=None,
+        max_length=128,
+        description=(
+            "Conversation identifier; messages sharing it can refine earlier "
+            "requests (e.g. 'something shorter')"
+        ),
+    )
+    priority: Literal["interactive", "batch"] = Field(
+        default="interactive",
+        description=(
+            "Admission priority class; under load, interactive requests are "
+            "admitted before batch ones"
+        ),
+    )
 
     @field_validator("message")
     @classmethod
@@ -49,6 +64,25 @@ class DebugInfo(BaseModel):
         default_factory=list,
         description="Titles rejected during evaluation retries",
     )
+    token_usage: dict[str, Any] | None = Field(
+        default=None,
+        description="LLM token usage, latency and estimated cost by node, agent and model",
+    )
+    timings: dict[str, Any] | None = Field(
+        default=None,
+        description=(
+            "Where the request spent its time: wall time per node, latency and "
+            "tokens per LLM call, TMDB requests and cache hits, retries, and a "
+            "waterfall of all spans"
+        ),
+    )
+    degraded_nodes: list[str] = Field(
+        default_factory=list,
+        description=(
+            "Workflow nodes that skipped their LLM call, or some finder lookups, to "
+            "meet the request deadline or because the workflow is degraded"
+        ),
+    )
 
 
 class ChatResponse(BaseModel):
@@ -72,6 +106,136 @@ class ChatResponse(BaseModel):
     )
 
 
+class StreamEvent(BaseModel):
+    """A single NDJSON event emitted by the /chat/stream endpoint.
+
+    Event types:
+        - ``route``: routing decision, emitted once after orchestration
+        - ``token``: a piece of draft recommendation text
+        - ``retracted``: the text streamed so far failed evaluation and
+          must be discarded by the client; a retry may follow
+        - ``final``: the verified reply (always the last event on success)
+        - ``error``: processing failed; no further events follow
+    """
+
+    event: Literal["route", "token", "retracted", "final", "error"] = Field(
+        ...,
+        description="Event type",
+    )
+    text: str | None = Field(
+        default=None,
+        description="Text chunk for token events",
+    )
+    route: Literal["movies", "system", "rag", "hybrid"] | None = Field(
+        default=None,
+        description="The detected intent route (route and final events)",
+    )
+    reply: str | None = Field(
+        default=None,
+        description="Complete assistant reply (final events)",
+    )
+    title: str | None = Field(
+        default=None,
+        description="Title of the retracted recommendation (retracted events)",
+    )
+    reason: str | None = Field(
+        default=None,
+        description="Why the streamed draft was retracted, or error detail",
+    )
+    verified: bool | None = Field(
+        default=None,
+        description="Whether the final reply passed evaluation (final events)",
+    )
+    extracted_constraints: Constraints | None = Field(
+        default=None,
+        description="Extracted constraints (route and final events)",
+    )
+
+
+class ChatBatchRequest(BaseModel):
+    """Request body for the /chat/batch endpoint."""
+
+    messages: list[str] = Field(
+        ...,
+        min_length=1,
+        description="Independent user messages to process",
+    )
+    max_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Messages processed at once (capped by the server limit)",
+    )
+
+    @field_validator("messages")
+    @classmethod
+    def messages_not_whitespace(cls, v: list[str]) -> list[str]:
+        if any(not message.strip() for message in v):
+            raise ValueError("Messages cannot be empty or whitespace only")
+        return v
+
+
+class ChatBatchItem(BaseModel):
+    """A single NDJSON line emitted by the /chat/batch endpoint.
+
+    Items are emitted as they complete, so ``index`` identifies the message
+    they answer. Failed messages carry ``error`` and no reply.
+    """
+
+    index: int = Field(
+        ...,
+        description="Position of the message in the request",
+    )
+    reply: str | None = Field(
+        default=None,
+        description="Assistant's response to the message",
+    )
+    route: Literal["movies", "system", "rag", "hybrid"] | None = Field(
+        default=None,
+        description="The detected intent route",
+    )
+    extracted_constraints: Constraints | None = Field(
+        default=None,
+        description="Extracted constraints from the message",
+    )
+    debug: DebugInfo | None = Field(
+        default=None,
+        description="Debug information from workflow execution",
+    )
+    error: str | None = Field(
+        default=None,
+        description="Why the message could not be answered",
+    )
+
+
+class DegradationStatus(BaseModel):
+    """State of the SLO-aware degradation controller."""
+
+    level: int = Field(
+        ...,
+        description="Degradation level, 0 when the workflow runs in full",
+    )
+    name: str = Field(
+        ...,
+        description="Name of the level, e.g. full or template_writer",
+    )
+    measures: list[str] = Field(
+        default_factory=list,
+        description="Measures in effect at this level",
+    )
+    seconds_at_level: float = Field(
+        ...,
+        description="Time since the level last changed",
+    )
+    latency_seconds: dict[str, float | None] = Field(
+        default_factory=dict,
+        description="Recent p95 latency per upstream (null without enough samples)",
+    )
+    slo_seconds: dict[str, float] = Field(
+        default_factory=dict,
+        description="Latency SLO per upstream",
+    )
+
+
 class HealthResponse(BaseModel):
     """Response body from the /health endpoint."""
 
@@ -79,4 +243,68 @@ class HealthResponse(BaseModel):
         default="ok",
         description="Health status of the API",
     )
+    degradation: DegradationStatus | None = Field(
+        default=None,
+        description="Degradation controller state, when DEGRADATION_ENABLED is set",
+    )
+
+
+class ReadinessResponse(BaseModel):
+    """Response body from the /ready endpoint."""
+
+    status: Literal["cold", "warming", "ready", "failed"] = Field(
+        ...,
+        description="Whether the workflow has been built and can serve /chat",
+    )
+    completed_steps: list[str] = Field(
+        default_factory=list,
+        description="Warm-up steps finished so far, in order",
+    )
+    elapsed_seconds: float | None = Field(
+        default=None,
+        description="Time spent building the workflow so far",
+    )
+    error: str | None = Field(
+        default=None,
+        description="Why the last build failed",
+    )
+
+
+class CacheStats(BaseModel):
+    """Shared cache lookups of one worker in one namespace."""
+
+    hits: int = Field(..., description="Lookups answered from the cache")
+    misses: int = Field(..., description="Lookups that went upstream")
+    hit_rate: float | None = Field(
+        default=None,
+        description="Fraction of lookups answered from the cache",
+    )
+
+
+class WorkerStats(BaseModel):
+    """Latest report of one worker process."""
+
+    pid: int = Field(..., description="Worker process id")
+    rss_bytes: int = Field(..., description="Resident memory of the worker")
+    private_bytes: int | None = Field(
+        default=None,
+        description="Resident memory not shared with other processes (Linux only)",
+    )
+    cache: dict[str, CacheStats] = Field(
+        default_factory=dict,
+        description="Shared cache lookups by namespace (tmdb, llm)",
+    )
+    updated_at: float | None = Field(
+        default=None,
+        description="Unix time of the report",
+    )
+
+
+class WorkersResponse(BaseModel):
+    """Response body from the /workers endpoint."""
+
+    workers: list[WorkerStats] = Field(
+        default_factory=list,
+        description="Reports of the workers serving this API, by pid",
+    )
 
@@ -178,4 +178,11 @@ class InputDecision(BaseModel):
             "Should be a well-formed question for knowledge retrieval."
         ),
     )
+    is_refinement: bool = Field(
+        default=False,
+        description=(
+            "Whether the message refines the previous movie request in the "
+            "conversation (e.g. 'something shorter', 'not that one')"
+        ),
+    )
 
@@ -0,0 +1,24 @@
+"""Conversation sessions for the Movie Night Assistant.
+
+Requests that carry the same ``session_id`` share a :class:`SessionState`,
+which lets follow-ups such as "something shorter" or "not that one" refine
+the previous movie request instead of starting over.
+"""
+
+from app.sessions.models import (
+    SessionState,
+    SessionTurn,
+    merge_constraints,
+    summarize_turns,
+)
+from app.sessions.store import InMemorySessionStore, SessionStore, SQLiteSessionStore
+
+__all__ = [
+    "SessionState",
+    "SessionTurn",
+    "merge_constraints",
+    "summarize_turns",
+    "SessionStore",
+    "InMemorySessionStore",
+    "SQLiteSessionStore",
+]
@@ -0,0 +1,175 @@
+"""Conversation session model.
+
+A :class:`SessionState` is what the assistant remembers about a
+conversation between ``/chat`` requests that share a ``session_id``: the
+last movie request (constraints, search query and candidates), the titles
+the user has already been shown or rejected, and a compacted transcript.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from app.schemas.domain import MovieResult
+from app.schemas.orchestrator import Constraints, MovieSearchQuery
+
+MAX_CACHED_CANDIDATES = 10
+MAX_TURN_CHARS = 500
+MAX_SUMMARY_CHARS = 1200
+
+
+class SessionTurn(BaseModel):
+    """One message in a conversation."""
+
+    role: Literal["user", "assistant"]
+    content: str
+
+
+Summarizer = Callable[[str, list[SessionTurn]], str]
+
+
+def summarize_turns(summary: str, turns: list[SessionTurn]) -> str:
+    """Fold ``turns`` into ``summary`` without calling an LLM.
+
+    Each turn becomes one shortened line. The oldest lines are dropped once
+    the summary exceeds :data:`MAX_SUMMARY_CHARS`.
+
+    Args:
+        summary: The existing summary, possibly empty.
+        turns: Turns being removed from the verbatim transcript.
+
+    Returns:
+        The updated summary.
+    """
+    lines = [line for line in summary.splitlines() if line]
+    for turn in turns:
+        text = " ".join(turn.content.split())
+        if len(text) > 120:
+            text = text[:117] + "..."
+        speaker = "User" if turn.role == "user" else "Assistant"
+        lines.append(f"{speaker}: {text}")
+
+    while lines and len("\n".join(lines)) > MAX_SUMMARY_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class SessionState(BaseModel):
+    """Everything remembered about one conversation."""
+
+    session_id: str
+    summary: str = Field(
+        default="",
+        description="Compacted summary of turns older than the verbatim window",
+    )
+    turns: list[SessionTurn] = Field(default_factory=list)
+    constraints: Constraints | None = None
+    search_query: MovieSearchQuery | None = None
+    candidate_movies: list[MovieResult] = Field(
+        default_factory=list,
+        description="Candidates of the last movie search, reused by refinements",
+    )
+    rejected_titles: list[str] = Field(default_factory=list)
+    last_recommendation: str | None = None
+    updated_at: float = Field(default_factory=time.time)
+
+    def has_history(self) -> bool:
+        """Whether there is anything to tell the input agent about."""
+        return bool(self.summary or self.turns)
+
+    def history_text(self) -> str:
+        """Render the conversation for the input agent's prompt."""
+        lines: list[str] = []
+        if self.summary:
+            lines.append("Earlier in the conversation:")
+            lines.append(self.summary)
+            lines.append("")
+        for turn in self.turns:
+            speaker = "User" if turn.role == "user" else "Assistant"
+            lines.append(f"{speaker}: {turn.content}")
+        if self.constraints is not None:
+            lines.append("")
+            lines.append(
+                f"Constraints of the previous movie request: "
+                f"{self.constraints.model_dump_json(exclude_none=True)}"
+            )
+        if self.last_recommendation:
+            lines.append(f"Last recommended movie: {self.last_recommendation}")
+        return "\n".join(lines)
+
+    def record_turn(self, user_message: str, result: dict) -> None:
+        """Update the session from a completed workflow run.
+
+        Args:
+            user_message: The message the run answered.
+            result: The final workflow state.
+        """
+        self.turns.append(SessionTurn(role="user", content=_clip(user_message)))
+        reply = result.get("final_response")
+        if reply:
+            self.turns.append(SessionTurn(role="assistant", content=_clip(reply)))
+
+        if result.get("route") in ("movies", "hybrid"):
+            self.constraints = result.get("constraints")
+            self.search_query = result.get("search_query")
+            candidates = result.get("candidate_movies") or []
+            if candidates:
+                self.candidate_movies = list(candidates[:MAX_CACHED_CANDIDATES])
+            self.rejected_titles = list(result.get("rejected_titles") or [])
+            draft = result.get("draft_recommendation")
+            self.last_recommendation = draft.movie.title if draft is not None else None
+
+        self.updated_at = time.time()
+
+    def compact(
+        self, max_turns: int, summarizer: Summarizer = summarize_turns
+    ) -> None:
+        """Keep the last ``max_turns`` turns verbatim and summarize the rest.
+
+        Args:
+            max_turns: Number of recent turns kept word for word.
+            summarizer: Function folding old turns into the summary.
+        """
+        if len(self.turns) <= max_turns:
+            return
+        cut = len(self.turns) - max_turns
+        self.summary = summarizer(self.summary, self.turns[:cut])
+        self.turns = self.turns[cut:]
+
+
+def merge_constraints(previous: Constraints | None, current: Constraints) -> Constraints:
+    """Apply the constraints of a refinement on top of the previous ones.
+
+    Fields the follow-up message sets win; fields it leaves empty keep their
+    previous value.
+
+    Args:
+        previous: Constraints of the previous movie request.
+        current: Constraints extracted from the follow-up message.
+
+    Returns:
+        The merged constraints.
+    """
+    if previous is None:
+        return current
+    return Constraints(
+        genres=current.genres or previous.genres,
+        max_runtime_minutes=(
+            current.max_runtime_minutes
+            if current.max_runtime_minutes is not None
+            else previous.max_runtime_minutes
+        ),
+        min_runtime_minutes=(
+            current.min_runtime_minutes
+            if current.min_runtime_minutes is not None
+            else previous.min_runtime_minutes
+        ),
+    )
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= MAX_TURN_CHARS else text[: MAX_TURN_CHARS - 3] + "..."
@@ -0,0 +1,165 @@
+"""Session stores keyed by ``session_id``.
+
+Two backends are provided:
+
+- :class:`InMemorySessionStore`: a bounded LRU map, private to one process
+- :class:`SQLiteSessionStore`: a single SQLite file that several worker
+  processes on one host can share; it stands in for a networked store such
+  as Redis and uses the same get/put-with-TTL access pattern
+
+Both evict sessions that have not been updated for ``ttl_seconds``.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+
+from app.sessions.models import SessionState
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Abstract base class for conversation session stores."""
+
+    def __init__(self, ttl_seconds: float = 3600.0) -> None:
+        """Initialize the store.
+
+        Args:
+            ttl_seconds: Sessions idle for longer than this are evicted.
+        """
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def get(self, session_id: str) -> SessionState | None:
+        """Return the session, or None if it is unknown or expired."""
+        ...
+
+    @abstractmethod
+    def save(self, session: SessionState) -> None:
+        """Store ``session``, replacing any previous version."""
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Forget a session."""
+        ...
+
+    def _expired(self, updated_at: float) -> bool:
+        return time.time() - updated_at > self.ttl_seconds
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local LRU session store."""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600.0) -> None:
+        """Initialize the store.
+
+        Args:
+            max_sessions: Least recently used sessions are evicted beyond this.
+            ttl_seconds: Sessions idle for longer than this are evicted.
+        """
+        super().__init__(ttl_seconds)
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionState | None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._expired(session.updated_at):
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return session.model_copy(deep=True)
+
+    def save(self, session: SessionState) -> None:
+        with self._lock:
+            self._sessions[session.session_id] = session.model_copy(deep=True)
+            self._sessions.move_to_end(session.session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                logger.debug("Evicted session %s (capacity)", evicted)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store persisted in a SQLite database file."""
+
+    _PURGE_EVERY = 100
+
+    def __init__(self, path: str, ttl_seconds: float = 3600.0) -> None:
+        """Initialize the store, creating the table if needed.
+
+        Args:
+            path: Database file path (``":memory:"`` is not supported since
+                every operation opens its own connection).
+            ttl_seconds: Sessions idle for longer than this are evicted.
+        """
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._writes = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and is closed afterwards."""
+        with closing(sqlite3.connect(self.path, timeout=5.0)) as conn, conn:
+            yield conn
+
+    def get(self, session_id: str) -> SessionState | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            data, updated_at = row
+            if self._expired(updated_at):
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                return None
+        return SessionState.model_validate_json(data)
+
+    def save(self, session: SessionState) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                (session.session_id, session.model_dump_json(), session.updated_at),
+            )
+            with self._lock:
+                self._writes += 1
+                purge = self._writes % self._PURGE_EVERY == 0
+            if purge:
+                conn.execute(
+                    "DELETE FROM sessions WHERE updated_at < ?",
+                    (time.time() - self.ttl_seconds,),
+                )
+
+    def delete(self, session_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
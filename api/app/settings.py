@@ -1,6 +1,35 @@
 # BaseSettings automatically reads values from environment variables
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import BaseModel, Field
+
+
+class AgentModelSettings(BaseModel):
+    """Per-agent overrides for the chat model an agent uses.
+
+    Unset fields fall back to the global AZURE_OPENAI_DEPLOYMENT, MAX_TOKENS,
+    LLM_TIMEOUT_SECONDS and the agent's default temperature.
+    """
+
+    deployment: str | None = Field(
+        default=None,
+        description="Azure OpenAI deployment name (e.g., gpt-4o-mini)",
+    )
+    max_tokens: int | None = Field(
+        default=None,
+        gt=0,
+        description="Maximum tokens in the response",
+    )
+    timeout: float | None = Field(
+        default=None,
+        gt=0,
+        description="Request timeout in seconds",
+    )
+    temperature: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=2.0,
+        description="Model temperature",
+    )
 
 
 class Settings(BaseSettings):
@@ -17,6 +46,78 @@ class Settings(BaseSettings):
         - MAX_TOKENS: Maximum tokens in response (optional)
         - TMDB_API_KEY: TMDB API key for movie retrieval (optional, uses stub if not set)
         - MOVIE_FINDER_MODE: "tmdb" or "stub" (default: auto-detect based on API key)
+        - LLM_PRICING: JSON map of model/deployment to USD per 1M tokens, used
+          for cost estimates (e.g. {"gpt-4o": {"prompt": 2.5, "completion": 10}})
+        - PROMPT_TOKEN_BUDGETS: JSON map of agent (writer, evaluator, rag) to
+          the token budget of its user prompt (e.g. {"rag": 2000})
+        - PROMPT_OVERVIEW_TOKENS: Max tokens kept from a movie overview (default: 80)
+        - PROMPT_CONTEXT_TOKENS: Max tokens of retrieved documentation (default: 1000)
+        - PROMPT_TOKENIZER: "approx" or "tiktoken" (default: approx)
+        - LLM_TIMEOUT_SECONDS: Default LLM request timeout (optional)
+        - LLM_MAX_RETRIES: Retries per LLM call on transient errors (default: 1)
+        - LLM_HEDGING: Duplicate slow LLM calls, first answer wins (default: false)
+        - LLM_HEDGE_QUANTILE: Latency quantile after which to hedge (default: 0.95)
+        - LLM_HEDGE_INITIAL_DELAY_SECONDS: Hedging delay until enough
+          latencies are known (default: 5.0)
+        - LLM_HEDGE_MAX_WORKERS: Threads for hedged LLM calls (default: twice
+          ADMISSION_MAX_CONCURRENCY, or 16 without admission control)
+        - CHAT_DEADLINE_SECONDS: Time budget of one /chat request (default: 45)
+        - SESSION_STORE: "memory", "sqlite" or "none" (default: memory)
+        - SESSION_DB_PATH: SQLite file for the sqlite session store
+          (default: sessions.db)
+        - SESSION_TTL_SECONDS: Idle time after which a session is forgotten
+          (default: 3600)
+        - SESSION_MAX_SESSIONS: Sessions kept by the memory store (default: 1000)
+        - SESSION_MAX_TURNS: Recent messages kept verbatim; older ones are
+          summarized (default: 6)
+        - WORKFLOW_CHECKPOINTER: "memory", "sqlite" or "none" (default: none)
+        - CHECKPOINT_DB_PATH: SQLite file for the sqlite checkpointer
+          (default: checkpoints.db)
+        - CHECKPOINT_TTL_SECONDS: Age after which unfinished runs can no
+          longer be resumed (default: 3600)
+        - SHARED_CACHE_PATH: SQLite file caching TMDB responses for all
+          worker processes (default: unset, no shared cache)
+        - SHARED_CACHE_TTL_SECONDS: Age after which shared cache entries
+          expire (default: 3600)
+        - LLM_RESPONSE_CACHE: Also cache temperature-0 LLM completions in
+          the shared cache (default: false)
+        - WORKER_REPORT_INTERVAL_SECONDS: How often each worker records its
+          memory and cache hit counts for /workers (default: 15)
+        - ADMISSION_MAX_CONCURRENCY: Chat requests run at once per worker;
+          0 disables admission control (default: 8)
+        - ADMISSION_MAX_QUEUE: Requests waiting for admission before new
+          ones are rejected with 503 (default: 32)
+        - ADMISSION_MAX_WAIT_SECONDS: Longest wait for admission (default: 10)
+        - ADMISSION_LLM_TOKENS_PER_MINUTE: LLM token budget per worker; while
+          used up, requests are held back or rejected with 429 (default: unset)
+        - ADMISSION_TMDB_REQUESTS_PER_SECOND: TMDB request budget per worker
+          (default: unset)
+        - DEGRADATION_ENABLED: Degrade the workflow step by step while upstream
+          latency exceeds its SLO (default: false)
+        - DEGRADATION_LLM_P95_SECONDS: p95 latency SLO of LLM calls (default: 8)
+        - DEGRADATION_TMDB_P95_SECONDS: p95 latency SLO of TMDB requests
+          (default: 2)
+        - DEGRADATION_WINDOW_SECONDS: Age of the latest latencies the p95 is
+          taken over (default: 60)
+        - DEGRADATION_STEP_SECONDS: Minimum time between level changes
+          (default: 15)
+        - DEGRADATION_RECOVERY_SECONDS: Time latency must stay well under the
+          SLOs before stepping back up a level (default: 60)
+        - DEGRADATION_MAX_LEVEL: Deepest degradation level, 0-4 (default: 4)
+        - AGENT_MODELS: JSON map of agent (responder, input, writer, evaluator,
+          rag) to model overrides, e.g. {"input": {"deployment": "gpt-4o-mini"}}.
+          Single values can also be set as AGENT_MODELS__INPUT__DEPLOYMENT.
+        - ESCALATION_DEPLOYMENT: Large deployment used when a tiered agent is
+          unsure (default: AZURE_OPENAI_DEPLOYMENT)
+        - INPUT_ESCALATION_CONFIDENCE: Routing confidence below which the input
+          agent re-asks the large model (default: 0.6)
+        - EVALUATOR_UNCERTAINTY_BAND: Distance from PASS_THRESHOLD within which
+          an evaluator score is re-judged by the large model (default: 0.1)
+        - CASSETTE_MODE: "off", "record" or "replay" LLM and TMDB calls
+          (default: off)
+        - CASSETTE_PATH: Cassette file (default: cassettes/recording.jsonl.gz)
+        - CASSETTE_TIME_SCALE: Factor applied to recorded times when
+          replaying; 0 replays instantly (default: 1.0)
     """
     
     # Field(...) = required, no default → app crashes if missing
@@ -51,6 +152,255 @@ class Settings(BaseSettings):
         description="Maximum tokens in the response (optional)"
     )
     
+    llm_timeout_seconds: float | None = Field(
+        default=None,
+        gt=0,
+        description="Default LLM request timeout in seconds (optional)"
+    )
+    llm_max_retries: int = Field(
+        default=1,
+        ge=0,
+        description="Retries per LLM call on transient errors"
+    )
+    llm_hedging: bool = Field(
+        default=False,
+        description="Issue a duplicate LLM call when the first is slower than usual"
+    )
+    llm_hedge_quantile: float = Field(
+        default=0.95,
+        gt=0.0,
+        lt=1.0,
+        description="Latency quantile after which a call is hedged"
+    )
+    llm_hedge_initial_delay_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        description="Hedging delay used until enough latencies are observed"
+    )
+    llm_hedge_max_workers: int | None = Field(
+        default=None,
+        ge=2,
+        description="Threads shared by hedged LLM calls and their duplicates"
+    )
+    upstream_coalescing: bool = Field(
+        default=True,
+        description="Share one TMDB or LLM call among concurrent identical calls"
+    )
+    workflow_warmup: bool = Field(
+        default=True,
+        description="Build the workflow in the background at startup "
+        "instead of on the first /chat request"
+    )
+    chat_deadline_seconds: float = Field(
+        default=45.0,
+        gt=0,
+        description="Time budget for one chat request, shared by all workflow nodes"
+    )
+
+    # Conversation sessions (optional)
+    session_store: str = Field(
+        default="memory",
+        description="Session store backend: 'memory', 'sqlite' or 'none'"
+    )
+    session_db_path: str = Field(
+        default="sessions.db",
+        description="SQLite database file used by the sqlite session store"
+    )
+    session_ttl_seconds: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Idle time after which a conversation session is evicted"
+    )
+    session_max_sessions: int = Field(
+        default=1000,
+        gt=0,
+        description="Maximum number of sessions kept by the in-memory store"
+    )
+    session_max_turns: int = Field(
+        default=6,
+        ge=0,
+        description="Recent messages kept verbatim; older ones are folded into a summary"
+    )
+
+    # Resumable workflow runs (optional)
+    workflow_checkpointer: str = Field(
+        default="none",
+        description="Workflow checkpoint saver: 'memory', 'sqlite' or 'none'"
+    )
+    checkpoint_db_path: str = Field(
+        default="checkpoints.db",
+        description="SQLite database file used by the sqlite checkpointer"
+    )
+    checkpoint_ttl_seconds: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Age after which checkpoints of unfinished runs are purged"
+    )
+
+    # Multi-process serving (optional)
+    shared_cache_path: str | None = Field(
+        default=None,
+        description="SQLite database file caching upstream responses across workers"
+    )
+    shared_cache_ttl_seconds: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Age after which shared cache entries expire"
+    )
+    llm_response_cache: bool = Field(
+        default=False,
+        description="Cache temperature-0 LLM completions in the shared cache"
+    )
+    worker_report_interval_seconds: float = Field(
+        default=15.0,
+        gt=0,
+        description="Seconds between each worker's memory and cache reports"
+    )
+
+    # Admission control (optional)
+    admission_max_concurrency: int = Field(
+        default=8,
+        ge=0,
+        description="Chat requests run at once per worker (0 disables admission control)"
+    )
+    admission_max_queue: int = Field(
+        default=32,
+        ge=0,
+        description="Requests allowed to wait for admission"
+    )
+    admission_max_wait_seconds: float = Field(
+        default=10.0,
+        ge=0,
+        description="Longest time a request waits for admission"
+    )
+    admission_llm_tokens_per_minute: int | None = Field(
+        default=None,
+        gt=0,
+        description="LLM tokens per minute a worker may use before holding back requests"
+    )
+    admission_tmdb_requests_per_second: float | None = Field(
+        default=None,
+        gt=0,
+        description="TMDB requests per second a worker may make before holding back requests"
+    )
+
+    # SLO-aware degradation (optional, see app/resilience/degradation.py)
+    degradation_enabled: bool = Field(
+        default=False,
+        description="Degrade the workflow step by step while upstream latency exceeds its SLO"
+    )
+    degradation_llm_p95_seconds: float = Field(
+        default=8.0,
+        gt=0,
+        description="p95 latency SLO of LLM calls"
+    )
+    degradation_tmdb_p95_seconds: float = Field(
+        default=2.0,
+        gt=0,
+        description="p95 latency SLO of TMDB requests"
+    )
+    degradation_window_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        description="Age of the latest upstream latencies the p95 is taken over"
+    )
+    degradation_step_seconds: float = Field(
+        default=15.0,
+        ge=0,
+        description="Minimum time between two degradation level changes"
+    )
+    degradation_recovery_seconds: float = Field(
+        default=60.0,
+        ge=0,
+        description="Time latency must stay well under the SLOs before stepping back up"
+    )
+    degradation_max_level: int = Field(
+        default=4,
+        ge=0,
+        le=4,
+        description="Deepest degradation level (1: rules-only evaluator, 2: template "
+        "writer, 3: capped finder, 4: cached RAG answers)"
+    )
+
+    # Request deduplication (optional)
+    idempotency_ttl_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds a completed /chat response is replayed for retries with the same Idempotency-Key (0 disables)"
+    )
+
+    # Batch processing (optional)
+    batch_max_items: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum number of messages per /chat/batch request"
+    )
+    batch_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum messages of a batch processed at once"
+    )
+
+    # Per-agent model tiering (optional)
+    agent_models: dict[str, AgentModelSettings] = Field(
+        default_factory=dict,
+        description=(
+            "Per-agent deployment, max_tokens, timeout and temperature "
+            "overrides keyed by agent name"
+        ),
+    )
+    escalation_deployment: str | None = Field(
+        default=None,
+        description=(
+            "Deployment used when a tiered agent escalates "
+            "(defaults to azure_openai_deployment)"
+        ),
+    )
+    input_escalation_confidence: float = Field(
+        default=0.6,
+        ge=0.0,
+        le=1.0,
+        description="Input agent routing confidence below which to escalate",
+    )
+    evaluator_uncertainty_band: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Evaluator score distance from the pass threshold that triggers escalation",
+    )
+
+    # Cost accounting (optional)
+    llm_pricing: dict[str, dict[str, float]] = Field(
+        default_factory=dict,
+        description=(
+            "USD per 1M tokens keyed by model or deployment name, with keys "
+            "'prompt', 'completion' and optional 'cached_prompt'"
+        ),
+    )
+
+    # Prompt size budgets (see app.llm.prompt_budget)
+    prompt_token_budgets: dict[str, int] = Field(
+        default_factory=dict,
+        description=(
+            "Per-agent user prompt token budgets (writer, evaluator, rag), "
+            "overriding the built-in defaults"
+        ),
+    )
+    prompt_overview_tokens: int = Field(
+        default=80,
+        gt=0,
+        description="Maximum tokens kept from a movie overview in prompts",
+    )
+    prompt_context_tokens: int = Field(
+        default=1000,
+        gt=0,
+        description="Maximum tokens of retrieved documentation in the RAG prompt",
+    )
+    prompt_tokenizer: str = Field(
+        default="approx",
+        description="Token counter: 'approx' (~4 chars/token) or 'tiktoken'",
+    )
+
     # TMDB integration (optional)
     tmdb_api_key: str | None = Field(
         default=None,
@@ -60,6 +410,10 @@ class Settings(BaseSettings):
         default="auto",
         description="Movie finder mode: 'tmdb', 'stub', or 'auto' (auto-detect based on API key)"
     )
+    tmdb_base_url: str = Field(
+        default="https://api.themoviedb.org/3",
+        description="TMDB API root URL (point at a local stand-in for load tests)"
+    )
     
     # LangSmith observability (optional)
     langchain_tracing_v2: bool = Field(
@@ -79,6 +433,49 @@ class Settings(BaseSettings):
         description="LangSmith API endpoint"
     )
 
+    # OpenTelemetry tracing (optional)
+    otel_exporter_otlp_endpoint: str | None = Field(
+        default=None,
+        description=(
+            "OpenTelemetry collector base URL; when set, spans are exported "
+            "over OTLP/HTTP to {endpoint}/v1/traces"
+        )
+    )
+    otel_service_name: str = Field(
+        default="movie-night-api",
+        description="service.name resource attribute on exported spans"
+    )
+
+    # On-demand profiling (optional, admin only)
+    profiling_enabled: bool = Field(
+        default=False,
+        description="Serve /debug/profile/cpu and /debug/profile/memory"
+    )
+    profiling_max_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        description="Longest capture a /debug/profile request may ask for"
+    )
+
+    # Record/replay of LLM and TMDB calls (optional, see app/cassettes.py)
+    cassette_mode: str = Field(
+        default="off",
+        description="Cassette mode: 'off', 'record' or 'replay' LLM and TMDB calls"
+    )
+    cassette_path: str = Field(
+        default="cassettes/recording.jsonl.gz",
+        description="Cassette file; gzip-compressed when it ends in .gz"
+    )
+    cassette_time_scale: float = Field(
+        default=1.0,
+        ge=0,
+        description="Factor applied to recorded call times when replaying (0 = instantly)"
+    )
+
+    def model_for_agent(self, agent: str) -> AgentModelSettings:
+        """Return the model overrides configured for an agent (may be empty)."""
+        return self.agent_models.get(agent) or AgentModelSettings()
+
     @property
     def langsmith_enabled(self) -> bool:
         """Check if LangSmith tracing is properly configured and enabled."""
@@ -91,6 +488,8 @@ class Settings(BaseSettings):
         "env_file_encoding": "utf-8",
         # Ignore extra env vars that don't match our fields
         "extra": "ignore",
+        # AGENT_MODELS__INPUT__DEPLOYMENT=... sets agent_models["input"].deployment
+        "env_nested_delimiter": "__",
     }
 
 
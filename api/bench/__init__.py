@@ -0,0 +1,5 @@
+"""Offline benchmarks for the Movie Night Assistant API.
+
+Run from the ``api/`` directory, e.g. ``python -m bench.prompt_tokens``.
+Benchmarks never call Azure OpenAI or TMDB.
+"""
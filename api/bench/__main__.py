@@ -0,0 +1,96 @@
+"""Run the benchmark suite and record or compare its results.
+
+Usage (from ``api/``)::
+
+    python -m bench [--quick] [--only NAME ...] [--save NAME] [--compare NAME]
+
+``--save`` writes the results to ``bench/results/NAME.json``; ``--compare``
+prints each metric's change against a saved result set and exits with
+status 1 if any got slower than ``--tolerance`` allows. Record a baseline
+before a performance change and compare against it after.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections.abc import Callable
+from typing import Any
+
+from bench import (
+    candidate_selection,
+    graph_overhead,
+    ingestion,
+    logging_overhead,
+    rag_retrieval,
+    workflow_e2e,
+)
+from bench.harness import (
+    DEFAULT_TOLERANCE,
+    compare_results,
+    flatten,
+    load_results,
+    print_comparison,
+    save_results,
+)
+
+SUITES: dict[str, Callable[[bool], Any]] = {
+    "workflow_e2e": lambda quick: workflow_e2e.run(iterations=3 if quick else 20),
+    "graph_overhead": lambda quick: graph_overhead.run(iterations=10 if quick else 200),
+    "rag_retrieval": lambda quick: rag_retrieval.run(
+        sizes=(10, 1_000) if quick else rag_retrieval.DEFAULT_SIZES,
+        iterations=5 if quick else 50,
+    ),
+    "candidate_selection": lambda quick: candidate_selection.run(
+        sizes=(10, 1_000) if quick else candidate_selection.DEFAULT_SIZES,
+        iterations=5 if quick else 50,
+    ),
+    "ingestion": lambda quick: ingestion.run(
+        files=20 if quick else 200, iterations=1 if quick else 5
+    ),
+    "logging_overhead": lambda quick: logging_overhead.run(iterations=200 if quick else 5000),
+}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(SUITES), help="Run only these benchmarks"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Small sizes and few iterations (smoke run)"
+    )
+    parser.add_argument("--save", metavar="NAME", help="Save results as bench/results/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with a saved result set")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Relative slowdown reported as a regression (default: 0.10)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = {}
+    for name in args.only or SUITES:
+        print(f"== {name} ==")
+        results[name] = SUITES[name](args.quick)
+        print()
+    metrics = flatten(results)
+
+    if args.save:
+        print(f"Saved {len(metrics)} metrics to {save_results(args.save, metrics)}")
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), metrics, args.tolerance)
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):\n")
+        print_comparison(rows)
+        if any(row["verdict"] == "slower" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
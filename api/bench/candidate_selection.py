@@ -0,0 +1,75 @@
+"""Candidate selection benchmark: filtering and ranking by candidate count.
+
+Runs :func:`select_best_candidate` (hard-constraint filter, then ranking)
+and :func:`prioritize_candidates` alone over 10, 1,000 and 100,000
+synthetic candidates with a genre preference, a runtime limit and a few
+rejected titles, and reports the mean time per call.
+
+Usage (from ``api/``)::
+
+    python -m bench.candidate_selection [--sizes 10 1000 100000] [--iterations 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.llm.candidate_selector import prioritize_candidates, select_best_candidate
+from app.schemas.orchestrator import Constraints
+from bench.corpus import synthetic_movies
+from bench.harness import measure
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+CONSTRAINTS = Constraints(genres=["comedy", "drama"], max_runtime_minutes=120)
+REJECTED = ["Synthetic Movie 1", "Synthetic Movie 2", "Synthetic Movie 3"]
+
+
+def run(
+    sizes: tuple[int, ...] = DEFAULT_SIZES, iterations: int = 50
+) -> dict[str, dict[str, float]]:
+    """Measure and print selection time per candidate count.
+
+    Args:
+        sizes: Candidate counts.
+        iterations: Timed calls for up to 1,000 candidates; larger counts
+            run proportionally fewer (at least three).
+
+    Returns:
+        Mean microseconds per ``select`` and ``prioritize`` call, keyed by
+        candidate count.
+    """
+    results = {}
+    for size in sizes:
+        movies = synthetic_movies(size)
+        count = max(3, min(iterations, iterations * 1_000 // size))
+        select = measure(
+            lambda: select_best_candidate(movies, CONSTRAINTS, REJECTED), iterations=count
+        )
+        prioritize = measure(
+            lambda: prioritize_candidates(movies, CONSTRAINTS), iterations=count
+        )
+        results[str(size)] = {
+            "select_mean_us": select["mean_us"],
+            "prioritize_mean_us": prioritize["mean_us"],
+        }
+
+    print("Candidate selection over synthetic candidates\n")
+    print(f"{'candidates':>10} {'select µs':>12} {'prioritize µs':>14}")
+    for size, times in results.items():
+        print(
+            f"{size:>10} {times['select_mean_us']:>12.0f} "
+            f"{times['prioritize_mean_us']:>14.0f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    run(tuple(args.sizes), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
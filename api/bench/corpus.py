@@ -0,0 +1,103 @@
+"""Synthetic, reproducible corpora for the RAG and selection benchmarks.
+
+Text is drawn from the vocabulary of the bundled knowledge base so term
+statistics resemble the real documents, and every generator takes a seed
+so repeated runs measure the same data.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+from functools import cache
+from pathlib import Path
+
+from app.rag.ingest import DEFAULT_KNOWLEDGE_BASE_PATH, KnowledgeDocument
+from app.schemas.domain import MovieResult
+
+GENRES = (
+    "Action", "Adventure", "Animation", "Comedy", "Crime", "Drama", "Family",
+    "Fantasy", "Horror", "Mystery", "Romance", "Sci-Fi", "Thriller", "Western",
+)
+
+
+@cache
+def vocabulary() -> tuple[str, ...]:
+    """Distinct words of the bundled knowledge base, in sorted order."""
+    words: set[str] = set()
+    for path in DEFAULT_KNOWLEDGE_BASE_PATH.glob("*.md"):
+        words.update(re.findall(r"[a-z]+", path.read_text(encoding="utf-8").lower()))
+    return tuple(sorted(words))
+
+
+def paragraph(rng: random.Random, words: int = 60) -> str:
+    """A paragraph of sentences of random knowledge-base words."""
+    vocab = vocabulary()
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(6, 14))
+        sentence = " ".join(rng.choice(vocab) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+def synthetic_chunks(count: int, seed: int = 0) -> list[KnowledgeDocument]:
+    """Knowledge-base chunks of about 60 words each."""
+    rng = random.Random(seed)
+    return [
+        KnowledgeDocument(
+            content=paragraph(rng),
+            source=f"synthetic_{i // 10}.md",
+            title=f"Synthetic document {i // 10}",
+            metadata={"chunk_index": i % 10},
+        )
+        for i in range(count)
+    ]
+
+
+def write_knowledge_base(
+    directory: Path, files: int, paragraphs: int = 40, seed: int = 0
+) -> int:
+    """Write markdown files shaped like the bundled knowledge base.
+
+    Args:
+        directory: Directory to write into.
+        files: Number of files.
+        paragraphs: Paragraphs per file, each under a ``##`` heading every
+            few paragraphs.
+        seed: Random seed.
+
+    Returns:
+        Total size of the written files in bytes.
+    """
+    rng = random.Random(seed)
+    total = 0
+    for i in range(files):
+        sections = [f"# Synthetic document {i}"]
+        for p in range(paragraphs):
+            if p % 4 == 0:
+                sections.append(f"## Section {p // 4}")
+            sections.append(paragraph(rng, words=rng.randint(20, 120)))
+        text = "\n\n".join(sections) + "\n"
+        (directory / f"synthetic_{i}.md").write_text(text, encoding="utf-8")
+        total += len(text.encode("utf-8"))
+    return total
+
+
+def synthetic_movies(count: int, seed: int = 0) -> list[MovieResult]:
+    """Candidate movies with varied genres, runtimes, ratings and gaps."""
+    rng = random.Random(seed)
+    return [
+        MovieResult(
+            id=f"synthetic-{i}",
+            title=f"Synthetic Movie {i}",
+            year=rng.choice([None, rng.randint(1950, 2025)]),
+            genres=rng.sample(GENRES, rng.randint(1, 3)),
+            runtime_minutes=rng.choice([None, rng.randint(70, 200)]),
+            overview=paragraph(rng, words=30) if rng.random() < 0.9 else None,
+            rating=round(rng.uniform(3.0, 9.5), 1) if rng.random() < 0.95 else None,
+        )
+        for i in range(count)
+    ]
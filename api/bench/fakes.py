@@ -0,0 +1,308 @@
+"""Deterministic stand-ins for Azure OpenAI and TMDB used by the benchmarks.
+
+- :class:`FakeChatModel` is a LangChain chat model that waits a configurable
+  latency and answers with fixed text. Structured output
+  (``with_structured_output``) is supported for the schemas the agents ask
+  for: ``InputDecision`` is derived from the user message with the stub
+  orchestrator's keyword rules and ``EvaluationResult`` always passes,
+  unless the model is given another ``structured_responder``.
+- :class:`FixtureTMDBServer` is a local HTTP server answering TMDB API
+  requests with the responses recorded in ``bench/fixtures/tmdb.json``.
+- :func:`fixture_workflow` builds the production workflow (LLM
+  agents, :class:`TMDBMovieFinderAgent`, RAG retriever) on top of both,
+  optionally with a custom evaluator answer and workflow options such as
+  the evaluator's retry limit.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from app.agents import MoviesResponder, SystemResponder
+from app.integrations.tmdb_client import TMDBClient, _endpoint_label
+from app.llm import TMDBMovieFinderAgent
+from app.llm.evaluator_agent import LLMEvaluatorAgent
+from app.llm.input_agent import InputOrchestratorAgent, StubInputOrchestratorAgent
+from app.llm.rag_agent import LLMRAGAssistantAgent
+from app.llm.recommendation_agent import LLMRecommendationWriterAgent
+from app.llm.workflow import MovieNightWorkflow
+from app.observability.usage import UsageCallbackHandler
+from app.rag.retriever import get_shared_retriever
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import InputDecision
+
+TMDB_FIXTURES = Path(__file__).parent / "fixtures" / "tmdb.json"
+FAKE_REPLY = (
+    "Tonight, go with this one: it fits what you asked for, it is well "
+    "reviewed, and it leaves time for snacks."
+)
+
+TMDB_NOT_FOUND = {
+    "success": False,
+    "status_code": 34,
+    "status_message": "The resource you requested could not be found.",
+}
+STRUCTURED_SCHEMAS: dict[str, type[BaseModel]] = {
+    "InputDecision": InputDecision,
+    "EvaluationResult": EvaluationResult,
+}
+
+StructuredResponder = Callable[[type[BaseModel], Sequence[BaseMessage]], BaseModel]
+
+_stub_orchestrator = StubInputOrchestratorAgent()
+
+
+def _approximate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def fake_structured_response(
+    schema: type[BaseModel], messages: Sequence[BaseMessage]
+) -> BaseModel:
+    """Build the structured answer a fake model gives for a schema.
+
+    Args:
+        schema: The requested output schema.
+        messages: The prompt; the last message is the user's request.
+
+    Returns:
+        An instance of ``schema``.
+
+    Raises:
+        NotImplementedError: For schemas no agent asks for.
+    """
+    if schema is InputDecision:
+        return _stub_orchestrator.decide(str(messages[-1].content))
+    if schema is EvaluationResult:
+        return EvaluationResult(
+            passed=True, score=0.9, feedback="Grounded and on topic.",
+        )
+    raise NotImplementedError(f"No fake structured output for {schema.__name__}")
+
+
+def load_tmdb_fixtures(path: Path = TMDB_FIXTURES) -> dict[str, Any]:
+    """Read recorded TMDB responses keyed by path or endpoint template."""
+    return json.loads(path.read_text())
+
+
+def tmdb_fixture_response(fixtures: dict[str, Any], path: str) -> tuple[int, dict]:
+    """Find the recorded response for a TMDB request path.
+
+    Args:
+        fixtures: Responses as returned by :func:`load_tmdb_fixtures`.
+        path: Request path below the API root, e.g. ``/movie/603``.
+
+    Returns:
+        The HTTP status and JSON body: the response recorded for the path,
+        else for its endpoint template (``/movie/{id}``), else TMDB's 404.
+    """
+    data = fixtures.get(path) or fixtures.get(_endpoint_label(path))
+    if data is None:
+        return 404, TMDB_NOT_FOUND
+    return 200, data
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model answering after a fixed latency with canned output.
+
+    Attributes:
+        latency_seconds: Time each completion takes.
+        reply: Text of every free-form completion.
+        structured_schema: Schema of the structured answer, set on the copy
+            returned by :meth:`with_structured_output`.
+        structured_responder: Builds the structured answer from the schema
+            and the prompt.
+    """
+
+    latency_seconds: float = 0.0
+    reply: str = FAKE_REPLY
+    structured_schema: type[BaseModel] | None = None
+    structured_responder: StructuredResponder = fake_structured_response
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if self.structured_schema is not None:
+            answer = self.structured_responder(self.structured_schema, messages)
+            content = answer.model_dump_json()
+        else:
+            content = self.reply
+        prompt_tokens = sum(_approximate_tokens(str(m.content)) for m in messages)
+        completion_tokens = _approximate_tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            response_metadata={"model_name": "fake"},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        """Return a runnable producing ``schema`` instances, like the real model."""
+        model = self.model_copy(update={"structured_schema": schema})
+        return model | RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
+
+
+def create_fake_chat_model(
+    agent: str,
+    latency_seconds: float = 0.0,
+    structured_responder: StructuredResponder = fake_structured_response,
+) -> FakeChatModel:
+    """Create a fake model with the usage callback production models carry."""
+    return FakeChatModel(
+        latency_seconds=latency_seconds,
+        structured_responder=structured_responder,
+        callbacks=[UsageCallbackHandler(agent=agent, model="fake")],
+    )
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Answers GET requests from the server's fixtures."""
+
+    server: "_FixtureHTTPServer"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        path = urlsplit(self.path).path.removeprefix("/3")
+        self.server.requests.append(path)
+        if self.server.latency_seconds:
+            time.sleep(self.server.latency_seconds)
+        status, data = tmdb_fixture_response(self.server.fixtures, path)
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures: dict[str, Any], latency_seconds: float) -> None:
+        super().__init__(("127.0.0.1", 0), _FixtureHandler)
+        self.fixtures = fixtures
+        self.latency_seconds = latency_seconds
+        self.requests: list[str] = []
+
+
+class FixtureTMDBServer:
+    """Local TMDB stand-in serving recorded responses.
+
+    Responses are looked up by the request path (e.g. ``/movie/603``), then
+    by its endpoint template (``/movie/{id}``); unknown paths get TMDB's
+    404 body. Query parameters are ignored.
+
+    Use as a context manager; :attr:`base_url` is what :class:`TMDBClient`
+    takes as ``base_url``.
+
+    Args:
+        fixtures_path: JSON file mapping paths or templates to responses.
+        latency_seconds: Time each response is delayed by.
+    """
+
+    def __init__(
+        self,
+        fixtures_path: Path = TMDB_FIXTURES,
+        latency_seconds: float = 0.0,
+    ) -> None:
+        self._server = _FixtureHTTPServer(load_tmdb_fixtures(fixtures_path), latency_seconds)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fixture-tmdb", daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    @property
+    def requests(self) -> list[str]:
+        """Paths requested so far."""
+        return self._server.requests
+
+    def __enter__(self) -> "FixtureTMDBServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextmanager
+def fixture_workflow(
+    llm_latency_seconds: float = 0.0,
+    tmdb_latency_seconds: float = 0.0,
+    evaluator_responder: StructuredResponder = fake_structured_response,
+    **workflow_options: Any,
+) -> Iterator[MovieNightWorkflow]:
+    """Run the production workflow against the fakes.
+
+    Args:
+        llm_latency_seconds: Latency of every LLM completion.
+        tmdb_latency_seconds: Latency of every TMDB response.
+        evaluator_responder: Builds the evaluator model's answers, e.g. a
+            judge scoring drafts against labels.
+        **workflow_options: Further :class:`MovieNightWorkflow` arguments,
+            e.g. ``max_retries`` and ``pass_threshold``.
+
+    Yields:
+        A workflow with LLM-backed agents on :class:`FakeChatModel` and a
+        TMDB movie finder talking to a :class:`FixtureTMDBServer`.
+    """
+    def llm(agent: str) -> FakeChatModel:
+        return create_fake_chat_model(agent, llm_latency_seconds)
+
+    with FixtureTMDBServer(latency_seconds=tmdb_latency_seconds) as server:
+        client = TMDBClient(api_key="bench", base_url=server.base_url)
+        try:
+            yield MovieNightWorkflow(
+                orchestrator=None,
+                movies_responder=MoviesResponder(llm("responder")),
+                system_responder=SystemResponder(llm("responder")),
+                input_agent=InputOrchestratorAgent(llm("input")),
+                movie_finder=TMDBMovieFinderAgent(client),
+                recommendation_writer=LLMRecommendationWriterAgent(llm("writer")),
+                evaluator=LLMEvaluatorAgent(
+                    create_fake_chat_model(
+                        "evaluator", llm_latency_seconds, evaluator_responder
+                    )
+                ),
+                rag_retriever=get_shared_retriever(),
+                rag_agent=LLMRAGAssistantAgent(llm("rag")),
+                **workflow_options,
+            )
+        finally:
+            client.close()
@@ -0,0 +1,112 @@
+"""Graph overhead benchmark: LangGraph framework cost per request.
+
+Runs sample requests for each route through a workflow built from stub
+agents (no LLM or TMDB calls) three ways and reports the mean time per
+request:
+
+- ``direct``: the route's node functions called one after another, with no
+  graph. This is the cost of the agents themselves.
+- ``routed``: orchestration followed by the route's precompiled graph, as
+  :meth:`MovieNightWorkflow.invoke` runs it.
+- ``full``: the full graph with conditional routing after orchestration.
+
+The difference to ``direct`` is the framework overhead.
+
+Usage (from ``api/``)::
+
+    python -m bench.graph_overhead [--iterations 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+
+from app.batch import create_stub_workflow
+from app.llm.workflow import MovieNightWorkflow
+
+SAMPLE_REQUESTS = {
+    "movies": "A comedy under 120 minutes for tonight",
+    "hybrid": "How does this app pick a good horror movie?",
+    "rag": "How does the app rank movies?",
+}
+
+
+def _run_direct(workflow: MovieNightWorkflow, message: str) -> dict:
+    state = workflow._initial_state(message)
+    state.update(workflow._orchestrate_node(state))
+    for name in workflow._route_steps(state["route"]):
+        state.update(workflow._nodes[name](state))
+    return state
+
+
+def _run_routed(workflow: MovieNightWorkflow, message: str) -> dict:
+    return workflow._run_routed(workflow._initial_state(message))
+
+
+def _run_full(workflow: MovieNightWorkflow, message: str) -> dict:
+    return workflow._graph.invoke(workflow._initial_state(message))
+
+
+MODES: dict[str, Callable[[MovieNightWorkflow, str], dict]] = {
+    "direct": _run_direct,
+    "routed": _run_routed,
+    "full": _run_full,
+}
+
+
+def _mean_microseconds(
+    run: Callable[[MovieNightWorkflow, str], dict],
+    workflow: MovieNightWorkflow,
+    message: str,
+    iterations: int,
+) -> float:
+    run(workflow, message)  # warm caches
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run(workflow, message)
+        samples.append(time.perf_counter() - start)
+    return statistics.fmean(samples) * 1_000_000
+
+
+def run(iterations: int = 200) -> dict[str, dict[str, float]]:
+    """Measure and print the mean time per request for each route and mode.
+
+    Returns:
+        Mean microseconds per request, keyed by route and then mode.
+    """
+    workflow = create_stub_workflow()
+    results = {}
+    for route, message in SAMPLE_REQUESTS.items():
+        assert _run_direct(workflow, message)["route"] == route, route
+        results[route] = {
+            mode: _mean_microseconds(fn, workflow, message, iterations)
+            for mode, fn in MODES.items()
+        }
+
+    print(f"Mean time per request in µs ({iterations} iterations, stub agents)\n")
+    print(
+        f"{'route':<8} {'direct':>9} {'routed':>9} {'full':>9} "
+        f"{'overhead routed':>16} {'overhead full':>14}"
+    )
+    for route, times in results.items():
+        print(
+            f"{route:<8} {times['direct']:>9.0f} {times['routed']:>9.0f} "
+            f"{times['full']:>9.0f} {times['routed'] - times['direct']:>16.0f} "
+            f"{times['full'] - times['direct']:>14.0f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    run(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
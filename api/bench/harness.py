@@ -0,0 +1,161 @@
+"""Timing and result storage shared by the benchmarks.
+
+Every benchmark reports its measurements as a flat mapping of metric name
+to value, with lower values better (times, not rates). :func:`save_results`
+writes them to ``bench/results/`` together with the commit and machine they
+were taken on, and :func:`compare_results` diffs two such files so a change
+can be checked against a baseline recorded before it::
+
+    python -m bench --save baseline      # before the change
+    python -m bench --compare baseline   # after it
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_TOLERANCE = 0.10
+
+
+def measure(
+    fn: Callable[[], Any],
+    iterations: int,
+    warmup: int = 1,
+) -> dict[str, float]:
+    """Time repeated calls of a function.
+
+    Args:
+        fn: The function to time.
+        iterations: Number of timed calls.
+        warmup: Untimed calls made first to warm caches.
+
+    Returns:
+        Mean, median and 95th percentile time per call in microseconds.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(max(1, iterations)):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": percentile(samples, 0.50),
+        "p95_us": percentile(samples, 0.95),
+    }
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """Flatten nested results into ``a/b/c`` metric names."""
+    flat: dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}/"))
+        else:
+            flat[name] = float(value)
+    return flat
+
+
+def _git_commit() -> str | None:
+    """Short hash of the checked-out commit, if git is available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(name: str, metrics: dict[str, float], directory: Path = RESULTS_DIR) -> Path:
+    """Write benchmark metrics to ``<directory>/<name>.json``.
+
+    Args:
+        name: Name of the result set, e.g. ``baseline``.
+        metrics: Flat metrics as returned by :func:`flatten`.
+        directory: Directory to write to.
+
+    Returns:
+        Path of the written file.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.json"
+    path.write_text(json.dumps({
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "metrics": metrics,
+    }, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def load_results(name: str, directory: Path = RESULTS_DIR) -> dict[str, float]:
+    """Read the metrics of a result set written by :func:`save_results`."""
+    return json.loads((directory / f"{name}.json").read_text())["metrics"]
+
+
+def compare_results(
+    baseline: dict[str, float],
+    current: dict[str, float],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[dict[str, Any]]:
+    """Compare metrics against a baseline.
+
+    Args:
+        baseline: Metrics recorded before a change.
+        current: Metrics recorded after it.
+        tolerance: Relative change within which a metric counts as unchanged.
+
+    Returns:
+        One row per metric present in both, with the baseline and current
+        value, the relative ``change`` and a ``verdict`` of ``faster``,
+        ``slower`` or ``same``.
+    """
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name], current[name]
+        change = (after - before) / before if before else 0.0
+        if change > tolerance:
+            verdict = "slower"
+        elif change < -tolerance:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append({
+            "metric": name,
+            "baseline": before,
+            "current": after,
+            "change": change,
+            "verdict": verdict,
+        })
+    return rows
+
+
+def print_comparison(rows: list[dict[str, Any]]) -> None:
+    """Print a comparison table as produced by :func:`compare_results`."""
+    width = max((len(row["metric"]) for row in rows), default=6)
+    print(f"{'metric':<{width}} {'baseline':>12} {'current':>12} {'change':>8}")
+    for row in rows:
+        marker = {"slower": "  !", "faster": "  +"}.get(row["verdict"], "")
+        print(
+            f"{row['metric']:<{width}} {row['baseline']:>12.1f} "
+            f"{row['current']:>12.1f} {row['change']:>+8.1%}{marker}"
+        )
@@ -0,0 +1,82 @@
+"""Ingestion benchmark: knowledge-base loading and chunking throughput.
+
+Writes a synthetic knowledge base of markdown files (headings and
+paragraphs of varied length, like the bundled one) to a temporary
+directory and times :meth:`DocumentIngester.load_documents` on it, then
+on the bundled knowledge base. Reports time per load, time per chunk and
+throughput.
+
+Usage (from ``api/``)::
+
+    python -m bench.ingestion [--files 200] [--iterations 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from app.rag.ingest import DEFAULT_KNOWLEDGE_BASE_PATH, DocumentIngester
+from bench.corpus import write_knowledge_base
+from bench.harness import measure
+
+
+def _measure_corpus(path: Path, iterations: int) -> dict[str, float]:
+    size = sum(f.stat().st_size for f in path.glob("*.md"))
+    chunks = len(DocumentIngester(path).load_documents())
+    timings = measure(lambda: DocumentIngester(path).load_documents(), iterations)
+    return {
+        "load_us": timings["mean_us"],
+        "per_chunk_us": timings["mean_us"] / max(1, chunks),
+        "chunks": chunks,
+        "bytes": size,
+    }
+
+
+def run(files: int = 200, iterations: int = 5) -> dict[str, dict[str, float]]:
+    """Measure and print ingestion time for a synthetic and the bundled corpus.
+
+    Args:
+        files: Files in the synthetic knowledge base (about 20 KB each).
+        iterations: Timed loads per corpus.
+
+    Returns:
+        Mean microseconds per load (``load_us``) and per chunk
+        (``per_chunk_us``), keyed by corpus (``synthetic``, ``bundled``).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        write_knowledge_base(Path(tmp), files)
+        corpora = {
+            "synthetic": _measure_corpus(Path(tmp), iterations),
+            "bundled": _measure_corpus(DEFAULT_KNOWLEDGE_BASE_PATH, iterations),
+        }
+
+    print("Knowledge-base ingestion (load + chunk)\n")
+    print(
+        f"{'corpus':<10} {'files KB':>9} {'chunks':>7} {'load ms':>9} "
+        f"{'µs/chunk':>9} {'MB/s':>7} {'chunks/s':>9}"
+    )
+    for name, stats in corpora.items():
+        seconds = stats["load_us"] / 1_000_000
+        print(
+            f"{name:<10} {stats['bytes'] / 1024:>9.0f} {stats['chunks']:>7.0f} "
+            f"{stats['load_us'] / 1000:>9.1f} {stats['per_chunk_us']:>9.1f} "
+            f"{stats['bytes'] / 1_000_000 / seconds:>7.1f} {stats['chunks'] / seconds:>9.0f}"
+        )
+    return {
+        name: {"load_us": stats["load_us"], "per_chunk_us": stats["per_chunk_us"]}
+        for name, stats in corpora.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    run(args.files, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Load test driver: replays a prompt mix against the chat API.
+
+Sends prompts drawn at random from a JSONL file (the same formats
+:mod:`app.batch` reads, e.g. ``bench/fixtures/prompt_mix.jsonl`` or the
+repository's ``requests.jsonl``; repeat a line to weight it) to ``/chat``
+and reports throughput, status codes and latency percentiles, overall and
+per route.
+
+Two load models are supported, as in Locust and k6:
+
+- closed loop (default): ``--users`` virtual users each send a request,
+  wait for the reply and ``--think-ms``, and repeat
+- open loop: with ``--rate``, requests arrive at a fixed rate regardless of
+  how fast they are answered, with at most ``--users`` in flight; arrivals
+  beyond that are counted as ``dropped``
+
+Run it against a server using the stand-in upstream of
+:mod:`bench.upstream` to load test without spending quota.
+
+Usage (from ``api/``)::
+
+    python -m bench.loadtest --url http://127.0.0.1:8000 [--users 20] \\
+        [--duration 60 | --requests 500] [--rate 10] [--prompts FILE] \\
+        [--upstream-url http://127.0.0.1:8090] [--out report.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.batch import BatchPrompt, read_prompts
+from bench.harness import percentile
+
+DEFAULT_PROMPTS = Path(__file__).parent / "fixtures" / "prompt_mix.jsonl"
+
+
+@dataclass
+class RequestSample:
+    """Outcome of one request.
+
+    Attributes:
+        prompt_id: ID of the prompt sent.
+        started: Seconds from the start of the run to the request.
+        seconds: Time to the complete response.
+        status: HTTP status, or 0 if no response was received.
+        route: Route reported in the response, if any.
+    """
+
+    prompt_id: str
+    started: float
+    seconds: float
+    status: int
+    route: str | None = None
+
+
+@dataclass
+class LoadReport:
+    """Samples of a load test run."""
+
+    samples: list[RequestSample] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    dropped: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        """Summarize the run.
+
+        Returns:
+            Request, success and drop counts, ``throughput_rps`` (all
+            responses) and ``goodput_rps`` (2xx responses) per second,
+            ``statuses`` by code, and ``latency_ms`` percentiles of the
+            successful requests, overall and per route.
+        """
+        ok = [s for s in self.samples if 200 <= s.status < 300]
+        by_route: dict[str, list[float]] = {}
+        for sample in ok:
+            by_route.setdefault(sample.route or "none", []).append(sample.seconds)
+        elapsed = self.elapsed_seconds or 1.0
+        return {
+            "requests": len(self.samples),
+            "ok": len(ok),
+            "dropped": self.dropped,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "throughput_rps": round(len(self.samples) / elapsed, 3),
+            "goodput_rps": round(len(ok) / elapsed, 3),
+            "statuses": {
+                str(code): count
+                for code, count in sorted(Counter(s.status for s in self.samples).items())
+            },
+            "latency_ms": _latency_ms([s.seconds for s in ok]),
+            "routes": {route: _latency_ms(times) for route, times in sorted(by_route.items())},
+        }
+
+
+def _latency_ms(seconds: list[float]) -> dict[str, float]:
+    if not seconds:
+        return {}
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "mean": round(statistics.fmean(ms), 1),
+        "p50": round(percentile(ms, 0.50), 1),
+        "p95": round(percentile(ms, 0.95), 1),
+        "p99": round(percentile(ms, 0.99), 1),
+        "max": round(max(ms), 1),
+    }
+
+
+async def run_load(
+    base_url: str,
+    prompts: list[BatchPrompt],
+    users: int = 10,
+    duration_seconds: float | None = 30.0,
+    max_requests: int | None = None,
+    arrival_rate: float | None = None,
+    think_seconds: float = 0.0,
+    path: str = "/chat",
+    timeout_seconds: float = 120.0,
+    seed: int = 0,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> LoadReport:
+    """Run a load test.
+
+    Args:
+        base_url: Root URL of the API.
+        prompts: Prompts to draw from, uniformly at random.
+        users: Concurrent virtual users (closed loop), or the cap on
+            requests in flight (open loop).
+        duration_seconds: Stop starting requests after this long.
+        max_requests: Stop after starting this many requests.
+        arrival_rate: Requests per second for an open-loop run; ``None``
+            for a closed loop.
+        think_seconds: Pause between a user's requests (closed loop).
+        path: Endpoint to post ``{"message": ...}`` to.
+        timeout_seconds: Per-request timeout.
+        seed: Seed for the prompt choice.
+        transport: Optional httpx transport (e.g. ASGI, for tests).
+
+    Returns:
+        The samples of all requests that were started.
+    """
+    if duration_seconds is None and max_requests is None:
+        raise ValueError("Set duration_seconds or max_requests")
+
+    rng = random.Random(seed)
+    report = LoadReport()
+    started = time.perf_counter()
+    deadline = started + duration_seconds if duration_seconds is not None else float("inf")
+    issued = 0
+
+    def may_start() -> bool:
+        nonlocal issued
+        if time.perf_counter() >= deadline or (
+            max_requests is not None and issued >= max_requests
+        ):
+            return False
+        issued += 1
+        return True
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout_seconds, transport=transport,
+        limits=httpx.Limits(max_connections=users, max_keepalive_connections=users),
+    ) as client:
+
+        async def send(prompt: BatchPrompt) -> None:
+            sent = time.perf_counter()
+            status, route = 0, None
+            try:
+                response = await client.post(path, json={"message": prompt.message})
+                status = response.status_code
+                if response.is_success:
+                    route = response.json().get("route")
+            except httpx.HTTPError:
+                pass
+            report.samples.append(RequestSample(
+                prompt_id=prompt.id,
+                started=sent - started,
+                seconds=time.perf_counter() - sent,
+                status=status,
+                route=route,
+            ))
+
+        if arrival_rate is None:
+            async def user() -> None:
+                while may_start():
+                    await send(rng.choice(prompts))
+                    if think_seconds:
+                        await asyncio.sleep(think_seconds)
+
+            await asyncio.gather(*(user() for _ in range(users)))
+        else:
+            in_flight: set[asyncio.Task] = set()
+            next_arrival = started
+            while may_start():
+                if len(in_flight) < users:
+                    task = asyncio.create_task(send(rng.choice(prompts)))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                else:
+                    report.dropped += 1
+                next_arrival += 1 / arrival_rate
+                await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            await asyncio.gather(*in_flight)
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+def print_summary(summary: dict[str, Any]) -> None:
+    """Print a run summary as returned by :meth:`LoadReport.summary`."""
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_seconds']:.1f}s: "
+        f"{summary['throughput_rps']:.2f} req/s, {summary['goodput_rps']:.2f} ok/s, "
+        f"{summary['dropped']} dropped"
+    )
+    print("statuses: " + ", ".join(f"{k}={v}" for k, v in summary["statuses"].items()))
+    print(f"\n{'route':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = [("all", summary["latency_ms"]), *summary["routes"].items()]
+    for route, latency in rows:
+        if latency:
+            print(
+                f"{route:<10} {latency['count']:>6} {latency['p50']:>9.1f} "
+                f"{latency['p95']:>9.1f} {latency['p99']:>9.1f} {latency['max']:>9.1f}"
+            )
+    if "upstream" in summary:
+        print("\nupstream: " + ", ".join(f"{k}={v}" for k, v in summary["upstream"].items()))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API root URL")
+    parser.add_argument("--path", default="/chat", help="Endpoint to load")
+    parser.add_argument("--prompts", type=Path, default=DEFAULT_PROMPTS, help="JSONL prompt mix")
+    parser.add_argument("--users", type=int, default=10, help="Virtual users / max in flight")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after N requests")
+    parser.add_argument("--rate", type=float, default=None, help="Open loop: arrivals/second")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--upstream-url", default=None,
+        help="Stand-in upstream to include request counts from (bench.upstream)",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Write the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_load(
+        args.url,
+        read_prompts(args.prompts),
+        users=args.users,
+        duration_seconds=None if args.requests else args.duration,
+        max_requests=args.requests,
+        arrival_rate=args.rate,
+        think_seconds=args.think_ms / 1000,
+        path=args.path,
+        timeout_seconds=args.timeout,
+        seed=args.seed,
+    ))
+    summary = report.summary()
+    if args.upstream_url:
+        summary["upstream"] = httpx.get(f"{args.upstream_url}/_stats").json()
+    print_summary(summary)
+    if args.out:
+        args.out.write_text(json.dumps(summary, indent=2) + "\n")
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
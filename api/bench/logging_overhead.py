@@ -0,0 +1,172 @@
+"""Logging overhead benchmark: cost of log calls and of logging per request.
+
+Measures the time per log call for:
+
+- ``dropped_fstring``: a DEBUG call below the log level whose message is an
+  f-string serializing a model, as the hot path used to log. The string is
+  built although the record is dropped.
+- ``dropped_lazy``: the same call with lazy ``%r`` arguments.
+- ``json`` and ``text``: an INFO record with fields, written by the JSON
+  and text formatters of :mod:`app.observability.logs`.
+- ``json_sampled``: the same JSON record with a 10% sampling rate.
+
+and the time per request of the stub workflow (no LLM or TMDB calls, so
+logging is a large share of the work) with logging disabled, at INFO
+(one summary line per request) and at DEBUG (every step).
+
+Usage (from ``api/``)::
+
+    python -m bench.logging_overhead [--iterations 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from app.batch import create_stub_workflow
+from app.observability.logs import (
+    JSONFormatter,
+    SamplingFilter,
+    TextFormatter,
+    configure_logging,
+)
+from app.schemas.orchestrator import Constraints, MovieSearchQuery
+from bench.graph_overhead import SAMPLE_REQUESTS
+from bench.harness import measure
+
+CALLS_PER_SAMPLE = 100
+
+
+class _NullStream:
+    """A text stream discarding everything written to it."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _bench_logger(formatter: logging.Formatter | None, sample_rate: float = 1.0) -> logging.Logger:
+    logger = logging.getLogger(f"bench.logging.{id(formatter)}.{sample_rate}")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(_NullStream())
+    if formatter is not None:
+        handler.setFormatter(formatter)
+    if sample_rate < 1.0:
+        handler.addFilter(SamplingFilter({logger.name: sample_rate}))
+    logger.addHandler(handler)
+    return logger
+
+
+def _per_call_us(call: Callable[[], None], iterations: int) -> float:
+    def sample() -> None:
+        for _ in range(CALLS_PER_SAMPLE):
+            call()
+
+    return measure(sample, max(1, iterations // CALLS_PER_SAMPLE))["mean_us"] / CALLS_PER_SAMPLE
+
+
+def _call_costs(iterations: int) -> dict[str, float]:
+    query = MovieSearchQuery(actors=["Keanu Reeves"], keywords=["cyberpunk", "heist"])
+    constraints = Constraints(genres=["sci-fi"], max_runtime_minutes=120)
+    reply = "A stylish, twisty pick for tonight. " * 30
+    dropped = _bench_logger(None)
+    as_json = _bench_logger(JSONFormatter())
+    as_text = _bench_logger(TextFormatter())
+    sampled = _bench_logger(JSONFormatter(), sample_rate=0.1)
+
+    def summary(logger: logging.Logger) -> Callable[[], None]:
+        return lambda: logger.info(
+            "Workflow completed",
+            extra={"route": "movies", "seconds": 1.234, "tokens": 512, "reply": reply},
+        )
+
+    return {
+        "dropped_fstring": _per_call_us(
+            lambda: dropped.debug(
+                f"Finder searching with constraints: {constraints}, "
+                f"search_query: {query.model_dump_json()}"
+            ),
+            iterations,
+        ),
+        "dropped_lazy": _per_call_us(
+            lambda: dropped.debug(
+                "Finder searching with constraints: %r, search_query: %r", constraints, query
+            ),
+            iterations,
+        ),
+        "json": _per_call_us(summary(as_json), iterations),
+        "text": _per_call_us(summary(as_text), iterations),
+        "json_sampled": _per_call_us(summary(sampled), iterations),
+    }
+
+
+@contextmanager
+def _root_logging(level: int | None) -> Iterator[None]:
+    """Log to a null stream at ``level`` (``None`` disables logging)."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    root.handlers.clear()
+    if level is None:
+        logging.disable(logging.CRITICAL)
+    else:
+        configure_logging(level, "json", stream=_NullStream())
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+
+def _request_costs(iterations: int) -> dict[str, float]:
+    workflow = create_stub_workflow()
+    message = SAMPLE_REQUESTS["movies"]
+    results = {}
+    for name, level in (("off", None), ("info", logging.INFO), ("debug", logging.DEBUG)):
+        with _root_logging(level):
+            results[name] = measure(lambda: workflow.invoke(message), iterations)["mean_us"]
+    return results
+
+
+def run(iterations: int = 2000) -> dict[str, dict[str, float]]:
+    """Measure and print the cost of log calls and of logging per request.
+
+    Args:
+        iterations: Log calls per case; a tenth as many workflow requests
+            per log level.
+
+    Returns:
+        Microseconds per log call under ``call``, and per stub workflow
+        request by log level under ``request``.
+    """
+    results = {
+        "call": _call_costs(iterations),
+        "request": _request_costs(max(1, iterations // 10)),
+    }
+
+    print(f"Time per log call in µs ({iterations} calls)\n")
+    for case, us in results["call"].items():
+        print(f"{case:<16} {us:>8.2f}")
+    off = results["request"]["off"]
+    print("\nStub workflow request (movies route) in µs by log level\n")
+    for level, us in results["request"].items():
+        print(f"{level:<16} {us:>8.0f} {us - off:>+8.0f}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
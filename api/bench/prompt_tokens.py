@@ -0,0 +1,234 @@
+"""Prompt size benchmark: tokens per request before and after prompt budgets.
+
+Builds the writer, evaluator and RAG prompts for a fixed set of sample
+requests twice — with the original prompt layout (dynamic content first,
+``unknown`` placeholders, full overviews and documentation chunks) and with
+the budgeted, static-first layout from :mod:`app.llm.prompt_budget` — and
+reports the average prompt tokens per request and the prompt prefix shared
+by all requests (the part Azure OpenAI's prompt cache can reuse).
+
+Usage (from ``api/``)::
+
+    python -m bench.prompt_tokens [--tokenizer approx|tiktoken]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from app.llm.evaluator_agent import LLMEvaluatorAgent
+from app.llm.prompt_budget import TokenCounter, budget_for_agent, create_token_counter
+from app.llm.prompts import (
+    EVALUATOR_SYSTEM_PROMPT,
+    RAG_ASSISTANT_SYSTEM_PROMPT,
+    RECOMMENDATION_WRITER_SYSTEM_PROMPT,
+)
+from app.llm.rag_agent import LLMRAGAssistantAgent
+from app.llm.recommendation_agent import LLMRecommendationWriterAgent
+from app.rag.retriever import create_retriever
+from app.schemas.domain import DraftRecommendation, EvaluationResult, MovieResult
+from app.schemas.orchestrator import Constraints
+
+SAMPLE_MOVIES = [
+    MovieResult(
+        id="603",
+        title="The Matrix",
+        year=1999,
+        genres=["Action", "Science Fiction"],
+        runtime_minutes=136,
+        rating=8.2,
+        overview=(
+            "Set in the 22nd century, The Matrix tells the story of a computer "
+            "hacker who joins a group of underground insurgents fighting the "
+            "vast and powerful computers who now rule the earth. Thomas Anderson "
+            "leads a double life: by day a programmer at a respectable software "
+            "company, by night a hacker known as Neo. When the enigmatic Morpheus "
+            "offers him a choice between a red pill and a blue pill, he learns "
+            "that the world he knows is a simulation built to keep humanity "
+            "docile while machines harvest its energy."
+        ),
+    ),
+    MovieResult(
+        id="120467",
+        title="The Grand Budapest Hotel",
+        year=2014,
+        genres=["Comedy", "Drama"],
+        runtime_minutes=100,
+        rating=8.0,
+        overview=(
+            "The Grand Budapest Hotel tells of a legendary concierge at a famous "
+            "European hotel between the wars and his friendship with a young "
+            "employee who becomes his trusted protégé. The story involves the "
+            "theft and recovery of a priceless Renaissance painting, the battle "
+            "for an enormous family fortune and the slow and then sudden upheavals "
+            "that transformed Europe during the first half of the 20th century."
+        ),
+    ),
+    MovieResult(id="9999", title="Obscure Short", genres=["Animation"]),
+]
+
+SAMPLE_REQUESTS = [
+    ("Recommend a sci-fi movie under two hours", Constraints(genres=["sci-fi"], max_runtime_minutes=140)),
+    ("Something funny for tonight", Constraints(genres=["comedy"])),
+    ("Surprise me", Constraints()),
+]
+
+SAMPLE_RAG_QUERIES = [
+    "How does the evaluator decide whether a recommendation passes?",
+    "What data sources does the assistant use?",
+    "Why did my request get routed to clarification?",
+]
+
+
+class RecordingLLM:
+    """Chat model stand-in that records the messages it receives."""
+
+    def __init__(self) -> None:
+        self.calls: list[list[BaseMessage]] = []
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, messages: list[BaseMessage]):
+        self.calls.append(messages)
+        return EvaluationResult(passed=True, score=0.9, feedback="ok")
+
+
+class RecordingTextLLM(RecordingLLM):
+    def invoke(self, messages: list[BaseMessage]):
+        self.calls.append(messages)
+        return AIMessage(content="A fine pick.")
+
+
+def _legacy_movie(movie: MovieResult) -> str:
+    return "\n".join([
+        f"- title: {movie.title}",
+        f"- year: {movie.year if movie.year is not None else 'unknown'}",
+        f"- genres: {', '.join(movie.genres) if movie.genres else 'unknown'}",
+        f"- runtime: {movie.runtime_minutes} min" if movie.runtime_minutes is not None else "- runtime: unknown",
+        f"- rating: {movie.rating:.1f}/10" if movie.rating is not None else "- rating: unknown",
+        f"- overview: {movie.overview or 'not available'}",
+    ])
+
+
+def _legacy_constraints(constraints: Constraints) -> str:
+    lines: list[str] = []
+    if constraints.genres:
+        lines.append(f"- genres: {', '.join(constraints.genres)}")
+    if constraints.max_runtime_minutes:
+        lines.append(f"- max runtime: {constraints.max_runtime_minutes} min")
+    if constraints.min_runtime_minutes:
+        lines.append(f"- min runtime: {constraints.min_runtime_minutes} min")
+    return "\n".join(lines) if lines else "- (none detected)"
+
+
+def legacy_writer_prompt(message: str, constraints: Constraints, movie: MovieResult) -> str:
+    return (
+        f"User request: {message}\n\n"
+        f"User constraints:\n{_legacy_constraints(constraints)}\n\n"
+        f"Selected movie (you MUST only talk about this movie):\n{_legacy_movie(movie)}\n\n"
+        "Rejected titles (never mention):\n(none)\n\n"
+        "Write the recommendation text now."
+    )
+
+
+def legacy_evaluator_prompt(
+    message: str, constraints: Constraints, draft: DraftRecommendation
+) -> str:
+    return (
+        f"User request: {message}\n\n"
+        f"User constraints:\n{_legacy_constraints(constraints)}\n\n"
+        f"Selected movie (the only movie to judge):\n{_legacy_movie(draft.movie)}\n\n"
+        "Rejected titles (must not be picked):\n(none)\n\n"
+        f'Recommendation text produced by the writer:\n"""\n{draft.recommendation_text}\n"""\n\n'
+        "Evaluate the draft now and return the structured JSON verdict."
+    )
+
+
+def legacy_rag_prompt(query: str, contexts) -> str:
+    parts = [
+        f"[Context {i}] Source: {c.metadata.get('source_file', 'unknown')} | "
+        f"Title: {c.metadata.get('title', 'Unknown')} | Relevance: {(c.relevance_score or 0.0):.2f}\n"
+        f"{c.content}"
+        for i, c in enumerate(contexts, 1)
+    ]
+    context_text = "\n\n---\n\n".join(parts) if parts else "No relevant documentation found."
+    return (
+        f"## User Question\n{query}\n\n## Retrieved Documentation\n{context_text}\n\n"
+        "## Instructions\nAnswer the user's question based on the retrieved documentation above.\n"
+        "If the documentation doesn't contain relevant information, say so honestly.\n"
+        "Do not make up information that isn't in the documentation."
+    )
+
+
+def _common_prefix(prompts: list[str]) -> str:
+    return os.path.commonprefix(prompts) if prompts else ""
+
+
+def _report(name: str, before: list[str], after: list[str], count: TokenCounter) -> None:
+    avg_before = sum(count(p) for p in before) / len(before)
+    avg_after = sum(count(p) for p in after) / len(after)
+    saved = 100.0 * (avg_before - avg_after) / avg_before if avg_before else 0.0
+    print(
+        f"{name:<10} {avg_before:>10.0f} {avg_after:>10.0f} {saved:>8.1f}% "
+        f"{count(_common_prefix(before)):>14} {count(_common_prefix(after)):>14}"
+    )
+
+
+def run(tokenizer: str = "approx") -> None:
+    """Print the before/after prompt token report."""
+    count = create_token_counter(tokenizer)
+
+    writer_llm = RecordingTextLLM()
+    writer = LLMRecommendationWriterAgent(writer_llm, budget_for_agent("writer", tokenizer=tokenizer))
+    evaluator_llm = RecordingLLM()
+    evaluator = LLMEvaluatorAgent(evaluator_llm, budget_for_agent("evaluator", tokenizer=tokenizer))
+
+    writer_before, evaluator_before = [], []
+    for message, constraints in SAMPLE_REQUESTS:
+        for movie in SAMPLE_MOVIES:
+            draft = DraftRecommendation(
+                movie=movie,
+                recommendation_text=f"{movie.title} is a great fit for tonight.",
+                reasoning="sample",
+            )
+            writer._write_text(message, constraints, movie, None)
+            evaluator._call_llm(message, constraints, draft, None)
+            writer_before.append(
+                RECOMMENDATION_WRITER_SYSTEM_PROMPT + legacy_writer_prompt(message, constraints, movie)
+            )
+            evaluator_before.append(
+                EVALUATOR_SYSTEM_PROMPT + legacy_evaluator_prompt(message, constraints, draft)
+            )
+
+    retriever = create_retriever()
+    rag_llm = RecordingTextLLM()
+    rag = LLMRAGAssistantAgent(rag_llm, budget_for_agent("rag", tokenizer=tokenizer))
+    rag_before = []
+    for query in SAMPLE_RAG_QUERIES:
+        contexts = retriever.retrieve(query)
+        rag.answer(query, contexts)
+        rag_before.append(RAG_ASSISTANT_SYSTEM_PROMPT + legacy_rag_prompt(query, contexts))
+
+    def rendered(llm: RecordingLLM) -> list[str]:
+        return ["".join(str(m.content) for m in call) for call in llm.calls]
+
+    print(f"Prompt tokens per request ({tokenizer} tokenizer, system + user prompt)\n")
+    print(f"{'agent':<10} {'before':>10} {'after':>10} {'saved':>9} {'prefix before':>14} {'prefix after':>14}")
+    _report("writer", writer_before, rendered(writer_llm), count)
+    _report("evaluator", evaluator_before, rendered(evaluator_llm), count)
+    _report("rag", rag_before, rendered(rag_llm), count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokenizer", default="approx", choices=["approx", "tiktoken"])
+    args = parser.parse_args()
+    run(args.tokenizer)
+
+
+if __name__ == "__main__":
+    main()
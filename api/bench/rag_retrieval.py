@@ -0,0 +1,93 @@
+"""RAG retrieval benchmark: index build and query time by corpus size.
+
+Builds a :class:`DocumentRetriever` over synthetic corpora of 10, 1,000
+and 100,000 chunks (about 60 words each, drawn from the knowledge base's
+vocabulary) and reports the time to build the TF-IDF index and the time
+per query for a fixed set of questions.
+
+Usage (from ``api/``)::
+
+    python -m bench.rag_retrieval [--sizes 10 1000 100000] [--iterations 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+
+from app.rag.ingest import KnowledgeDocument
+from app.rag.retriever import DocumentRetriever
+from bench.corpus import synthetic_chunks
+from bench.harness import measure
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+QUERIES = (
+    "How does the app rank movies?",
+    "What happens when the evaluator rejects a recommendation?",
+    "Which data sources are used for movie information?",
+    "How are runtime constraints applied?",
+    "What are the known limitations of the assistant?",
+)
+
+
+class _CorpusIngester:
+    """Stands in for :class:`DocumentIngester` with prepared chunks."""
+
+    def __init__(self, chunks: list[KnowledgeDocument]) -> None:
+        self._chunks = chunks
+
+    def load_documents(self) -> list[KnowledgeDocument]:
+        return self._chunks
+
+
+def run(
+    sizes: tuple[int, ...] = DEFAULT_SIZES, iterations: int = 50
+) -> dict[str, dict[str, float]]:
+    """Measure and print index build and query time per corpus size.
+
+    Args:
+        sizes: Corpus sizes in chunks.
+        iterations: Timed queries for corpora of up to 1,000 chunks. Larger
+            corpora run proportionally fewer, but each question at least once.
+
+    Returns:
+        Microseconds to build the index (``build_us``) and mean and p95
+        microseconds per query, keyed by corpus size.
+    """
+    results = {}
+    for size in sizes:
+        retriever = DocumentRetriever(ingester=_CorpusIngester(synthetic_chunks(size)))
+        started = time.perf_counter()
+        retriever.initialize()
+        build_us = (time.perf_counter() - started) * 1_000_000
+
+        questions = itertools.cycle(QUERIES)
+        count = max(len(QUERIES), min(iterations, iterations * 1_000 // size))
+        timings = measure(lambda: retriever.retrieve(next(questions)), iterations=count)
+        results[str(size)] = {
+            "build_us": build_us,
+            "query_mean_us": timings["mean_us"],
+            "query_p95_us": timings["p95_us"],
+        }
+
+    print("RAG retrieval over synthetic corpora (TF-IDF, top_k=3)\n")
+    print(f"{'chunks':>8} {'build ms':>10} {'query ms':>10} {'query p95 ms':>13}")
+    for size, times in results.items():
+        print(
+            f"{size:>8} {times['build_us'] / 1000:>10.1f} "
+            f"{times['query_mean_us'] / 1000:>10.2f} {times['query_p95_us'] / 1000:>13.2f}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    run(tuple(args.sizes), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Record workflow traces to a cassette and replay them offline.
+
+``record`` runs a prompt mix through the workflow built by
+:func:`app.factory.create_workflow` with ``CASSETTE_MODE=record``, saving
+every LLM completion and TMDB response together with the time it took
+(see :mod:`app.cassettes`). By default the calls go to the stand-in of
+:mod:`bench.upstream`, served in-process with the given latencies; with
+``--env`` they go to the services configured in the environment, which
+captures real upstream behavior.
+
+``replay`` runs the same prompts with ``CASSETTE_MODE=replay``. No request
+leaves the process: every response is the recorded one, delivered after
+the recorded time scaled by ``--time-scale`` (1: recorded speed, 0: no
+waiting). Replies are identical from run to run, so a recorded trace is
+both a regression test and a benchmark of the application's own work
+under realistic upstream timings. Replay a cassette with the settings it
+was recorded with (``--env`` if it was recorded with ``--env``): model
+deployments and prompts are part of each recorded request.
+
+Usage (from ``api/``)::
+
+    python -m bench.replay record [--cassette PATH] [--prompts FILE] [--env] \\
+        [--llm-latency-ms 800] [--tmdb-latency-ms 60]
+    python -m bench.replay replay [--cassette PATH] [--prompts FILE] \\
+        [--time-scale 1] [--iterations 1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.batch import BatchPrompt, read_prompts
+from app.factory import cleanup_tmdb_client, create_workflow
+from app.llm.workflow import MovieNightWorkflow
+from app.settings import Settings, get_settings
+
+DEFAULT_PROMPTS = Path(__file__).parent / "fixtures" / "prompt_mix.jsonl"
+DEFAULT_CASSETTE = Path("cassettes") / "prompt_mix.jsonl.gz"
+# Endpoint of the offline settings when replaying: never contacted.
+OFFLINE_ENDPOINT = "http://upstream.invalid"
+
+
+@dataclass
+class TraceResult:
+    """Outcome of one prompt.
+
+    Attributes:
+        prompt_id: ID of the prompt.
+        route: Route the workflow took.
+        reply: Final response text.
+        seconds: Time the workflow took.
+        llm_calls: LLM calls the request made.
+        tmdb_requests: TMDB requests the request made.
+    """
+
+    prompt_id: str
+    route: str | None
+    reply: str
+    seconds: float
+    llm_calls: int
+    tmdb_requests: int
+
+
+def offline_settings(upstream_url: str = OFFLINE_ENDPOINT, **overrides: Any) -> Settings:
+    """Settings for the stand-in upstream, independent of the environment's ``.env``.
+
+    Args:
+        upstream_url: Base URL of the stand-in (see
+            :func:`bench.upstream.serve_upstream`).
+        **overrides: Further settings.
+    """
+    values: dict[str, Any] = {
+        "azure_openai_endpoint": upstream_url,
+        "azure_openai_api_key": "bench",
+        "azure_openai_api_version": "2024-10-21",
+        "azure_openai_deployment": "gpt-4o-mini",
+        "llm_max_retries": 0,
+        "tmdb_api_key": "bench",
+        "movie_finder_mode": "tmdb",
+        "tmdb_base_url": f"{upstream_url}/3",
+        "workflow_checkpointer": "none",
+        **overrides,
+    }
+    return Settings(_env_file=None, **values)
+
+
+def with_cassette(
+    settings: Settings, cassette: Path, mode: str, time_scale: float = 1.0
+) -> Settings:
+    """Copy of ``settings`` recording to or replaying from ``cassette``."""
+    return settings.model_copy(update={
+        "cassette_mode": mode,
+        "cassette_path": str(cassette),
+        "cassette_time_scale": time_scale,
+    })
+
+
+@contextmanager
+def cassette_workflow(settings: Settings) -> Iterator[MovieNightWorkflow]:
+    """The production workflow for ``settings``, closing its TMDB client after use."""
+    try:
+        yield create_workflow(settings)
+    finally:
+        cleanup_tmdb_client()
+
+
+def run_prompts(
+    workflow: MovieNightWorkflow, prompts: list[BatchPrompt]
+) -> list[TraceResult]:
+    """Run each prompt through the workflow, one after the other."""
+    results = []
+    for prompt in prompts:
+        started = time.perf_counter()
+        state = workflow.invoke(prompt.message)
+        seconds = time.perf_counter() - started
+        timings = state["timings"]
+        results.append(TraceResult(
+            prompt_id=prompt.id,
+            route=state.get("route"),
+            reply=state.get("final_response") or "",
+            seconds=seconds,
+            llm_calls=len(timings["llm_calls"]),
+            tmdb_requests=timings["tmdb"]["requests"],
+        ))
+    return results
+
+
+def record(
+    cassette: Path,
+    prompts: list[BatchPrompt],
+    settings: Settings | None = None,
+    llm_latency_ms: float = 800.0,
+    tmdb_latency_ms: float = 60.0,
+) -> list[TraceResult]:
+    """Record the prompts' LLM and TMDB calls to a new cassette.
+
+    Args:
+        cassette: Cassette file to write.
+        prompts: Prompts to run.
+        settings: Settings of the services to call; by default the
+            stand-in upstream is started with the given latencies.
+        llm_latency_ms: Median stand-in LLM latency.
+        tmdb_latency_ms: Median stand-in TMDB latency.
+
+    Returns:
+        One result per prompt.
+    """
+    if settings is not None:
+        with cassette_workflow(with_cassette(settings, cassette, "record")) as workflow:
+            return run_prompts(workflow, prompts)
+
+    from bench.upstream import (
+        LatencyDistribution,
+        UpstreamBehavior,
+        create_upstream_app,
+        serve_upstream,
+    )
+
+    upstream = create_upstream_app(
+        llm=UpstreamBehavior(
+            latency=LatencyDistribution(llm_latency_ms / 1000, 0.4),
+            seconds_per_token=0.01 if llm_latency_ms else 0.0,
+        ),
+        tmdb=UpstreamBehavior(latency=LatencyDistribution(tmdb_latency_ms / 1000, 0.4)),
+    )
+    with serve_upstream(upstream) as url:
+        settings = with_cassette(offline_settings(url), cassette, "record")
+        with cassette_workflow(settings) as workflow:
+            return run_prompts(workflow, prompts)
+
+
+def replay(
+    cassette: Path,
+    prompts: list[BatchPrompt],
+    settings: Settings | None = None,
+    time_scale: float = 1.0,
+    iterations: int = 1,
+) -> list[list[TraceResult]]:
+    """Replay the prompts from a cassette, without network.
+
+    Args:
+        cassette: Recorded cassette.
+        prompts: The prompts the cassette was recorded with.
+        settings: The settings it was recorded with (default: the
+            stand-in's).
+        time_scale: Factor applied to recorded call times.
+        iterations: Times to run the prompt mix.
+
+    Returns:
+        The results of each iteration.
+
+    Raises:
+        CassetteMissError: If a request was not recorded, e.g. because a
+            prompt template changed since the recording.
+    """
+    settings = with_cassette(settings or offline_settings(), cassette, "replay", time_scale)
+    with cassette_workflow(settings) as workflow:
+        return [run_prompts(workflow, prompts) for _ in range(iterations)]
+
+
+def print_results(title: str, runs: list[list[TraceResult]]) -> None:
+    """Print the mean time, route and calls per prompt."""
+    print(title + "\n")
+    print(f"{'prompt':<16} {'route':<8} {'mean ms':>9} {'LLM calls':>10} {'TMDB calls':>11}")
+    for results in zip(*runs):
+        first = results[0]
+        mean_ms = statistics.fmean(r.seconds for r in results) * 1000
+        print(
+            f"{first.prompt_id:<16} {first.route or '-':<8} {mean_ms:>9.1f} "
+            f"{first.llm_calls:>10} {first.tmdb_requests:>11}"
+        )
+    total_ms = statistics.fmean(sum(r.seconds for r in run) for run in runs) * 1000
+    print(f"\n{'total':<16} {'':<8} {total_ms:>9.1f}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("record", "replay"))
+    parser.add_argument("--cassette", type=Path, default=DEFAULT_CASSETTE)
+    parser.add_argument("--prompts", type=Path, default=DEFAULT_PROMPTS)
+    parser.add_argument(
+        "--env", action="store_true",
+        help="Use the settings from the environment instead of the stand-in upstream",
+    )
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--tmdb-latency-ms", type=float, default=60.0)
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0,
+        help="Factor applied to recorded call times when replaying (0: no waiting)",
+    )
+    parser.add_argument("--iterations", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    prompts = read_prompts(args.prompts)
+    settings = get_settings() if args.env else None
+    if args.command == "record":
+        results = record(
+            args.cassette, prompts, settings,
+            llm_latency_ms=args.llm_latency_ms, tmdb_latency_ms=args.tmdb_latency_ms,
+        )
+        print_results(f"Recorded {len(prompts)} prompts to {args.cassette}", [results])
+    else:
+        runs = replay(args.cassette, prompts, settings, args.time_scale, args.iterations)
+        print_results(
+            f"Replayed {len(prompts)} prompts from {args.cassette} "
+            f"(time scale {args.time_scale:g}, {args.iterations} iterations)",
+            runs,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Quality-versus-latency evaluation of the evaluator's retry loop.
+
+Replays the labeled prompts in ``bench/fixtures/eval_prompts.jsonl``
+through the production workflow on the fakes (see
+:func:`bench.fakes.fixture_workflow`) once per retry configuration, i.e.
+per combination of the retry limit (``MAX_RETRIES``) and the evaluator's
+pass threshold (``PASS_THRESHOLD``), and reports for each:
+
+- ``quality``: mean labeled relevance of the movie the user got, 0 when
+  the retries ran out and the safe fallback was returned
+- ``accepted_quality``: mean relevance of the drafts that passed, which a
+  stricter threshold raises at the cost of more fallbacks
+- ``pass_rate`` and ``fallback_rate``: share of requests ending with a
+  passing draft or with the fallback
+- ``mean_score``: mean evaluator score over every judged draft
+- ``retries`` and ``llm_calls``: mean per request
+- ``latency_ms`` and ``p95_latency_ms``: time per request
+
+Each prompt is labeled with the relevance (0 to 1) of the movies the
+writer may pick. The evaluator model is replaced by :class:`LabeledJudge`,
+which scores a draft with its labeled relevance plus seeded noise, the way
+an LLM judge is mostly but not always right. The noise depends only on the
+seed, the prompt and the movie, so every configuration sees the same
+verdicts and differences between configurations come from the retry
+settings alone.
+
+Configurations that no other one beats on both quality and cost (latency,
+or LLM calls with ``--cost llm_calls``) form the Pareto front, marked
+``*`` in the report: the candidates worth choosing between.
+
+Usage (from ``api/``)::
+
+    python -m bench.retry_eval [--max-retries 1 2 3] [--thresholds 0.5 0.7 0.85]
+        [--repeats 3] [--noise 0.1] [--llm-latency-ms 20] [--cost latency_ms]
+        [--out results.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+from app.schemas.domain import EvaluationResult
+from bench.fakes import fake_structured_response, fixture_workflow
+from bench.harness import percentile
+
+EVAL_PROMPTS = Path(__file__).parent / "fixtures" / "eval_prompts.jsonl"
+DEFAULT_MAX_RETRIES = (1, 2, 3)
+DEFAULT_THRESHOLDS = (0.5, 0.7, 0.85)
+DEFAULT_NOISE = 0.1
+# Score below which the judge itself says the draft fails, whatever the
+# workflow's threshold.
+JUDGE_PASS_SCORE = 0.5
+COSTS = ("latency_ms", "llm_calls")
+
+
+@dataclass(frozen=True)
+class EvalCase:
+    """A prompt with the relevance of the movies that may be recommended.
+
+    Attributes:
+        id: Short name of the case.
+        message: The user message.
+        relevance: Relevance from 0 to 1 by movie title; unlisted movies
+            are irrelevant.
+    """
+
+    id: str
+    message: str
+    relevance: dict[str, float] = field(default_factory=dict)
+
+    def quality(self, title: str | None) -> float:
+        """Relevance of a recommended movie, 0 for no recommendation."""
+        return self.relevance.get(title, 0.0) if title is not None else 0.0
+
+
+def load_eval_cases(path: Path = EVAL_PROMPTS) -> list[EvalCase]:
+    """Read labeled prompts, one JSON object per line."""
+    cases = []
+    for line in path.read_text().splitlines():
+        if line.strip():
+            data = json.loads(line)
+            cases.append(EvalCase(data["id"], data["message"], data.get("relevance", {})))
+    return cases
+
+
+@dataclass(frozen=True)
+class RetryConfig:
+    """Settings of the evaluator's retry loop."""
+
+    max_retries: int
+    pass_threshold: float
+
+    @property
+    def name(self) -> str:
+        return f"retries={self.max_retries} threshold={self.pass_threshold:g}"
+
+
+def config_grid(
+    max_retries: Sequence[int] = DEFAULT_MAX_RETRIES,
+    thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+) -> list[RetryConfig]:
+    """Every combination of retry limit and pass threshold."""
+    return [RetryConfig(m, t) for m, t in itertools.product(max_retries, thresholds)]
+
+
+def _prompt_field(prompt: str, prefix: str) -> str:
+    for line in prompt.splitlines():
+        if line.startswith(prefix):
+            return line[len(prefix):].strip()
+    return ""
+
+
+class LabeledJudge:
+    """Evaluator model stand-in scoring drafts by their labeled relevance.
+
+    Reads the user request and the selected movie from the evaluator's
+    prompt and answers with the labeled relevance plus Gaussian noise,
+    clamped to [0, 1]. Other structured outputs are left to
+    :func:`bench.fakes.fake_structured_response`.
+
+    Args:
+        cases: The labeled prompts.
+        noise: Standard deviation of the noise added to the relevance.
+        seed: Noise seed; set :attr:`seed` to replay the prompts with other
+            verdicts.
+
+    Attributes:
+        scores: Every score given, in order.
+    """
+
+    def __init__(self, cases: Sequence[EvalCase], noise: float = DEFAULT_NOISE, seed: int = 0):
+        self._cases = {case.message: case for case in cases}
+        self.noise = noise
+        self.seed = seed
+        self.scores: list[float] = []
+
+    def __call__(self, schema: type[BaseModel], messages: Sequence[BaseMessage]) -> BaseModel:
+        if schema is not EvaluationResult:
+            return fake_structured_response(schema, messages)
+        prompt = str(messages[-1].content)
+        message = _prompt_field(prompt, "User request:")
+        title = _prompt_field(prompt, "- title:")
+        case = self._cases.get(message)
+        relevance = case.quality(title) if case is not None else 0.0
+        rng = random.Random(f"{self.seed}:{message}:{title}")
+        score = round(min(1.0, max(0.0, relevance + rng.gauss(0.0, self.noise))), 3)
+        self.scores.append(score)
+        return EvaluationResult(
+            passed=score >= JUDGE_PASS_SCORE,
+            score=score,
+            feedback="Fits the request." if score >= JUDGE_PASS_SCORE else "Weak fit.",
+        )
+
+
+@dataclass
+class RequestOutcome:
+    """What one replayed request produced."""
+
+    case_id: str
+    quality: float
+    passed: bool
+    fallback: bool
+    retries: int
+    llm_calls: int
+    seconds: float
+    scores: list[float]
+
+
+def evaluate_config(
+    config: RetryConfig,
+    cases: Sequence[EvalCase],
+    repeats: int = 3,
+    noise: float = DEFAULT_NOISE,
+    llm_latency_ms: float = 0.0,
+) -> list[RequestOutcome]:
+    """Replay the labeled prompts through a workflow with one retry configuration.
+
+    Args:
+        config: The retry settings.
+        cases: The labeled prompts.
+        repeats: Times each prompt is replayed, with judge seeds 0 to
+            ``repeats - 1``.
+        noise: Standard deviation of the judge's noise.
+        llm_latency_ms: Latency of every LLM completion.
+
+    Returns:
+        One outcome per request.
+    """
+    judge = LabeledJudge(cases, noise)
+    outcomes = []
+    with fixture_workflow(
+        llm_latency_ms / 1000,
+        evaluator_responder=judge,
+        max_retries=config.max_retries,
+        pass_threshold=config.pass_threshold,
+    ) as workflow:
+        for seed in range(repeats):
+            judge.seed = seed
+            for case in cases:
+                judge.scores = []
+                started = time.perf_counter()
+                result = workflow.invoke(case.message)
+                seconds = time.perf_counter() - started
+
+                draft = result.get("draft_recommendation")
+                retries = result.get("retry_count", 0) or 0
+                outcomes.append(
+                    RequestOutcome(
+                        case_id=case.id,
+                        quality=case.quality(draft.movie.title if draft else None),
+                        passed=draft is not None,
+                        fallback=(
+                            draft is None
+                            and result.get("evaluation_result") is not None
+                            and retries >= config.max_retries
+                        ),
+                        retries=retries,
+                        llm_calls=len(result["timings"]["llm_calls"]),
+                        seconds=seconds,
+                        scores=judge.scores,
+                    )
+                )
+    return outcomes
+
+
+def summarize(config: RetryConfig, outcomes: Sequence[RequestOutcome]) -> dict[str, Any]:
+    """Aggregate the outcomes of one configuration into a report row."""
+    latencies = [outcome.seconds * 1000 for outcome in outcomes]
+    scores = [score for outcome in outcomes for score in outcome.scores]
+    accepted = [outcome.quality for outcome in outcomes if outcome.passed]
+    return {
+        "config": config.name,
+        "max_retries": config.max_retries,
+        "pass_threshold": config.pass_threshold,
+        "requests": len(outcomes),
+        "quality": statistics.fmean(o.quality for o in outcomes),
+        "accepted_quality": statistics.fmean(accepted) if accepted else 0.0,
+        "pass_rate": statistics.fmean(o.passed for o in outcomes),
+        "fallback_rate": statistics.fmean(o.fallback for o in outcomes),
+        "mean_score": statistics.fmean(scores) if scores else 0.0,
+        "retries": statistics.fmean(o.retries for o in outcomes),
+        "llm_calls": statistics.fmean(o.llm_calls for o in outcomes),
+        "latency_ms": statistics.fmean(latencies),
+        "p95_latency_ms": percentile(latencies, 0.95),
+    }
+
+
+def mark_pareto_front(rows: list[dict[str, Any]], cost: str = "latency_ms") -> list[dict[str, Any]]:
+    """Flag the rows no other row beats on both quality and cost.
+
+    A row is dominated when another one has at least its quality at no
+    more cost, and is strictly better on one of the two. Sets ``pareto``
+    on every row.
+
+    Args:
+        rows: Report rows as returned by :func:`summarize`.
+        cost: The row key to minimize, e.g. ``latency_ms`` or ``llm_calls``.
+
+    Returns:
+        The same rows.
+    """
+    for row in rows:
+        row["pareto"] = not any(
+            other["quality"] >= row["quality"]
+            and other[cost] <= row[cost]
+            and (other["quality"] > row["quality"] or other[cost] < row[cost])
+            for other in rows
+        )
+    return rows
+
+
+def print_report(rows: Sequence[dict[str, Any]], cost: str) -> None:
+    print(
+        f"{'':1} {'config':<26} {'quality':>8} {'accepted':>9} {'pass':>6} {'fallbk':>7} {'score':>6} "
+        f"{'retries':>8} {'LLM calls':>10} {'mean ms':>8} {'p95 ms':>8}"
+    )
+    for row in sorted(rows, key=lambda r: r[cost]):
+        print(
+            f"{'*' if row['pareto'] else ' '} {row['config']:<26} {row['quality']:>8.3f} "
+            f"{row['accepted_quality']:>9.3f} {row['pass_rate']:>6.0%} {row['fallback_rate']:>7.0%} {row['mean_score']:>6.2f} "
+            f"{row['retries']:>8.2f} {row['llm_calls']:>10.2f} "
+            f"{row['latency_ms']:>8.1f} {row['p95_latency_ms']:>8.1f}"
+        )
+    print(f"\n* Pareto front on quality and {cost}")
+
+
+def run(
+    configs: Sequence[RetryConfig] | None = None,
+    repeats: int = 3,
+    noise: float = DEFAULT_NOISE,
+    llm_latency_ms: float = 0.0,
+    cost: str = "latency_ms",
+    cases_path: Path = EVAL_PROMPTS,
+) -> list[dict[str, Any]]:
+    """Evaluate retry configurations and print the Pareto report.
+
+    Args:
+        configs: Configurations to compare (default: :func:`config_grid`).
+        repeats: Times each prompt is replayed per configuration.
+        noise: Standard deviation of the judge's noise.
+        llm_latency_ms: Latency of every LLM completion.
+        cost: Cost the Pareto front is computed on, one of :data:`COSTS`.
+        cases_path: The labeled prompts.
+
+    Returns:
+        One report row per configuration, see :func:`summarize`, with the
+        ``pareto`` flag set.
+    """
+    if cost not in COSTS:
+        raise ValueError(f"Unknown cost '{cost}' (expected one of {', '.join(COSTS)})")
+    cases = load_eval_cases(cases_path)
+    rows = [
+        summarize(config, evaluate_config(config, cases, repeats, noise, llm_latency_ms))
+        for config in (configs if configs is not None else config_grid())
+    ]
+    mark_pareto_front(rows, cost)
+
+    print(
+        f"Retry loop quality vs {cost} ({len(cases)} prompts x {repeats} repeats, "
+        f"judge noise {noise:g}, LLM latency {llm_latency_ms:g} ms)\n"
+    )
+    print_report(rows, cost)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-retries", type=int, nargs="+", default=list(DEFAULT_MAX_RETRIES))
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--noise", type=float, default=DEFAULT_NOISE)
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--cost", choices=COSTS, default="latency_ms")
+    parser.add_argument("--prompts", type=Path, default=EVAL_PROMPTS)
+    parser.add_argument("--out", type=Path, help="Also write the report rows as JSON")
+    args = parser.parse_args()
+    rows = run(
+        config_grid(args.max_retries, args.thresholds),
+        repeats=args.repeats,
+        noise=args.noise,
+        llm_latency_ms=args.llm_latency_ms,
+        cost=args.cost,
+        cases_path=args.prompts,
+    )
+    if args.out is not None:
+        args.out.write_text(json.dumps(rows, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""Local stand-in for Azure OpenAI and TMDB, for load tests.
+
+Serves the subset of both APIs the app uses, so the real server can be
+load tested end to end without spending quota:
+
+- ``POST /openai/deployments/{deployment}/chat/completions``: Azure OpenAI
+  chat completions, plain or streamed (SSE), with structured output both
+  as ``response_format`` JSON schema (LangChain's default for
+  ``with_structured_output``) and as a forced tool call. Structured answers
+  come from :func:`bench.fakes.fake_structured_response`; text answers are
+  a fixed reply.
+- ``GET /3/...``: TMDB, replaying ``bench/fixtures/tmdb.json``.
+- ``GET /_stats``: requests served per service and outcome.
+
+Each service has its own :class:`UpstreamBehavior`: a log-normal latency
+distribution (plus time per completion token for the LLM), a rate of
+injected 500 errors and an optional request rate above which requests are
+answered with 429 and ``Retry-After``, as the real APIs do.
+
+Usage (from ``api/``)::
+
+    python -m bench.upstream [--port 8090] [--llm-latency-ms 800] \\
+        [--llm-latency-sigma 0.5] [--llm-ms-per-token 10] [--llm-error-rate 0.01] \\
+        [--llm-rpm 600] [--tmdb-latency-ms 60] [--tmdb-rps 40]
+
+and start the API against it with ``AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8090``,
+``TMDB_BASE_URL=http://127.0.0.1:8090/3`` and any ``TMDB_API_KEY``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import HumanMessage
+
+from app.resilience import RateLimiter
+from bench.fakes import (
+    FAKE_REPLY,
+    STRUCTURED_SCHEMAS,
+    fake_structured_response,
+    load_tmdb_fixtures,
+    tmdb_fixture_response,
+)
+
+AZURE_SERVER_ERROR = {
+    "error": {
+        "code": "InternalServerError",
+        "message": "The server had an error while processing your request.",
+    }
+}
+TMDB_SERVER_ERROR = {
+    "success": False,
+    "status_code": 11,
+    "status_message": "Internal error: Something went wrong, contact TMDB.",
+}
+
+
+@dataclass
+class LatencyDistribution:
+    """Log-normal latency around a median; a ``sigma`` of 0 makes it fixed."""
+
+    median_seconds: float = 0.0
+    sigma: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_seconds <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median_seconds
+        return rng.lognormvariate(math.log(self.median_seconds), self.sigma)
+
+
+@dataclass
+class UpstreamBehavior:
+    """How a simulated upstream responds.
+
+    Attributes:
+        latency: Time to the first byte of each response.
+        seconds_per_token: Added time per completion token (LLM only).
+        error_rate: Fraction of requests answered with a 500.
+        requests_per_second: Sustained request rate above which requests
+            are rejected with 429; ``None`` for no limit.
+    """
+
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    seconds_per_token: float = 0.0
+    error_rate: float = 0.0
+    requests_per_second: float | None = None
+
+    def limiter(self) -> RateLimiter | None:
+        if not self.requests_per_second:
+            return None
+        return RateLimiter(
+            self.requests_per_second, burst=max(1, int(self.requests_per_second))
+        )
+
+
+def _approximate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _text(content: Any) -> str:
+    """Text of a chat message's content (a string or a list of parts)."""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _requested_schema(body: dict[str, Any]) -> tuple[str | None, str | None]:
+    """Schema name and tool name of a structured-output request, if any."""
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return response_format["json_schema"]["name"], None
+    tools = body.get("tools") or []
+    if tools:
+        choice = body.get("tool_choice")
+        name = tools[0]["function"]["name"]
+        if isinstance(choice, dict):
+            name = choice["function"]["name"]
+        return name, name
+    return None, None
+
+
+def chat_completion_message(body: dict[str, Any]) -> dict[str, Any]:
+    """Build the assistant message answering a chat-completions request.
+
+    Args:
+        body: The request body.
+
+    Returns:
+        An assistant message: JSON content for a ``response_format``
+        schema, a tool call for a forced tool, otherwise the fixed reply.
+    """
+    schema_name, tool_name = _requested_schema(body)
+    if schema_name is None:
+        return {"role": "assistant", "content": FAKE_REPLY}
+
+    user_messages = [m for m in body.get("messages", []) if m.get("role") == "user"]
+    last = _text(user_messages[-1]["content"]) if user_messages else ""
+    schema = STRUCTURED_SCHEMAS[schema_name]
+    arguments = fake_structured_response(schema, [HumanMessage(content=last)]).model_dump_json()
+    if tool_name is None:
+        return {"role": "assistant", "content": arguments}
+    return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": tool_name, "arguments": arguments},
+        }],
+    }
+
+
+def create_upstream_app(
+    llm: UpstreamBehavior | None = None,
+    tmdb: UpstreamBehavior | None = None,
+    seed: int = 0,
+    model: str = "gpt-4o-mini",
+) -> FastAPI:
+    """Create the stand-in server.
+
+    Args:
+        llm: Behavior of the Azure OpenAI endpoints.
+        tmdb: Behavior of the TMDB endpoints.
+        seed: Seed for latency samples and error injection.
+        model: Model name reported in completions.
+
+    Returns:
+        The ASGI application.
+    """
+    llm = llm or UpstreamBehavior()
+    tmdb = tmdb or UpstreamBehavior()
+    rng = random.Random(seed)
+    limiters = {"llm": llm.limiter(), "tmdb": tmdb.limiter()}
+    fixtures = load_tmdb_fixtures()
+    stats: Counter[str] = Counter()
+    app = FastAPI(title="Movie Night upstream stand-in")
+
+    def reject(service: str, behavior: UpstreamBehavior) -> JSONResponse | None:
+        """The 429 or injected 500 a request gets, if any."""
+        limiter = limiters[service]
+        if limiter is not None and not limiter.try_acquire():
+            stats[f"{service}.rate_limited"] += 1
+            retry_after = max(1, math.ceil(1 / limiter.rate))
+            if service == "llm":
+                body = {"error": {
+                    "code": "429",
+                    "message": (
+                        "Requests to the ChatCompletions_Create Operation have exceeded "
+                        f"call rate limit. Please retry after {retry_after} seconds."
+                    ),
+                }}
+            else:
+                body = {
+                    "success": False,
+                    "status_code": 25,
+                    "status_message": "Your request count is over the allowed limit.",
+                }
+            return JSONResponse(body, 429, headers={"Retry-After": str(retry_after)})
+        if rng.random() < behavior.error_rate:
+            stats[f"{service}.error"] += 1
+            body = AZURE_SERVER_ERROR if service == "llm" else TMDB_SERVER_ERROR
+            return JSONResponse(body, 500)
+        return None
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request) -> Any:
+        body = await request.json()
+        if (rejection := reject("llm", llm)) is not None:
+            return rejection
+        stats["llm.ok"] += 1
+
+        message = chat_completion_message(body)
+        output = message["content"] or message["tool_calls"][0]["function"]["arguments"]
+        prompt_tokens = sum(_approximate_tokens(_text(m.get("content"))) for m in body["messages"])
+        completion_tokens = _approximate_tokens(output)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        finish_reason = "tool_calls" if "tool_calls" in message else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        first_byte = llm.latency.sample(rng)
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(
+                _stream_completion(
+                    completion_id, created, model, message, finish_reason,
+                    usage if include_usage else None, first_byte, llm.seconds_per_token,
+                ),
+                media_type="text/event-stream",
+            )
+
+        await asyncio.sleep(first_byte + llm.seconds_per_token * completion_tokens)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+
+    @app.get("/3/{path:path}")
+    async def tmdb_get(path: str) -> JSONResponse:
+        if (rejection := reject("tmdb", tmdb)) is not None:
+            return rejection
+        stats["tmdb.ok"] += 1
+        await asyncio.sleep(tmdb.latency.sample(rng))
+        status, data = tmdb_fixture_response(fixtures, f"/{path}")
+        return JSONResponse(data, status)
+
+    @app.get("/_stats")
+    async def upstream_stats() -> dict[str, int]:
+        return dict(stats)
+
+    return app
+
+
+async def _stream_completion(
+    completion_id: str,
+    created: int,
+    model: str,
+    message: dict[str, Any],
+    finish_reason: str,
+    usage: dict[str, int] | None,
+    first_byte: float,
+    seconds_per_token: float,
+) -> AsyncIterator[str]:
+    """Server-sent events of a streamed completion, a few tokens per chunk."""
+
+    def chunk(delta: dict[str, Any], finish: str | None = None, **extra: Any) -> str:
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            **extra,
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    await asyncio.sleep(first_byte)
+    if "tool_calls" in message:
+        yield chunk({"role": "assistant", "tool_calls": [
+            {"index": 0, **call} for call in message["tool_calls"]
+        ]})
+    else:
+        yield chunk({"role": "assistant", "content": ""})
+        words = message["content"].split(" ")
+        for i in range(0, len(words), 4):
+            piece = " ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "")
+            await asyncio.sleep(seconds_per_token * _approximate_tokens(piece))
+            yield chunk({"content": piece})
+    yield chunk({}, finish_reason)
+    if usage is not None:
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [],
+            "usage": usage,
+        }
+        yield f"data: {json.dumps(data)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@contextmanager
+def serve_upstream(app: FastAPI | None = None, host: str = "127.0.0.1") -> Iterator[str]:
+    """Serve the stand-in on a free port in a background thread.
+
+    Args:
+        app: The server to run (default: :func:`create_upstream_app`).
+        host: Interface to listen on.
+
+    Yields:
+        Its base URL, e.g. ``http://127.0.0.1:54321``.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        app or create_upstream_app(), host=host, port=0, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, name="upstream", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Upstream stand-in failed to start")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--seed", type=int, default=0)
+    for service, latency_ms in (("llm", 800.0), ("tmdb", 60.0)):
+        parser.add_argument(
+            f"--{service}-latency-ms", type=float, default=latency_ms,
+            help="Median time to first byte",
+        )
+        parser.add_argument(
+            f"--{service}-latency-sigma", type=float, default=0.4,
+            help="Log-normal shape of the latency (0: fixed)",
+        )
+        parser.add_argument(
+            f"--{service}-error-rate", type=float, default=0.0,
+            help="Fraction of requests answered with a 500",
+        )
+    parser.add_argument(
+        "--llm-ms-per-token", type=float, default=10.0,
+        help="Added latency per completion token",
+    )
+    parser.add_argument(
+        "--llm-rpm", type=float, default=None,
+        help="Requests per minute above which the LLM answers 429",
+    )
+    parser.add_argument(
+        "--tmdb-rps", type=float, default=None,
+        help="Requests per second above which TMDB answers 429",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    import uvicorn
+
+    args = parse_args(argv)
+    app = create_upstream_app(
+        llm=UpstreamBehavior(
+            latency=LatencyDistribution(args.llm_latency_ms / 1000, args.llm_latency_sigma),
+            seconds_per_token=args.llm_ms_per_token / 1000,
+            error_rate=args.llm_error_rate,
+            requests_per_second=args.llm_rpm / 60 if args.llm_rpm else None,
+        ),
+        tmdb=UpstreamBehavior(
+            latency=LatencyDistribution(args.tmdb_latency_ms / 1000, args.tmdb_latency_sigma),
+            error_rate=args.tmdb_error_rate,
+            requests_per_second=args.tmdb_rps,
+        ),
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""End-to-end workflow benchmark with fake LLMs and recorded TMDB responses.
+
+Runs :meth:`MovieNightWorkflow.invoke` for a sample request per route on
+the production agents (see :func:`bench.fakes.fixture_workflow`): the LLM
+agents talk to :class:`~bench.fakes.FakeChatModel` models answering after a
+configurable latency, and the TMDB movie finder talks to a local server
+replaying the responses in ``bench/fixtures/tmdb.json``. Reports the mean
+and 95th percentile time per request and the LLM and TMDB calls each
+request makes.
+
+Usage (from ``api/``)::
+
+    python -m bench.workflow_e2e [--iterations 20] [--llm-latency-ms 0] [--tmdb-latency-ms 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from bench.fakes import fixture_workflow
+from bench.graph_overhead import SAMPLE_REQUESTS
+from bench.harness import measure
+
+
+def run(
+    iterations: int = 20,
+    llm_latency_ms: float = 0.0,
+    tmdb_latency_ms: float = 0.0,
+) -> dict[str, dict[str, float]]:
+    """Measure and print the time per request for each route.
+
+    Args:
+        iterations: Timed requests per route.
+        llm_latency_ms: Latency of every LLM completion.
+        tmdb_latency_ms: Latency of every TMDB response.
+
+    Returns:
+        Mean and p95 microseconds per request, keyed by route.
+    """
+    results = {}
+    calls = {}
+    with fixture_workflow(llm_latency_ms / 1000, tmdb_latency_ms / 1000) as workflow:
+        for route, message in SAMPLE_REQUESTS.items():
+            result = workflow.invoke(message)
+            assert result["route"] == route, (route, result["route"])
+            timings = result["timings"]
+            calls[route] = (len(timings["llm_calls"]), timings["tmdb"]["requests"])
+
+            times = measure(lambda: workflow.invoke(message), iterations, warmup=0)
+            results[route] = {"mean_us": times["mean_us"], "p95_us": times["p95_us"]}
+
+    print(
+        f"Workflow end to end ({iterations} requests per route, LLM latency "
+        f"{llm_latency_ms:g} ms, TMDB latency {tmdb_latency_ms:g} ms)\n"
+    )
+    print(f"{'route':<8} {'mean ms':>9} {'p95 ms':>9} {'LLM calls':>10} {'TMDB calls':>11}")
+    for route, times in results.items():
+        llm_calls, tmdb_calls = calls[route]
+        print(
+            f"{route:<8} {times['mean_us'] / 1000:>9.2f} {times['p95_us'] / 1000:>9.2f} "
+            f"{llm_calls:>10} {tmdb_calls:>11}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tmdb-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    run(args.iterations, args.llm_latency_ms, args.tmdb_latency_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Gunicorn configuration for multi-worker serving.
+
+Runs the FastAPI app in several uvicorn worker processes::
+
+    gunicorn app.main:app
+
+The master preloads the app and its read-only state (see
+:mod:`app.serving`) before forking, so workers share it copy-on-write.
+Set ``SHARED_CACHE_PATH`` so workers also share TMDB (and optionally LLM)
+responses, and report memory and cache hit rates on ``/workers``.
+
+Sessions, request deduplication and workflow checkpoints kept in memory
+are private to each worker. Before raising ``WEB_CONCURRENCY`` above 1,
+set ``SESSION_STORE=sqlite`` (and ``WORKFLOW_CHECKPOINTER=sqlite`` if
+checkpointing is on) with database paths all workers can reach.
+
+Environment:
+    PORT: Listening port (default: 8000).
+    WEB_CONCURRENCY: Number of worker processes (default: 1).
+    WORKER_TIMEOUT_SECONDS: Seconds a silent worker is given before it is
+        restarted (default: 120).
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn_worker.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT_SECONDS", "120"))
+graceful_timeout = 30
+preload_app = True
+
+
+def on_starting(server):
+    """Build the state workers share before any of them is forked."""
+    from app.serving import preload_shared_state
+
+    preload_shared_state()
@@ -1,3 +1,4 @@
+import sqlite3
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -85,6 +86,33 @@ def stub_rag_agent():
     return StubRAGAssistantAgent()
 
 
+@pytest.fixture
+def sqlite_connections(monkeypatch):
+    """Record the SQLite connections opened during a test."""
+    opened = []
+    connect = sqlite3.connect
+
+    def recording_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", recording_connect)
+    return opened
+
+
+def open_connections(connections: list[sqlite3.Connection]) -> int:
+    """Count the connections that have not been closed."""
+    count = 0
+    for conn in connections:
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            continue
+        count += 1
+    return count
+
+
 def make_movie(
     id_: str,
     title: str,
@@ -0,0 +1,430 @@
+"""Tests for admission control and backpressure on the chat endpoints."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.integrations.tmdb_client import TMDBClient
+from app.llm.workflow import MovieNightWorkflow
+from app.main import app
+from app.observability.metrics import REGISTRY
+from app.observability.usage import LLMCallUsage, record_usage
+from app.resilience import (
+    AdmissionController,
+    AdmissionRejected,
+    Deadline,
+    DownstreamBudget,
+    charge_downstream,
+    set_downstream_budgets,
+)
+from app.resilience.admission import (
+    ADMISSION_DECISIONS,
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+    set_downstream_budgets([])
+    routes.cleanup_workflow()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+class TestDownstreamBudget:
+    def test_can_be_overdrawn_and_recovers_at_rate(self):
+        clock = FakeClock()
+        budget = DownstreamBudget("llm", rate=10, capacity=100, clock=clock)
+
+        budget.charge(130)
+
+        assert budget.level() == -30
+        assert budget.seconds_until_available() == pytest.approx(3.1)
+        clock.now = 5.0
+        assert budget.level() == 20
+        assert budget.seconds_until_available() == 0
+
+    def test_charge_downstream_uses_installed_budgets(self):
+        budget = DownstreamBudget("tmdb", rate=1, capacity=5)
+        set_downstream_budgets([budget])
+
+        charge_downstream("tmdb", 2)
+        charge_downstream("llm", 1000)  # no budget configured: ignored
+
+        assert budget.level() == pytest.approx(3, abs=0.01)
+
+    def test_upstream_calls_are_charged(self):
+        tmdb = DownstreamBudget("tmdb", rate=0.001, capacity=10)
+        llm = DownstreamBudget("llm", rate=0.001, capacity=1000)
+        set_downstream_budgets([tmdb, llm])
+        response = MagicMock()
+        response.json.return_value = {"results": [{"id": 287}]}
+
+        with patch.object(httpx.Client, "get", return_value=response):
+            TMDBClient(api_key="test-key").search_person("Brad Pitt")
+        record_usage(
+            LLMCallUsage(
+                node="respond", agent="writer", model="gpt-4o",
+                prompt_tokens=100, completion_tokens=20,
+            )
+        )
+
+        assert tmdb.level() == pytest.approx(9, abs=0.01)
+        assert llm.level() == pytest.approx(880, abs=0.01)
+
+
+class TestAdmissionController:
+    def test_admits_up_to_concurrency_then_rejects_when_queue_full(self):
+        controller = AdmissionController(max_concurrency=2, max_queue=0)
+
+        first = controller.admit()
+        controller.admit()
+
+        with pytest.raises(AdmissionRejected) as exc:
+            controller.admit()
+        assert exc.value.status_code == 503
+        assert exc.value.reason == "queue_full"
+        assert exc.value.retry_after >= 1
+        assert ADMISSION_IN_FLIGHT.labels().value == 2
+
+        first.release()
+        first.release()  # idempotent
+        assert controller.in_flight == 1
+
+    def test_waiter_is_admitted_when_a_slot_frees(self):
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=5)
+        ticket = controller.admit()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            waiting = pool.submit(controller.admit)
+            _wait_for(lambda: controller.queue_depth() == 1)
+            assert ADMISSION_QUEUE_DEPTH.labels(priority="interactive").value == 1
+            ticket.release()
+            waiting.result(timeout=5).release()
+
+        assert ADMISSION_QUEUE_DEPTH.labels(priority="interactive").value == 0
+        assert ADMISSION_DECISIONS.labels(priority="interactive", outcome="admitted").value == 2
+
+    def test_wait_is_bounded_by_request_deadline(self):
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=30)
+        controller.admit()
+
+        started = time.monotonic()
+        with pytest.raises(AdmissionRejected) as exc:
+            controller.admit(deadline=Deadline.after(0.05))
+
+        assert exc.value.status_code == 503
+        assert exc.value.reason == "timed_out"
+        assert time.monotonic() - started < 1
+        assert controller.queue_depth() == 0
+
+    def test_interactive_requests_overtake_batch(self):
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=5)
+        ticket = controller.admit()
+        order = []
+
+        def admit(priority):
+            with controller.admit(priority):
+                order.append(priority)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            batch = pool.submit(admit, "batch")
+            _wait_for(lambda: controller.queue_depth("batch") == 1)
+            interactive = pool.submit(admit, "interactive")
+            _wait_for(lambda: controller.queue_depth("interactive") == 1)
+            ticket.release()
+            batch.result(timeout=5)
+            interactive.result(timeout=5)
+
+        assert order == ["interactive", "batch"]
+
+    def test_batch_slots_are_capped_at_concurrency(self):
+        controller = AdmissionController(max_concurrency=4)
+
+        ticket = controller.admit("batch", slots=10)
+
+        assert ticket.slots == 4
+        assert controller.in_flight == 4
+
+    def test_exhausted_budget_rejects_with_429(self):
+        budget = DownstreamBudget("llm", rate=1, capacity=10)
+        controller = AdmissionController(
+            max_concurrency=4, max_wait_seconds=0.1, budgets=[budget]
+        )
+        budget.charge(100)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            controller.admit()
+
+        assert exc.value.status_code == 429
+        assert exc.value.reason == "budget_exhausted"
+        assert exc.value.retry_after >= 90
+
+    def test_request_waits_for_budget_to_recover(self):
+        budget = DownstreamBudget("tmdb", rate=20, capacity=1)
+        controller = AdmissionController(
+            max_concurrency=4, max_wait_seconds=2, budgets=[budget]
+        )
+        budget.charge(2)
+
+        started = time.monotonic()
+        controller.admit().release()
+
+        assert 0.02 < time.monotonic() - started < 1
+
+    def test_rejects_unknown_priority(self):
+        with pytest.raises(ValueError):
+            AdmissionController(max_concurrency=1).admit("urgent")
+
+    def test_async_waiters_are_woken_by_releases_in_other_threads(self):
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=5)
+        ticket = controller.admit()
+        order = []
+
+        async def admit(name):
+            async_ticket = await controller.aadmit()
+            order.append(name)
+            return async_ticket
+
+        async def main():
+            first = asyncio.create_task(admit("first"))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(admit("second"))
+            while controller.queue_depth() < 2:
+                await asyncio.sleep(0.005)
+            await asyncio.to_thread(ticket.release)
+            await asyncio.to_thread((await first).release)
+            (await second).release()
+
+        asyncio.run(main())
+
+        assert order == ["first", "second"]
+        assert controller.in_flight == 0
+        assert ADMISSION_QUEUE_DEPTH.labels(priority="interactive").value == 0
+
+    def test_cancelled_async_waiter_leaves_queue(self):
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=5)
+        controller.admit()
+
+        async def main():
+            waiter = asyncio.create_task(controller.aadmit())
+            while controller.queue_depth() == 0:
+                await asyncio.sleep(0.005)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(main())
+
+        assert controller.queue_depth() == 0
+        assert controller.in_flight == 1
+
+    def test_async_wait_is_bounded_by_request_deadline(self):
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=30)
+        controller.admit()
+
+        with pytest.raises(AdmissionRejected) as exc:
+            asyncio.run(controller.aadmit(deadline=Deadline.after(0.05)))
+
+        assert exc.value.reason == "timed_out"
+        assert controller.queue_depth() == 0
+
+
+def _blocking_workflow(release: threading.Event) -> MagicMock:
+    wf = MagicMock(spec=MovieNightWorkflow)
+
+    def invoke(*args, **kwargs):
+        release.wait(5)
+        return {"final_response": "Try Airplane!", "route": "movies"}
+
+    wf.invoke.side_effect = invoke
+    return wf
+
+
+class TestChatAdmission:
+    def test_saturated_server_answers_503_with_retry_after(self):
+        release = threading.Event()
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        routes.initialize_workflow(
+            _blocking_workflow(release), admission_controller=controller
+        )
+        client = TestClient(app, raise_server_exceptions=False)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            running = pool.submit(client.post, "/chat", json={"message": "a comedy"})
+            _wait_for(lambda: controller.in_flight == 1)
+            try:
+                r = client.post("/chat", json={"message": "a drama"})
+            finally:
+                release.set()
+            assert running.result(timeout=5).status_code == 200
+
+        assert r.status_code == 503
+        assert int(r.headers["Retry-After"]) >= 1
+        assert controller.in_flight == 0
+
+    def test_queued_request_does_not_take_a_thread(self):
+        release = threading.Event()
+        controller = AdmissionController(max_concurrency=1, max_wait_seconds=5)
+        routes.initialize_workflow(
+            _blocking_workflow(release), admission_controller=controller
+        )
+        client = TestClient(app, raise_server_exceptions=False)
+
+        with (
+            patch.object(
+                routes, "_run_chat", wraps=routes._run_chat
+            ) as threaded,
+            ThreadPoolExecutor(max_workers=2) as pool,
+        ):
+            running = pool.submit(client.post, "/chat", json={"message": "a comedy"})
+            _wait_for(lambda: controller.in_flight == 1)
+            queued = pool.submit(client.post, "/chat", json={"message": "a drama"})
+            _wait_for(lambda: controller.queue_depth() == 1)
+            try:
+                assert threaded.call_count == 1
+                assert client.get("/health").status_code == 200
+            finally:
+                release.set()
+            assert running.result(timeout=5).status_code == 200
+            assert queued.result(timeout=5).status_code == 200
+
+        assert threaded.call_count == 2
+        assert controller.in_flight == 0
+
+    def test_duplicate_of_running_request_is_not_admitted_again(self):
+        release = threading.Event()
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        wf = _blocking_workflow(release)
+        routes.initialize_workflow(wf, admission_controller=controller)
+        client = TestClient(app, raise_server_exceptions=False)
+        body = {"message": "a comedy", "session_id": "s1"}
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            running = pool.submit(client.post, "/chat", json=body)
+            _wait_for(lambda: controller.in_flight == 1)
+            duplicate = pool.submit(client.post, "/chat", json=body)
+            time.sleep(0.1)
+            release.set()
+            responses = [running.result(timeout=5), duplicate.result(timeout=5)]
+
+        assert [r.status_code for r in responses] == [200, 200]
+        assert responses[1].headers["Idempotent-Replayed"] == "true"
+        assert wf.invoke.call_count == 1
+
+    def test_duplicates_wait_without_taking_threads(self):
+        release = threading.Event()
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        routes.initialize_workflow(
+            _blocking_workflow(release), admission_controller=controller
+        )
+        client = TestClient(app, raise_server_exceptions=False)
+        headers = {"Idempotency-Key": "req-1"}
+        threaded = []
+        run_in_threadpool = routes.run_in_threadpool
+
+        async def counting(fn, *args, **kwargs):
+            if fn is not routes._ensure_workflow:
+                threaded.append(fn)
+            return await run_in_threadpool(fn, *args, **kwargs)
+
+        with (
+            patch.object(routes, "run_in_threadpool", counting),
+            ThreadPoolExecutor(max_workers=4) as pool,
+        ):
+            running = pool.submit(
+                client.post, "/chat", json={"message": "a comedy"}, headers=headers
+            )
+            _wait_for(lambda: controller.in_flight == 1)
+            duplicates = [
+                pool.submit(
+                    client.post, "/chat", json={"message": "a comedy"}, headers=headers
+                )
+                for _ in range(3)
+            ]
+            time.sleep(0.1)
+            try:
+                assert len(threaded) == 1
+            finally:
+                release.set()
+            responses = [running.result(timeout=5)] + [
+                f.result(timeout=5) for f in duplicates
+            ]
+
+        assert [r.status_code for r in responses] == [200] * 4
+        assert len(threaded) == 1
+
+    def test_exhausted_llm_budget_answers_429(self):
+        budget = DownstreamBudget("llm", rate=1, capacity=100)
+        budget.charge(1000)
+        routes.initialize_workflow(
+            _blocking_workflow(threading.Event()),
+            admission_controller=AdmissionController(
+                max_concurrency=2, max_wait_seconds=1, budgets=[budget]
+            ),
+        )
+        client = TestClient(app, raise_server_exceptions=False)
+
+        r = client.post("/chat", json={"message": "a comedy"})
+
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) >= 900
+
+    def test_stream_holds_slot_until_sent(self):
+        controller = AdmissionController(max_concurrency=1)
+        wf = MagicMock(spec=MovieNightWorkflow)
+        wf.stream.return_value = iter([])
+        routes.initialize_workflow(wf, admission_controller=controller)
+        client = TestClient(app)
+
+        r = client.post("/chat/stream", json={"message": "a comedy"})
+
+        assert r.status_code == 200
+        assert controller.in_flight == 0
+        assert ADMISSION_DECISIONS.labels(priority="interactive", outcome="admitted").value == 1
+
+    def test_batch_is_admitted_at_batch_priority(self):
+        controller = AdmissionController(max_concurrency=2)
+        wf = MagicMock(spec=MovieNightWorkflow)
+        wf.batch.return_value = iter([(0, {"final_response": "ok", "route": "movies"})])
+        routes.initialize_workflow(wf, admission_controller=controller)
+        client = TestClient(app)
+
+        r = client.post("/chat/batch", json={"messages": ["a comedy"]})
+
+        assert r.status_code == 200
+        assert ADMISSION_DECISIONS.labels(priority="batch", outcome="admitted").value == 1
+        assert wf.batch.call_args.kwargs["max_concurrency"] == 2
+        assert controller.in_flight == 0
+
+    def test_rejects_unknown_priority_in_request(self):
+        routes.initialize_workflow(MagicMock(spec=MovieNightWorkflow))
+        client = TestClient(app)
+
+        r = client.post("/chat", json={"message": "a comedy", "priority": "urgent"})
+
+        assert r.status_code == 422
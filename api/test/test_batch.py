@@ -0,0 +1,163 @@
+"""Tests for batch processing and sub-query sharing within a batch."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.integrations.tmdb_client import TMDBClient
+from app.llm.evaluator_agent import StubEvaluatorAgent
+from app.llm.workflow import MovieNightWorkflow
+from app.main import app
+from app.resilience import BatchMemo, batch_memo_scope, memoized
+from app.schemas.orchestrator import Constraints, InputDecision
+
+from conftest import make_movie
+
+MOVIES = [
+    make_movie(str(i), f"Movie {i}", genres=["Comedy"], rating=7.0, year=2000 + i)
+    for i in range(5)
+]
+
+
+class TestBatchMemo:
+    def test_computes_each_key_once(self):
+        memo = BatchMemo()
+        fn = MagicMock(return_value=["a"])
+
+        with batch_memo_scope(memo):
+            first = memoized("tmdb", "k", fn)
+            second = memoized("tmdb", "k", fn)
+
+        fn.assert_called_once()
+        assert first == second == ["a"]
+        assert (memo.hits, memo.misses) == (1, 1)
+
+    def test_returns_independent_copies(self):
+        with batch_memo_scope(BatchMemo()):
+            first = memoized("tmdb", "k", lambda: {"results": []})
+            first["results"].append(1)
+            second = memoized("tmdb", "k", lambda: {"results": []})
+
+        assert second == {"results": []}
+
+    def test_failures_are_not_memoized(self):
+        fn = MagicMock(side_effect=[RuntimeError("boom"), "ok"])
+
+        with batch_memo_scope(BatchMemo()):
+            with pytest.raises(RuntimeError):
+                memoized("rag", "q", fn)
+            assert memoized("rag", "q", fn) == "ok"
+
+    def test_calls_through_outside_a_batch(self):
+        fn = MagicMock(return_value=1)
+
+        memoized("rag", "q", fn)
+        memoized("rag", "q", fn)
+
+        assert fn.call_count == 2
+
+    def test_tmdb_requests_are_shared(self):
+        client = TMDBClient(api_key="test-key")
+        response = MagicMock()
+        response.json.return_value = {"results": [{"id": 287}]}
+
+        with (
+            patch.object(httpx.Client, "get", return_value=response) as mock_get,
+            batch_memo_scope(BatchMemo()),
+        ):
+            assert client.search_person("Brad Pitt") == 287
+            assert client.search_person("Brad Pitt") == 287
+
+        mock_get.assert_called_once()
+
+
+@pytest.fixture
+def workflow(
+    mock_input_agent,
+    mock_movies_responder,
+    mock_system_responder,
+    mock_movie_finder,
+    stub_recommendation_writer,
+):
+    def decide(user_message, history=None):
+        if user_message == "boom":
+            raise RuntimeError("orchestrator failed")
+        return InputDecision(route="movies", constraints=Constraints(genres=["comedy"]))
+
+    mock_input_agent.decide.side_effect = decide
+    mock_movie_finder.find_movies.return_value = MOVIES
+    return MovieNightWorkflow(
+        orchestrator=None,
+        movies_responder=mock_movies_responder,
+        system_responder=mock_system_responder,
+        input_agent=mock_input_agent,
+        movie_finder=mock_movie_finder,
+        recommendation_writer=stub_recommendation_writer,
+        evaluator=StubEvaluatorAgent(),
+    )
+
+
+class TestWorkflowBatch:
+    def test_isolates_failures_and_shares_sub_queries(self, workflow, mock_input_agent):
+        results = dict(workflow.batch(["a comedy", "boom", "a comedy"], max_concurrency=2))
+
+        assert sorted(results) == [0, 1, 2]
+        assert results[0]["final_response"]
+        assert results[2]["final_response"]
+        assert isinstance(results[1], RuntimeError)
+        assert mock_input_agent.decide.call_count == 2
+
+    def test_items_get_their_own_deadline(self, workflow):
+        results = dict(workflow.batch(["a comedy"], deadline_seconds=30))
+
+        assert results[0]["deadline_at"] is not None
+
+
+class TestChatBatchEndpoint:
+    def test_streams_items_with_errors_isolated(self, workflow):
+        with patch.object(routes, "workflow", workflow):
+            client = TestClient(app, raise_server_exceptions=False)
+            r = client.post("/chat/batch", json={"messages": ["a comedy", "boom"]})
+
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        items = {item["index"]: item for item in map(json.loads, r.text.splitlines())}
+        assert items[0]["route"] == "movies"
+        assert items[0]["reply"]
+        assert items[0]["debug"]["selected_movie"]["title"].startswith("Movie")
+        assert "reply" not in items[1]
+        assert items[1]["error"]
+
+    def test_rejects_oversized_batch(self, workflow):
+        with (
+            patch.object(routes, "workflow", workflow),
+            patch.object(routes, "max_batch_items", 2),
+        ):
+            client = TestClient(app, raise_server_exceptions=False)
+            r = client.post("/chat/batch", json={"messages": ["a", "b", "c"]})
+
+        assert r.status_code == 422
+
+    def test_rejects_blank_messages(self):
+        client = TestClient(app, raise_server_exceptions=False)
+
+        r = client.post("/chat/batch", json={"messages": ["a comedy", "  "]})
+
+        assert r.status_code == 422
+
+    def test_caps_requested_concurrency(self):
+        mock_workflow = MagicMock(spec=MovieNightWorkflow)
+        mock_workflow.batch.return_value = iter([])
+
+        with (
+            patch.object(routes, "workflow", mock_workflow),
+            patch.object(routes, "max_batch_concurrency", 3),
+        ):
+            client = TestClient(app, raise_server_exceptions=False)
+            client.post("/chat/batch", json={"messages": ["a"], "max_concurrency": 50})
+
+        assert mock_workflow.batch.call_args.kwargs["max_concurrency"] == 3
@@ -0,0 +1,154 @@
+"""Tests for the offline batch runner CLI."""
+
+import json
+
+import pytest
+
+from app.batch import completed_ids, main, read_prompts
+from app.llm.input_agent import StubInputOrchestratorAgent
+from app.resilience import RateLimiter
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter:
+    def test_allows_burst_then_paces_calls(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+
+        assert limiter.acquire() == 0
+        assert limiter.acquire() == 0
+        assert limiter.acquire() == pytest.approx(0.5)
+        assert clock.now == pytest.approx(0.5)
+
+    def test_try_acquire_does_not_wait(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=1, clock=clock, sleep=clock.sleep)
+
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        clock.now = 1.0
+        assert limiter.try_acquire()
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
+
+
+class TestStubInputOrchestrator:
+    def test_routes_by_keywords(self):
+        agent = StubInputOrchestratorAgent()
+
+        assert agent.decide("a comedy under 100 minutes").route == "movies"
+        assert agent.decide("How does the app rank movies?").route == "rag"
+
+    def test_extracts_genres_and_runtime(self):
+        constraints = StubInputOrchestratorAgent().decide(
+            "a comedy or horror movie under 100 minutes"
+        ).constraints
+
+        assert set(constraints.genres) == {"comedy", "horror"}
+        assert constraints.max_runtime_minutes == 100
+
+
+class TestReadPrompts:
+    def test_accepts_backlog_style_lines(self, tmp_path):
+        path = tmp_path / "in.jsonl"
+        _write_jsonl(
+            path,
+            [
+                {"request_id": "r-1", "title": "t", "body": "a comedy"},
+                {"message": "a drama"},
+            ],
+        )
+        path.write_text(path.read_text() + "\n")
+
+        prompts = read_prompts(path)
+
+        assert [(p.id, p.message) for p in prompts] == [("r-1", "a comedy"), ("2", "a drama")]
+
+    def test_rejects_lines_without_prompt(self, tmp_path):
+        path = tmp_path / "in.jsonl"
+        _write_jsonl(path, [{"id": "x"}])
+
+        with pytest.raises(ValueError):
+            read_prompts(path)
+
+
+class TestBatchCLI:
+    def test_stub_run_streams_results(self, tmp_path):
+        prompts = tmp_path / "in.jsonl"
+        output = tmp_path / "out.jsonl"
+        _write_jsonl(
+            prompts,
+            [
+                {"id": "a", "message": "a comedy under 120 minutes"},
+                {"id": "b", "message": "How does the app pick movies?"},
+                {"id": "c", "message": "a horror movie"},
+            ],
+        )
+
+        code = main([str(prompts), "-o", str(output), "--stub", "--concurrency", "2"])
+
+        assert code == 0
+        records = {r["id"]: r for r in _read_jsonl(output)}
+        assert set(records) == {"a", "b", "c"}
+        assert records["a"]["route"] == "movies"
+        assert records["a"]["debug"]["selected_movie"]
+        assert records["b"]["route"] == "rag"
+        assert records["a"]["timings"]["elapsed_seconds"] >= 0
+        assert all(r["reply"] and "error" not in r for r in records.values())
+
+    def test_resumes_after_interruption(self, tmp_path):
+        prompts = tmp_path / "in.jsonl"
+        output = tmp_path / "out.jsonl"
+        _write_jsonl(
+            prompts,
+            [{"id": "a", "message": "a comedy"}, {"id": "b", "message": "a drama"}],
+        )
+        # A previous run finished "a", failed "b" and was cut off mid-line.
+        output.write_text(
+            json.dumps({"id": "a", "message": "a comedy", "reply": "done"})
+            + "\n"
+            + json.dumps({"id": "b", "message": "a drama", "error": "timeout"})
+            + "\n"
+            + '{"id": "b", "mess'
+        )
+        assert completed_ids(output) == {"a"}
+
+        main([str(prompts), "-o", str(output), "--stub"])
+
+        lines = output.read_text().splitlines()
+        rerun = json.loads(lines[-1])
+        assert rerun["id"] == "b"
+        assert rerun["reply"]
+        assert completed_ids(output) == {"a", "b"}
+
+    def test_restart_overwrites_output(self, tmp_path):
+        prompts = tmp_path / "in.jsonl"
+        output = tmp_path / "out.jsonl"
+        _write_jsonl(prompts, [{"id": "a", "message": "a comedy"}])
+        output.write_text(json.dumps({"id": "a", "reply": "old"}) + "\n")
+
+        main([str(prompts), "-o", str(output), "--stub", "--restart"])
+
+        records = _read_jsonl(output)
+        assert len(records) == 1
+        assert records[0]["reply"] != "old"
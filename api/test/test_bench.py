@@ -0,0 +1,267 @@
+"""Tests for the offline benchmark suite, its fakes and the load test harness."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_openai import AzureChatOpenAI
+
+from app.api import routes
+from app.batch import BatchPrompt, create_stub_workflow
+from app.integrations.tmdb_client import TMDBClient
+from app.llm.input_agent import InputOrchestratorAgent
+from app.main import app
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import InputDecision
+
+
+class TestFixtureTMDBServer:
+    def test_client_reads_recorded_responses_from_base_url(self):
+        from bench.fakes import FixtureTMDBServer
+
+        with FixtureTMDBServer() as server:
+            with TMDBClient(api_key="bench", base_url=server.base_url) as client:
+                movies = client.discover_movies(genres=["comedy"], limit=5)
+                details = client.get_movie_details(603)
+                missing = client.get_movie_details(1)
+
+        assert len(movies) == 5
+        assert details.title == "The Matrix"
+        assert details.runtime_minutes == 136
+        assert missing is None
+        assert server.requests == ["/discover/movie", "/movie/603", "/movie/1"]
+
+
+class TestFakeChatModel:
+    def test_structured_output_follows_the_stub_rules(self):
+        from bench.fakes import create_fake_chat_model
+
+        agent = InputOrchestratorAgent(create_fake_chat_model("input"))
+
+        decision = agent.decide("A horror movie under 100 minutes")
+
+        assert isinstance(decision, InputDecision)
+        assert decision.route == "movies"
+        assert decision.constraints.genres == ["horror"]
+        assert decision.constraints.max_runtime_minutes == 100
+
+
+class TestBenchmarks:
+    def test_workflow_e2e_runs_every_route_through_the_fakes(self, capsys):
+        from bench.workflow_e2e import run
+
+        results = run(iterations=1)
+
+        assert set(results) == {"movies", "hybrid", "rag"}
+        assert "TMDB calls" in capsys.readouterr().out
+
+    def test_size_benchmarks_report_each_size(self):
+        from bench.candidate_selection import run as run_selection
+        from bench.rag_retrieval import run as run_retrieval
+
+        assert set(run_retrieval(sizes=(10, 50), iterations=1)) == {"10", "50"}
+        assert set(run_selection(sizes=(10,), iterations=1)["10"]) == {
+            "select_mean_us", "prioritize_mean_us",
+        }
+
+    def test_logging_overhead_reports_calls_and_requests(self):
+        from bench.logging_overhead import run
+
+        results = run(iterations=10)
+
+        assert set(results["call"]) == {
+            "dropped_fstring", "dropped_lazy", "json", "text", "json_sampled",
+        }
+        assert set(results["request"]) == {"off", "info", "debug"}
+
+    def test_ingestion_reports_both_corpora(self):
+        from bench.ingestion import run
+
+        assert set(run(files=2, iterations=1)) == {"synthetic", "bundled"}
+
+
+class TestRetryEval:
+    def test_judge_scores_drafts_by_label_with_seeded_noise(self):
+        from langchain_core.messages import HumanMessage
+
+        from bench.retry_eval import EvalCase, LabeledJudge
+
+        judge = LabeledJudge([EvalCase("c", "A comedy", {"Airplane!": 0.9})], noise=0.05)
+        prompt = [HumanMessage("User request: A comedy\n\nSelected movie:\n- title: Airplane!")]
+        other = [HumanMessage("User request: A comedy\n\nSelected movie:\n- title: Alien")]
+
+        first, again = judge(EvaluationResult, prompt), judge(EvaluationResult, prompt)
+        miss = judge(EvaluationResult, other)
+
+        assert first == again
+        assert first.passed and first.score == pytest.approx(0.9, abs=0.2)
+        assert not miss.passed
+        assert judge.scores == [first.score, first.score, miss.score]
+
+    def test_pareto_front_keeps_undominated_configs(self):
+        from bench.retry_eval import mark_pareto_front
+
+        rows = mark_pareto_front([
+            {"config": "cheap", "quality": 0.5, "latency_ms": 10.0},
+            {"config": "best", "quality": 0.7, "latency_ms": 20.0},
+            {"config": "dominated", "quality": 0.6, "latency_ms": 25.0},
+        ])
+
+        assert [row["config"] for row in rows if row["pareto"]] == ["cheap", "best"]
+
+    def test_reports_each_config_on_the_labeled_prompts(self, capsys):
+        from bench.retry_eval import RetryConfig, run
+
+        rows = run([RetryConfig(1, 0.5), RetryConfig(3, 0.85)], repeats=1, cost="llm_calls")
+
+        single, strict = rows
+        assert single["requests"] == strict["requests"] == 12
+        assert single["retries"] <= 1 and single["llm_calls"] == 3
+        assert strict["llm_calls"] > single["llm_calls"]
+        assert strict["accepted_quality"] >= single["accepted_quality"]
+        assert any(row["pareto"] for row in rows)
+        assert "Pareto front on quality and llm_calls" in capsys.readouterr().out
+
+
+class TestResults:
+    def test_saved_results_compare_against_a_baseline(self, tmp_path):
+        from bench.harness import compare_results, flatten, load_results, save_results
+
+        save_results("baseline", flatten({"rag": {"10": {"query_us": 100.0}}}), tmp_path)
+        baseline = load_results("baseline", tmp_path)
+
+        rows = compare_results(
+            baseline | {"gone_us": 1.0},
+            {"rag/10/query_us": 125.0, "new_us": 1.0},
+            tolerance=0.1,
+        )
+
+        assert baseline == {"rag/10/query_us": 100.0}
+        assert rows == [{
+            "metric": "rag/10/query_us",
+            "baseline": 100.0,
+            "current": 125.0,
+            "change": 0.25,
+            "verdict": "slower",
+        }]
+
+
+def _azure_model(upstream) -> AzureChatOpenAI:
+    return AzureChatOpenAI(
+        azure_endpoint="http://testserver",
+        api_key="test-key",
+        api_version="2024-10-21",
+        azure_deployment="gpt-4o-mini",
+        http_client=TestClient(upstream),
+        max_retries=0,
+        stream_usage=True,
+    )
+
+
+class TestUpstream:
+    def test_serves_structured_output_as_json_schema_and_tool_calls(self):
+        from bench.upstream import create_upstream_app
+
+        model = _azure_model(create_upstream_app())
+
+        decision = model.with_structured_output(InputDecision).invoke(
+            "A comedy under 90 minutes"
+        )
+        verdict = model.with_structured_output(
+            EvaluationResult, method="function_calling"
+        ).invoke("Judge this draft")
+
+        assert decision.route == "movies"
+        assert decision.constraints.max_runtime_minutes == 90
+        assert verdict.passed is True
+
+    def test_streams_text_with_usage(self):
+        from bench.fakes import FAKE_REPLY
+        from bench.upstream import create_upstream_app
+
+        chunks = list(_azure_model(create_upstream_app()).stream("hello"))
+        message = sum(chunks[1:], chunks[0])
+
+        assert message.content == FAKE_REPLY
+        assert message.usage_metadata["output_tokens"] > 0
+
+    def test_injects_errors_and_rate_limits(self):
+        from bench.upstream import UpstreamBehavior, create_upstream_app
+
+        client = TestClient(create_upstream_app(
+            llm=UpstreamBehavior(error_rate=1.0),
+            tmdb=UpstreamBehavior(requests_per_second=0.5),
+        ))
+        body = {"messages": [{"role": "user", "content": "hi"}]}
+
+        failed = client.post("/openai/deployments/gpt-4o-mini/chat/completions", json=body)
+        first = client.get("/3/movie/603")
+        limited = client.get("/3/movie/603")
+
+        assert failed.status_code == 500
+        assert first.json()["title"] == "The Matrix"
+        assert limited.status_code == 429
+        assert limited.headers["Retry-After"] == "2"
+        assert client.get("/_stats").json() == {
+            "llm.error": 1, "tmdb.ok": 1, "tmdb.rate_limited": 1,
+        }
+
+    def test_latency_distribution(self):
+        import random
+
+        from bench.upstream import LatencyDistribution
+
+        rng = random.Random(0)
+        samples = [LatencyDistribution(0.1, 0.5).sample(rng) for _ in range(2000)]
+
+        assert LatencyDistribution(0.1).sample(rng) == 0.1
+        assert sorted(samples)[1000] == pytest.approx(0.1, rel=0.1)
+
+
+class TestLoadTest:
+    @pytest.fixture
+    def stub_api(self):
+        routes.initialize_workflow(create_stub_workflow())
+        yield httpx.ASGITransport(app=app)
+        routes.cleanup_workflow()
+
+    def test_closed_loop_reports_percentiles_per_route(self, stub_api):
+        from bench.loadtest import run_load
+
+        prompts = [
+            BatchPrompt(id="movies", message="A comedy under 100 minutes"),
+            BatchPrompt(id="rag", message="How does the app rank movies?"),
+        ]
+
+        report = asyncio.run(run_load(
+            "http://api", prompts, users=3, duration_seconds=None,
+            max_requests=12, transport=stub_api,
+        ))
+        summary = report.summary()
+
+        assert summary["requests"] == summary["ok"] == 12
+        assert summary["statuses"] == {"200": 12}
+        assert set(summary["routes"]) <= {"movies", "rag"}
+        latency = summary["latency_ms"]
+        assert latency["count"] == 12
+        assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+
+    def test_open_loop_drops_arrivals_beyond_the_in_flight_cap(self):
+        from bench.loadtest import run_load
+
+        async def slow(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.2)
+            return httpx.Response(503)
+
+        report = asyncio.run(run_load(
+            "http://api", [BatchPrompt(id="1", message="hi")], users=1,
+            duration_seconds=None, max_requests=4, arrival_rate=50,
+            transport=httpx.MockTransport(slow),
+        ))
+        summary = report.summary()
+
+        assert summary["requests"] + summary["dropped"] == 4
+        assert summary["dropped"] >= 2
+        assert summary["ok"] == 0
+        assert summary["latency_ms"] == {}
@@ -0,0 +1,206 @@
+"""Tests for recording and replaying LLM and TMDB calls with cassettes."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.batch import BatchPrompt
+from app.cassettes import Cassette, CassetteMissError, request_key
+from app.integrations.tmdb_client import TMDBClient, TMDBClientError
+from app.llm.client import ResilientAzureChatOpenAI
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import InputDecision
+
+
+def _offline(request: httpx.Request) -> httpx.Response:
+    raise AssertionError(f"Unexpected request to {request.url}")
+
+
+def _set_seconds(path, seconds: list[float]) -> None:
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    for line, value in zip(lines, seconds, strict=True):
+        line["seconds"] = value
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def _chat_model(cassette: Cassette, http_client=None) -> ResilientAzureChatOpenAI:
+    if http_client is None:
+        http_client = httpx.Client(transport=httpx.MockTransport(_offline))
+    return ResilientAzureChatOpenAI(
+        azure_endpoint="http://testserver",
+        api_key="test-key",
+        api_version="2024-10-21",
+        azure_deployment="gpt-4o-mini",
+        http_client=http_client,
+        max_retries=0,
+        stream_usage=True,
+        cassette=cassette,
+    )
+
+
+class TestCassette:
+    def test_replays_responses_at_scaled_recorded_times(self, tmp_path):
+        path = tmp_path / "calls.jsonl"
+        recording = Cassette(path, mode="record")
+        recording.play("tmdb", "a", lambda: {"id": 1})
+        recording.play("tmdb", "a", lambda: {"id": 2})
+        _set_seconds(path, [0.2, 0.4])
+
+        slept = []
+        replaying = Cassette(path, time_scale=0.5, sleep=slept.append)
+
+        def unreachable():
+            raise AssertionError("replay must not call upstream")
+
+        responses = [replaying.play("tmdb", "a", unreachable) for _ in range(3)]
+
+        assert responses == [{"id": 1}, {"id": 2}, {"id": 1}]
+        assert len(replaying) == 2
+        assert slept == pytest.approx([0.1, 0.2, 0.1])
+
+    def test_time_scale_zero_never_sleeps(self, tmp_path):
+        path = tmp_path / "calls.jsonl"
+        Cassette(path, mode="record").play("llm", "k", lambda: "ok")
+        _set_seconds(path, [2.5])
+
+        slept = []
+        assert Cassette(path, time_scale=1.0, sleep=slept.append).play("llm", "k", str) == "ok"
+        assert Cassette(path, time_scale=0.0, sleep=slept.append).play("llm", "k", str) == "ok"
+        assert slept == [2.5]
+
+    def test_missing_request_raises(self, tmp_path):
+        path = tmp_path / "calls.jsonl"
+        Cassette(path, mode="record").play("tmdb", "known", lambda: 1)
+
+        with pytest.raises(CassetteMissError, match="/movie/9"):
+            Cassette(path).play("tmdb", "other", lambda: 1, request={"endpoint": "/movie/9"})
+
+    def test_records_and_replays_errors_of_the_given_type(self, tmp_path):
+        path = tmp_path / "calls.jsonl.gz"
+
+        def fail():
+            raise TMDBClientError("TMDB request failed: 404")
+
+        with pytest.raises(TMDBClientError):
+            Cassette(path, mode="record").play("tmdb", "k", fail, error_type=TMDBClientError)
+
+        with pytest.raises(TMDBClientError, match="404"):
+            Cassette(path).play("tmdb", "k", fail, error_type=TMDBClientError)
+
+    def test_gzip_cassettes_are_compressed(self, tmp_path):
+        path = tmp_path / "calls.jsonl.gz"
+        Cassette(path, mode="record").play("tmdb", "k", lambda: {"title": "x" * 1000})
+
+        assert path.read_bytes()[:2] == b"\x1f\x8b"
+        assert path.stat().st_size < 200
+        assert Cassette(path).play("tmdb", "k", dict) == {"title": "x" * 1000}
+
+    def test_rejects_unknown_modes(self, tmp_path):
+        with pytest.raises(ValueError):
+            Cassette(tmp_path / "calls.jsonl", mode="rewind")
+        with pytest.raises(ValueError):
+            Cassette(tmp_path / "calls.jsonl", mode="record", time_scale=-1)
+
+    def test_request_key_is_stable(self):
+        assert request_key("/movie/603", {"b": 1, "a": 2}) == request_key(
+            "/movie/603", {"a": 2, "b": 1}
+        )
+        assert request_key("/movie/603") != request_key("/movie/604")
+
+
+class TestChatModelCassette:
+    @pytest.fixture
+    def upstream(self):
+        from bench.upstream import create_upstream_app
+
+        return TestClient(create_upstream_app())
+
+    def test_structured_output_replays_without_network(self, tmp_path, upstream):
+        path = tmp_path / "llm.jsonl.gz"
+        recording = _chat_model(Cassette(path, mode="record"), upstream)
+        decision = recording.with_structured_output(InputDecision).invoke(
+            "A comedy under 90 minutes"
+        )
+        verdict = recording.with_structured_output(
+            EvaluationResult, method="function_calling"
+        ).invoke("Judge this draft")
+
+        replaying = _chat_model(Cassette(path, time_scale=0))
+        replayed = replaying.with_structured_output(InputDecision).invoke(
+            "A comedy under 90 minutes"
+        )
+        replayed_verdict = replaying.with_structured_output(
+            EvaluationResult, method="function_calling"
+        ).invoke("Judge this draft")
+
+        assert replayed == decision
+        assert replayed_verdict == verdict
+        with pytest.raises(CassetteMissError):
+            replaying.invoke("A prompt never recorded")
+
+    def test_streams_replay_chunk_by_chunk(self, tmp_path, upstream):
+        path = tmp_path / "llm.jsonl"
+        recorded = list(_chat_model(Cassette(path, mode="record"), upstream).stream("hello"))
+
+        replayed = list(_chat_model(Cassette(path, time_scale=0)).stream("hello"))
+
+        assert [c.content for c in replayed] == [c.content for c in recorded]
+        assert len(replayed) > 1
+        message = sum(replayed[1:], replayed[0])
+        assert message.usage_metadata["output_tokens"] > 0
+
+    def test_async_calls_replay(self, tmp_path, upstream):
+        path = tmp_path / "llm.jsonl"
+        recorded = _chat_model(Cassette(path, mode="record"), upstream).invoke("hello")
+
+        replayed = asyncio.run(_chat_model(Cassette(path, time_scale=0)).ainvoke("hello"))
+
+        assert replayed.content == recorded.content
+
+
+class TestTMDBCassette:
+    def test_replays_responses_and_not_found_without_network(self, tmp_path):
+        from bench.fakes import FixtureTMDBServer
+
+        path = tmp_path / "tmdb.jsonl.gz"
+        with FixtureTMDBServer() as server:
+            with TMDBClient(
+                api_key="bench", base_url=server.base_url,
+                cassette=Cassette(path, mode="record"),
+            ) as client:
+                movies = client.discover_movies(genres=["comedy"], limit=5)
+                details = client.get_movie_details(603)
+                assert client.get_movie_details(1) is None
+
+        with TMDBClient(
+            api_key="bench", base_url="http://tmdb.invalid/3",
+            cassette=Cassette(path, time_scale=0),
+        ) as client:
+            assert client.discover_movies(genres=["comedy"], limit=5) == movies
+            assert client.get_movie_details(603) == details
+            assert client.get_movie_details(1) is None
+            with pytest.raises(CassetteMissError):
+                client.get_movie_details(604)
+
+
+class TestWorkflowReplay:
+    def test_recorded_workflow_replays_identical_replies(self, tmp_path):
+        from bench.replay import record, replay
+
+        prompts = [
+            BatchPrompt(id="movies", message="A comedy under 100 minutes"),
+            BatchPrompt(id="rag", message="How does the app rank movies?"),
+        ]
+        path = tmp_path / "trace.jsonl.gz"
+
+        recorded = record(path, prompts, llm_latency_ms=0, tmdb_latency_ms=0)
+        (replayed,) = replay(path, prompts, time_scale=0)
+
+        assert [r.route for r in recorded] == ["movies", "rag"]
+        assert [(r.route, r.reply, r.llm_calls) for r in replayed] == [
+            (r.route, r.reply, r.llm_calls) for r in recorded
+        ]
+        assert all(r.reply for r in replayed)
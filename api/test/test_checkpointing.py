@@ -0,0 +1,343 @@
+"""Tests for resumable workflow runs and the compact checkpoint serializer."""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import ormsgpack
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.llm.evaluator_agent import StubEvaluatorAgent
+from app.llm.workflow import MovieNightWorkflow
+from app.llm.workflow.checkpointing import (
+    COMPACT_TYPE,
+    CheckpointDecodeError,
+    CompactSerializer,
+    ExpiringMemorySaver,
+    SQLiteCheckpointSaver,
+    create_checkpointer,
+)
+from app.resilience import Deadline
+from app.schemas.domain import DraftRecommendation
+from app.schemas.orchestrator import Constraints, InputDecision
+from app.sessions import SessionState
+
+from conftest import make_movie, open_connections
+
+MOVIES = [
+    make_movie(
+        str(i),
+        f"Movie {i}",
+        genres=["Comedy", "Drama"],
+        rating=7.0,
+        overview="A family reunites for one last summer.",
+        runtime_minutes=100 + i,
+        year=2000 + i,
+    )
+    for i in range(10)
+]
+
+
+class TestCompactSerializer:
+    def test_round_trips_domain_models(self):
+        serde = CompactSerializer()
+        value = {
+            "candidate_movies": MOVIES,
+            "draft": DraftRecommendation(movie=MOVIES[0], recommendation_text="Go"),
+            "session": SessionState(session_id="s", constraints=Constraints(genres=["comedy"])),
+        }
+
+        type_, payload = serde.dumps_typed(value)
+
+        assert type_ == COMPACT_TYPE
+        assert serde.loads_typed((type_, payload)) == value
+
+    def test_smaller_than_default_serializer(self):
+        compact = CompactSerializer().dumps_typed(MOVIES)[1]
+        default = JsonPlusSerializer().dumps_typed(MOVIES)[1]
+
+        assert len(compact) < 0.7 * len(default)
+
+    def test_falls_back_for_other_types(self):
+        serde = CompactSerializer()
+        messages = [HumanMessage(content="hi")]
+
+        type_, payload = serde.dumps_typed(messages)
+
+        assert type_ != COMPACT_TYPE
+        assert serde.loads_typed((type_, payload)) == messages
+
+    def test_validates_loaded_models(self):
+        serde = CompactSerializer()
+
+        with pytest.raises(CheckpointDecodeError):
+            serde.loads_typed((COMPACT_TYPE, _invalid_movies_payload()))
+
+
+def _invalid_movies_payload() -> bytes:
+    values = list({**MOVIES[0].model_dump(), "title": None}.values())
+    return ormsgpack.packb([ormsgpack.Ext(1, ormsgpack.packb([1, values]))])
+
+
+def _corrupt_candidates(saver) -> None:
+    for key, (type_, _) in list(saver.blobs.items()):
+        if key[2] == "candidate_movies" and type_ == COMPACT_TYPE:
+            saver.blobs[key] = (type_, _invalid_movies_payload())
+
+
+def _workflow(
+    checkpointer,
+    mock_input_agent,
+    mock_movies_responder,
+    mock_system_responder,
+    mock_movie_finder,
+    stub_recommendation_writer,
+    evaluator,
+):
+    mock_input_agent.decide.return_value = InputDecision(
+        route="movies", constraints=Constraints(genres=["comedy"])
+    )
+    mock_movie_finder.find_movies.return_value = MOVIES
+    return MovieNightWorkflow(
+        orchestrator=None,
+        movies_responder=mock_movies_responder,
+        system_responder=mock_system_responder,
+        input_agent=mock_input_agent,
+        movie_finder=mock_movie_finder,
+        recommendation_writer=stub_recommendation_writer,
+        evaluator=evaluator,
+        checkpointer=checkpointer,
+    )
+
+
+def _flaky_evaluator(failures: int = 1):
+    evaluator = MagicMock(spec=StubEvaluatorAgent)
+    calls = {"count": 0}
+
+    def evaluate(**kwargs):
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise RuntimeError("evaluator timed out")
+        return StubEvaluatorAgent().evaluate(**kwargs)
+
+    evaluator.evaluate.side_effect = evaluate
+    return evaluator
+
+
+@pytest.fixture
+def agents(
+    mock_input_agent,
+    mock_movies_responder,
+    mock_system_responder,
+    mock_movie_finder,
+    stub_recommendation_writer,
+):
+    return (
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        mock_movie_finder,
+        stub_recommendation_writer,
+    )
+
+
+class TestResumableRuns:
+    def test_retry_resumes_after_last_completed_node(self, agents):
+        input_agent, _, _, finder, _ = agents
+        checkpointer = create_checkpointer("memory")
+        workflow = _workflow(checkpointer, *agents, _flaky_evaluator())
+
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+        result = workflow.invoke("a comedy", run_key="req-1")
+
+        assert result["final_response"]
+        input_agent.decide.assert_called_once()
+        finder.find_movies.assert_called_once()
+
+    def test_completed_run_is_forgotten(self, agents):
+        input_agent, *_ = agents
+        checkpointer = create_checkpointer("memory")
+        workflow = _workflow(checkpointer, *agents, StubEvaluatorAgent())
+
+        workflow.invoke("a comedy", run_key="req-1")
+        workflow.invoke("a comedy", run_key="req-1")
+
+        assert input_agent.decide.call_count == 2
+        assert checkpointer.get_tuple({"configurable": {"thread_id": "req-1"}}) is None
+
+    def test_resume_uses_the_new_deadline(self, agents):
+        checkpointer = create_checkpointer("memory")
+        workflow = _workflow(checkpointer, *agents, _flaky_evaluator())
+
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1", deadline=Deadline(time.time() + 60))
+        retry_deadline = Deadline.after(30)
+        result = workflow.invoke("a comedy", run_key="req-1", deadline=retry_deadline)
+
+        assert result["deadline_at"] == retry_deadline.expires_at
+
+    def test_undecodable_checkpoint_is_discarded(self, agents):
+        input_agent, *_ = agents
+        checkpointer = create_checkpointer("memory")
+        workflow = _workflow(checkpointer, *agents, _flaky_evaluator())
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+        _corrupt_candidates(checkpointer)
+
+        result = workflow.invoke("a comedy", run_key="req-1")
+
+        assert result["final_response"]
+        assert input_agent.decide.call_count == 2
+
+    def test_runs_without_key_are_not_checkpointed(self, agents):
+        checkpointer = MagicMock(spec=InMemorySaver)
+        workflow = _workflow(checkpointer, *agents, StubEvaluatorAgent())
+
+        assert workflow.invoke("a comedy")["final_response"]
+        checkpointer.put.assert_not_called()
+
+
+class TestSQLiteCheckpointSaver:
+    def test_resume_survives_restart(self, tmp_path, agents):
+        input_agent, *_ = agents
+        path = str(tmp_path / "checkpoints.db")
+        first = _workflow(SQLiteCheckpointSaver(path), *agents, _flaky_evaluator())
+
+        with pytest.raises(RuntimeError):
+            first.invoke("a comedy", run_key="req-1")
+
+        second = _workflow(SQLiteCheckpointSaver(path), *agents, StubEvaluatorAgent())
+        result = second.invoke("a comedy", run_key="req-1")
+
+        assert result["final_response"]
+        input_agent.decide.assert_called_once()
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone() == (0,)
+
+    def test_undecodable_checkpoint_is_discarded(self, tmp_path, agents):
+        input_agent, *_ = agents
+        path = str(tmp_path / "checkpoints.db")
+        first = _workflow(SQLiteCheckpointSaver(path), *agents, _flaky_evaluator())
+        with pytest.raises(RuntimeError):
+            first.invoke("a comedy", run_key="req-1")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "UPDATE blobs SET value = ? WHERE channel = 'candidate_movies' AND type = ?",
+                (_invalid_movies_payload(), COMPACT_TYPE),
+            )
+
+        second = _workflow(SQLiteCheckpointSaver(path), *agents, StubEvaluatorAgent())
+        result = second.invoke("a comedy", run_key="req-1")
+
+        assert result["final_response"]
+        assert input_agent.decide.call_count == 2
+
+    def test_candidates_are_stored_compactly(self, tmp_path, agents):
+        path = str(tmp_path / "checkpoints.db")
+        workflow = _workflow(SQLiteCheckpointSaver(path), *agents, _flaky_evaluator())
+
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+
+        with sqlite3.connect(path) as conn:
+            types = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT type FROM blobs WHERE channel = 'candidate_movies'"
+                )
+            }
+        assert COMPACT_TYPE in types
+
+    def test_closes_its_connections(self, tmp_path, agents, sqlite_connections):
+        workflow = _workflow(
+            SQLiteCheckpointSaver(str(tmp_path / "checkpoints.db")), *agents, _flaky_evaluator()
+        )
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+
+        assert sqlite_connections
+        assert open_connections(sqlite_connections) == 0
+
+    def test_purges_expired_threads(self, tmp_path, agents):
+        path = str(tmp_path / "checkpoints.db")
+        workflow = _workflow(SQLiteCheckpointSaver(path), *agents, _flaky_evaluator())
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+
+        SQLiteCheckpointSaver(path, ttl_seconds=-1)
+
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone() == (0,)
+
+    def test_purges_expired_threads_while_running(self, tmp_path, agents):
+        path = str(tmp_path / "checkpoints.db")
+        saver = SQLiteCheckpointSaver(path, ttl_seconds=-1, purge_interval_seconds=0)
+        workflow = _workflow(saver, *agents, _flaky_evaluator(failures=2))
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-2")
+
+        with sqlite3.connect(path) as conn:
+            threads = {row[0] for row in conn.execute("SELECT thread_id FROM checkpoints")}
+        assert threads == {"req-2"}
+
+
+class TestExpiringMemorySaver:
+    def test_is_the_memory_backend(self):
+        assert isinstance(create_checkpointer("memory"), ExpiringMemorySaver)
+
+    def test_purges_abandoned_threads(self, agents):
+        saver = ExpiringMemorySaver(ttl_seconds=-1, purge_interval_seconds=0)
+        workflow = _workflow(saver, *agents, _flaky_evaluator(failures=2))
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-2")
+
+        assert set(saver.storage) == {"req-2"}
+
+    def test_keeps_threads_within_ttl(self, agents):
+        saver = ExpiringMemorySaver(purge_interval_seconds=0)
+        workflow = _workflow(saver, *agents, _flaky_evaluator(failures=2))
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-2")
+
+        assert set(saver.storage) == {"req-1", "req-2"}
+
+    def test_purge_waits_for_reads_in_progress(self, agents):
+        saver = ExpiringMemorySaver(ttl_seconds=-1)
+        workflow = _workflow(saver, *agents, _flaky_evaluator())
+        with pytest.raises(RuntimeError):
+            workflow.invoke("a comedy", run_key="req-1")
+        reading, release = threading.Event(), threading.Event()
+        read = InMemorySaver.get_tuple
+
+        def slow_read(self, config):
+            reading.set()
+            release.wait(5)
+            return read(self, config)
+
+        with patch.object(InMemorySaver, "get_tuple", slow_read), ThreadPoolExecutor(1) as pool:
+            pending = pool.submit(saver.get_tuple, {"configurable": {"thread_id": "req-1"}})
+            reading.wait(5)
+            purge = threading.Thread(target=saver.purge_expired)
+            purge.start()
+            purge.join(0.2)
+            assert purge.is_alive()
+            release.set()
+            purge.join(5)
+
+            assert pending.result() is not None
+        assert not saver.storage.get("req-1")
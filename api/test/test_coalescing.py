@@ -0,0 +1,395 @@
+"""Tests for coalescing identical concurrent TMDB and LLM calls."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import AzureChatOpenAI
+
+from app.integrations.tmdb_client import TMDBClient
+from app.llm.client import ResilientAzureChatOpenAI
+from app.observability.metrics import REGISTRY
+from app.resilience import AsyncSingleFlight, SingleFlight
+from app.resilience.singleflight import SINGLEFLIGHT_CALLS, SINGLEFLIGHT_RATIO
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+_gate = threading.Event()
+
+
+@pytest.fixture(autouse=True)
+def gate():
+    _gate.clear()
+    yield
+    _gate.set()
+
+
+def _run_concurrently(fn, callers: int = 3):
+    """Call ``fn`` from several threads, opening ``_gate`` once all started."""
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        futures = [pool.submit(fn) for _ in range(callers)]
+        time.sleep(0.1)
+        _gate.set()
+        return [f.result() for f in futures]
+
+
+class TestSingleFlightMetrics:
+    def test_named_group_reports_coalescing_ratio(self):
+        group = SingleFlight(name="tmdb")
+
+        def work():
+            _gate.wait(5)
+            return 1
+
+        _run_concurrently(lambda: group.do("k", work), callers=4)
+
+        assert SINGLEFLIGHT_CALLS.labels(upstream="tmdb", result="executed").value == 1
+        assert SINGLEFLIGHT_CALLS.labels(upstream="tmdb", result="shared").value == 3
+        assert SINGLEFLIGHT_RATIO.labels(upstream="tmdb").value == 0.75
+
+    def test_unnamed_group_is_not_counted(self):
+        SingleFlight().do("k", lambda: 1)
+
+        assert "singleflight_calls_total{" not in REGISTRY.render()
+
+
+class TestSingleFlightAsyncCallers:
+    def test_async_caller_joins_call_from_another_thread(self):
+        group = SingleFlight()
+        started = threading.Event()
+
+        def work():
+            started.set()
+            _gate.wait(5)
+            return "done"
+
+        async def work_async():
+            return "own"
+
+        async def join():
+            started.wait(5)
+            task = asyncio.create_task(group.ado("k", work_async))
+            await asyncio.sleep(0.05)
+            assert not task.done()
+            _gate.set()
+            return await task
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(group.do, "k", work)
+            assert asyncio.run(join()) == ("done", True)
+            assert leader.result(timeout=5) == ("done", False)
+
+    def test_async_waiter_retries_when_errors_are_not_shared(self):
+        group = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            if len(calls) == 1:
+                raise ValueError("boom")
+            return "done"
+
+        async def main():
+            return await asyncio.gather(
+                *(group.ado("k", work, share_errors=False) for _ in range(2)),
+                return_exceptions=True,
+            )
+
+        leader, waiter = asyncio.run(main())
+
+        assert isinstance(leader, ValueError)
+        assert waiter == ("done", False)
+        assert group.in_flight() == 0
+
+
+class TestAsyncSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            return await asyncio.gather(*(group.do("k", work) for _ in range(3)))
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True, True]
+        assert group.in_flight() == 0
+
+    def test_errors_are_shared(self):
+        group = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            raise ValueError("boom")
+
+        async def main():
+            return await asyncio.gather(
+                *(group.do("k", work) for _ in range(2)), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_cancelled_waiter_does_not_cancel_call(self):
+        group = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            leader = asyncio.create_task(group.do("k", work))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(group.do("k", work))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            return await leader
+
+        assert asyncio.run(main()) == ("done", False)
+
+    def test_waiters_can_retry_instead_of_sharing_errors(self):
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            if len(calls) == 1:
+                raise ValueError("boom")
+            return "done"
+
+        async def main():
+            return await asyncio.gather(
+                *(group.do("k", work, share_errors=False) for _ in range(2)),
+                return_exceptions=True,
+            )
+
+        leader, waiter = asyncio.run(main())
+
+        assert isinstance(leader, ValueError)
+        assert waiter == ("done", False)
+
+    def test_waiter_times_out_without_cancelling_call(self):
+        group = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        async def main():
+            leader = asyncio.create_task(group.do("k", work))
+            await asyncio.sleep(0)
+            with pytest.raises(TimeoutError):
+                await group.do("k", work, timeout=0.01)
+            return await leader
+
+        assert asyncio.run(main()) == ("done", False)
+
+
+class TestTMDBCoalescing:
+    def _slow_get(self):
+        response = MagicMock()
+        response.json.return_value = {"results": [{"id": 287}]}
+
+        def get(*args, **kwargs):
+            _gate.wait(5)
+            return response
+
+        return get
+
+    def test_concurrent_identical_requests_share_one_call(self):
+        client = TMDBClient(api_key="test-key")
+
+        with patch.object(httpx.Client, "get", side_effect=self._slow_get()) as mock_get:
+            results = _run_concurrently(lambda: client.search_person("Brad Pitt"))
+
+        assert results == [287, 287, 287]
+        mock_get.assert_called_once()
+
+    def test_different_params_are_not_shared(self):
+        client = TMDBClient(api_key="test-key")
+
+        with patch.object(httpx.Client, "get", side_effect=self._slow_get()) as mock_get:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [
+                    pool.submit(client.search_person, name)
+                    for name in ("Brad Pitt", "Tom Hanks")
+                ]
+                time.sleep(0.1)
+                _gate.set()
+                [f.result() for f in futures]
+
+        assert mock_get.call_count == 2
+
+    def test_coalescing_can_be_disabled(self):
+        client = TMDBClient(api_key="test-key", coalesce=False)
+
+        with patch.object(httpx.Client, "get", side_effect=self._slow_get()) as mock_get:
+            _run_concurrently(lambda: client.search_person("Brad Pitt"))
+
+        assert mock_get.call_count == 3
+
+
+def _chat_model(**kwargs) -> ResilientAzureChatOpenAI:
+    return ResilientAzureChatOpenAI(
+        azure_endpoint="https://example.openai.azure.com/",
+        api_key="key",
+        api_version="2024-08-01-preview",
+        azure_deployment="gpt-4o",
+        **kwargs,
+    )
+
+
+def _result() -> ChatResult:
+    message = AIMessage(
+        content="comedy",
+        usage_metadata={"input_tokens": 100, "output_tokens": 5, "total_tokens": 105},
+    )
+    return ChatResult(
+        generations=[ChatGeneration(message=message)],
+        llm_output={"token_usage": {"prompt_tokens": 100, "completion_tokens": 5}},
+    )
+
+
+class TestLLMCoalescing:
+    def test_identical_prompts_share_one_completion(self):
+        model = _chat_model(coalesce=True, temperature=0)
+        messages = [HumanMessage(content="Classify: a funny movie")]
+
+        def generate(*args, **kwargs):
+            _gate.wait(5)
+            return _result()
+
+        with patch.object(AzureChatOpenAI, "_generate", side_effect=generate) as upstream:
+            results = _run_concurrently(lambda: model._generate(messages, timeout=5))
+
+        upstream.assert_called_once()
+        assert all(r.generations[0].message.content == "comedy" for r in results)
+        with_usage = [r for r in results if r.generations[0].message.usage_metadata]
+        assert len(with_usage) == 1
+
+    def test_timeout_does_not_split_calls(self):
+        model = _chat_model(coalesce=True, temperature=0)
+        messages = [HumanMessage(content="hi")]
+
+        assert model._call_key(messages, None, {"timeout": 1}) == model._call_key(
+            messages, None, {"timeout": 9}
+        )
+        assert model._call_key(messages, None, {}) != model._call_key(
+            [HumanMessage(content="hello")], None, {}
+        )
+
+    def test_sampled_completions_are_not_shared(self):
+        model = _chat_model(coalesce=True, temperature=0.7)
+        messages = [HumanMessage(content="Write a pitch for Arrival")]
+
+        def generate(*args, **kwargs):
+            _gate.wait(5)
+            return _result()
+
+        with patch.object(AzureChatOpenAI, "_generate", side_effect=generate) as upstream:
+            _run_concurrently(lambda: model._generate(messages, timeout=5), callers=2)
+
+        assert upstream.call_count == 2
+
+    def test_failed_call_is_retried_by_waiters(self):
+        model = _chat_model(coalesce=True, temperature=0)
+        messages = [HumanMessage(content="hi")]
+        calls = []
+
+        def generate(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                _gate.wait(5)
+                raise TimeoutError("leader ran out of time")
+            return _result()
+
+        def call():
+            try:
+                return model._generate(messages, timeout=5)
+            except TimeoutError as e:
+                return e
+
+        with patch.object(AzureChatOpenAI, "_generate", side_effect=generate):
+            results = _run_concurrently(call)
+
+        assert len(calls) == 3
+        assert sum(isinstance(r, TimeoutError) for r in results) == 1
+        assert sum(isinstance(r, ChatResult) for r in results) == 2
+
+    def test_waiter_gives_up_after_its_own_timeout(self):
+        model = _chat_model(coalesce=True, temperature=0)
+        messages = [HumanMessage(content="hi")]
+        started = threading.Event()
+
+        def generate(*args, **kwargs):
+            started.set()
+            _gate.wait(5)
+            return _result()
+
+        with (
+            patch.object(AzureChatOpenAI, "_generate", side_effect=generate),
+            ThreadPoolExecutor(max_workers=1) as pool,
+        ):
+            leader = pool.submit(model._generate, messages, timeout=5)
+            started.wait(5)
+            begun = time.perf_counter()
+            with pytest.raises(TimeoutError):
+                model._generate(messages, timeout=0.1)
+            waited = time.perf_counter() - begun
+            _gate.set()
+            leader.result()
+
+        assert waited < 1
+
+    def test_disabled_by_default(self):
+        model = _chat_model(temperature=0)
+        messages = [HumanMessage(content="hi")]
+
+        def generate(*args, **kwargs):
+            _gate.wait(5)
+            return _result()
+
+        with patch.object(AzureChatOpenAI, "_generate", side_effect=generate) as upstream:
+            _run_concurrently(lambda: model._generate(messages), callers=2)
+
+        assert upstream.call_count == 2
+
+    def test_async_identical_prompts_share_one_completion(self):
+        model = _chat_model(coalesce=True, temperature=0)
+        messages = [HumanMessage(content="Classify: a funny movie")]
+
+        async def agenerate(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return _result()
+
+        async def main():
+            return await asyncio.gather(
+                *(model._agenerate(messages) for _ in range(3))
+            )
+
+        with patch.object(AzureChatOpenAI, "_agenerate", side_effect=agenerate) as upstream:
+            results = asyncio.run(main())
+
+        upstream.assert_called_once()
+        assert len(results) == 3
@@ -0,0 +1,431 @@
+"""Tests for the SLO-aware degradation controller and the degraded workflow."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.llm.movie_finder_agent import cap_search_query
+from app.llm.recommendation_agent import RecommendationWriterAgent
+from app.llm.state import DEGRADED_FINDER_LOOKUPS
+from app.llm.workflow import (
+    MovieNightWorkflow,
+    create_evaluate_node,
+    create_find_movies_node,
+    create_rag_respond_node,
+    create_write_recommendation_node,
+)
+from app.llm.workflow.streaming import stream_movie_recommendation
+from app.main import app
+from app.observability.metrics import REGISTRY
+from app.observability.usage import LLMCallUsage, record_usage
+from app.resilience import (
+    DEGRADATION_LEVELS,
+    DegradationController,
+    current_degradation_level,
+    measure_active,
+    set_degradation_controller,
+)
+from app.resilience.degradation import DEGRADATION_CHANGES, DEGRADATION_LEVEL
+from app.schemas.domain import DraftRecommendation, EvaluationResult, RetrievedContext
+from app.schemas.orchestrator import Constraints, InputDecision, MovieSearchQuery
+
+from conftest import make_movie
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+    set_degradation_controller(None)
+    routes.cleanup_workflow()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _controller(clock: FakeClock, **kwargs) -> DegradationController:
+    options = {
+        "slos": {"llm": 2.0, "tmdb": 0.5},
+        "window_seconds": 60,
+        "min_samples": 5,
+        "step_seconds": 10,
+        "recovery_seconds": 30,
+        "check_interval": 0,
+        "clock": clock,
+        **kwargs,
+    }
+    return DegradationController(**options)
+
+
+def _observe(controller: DegradationController, upstream: str, seconds: float, n: int = 5):
+    for _ in range(n):
+        controller.observe(upstream, seconds)
+
+
+def _state(level: str, **values) -> dict:
+    return {"degradation_level": DEGRADATION_LEVELS.index(level), **values}
+
+
+class TestDegradationController:
+    def test_steps_down_one_level_per_step_interval_while_over_slo(self):
+        clock = FakeClock()
+        controller = _controller(clock)
+
+        _observe(controller, "llm", 3.0)
+        assert controller.level == 1
+
+        clock.now = 5.0
+        _observe(controller, "llm", 3.0)
+        assert controller.level == 1
+
+        clock.now = 10.0
+        assert controller.level == 2
+        assert controller.level_name == "template_writer"
+        assert DEGRADATION_LEVEL.labels().value == 2
+        assert DEGRADATION_CHANGES.labels(direction="down").value == 2
+
+    def test_any_upstream_over_its_slo_degrades(self):
+        clock = FakeClock()
+        controller = _controller(clock)
+
+        _observe(controller, "llm", 1.0)
+        _observe(controller, "tmdb", 0.8)
+
+        assert controller.level == 1
+
+    def test_steps_up_after_latency_stays_low_for_recovery_time(self):
+        clock = FakeClock()
+        controller = _controller(clock, window_seconds=5)
+        _observe(controller, "llm", 3.0)
+        clock.now = 10.0
+        _observe(controller, "llm", 3.0)
+        assert controller.level == 2
+
+        clock.now = 20.0
+        _observe(controller, "llm", 0.5)
+        clock.now = 40.0
+        _observe(controller, "llm", 0.5)
+        assert controller.level == 2
+
+        clock.now = 50.0
+        assert controller.level == 1
+        clock.now = 70.0
+        assert controller.level == 1
+        clock.now = 80.0
+        assert controller.level == 0
+        assert DEGRADATION_CHANGES.labels(direction="up").value == 2
+
+    def test_latency_between_recovery_and_slo_holds_the_level(self):
+        clock = FakeClock()
+        controller = _controller(clock, window_seconds=5)
+        _observe(controller, "llm", 3.0)
+
+        for second in range(10, 200, 5):
+            clock.now = float(second)
+            _observe(controller, "llm", 1.8)
+
+        assert controller.level == 1
+
+    def test_never_goes_past_max_level(self):
+        clock = FakeClock()
+        controller = _controller(clock, max_level=2)
+
+        for second in range(0, 100, 10):
+            clock.now = float(second)
+            _observe(controller, "llm", 10.0)
+
+        assert controller.level == 2
+
+    def test_needs_min_samples_before_acting(self):
+        controller = _controller(FakeClock())
+
+        _observe(controller, "llm", 30.0, n=4)
+
+        assert controller.level == 0
+        assert controller.latency_quantiles() == {"llm": None, "tmdb": None}
+
+    def test_ignores_upstreams_without_slo(self):
+        controller = _controller(FakeClock())
+
+        _observe(controller, "search", 30.0)
+
+        assert controller.level == 0
+
+    def test_rejects_unknown_max_level(self):
+        with pytest.raises(ValueError):
+            DegradationController({"llm": 1.0}, max_level=len(DEGRADATION_LEVELS))
+
+    def test_status_reports_level_measures_and_latencies(self):
+        clock = FakeClock()
+        controller = _controller(clock)
+        _observe(controller, "llm", 3.0)
+        clock.now = 4.0
+
+        status = controller.status()
+
+        assert status == {
+            "level": 1,
+            "name": "rules_evaluator",
+            "measures": ["rules_evaluator"],
+            "seconds_at_level": 4.0,
+            "latency_seconds": {"llm": 3.0, "tmdb": None},
+            "slo_seconds": {"llm": 2.0, "tmdb": 0.5},
+        }
+
+    def test_measures_accumulate_with_level(self):
+        assert not measure_active(0, "rules_evaluator")
+        assert measure_active(2, "rules_evaluator")
+        assert measure_active(2, "template_writer")
+        assert not measure_active(2, "capped_finder")
+
+
+class TestLatencyFeed:
+    def test_llm_usage_is_observed_by_installed_controller(self):
+        controller = _controller(FakeClock())
+        set_degradation_controller(controller)
+
+        for _ in range(5):
+            record_usage(LLMCallUsage(
+                node="respond", agent="writer", model="gpt-4o",
+                prompt_tokens=10, completion_tokens=5, latency_seconds=4.0,
+            ))
+
+        assert controller.latency_quantiles()["llm"] == 4.0
+        assert current_degradation_level() == 1
+
+    def test_results_not_made_upstream_are_not_observed(self):
+        controller = _controller(FakeClock())
+        set_degradation_controller(controller)
+
+        for _ in range(5):
+            record_usage(LLMCallUsage(
+                node="respond", agent="writer", model="gpt-4o",
+                prompt_tokens=10, completion_tokens=5, latency_seconds=4.0,
+            ))
+        for source in ("cache", "shared", "cassette") * 5:
+            record_usage(LLMCallUsage(
+                node="respond", agent="writer", model="gpt-4o",
+                prompt_tokens=0, completion_tokens=0, latency_seconds=0.0,
+                served_from=source,
+            ))
+
+        assert controller.latency_quantiles()["llm"] == 4.0
+        assert current_degradation_level() == 1
+
+    def test_level_is_zero_without_controller(self):
+        assert current_degradation_level() == 0
+
+
+class TestCapSearchQuery:
+    def test_keeps_first_lookups_and_drops_text_search(self):
+        query = MovieSearchQuery(
+            actors=["Tom Hanks", "Meg Ryan"],
+            directors=["Nora Ephron"],
+            keywords=["new york"],
+            year=1993,
+            text_query="romantic comedy",
+        )
+
+        capped = cap_search_query(query, 2)
+
+        assert capped.actors == ["Tom Hanks", "Meg Ryan"]
+        assert capped.directors == []
+        assert capped.keywords == []
+        assert capped.text_query is None
+        assert capped.year == 1993
+
+    def test_returns_query_itself_when_within_cap(self):
+        query = MovieSearchQuery(actors=["Tom Hanks"], keywords=["space"])
+
+        assert cap_search_query(query, 2) is query
+
+
+class TestDegradedNodes:
+    def test_rules_evaluator_skips_the_evaluator_llm(self, mock_evaluator):
+        draft = DraftRecommendation(
+            movie=make_movie("1", "Long Movie", runtime_minutes=180),
+            recommendation_text="Watch Long Movie.",
+        )
+        node = create_evaluate_node(mock_evaluator)
+
+        result = node(_state(
+            "rules_evaluator",
+            user_message="something short",
+            constraints=Constraints(max_runtime_minutes=100),
+            draft_recommendation=draft,
+            rejected_titles=[],
+            retry_count=0,
+        ))
+
+        mock_evaluator.evaluate.assert_not_called()
+        assert result["evaluation_result"].passed is False
+        assert result["rejected_titles"] == ["Long Movie"]
+        assert result["degraded_nodes"] == ["evaluate"]
+
+    def test_full_level_uses_the_evaluator_llm(self, mock_evaluator):
+        mock_evaluator.evaluate.return_value = EvaluationResult(
+            passed=True, score=0.9, feedback="ok"
+        )
+        draft = DraftRecommendation(
+            movie=make_movie("1", "Movie"), recommendation_text="Watch Movie."
+        )
+        node = create_evaluate_node(mock_evaluator)
+
+        result = node(_state(
+            "full",
+            constraints=Constraints(),
+            draft_recommendation=draft,
+            rejected_titles=[],
+            retry_count=0,
+        ))
+
+        mock_evaluator.evaluate.assert_called_once()
+        assert "degraded_nodes" not in result
+
+    def test_template_writer_skips_the_writer_llm(self, mock_recommendation_writer):
+        node = create_write_recommendation_node(mock_recommendation_writer)
+
+        result = node(_state(
+            "template_writer",
+            user_message="sci-fi",
+            constraints=Constraints(genres=["sci-fi"]),
+            candidate_movies=[make_movie("1", "The Matrix", genres=["Sci-Fi"])],
+            rejected_titles=[],
+        ))
+
+        mock_recommendation_writer.write.assert_not_called()
+        assert result["draft_recommendation"].movie.title == "The Matrix"
+        assert result["degraded_nodes"] == ["write_recommendation"]
+
+    def test_capped_finder_limits_lookups(self, mock_movie_finder):
+        mock_movie_finder.find_movies.return_value = []
+        query = MovieSearchQuery(
+            actors=["A", "B"], directors=["C"], text_query="heist"
+        )
+        node = create_find_movies_node(mock_movie_finder)
+
+        result = node(_state("capped_finder", search_query=query))
+
+        sent = mock_movie_finder.find_movies.call_args.kwargs["search_query"]
+        assert len(sent.actors) + len(sent.directors) == DEGRADED_FINDER_LOOKUPS
+        assert sent.text_query is None
+        assert result["degraded_nodes"] == ["find_movies"]
+
+    def test_template_writer_level_does_not_cap_finder(self, mock_movie_finder):
+        mock_movie_finder.find_movies.return_value = []
+        query = MovieSearchQuery(actors=["A", "B", "C"])
+        node = create_find_movies_node(mock_movie_finder)
+
+        result = node(_state("template_writer", search_query=query))
+
+        assert mock_movie_finder.find_movies.call_args.kwargs["search_query"] is query
+        assert "degraded_nodes" not in result
+
+    def test_cached_rag_reuses_earlier_answers_without_llm(self, mock_rag_agent):
+        mock_rag_agent.answer.return_value = "Movies are ranked by rating."
+        contexts = [RetrievedContext(content="Ranking uses TMDB ratings.", source="rag")]
+        node = create_rag_respond_node(mock_rag_agent)
+        node(_state("full", user_message="How are movies ranked?", retrieved_contexts=contexts))
+
+        repeated = node(_state(
+            "cached_rag", user_message="how are  movies ranked?", retrieved_contexts=contexts
+        ))
+        new = node(_state(
+            "cached_rag", user_message="What is the knowledge base?", retrieved_contexts=contexts
+        ))
+
+        assert mock_rag_agent.answer.call_count == 1
+        assert repeated["final_response"] == "Movies are ranked by rating."
+        assert "Ranking uses TMDB ratings." in new["final_response"]
+        assert new["degraded_nodes"] == ["rag_respond"]
+
+
+class TestDegradedWorkflow:
+    def test_requests_run_at_the_installed_controller_level(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        mock_recommendation_writer,
+        mock_evaluator,
+    ):
+        controller = _controller(FakeClock(), max_level=2, step_seconds=0)
+        _observe(controller, "llm", 5.0)
+        set_degradation_controller(controller)
+        mock_input_agent.decide.return_value = InputDecision(
+            route="movies",
+            constraints=Constraints(genres=["sci-fi"]),
+            needs_recommendation=True,
+        )
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=mock_recommendation_writer,
+            evaluator=mock_evaluator,
+        )
+
+        result = workflow.invoke("A sci-fi movie")
+
+        assert result["degradation_level"] == 2
+        mock_recommendation_writer.write.assert_not_called()
+        mock_evaluator.evaluate.assert_not_called()
+        assert result["final_response"]
+        assert {"write_recommendation", "evaluate"} <= set(result["degraded_nodes"])
+
+
+class TestDegradedStream:
+    def test_template_writer_streams_deterministic_text(self):
+        writer = MagicMock(spec=RecommendationWriterAgent)
+        movie = make_movie("1", "The Matrix", genres=["Sci-Fi"])
+        state = _state(
+            "template_writer",
+            user_message="sci-fi",
+            constraints=Constraints(genres=["sci-fi"]),
+            rejected_titles=[],
+        )
+
+        events = list(stream_movie_recommendation(
+            state,
+            find_movies=lambda s: {"candidate_movies": [movie]},
+            writer=writer,
+            evaluate=None,
+            respond=lambda s: {"final_response": s["draft_recommendation"].recommendation_text},
+        ))
+
+        writer.write_stream.assert_not_called()
+        assert [e.event for e in events][-1] == "final"
+        assert "The Matrix" in "".join(e.text for e in events if e.event == "token")
+
+
+class TestHealth:
+    def test_health_reports_degradation_when_enabled(self):
+        clock = FakeClock()
+        controller = _controller(clock)
+        _observe(controller, "tmdb", 1.0)
+        routes.initialize_workflow(degradation_controller=controller)
+
+        r = TestClient(app).get("/health")
+
+        assert r.status_code == 200
+        body = r.json()
+        assert body["status"] == "ok"
+        assert body["degradation"]["level"] == 1
+        assert body["degradation"]["name"] == "rules_evaluator"
+        assert body["degradation"]["latency_seconds"] == {"llm": None, "tmdb": 1.0}
+
+    def test_health_is_unchanged_when_disabled(self):
+        routes.initialize_workflow()
+
+        assert TestClient(app).get("/health").json() == {"status": "ok"}
@@ -0,0 +1,292 @@
+"""Tests for singleflight coalescing and /chat request deduplication."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.idempotency import (
+    ChatDeduplicator,
+    IdempotencyKeyMismatch,
+    dedup_key,
+    request_fingerprint,
+)
+from app.llm.workflow import MovieNightWorkflow
+from app.main import app
+from app.resilience import SingleFlight
+from app.schemas import ChatRequest, ChatResponse
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        group = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "done"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            leader = pool.submit(group.do, "k", work)
+            started.wait(5)
+            followers = [pool.submit(group.do, "k", work) for _ in range(3)]
+            time.sleep(0.1)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert len(calls) == 1
+        assert results[0] == ("done", False)
+        assert results[1:] == [("done", True)] * 3
+        assert group.in_flight() == 0
+
+    def test_errors_are_shared_and_not_remembered(self):
+        group = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            group.do("k", fail)
+
+        assert group.do("k", lambda: 42) == (42, False)
+
+
+class TestDedupKey:
+    def test_prefers_idempotency_key(self):
+        request = ChatRequest(message="hi", session_id="s1")
+
+        assert dedup_key(request, "abc") == "idem:abc"
+
+    def test_session_and_normalized_message(self):
+        first = ChatRequest(message="A  Comedy ", session_id="s1")
+        retry = ChatRequest(message="a comedy", session_id="s1")
+        other_session = ChatRequest(message="a comedy", session_id="s2")
+
+        assert dedup_key(first) == dedup_key(retry)
+        assert dedup_key(first) != dedup_key(other_session)
+
+    def test_no_key_without_session(self):
+        assert dedup_key(ChatRequest(message="a comedy")) is None
+
+
+class TestChatDeduplicator:
+    def test_replays_completed_response(self):
+        dedup = ChatDeduplicator(ttl_seconds=30)
+        fn = MagicMock(return_value=ChatResponse(reply="Try Arrival."))
+
+        first = dedup.run("k", "fp", fn)
+        second = dedup.run("k", "fp", fn)
+
+        assert fn.call_count == 1
+        assert first[1] is False
+        assert second == (first[0], True)
+
+    def test_expired_responses_are_recomputed(self):
+        dedup = ChatDeduplicator(ttl_seconds=30)
+        fn = MagicMock(return_value=ChatResponse(reply="Try Arrival."))
+        dedup.run("k", "fp", fn)
+
+        with patch("app.api.idempotency.time.time", return_value=time.time() + 60):
+            dedup.run("k", "fp", fn)
+
+        assert fn.call_count == 2
+
+    def test_rejects_key_reused_for_other_request(self):
+        dedup = ChatDeduplicator()
+        dedup.run("k", "fp", lambda: ChatResponse(reply="Try Arrival."))
+
+        with pytest.raises(IdempotencyKeyMismatch):
+            dedup.run("k", "other", lambda: ChatResponse(reply="Try Moon."))
+
+    def test_failures_are_not_cached(self):
+        dedup = ChatDeduplicator()
+        fn = MagicMock(side_effect=[RuntimeError("boom"), ChatResponse(reply="ok")])
+
+        with pytest.raises(RuntimeError):
+            dedup.run("k", "fp", fn)
+
+        assert dedup.run("k", "fp", fn)[0].reply == "ok"
+
+    def test_without_replay_only_in_flight_runs_are_shared(self):
+        dedup = ChatDeduplicator(ttl_seconds=30)
+        fn = MagicMock(return_value=ChatResponse(reply="Try Arrival."))
+
+        first = dedup.run("k", "fp", fn, replay=False)
+        second = dedup.run("k", "fp", fn, replay=False)
+
+        assert fn.call_count == 2
+        assert first[1] is False
+        assert second[1] is False
+
+    def test_rejects_key_in_use_by_other_request(self):
+        dedup = ChatDeduplicator()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return ChatResponse(reply="Try Arrival.")
+
+        other = MagicMock(return_value=ChatResponse(reply="Try Moon."))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(dedup.run, "k", "fp", slow)
+            started.wait(5)
+            waiter = pool.submit(dedup.run, "k", "other", other)
+            time.sleep(0.05)
+            release.set()
+            assert leader.result(timeout=5)[0].reply == "Try Arrival."
+            with pytest.raises(IdempotencyKeyMismatch):
+                waiter.result(timeout=5)
+
+        other.assert_not_called()
+        with pytest.raises(IdempotencyKeyMismatch):
+            dedup.run("k", "other", other)
+
+    def test_waiters_do_not_inherit_failures(self):
+        dedup = ChatDeduplicator()
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(dedup.run, "k", "fp", failing)
+            started.wait(5)
+            waiter = pool.submit(
+                dedup.run, "k", "fp", lambda: ChatResponse(reply="Try Arrival.")
+            )
+            time.sleep(0.05)
+            release.set()
+            with pytest.raises(RuntimeError):
+                leader.result(timeout=5)
+            response, replayed = waiter.result(timeout=5)
+
+        assert response.reply == "Try Arrival."
+        assert replayed is False
+
+    def test_async_waiters_do_not_block_the_loop(self):
+        dedup = ChatDeduplicator()
+        calls = []
+
+        async def main():
+            release = asyncio.Event()
+
+            async def slow():
+                calls.append(1)
+                await release.wait()
+                return ChatResponse(reply="Try Arrival.")
+
+            runs = [asyncio.create_task(dedup.arun("k", "fp", slow)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*runs)
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True, True]
+
+    def test_evicts_oldest_entries(self):
+        dedup = ChatDeduplicator(max_entries=2)
+        for key in ("a", "b", "c"):
+            dedup.run(key, "fp", lambda: ChatResponse(reply=key))
+
+        fn = MagicMock(return_value=ChatResponse(reply="again"))
+        dedup.run("a", "fp", fn)
+
+        fn.assert_called_once()
+
+
+@pytest.fixture
+def mock_workflow():
+    workflow = MagicMock(spec=MovieNightWorkflow)
+    workflow.invoke.return_value = {"final_response": "Try Arrival.", "route": "rag"}
+    return workflow
+
+
+@pytest.fixture
+def client(mock_workflow):
+    with (
+        patch.object(routes, "workflow", mock_workflow),
+        patch.object(routes, "session_store", None),
+        patch.object(routes, "deduplicator", ChatDeduplicator()),
+    ):
+        yield TestClient(app, raise_server_exceptions=False)
+
+
+class TestChatEndpoint:
+    def test_retry_with_idempotency_key_is_replayed(self, client, mock_workflow):
+        headers = {"Idempotency-Key": "req-1"}
+
+        first = client.post("/chat", json={"message": "sci-fi"}, headers=headers)
+        retry = client.post("/chat", json={"message": "sci-fi"}, headers=headers)
+
+        assert mock_workflow.invoke.call_count == 1
+        assert mock_workflow.invoke.call_args.kwargs["run_key"] == "idem:req-1"
+        assert retry.json() == first.json()
+        assert "Idempotent-Replayed" not in first.headers
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+    def test_reused_key_for_other_message_is_rejected(self, client):
+        headers = {"Idempotency-Key": "req-1"}
+
+        client.post("/chat", json={"message": "sci-fi"}, headers=headers)
+        r = client.post("/chat", json={"message": "comedy"}, headers=headers)
+
+        assert r.status_code == 422
+
+    def test_requests_without_key_or_session_always_run(self, client, mock_workflow):
+        client.post("/chat", json={"message": "sci-fi"})
+        client.post("/chat", json={"message": "sci-fi"})
+
+        assert mock_workflow.invoke.call_count == 2
+
+    def test_repeated_session_message_is_a_new_turn(self, client, mock_workflow):
+        body = {"message": "another one", "session_id": "s1"}
+
+        client.post("/chat", json=body)
+        second = client.post("/chat", json=body)
+
+        assert mock_workflow.invoke.call_count == 2
+        assert "Idempotent-Replayed" not in second.headers
+
+    def test_concurrent_duplicates_run_workflow_once(self, client, mock_workflow):
+        release = threading.Event()
+
+        def slow_invoke(*args, **kwargs):
+            release.wait(5)
+            return {"final_response": "Try Arrival.", "route": "rag"}
+
+        mock_workflow.invoke.side_effect = slow_invoke
+        body = {"message": "sci-fi", "session_id": "s1"}
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(client.post, "/chat", json=body) for _ in range(3)]
+            while mock_workflow.invoke.call_count == 0:
+                time.sleep(0.01)
+            time.sleep(0.2)
+            release.set()
+            responses = [f.result() for f in futures]
+
+        assert mock_workflow.invoke.call_count == 1
+        assert all(r.json()["reply"] == "Try Arrival." for r in responses)
+        assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 2
+
+
+def test_fingerprint_ignores_case_and_whitespace():
+    assert request_fingerprint(ChatRequest(message=" Sci-Fi ")) == request_fingerprint(
+        ChatRequest(message="sci-fi")
+    )
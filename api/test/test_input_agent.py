@@ -236,3 +236,22 @@ class TestInputDecisionSchema:
 
         with pytest.raises(ValueError):
             InputDecision(route="movies", confidence=-0.1)
+
+
+class TestInputOrchestratorAgentHistory:
+    def test_history_is_sent_before_the_message(self, input_agent, mock_llm):
+        mock_llm.invoke.return_value = InputDecision(route="movies", is_refinement=True)
+
+        decision = input_agent.decide("something shorter", history="User: a sci-fi movie")
+
+        messages = mock_llm.invoke.call_args.args[0]
+        assert "User: a sci-fi movie" in messages[1].content
+        assert messages[-1].content == "something shorter"
+        assert decision.is_refinement is True
+
+    def test_no_history_sends_only_the_message(self, input_agent, mock_llm):
+        mock_llm.invoke.return_value = InputDecision(route="movies")
+
+        input_agent.decide("a comedy")
+
+        assert len(mock_llm.invoke.call_args.args[0]) == 2
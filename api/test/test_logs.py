@@ -0,0 +1,203 @@
+"""Tests for structured, sampled logging and request correlation IDs."""
+
+import io
+import json
+import logging
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.batch import create_stub_workflow
+from app.observability.logs import (
+    ContextFilter,
+    JSONFormatter,
+    SamplingFilter,
+    TextFormatter,
+    configure_logging,
+    configure_logging_from_env,
+    parse_sample_rates,
+    redact,
+    request_id_scope,
+)
+from app.observability.tracing import start_span
+
+
+@pytest.fixture
+def capture():
+    """Capture records of the ``app`` loggers as parsed JSON lines."""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(ContextFilter())
+    handler.setFormatter(JSONFormatter(max_field_chars=40))
+    logger = logging.getLogger("app")
+    previous = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    def lines() -> list[dict]:
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield lines
+    logger.removeHandler(handler)
+    logger.setLevel(previous)
+
+
+def _record(name: str = "app.test", level: int = logging.INFO, msg: str = "hello",
+            args: tuple = (), **extra) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJSONFormatter:
+    def test_writes_context_fields_and_extras(self, capture):
+        with request_id_scope("req-1"), start_span("work") as span:
+            logging.getLogger("app.test").info(
+                "Workflow %s", "completed", extra={"route": "movies", "tokens": 12}
+            )
+
+        (line,) = capture()
+        assert line["message"] == "Workflow completed"
+        assert line["level"] == "INFO"
+        assert line["logger"] == "app.test"
+        assert line["request_id"] == "req-1"
+        assert line["trace_id"] == span.context.trace_id
+        assert line["span_id"] == span.context.span_id
+        assert (line["route"], line["tokens"]) == ("movies", 12)
+
+    def test_truncates_and_redacts(self):
+        formatter = JSONFormatter(max_field_chars=20)
+        record = _record(
+            msg="GET /movie?api_key=abc123 failed",
+            reply="x" * 50,
+            api_key="abc123",
+            headers={"Authorization": "Bearer abc.def"},
+        )
+
+        line = json.loads(formatter.format(record))
+
+        assert line["message"] == "GET /movie?api_key=[REDACTED]... [12 more chars]"
+        assert line["reply"] == "x" * 20 + "... [30 more chars]"
+        assert line["api_key"] == "[REDACTED]"
+        assert line["headers"] == {"Authorization": "[REDACTED]"}
+
+    def test_serializes_models(self):
+        from app.schemas.orchestrator import Constraints
+
+        record = _record(constraints=Constraints(genres=["comedy"]))
+
+        line = json.loads(JSONFormatter().format(record))
+
+        assert line["constraints"]["genres"] == ["comedy"]
+
+
+class TestTextFormatter:
+    def test_appends_fields(self):
+        record = _record(route="rag", request_id="req-2")
+
+        line = TextFormatter().format(record)
+
+        assert line.endswith(' - app.test - INFO - hello route="rag" request_id="req-2"')
+
+
+class TestRedact:
+    def test_masks_secrets_in_text(self):
+        assert redact("Authorization: Bearer sk-123") == "Authorization: Bearer [REDACTED]"
+        assert redact('{"password": "hunter2"}') == '{"password": "[REDACTED]"}'
+        assert redact("a plain sentence") == "a plain sentence"
+
+
+class TestSampling:
+    def test_rates_apply_to_child_loggers_and_spare_warnings(self):
+        sampler = SamplingFilter({"app.llm": 0.0, "app.llm.tiering": 1.0})
+
+        assert not sampler.filter(_record("app.llm.input_agent"))
+        assert sampler.filter(_record("app.llm.tiering"))
+        assert sampler.filter(_record("app.rag"))
+        assert sampler.filter(_record("app.llm.input_agent", logging.WARNING))
+
+    def test_keeps_the_configured_fraction(self):
+        sampler = SamplingFilter({"app": 0.25}, rng=random.Random(0))
+
+        kept = sum(sampler.filter(_record()) for _ in range(4000))
+
+        assert kept == pytest.approx(1000, rel=0.1)
+
+    def test_dropped_records_are_never_formatted(self):
+        formatted = []
+
+        class Payload:
+            def __repr__(self):
+                formatted.append(True)
+                return "payload"
+
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.addFilter(SamplingFilter({"sampled": 0.0}))
+        handler.setFormatter(JSONFormatter())
+        logger = logging.getLogger("sampled.test")
+        logger.propagate = False
+        logger.addHandler(handler)
+
+        logger.warning("reply: %r", Payload())
+        logger.info("reply: %r", Payload())
+        logger.removeHandler(handler)
+
+        assert len(formatted) == 1
+        assert stream.getvalue().count("\n") == 1
+
+    def test_configure_logging_replaces_its_handler(self):
+        root = logging.getLogger()
+        try:
+            first = configure_logging("DEBUG", log_format="text")
+            second = configure_logging("INFO", sample_rates={"app": 0.5})
+
+            assert first not in root.handlers
+            assert second in root.handlers
+            assert isinstance(second.formatter, JSONFormatter)
+            assert root.level == logging.INFO
+        finally:
+            configure_logging_from_env()
+
+    def test_parse_sample_rates(self):
+        assert parse_sample_rates("app.llm=0.1, app.rag=1") == {"app.llm": 0.1, "app.rag": 1.0}
+        assert parse_sample_rates("") == {}
+        with pytest.raises(ValueError):
+            parse_sample_rates("app.llm=2")
+        with pytest.raises(ValueError):
+            parse_sample_rates("app.llm")
+
+
+class TestRequestCorrelation:
+    @pytest.fixture
+    def client(self):
+        from app.main import app
+
+        routes.initialize_workflow(create_stub_workflow())
+        yield TestClient(app)
+        routes.cleanup_workflow()
+
+    def test_logs_one_summary_per_request_with_the_callers_id(self, client, capture):
+        r = client.post(
+            "/chat",
+            json={"message": "A comedy under 100 minutes"},
+            headers={"X-Request-ID": "abc-123"},
+        )
+
+        assert r.headers["X-Request-ID"] == "abc-123"
+        (summary,) = [line for line in capture() if line["message"] == "Workflow completed"]
+        assert summary["request_id"] == "abc-123"
+        assert summary["route"] == "movies"
+        assert "find_movies" in summary["nodes"]
+        assert not [line for line in capture() if line["level"] == "DEBUG"]
+
+    def test_generates_an_id_when_missing_or_invalid(self, client):
+        generated = client.get("/health").headers["X-Request-ID"]
+        replaced = client.get(
+            "/health", headers={"X-Request-ID": "bad id\nInjected: line"}
+        ).headers["X-Request-ID"]
+
+        assert len(generated) == 32
+        assert len(replaced) == 32 and replaced != generated
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -71,7 +71,9 @@ def test_chat_movies_route():
         assert data["reply"] == "Here are some comedy recommendations!"
         assert data["route"] == "movies"
         assert data["extracted_constraints"]["genres"] == ["comedy"]
-        mock_workflow.invoke.assert_called_once_with("Recommend a comedy movie")
+        mock_workflow.invoke.assert_called_once_with(
+            "Recommend a comedy movie", deadline=ANY, session=None, run_key=None
+        )
 
 
 def test_chat_rag_route():
@@ -96,7 +98,9 @@ def test_chat_rag_route():
         data = r.json()
         assert data["reply"] == "This app uses Azure OpenAI to help with movies."
         assert data["route"] == "rag"
-        mock_workflow.invoke.assert_called_once_with("How does this app work?")
+        mock_workflow.invoke.assert_called_once_with(
+            "How does this app work?", deadline=ANY, session=None, run_key=None
+        )
 
 
 def test_chat_hybrid_route():
@@ -122,7 +126,12 @@ def test_chat_hybrid_route():
         assert data["reply"] == "Here are horror movies for Halloween with history!"
         assert data["route"] == "hybrid"
         assert data["extracted_constraints"]["genres"] == ["horror"]
-        mock_workflow.invoke.assert_called_once_with("Horror movies for Halloween and their history")
+        mock_workflow.invoke.assert_called_once_with(
+            "Horror movies for Halloween and their history",
+            deadline=ANY,
+            session=None,
+            run_key=None,
+        )
 
 
 def test_chat_system_route_maps_to_rag():
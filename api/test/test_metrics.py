@@ -0,0 +1,194 @@
+"""Tests for the latency, workflow and cache metrics exported on /metrics."""
+
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.middleware import HTTP_REQUEST_SECONDS
+from app.cache import SharedCache
+from app.cache.store import SHARED_CACHE_HIT_RATIO
+from app.integrations.tmdb_client import TMDB_LATENCY, TMDB_REQUESTS, TMDBClient
+from app.llm.state import MAX_RETRIES
+from app.llm.workflow import MovieNightWorkflow
+from app.llm.workflow.graph_builder import WORKFLOW_RUN_SECONDS
+from app.llm.workflow.nodes import (
+    EVALUATOR_PASS_RATIO,
+    EVALUATOR_VERDICTS,
+    WORKFLOW_NODE_SECONDS,
+    WORKFLOW_RETRIES,
+    instrument_node,
+)
+from app.main import app
+from app.observability.metrics import REGISTRY
+from app.resilience import BatchMemo
+from app.resilience.memo import BATCH_MEMO_HIT_RATIO
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import Constraints, InputDecision
+
+from conftest import make_movie
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+    routes.cleanup_workflow()
+
+
+def _count(histogram, **labels) -> int:
+    _, _, count = histogram.labels(**labels).snapshot()
+    return count
+
+
+class TestRequestLatency:
+    def test_requests_are_observed_by_route_template(self):
+        wf = MagicMock(spec=MovieNightWorkflow)
+        wf.invoke.return_value = {"final_response": "Try Airplane!", "route": "movies"}
+        routes.initialize_workflow(wf)
+        client = TestClient(app)
+
+        client.post("/chat", json={"message": "a comedy"})
+        client.get("/health")
+        client.get("/no-such-page")
+
+        assert _count(HTTP_REQUEST_SECONDS, method="POST", path="/chat", status=200) == 1
+        assert _count(HTTP_REQUEST_SECONDS, method="GET", path="/health", status=200) == 1
+        assert _count(
+            HTTP_REQUEST_SECONDS, method="GET", path="unmatched", status=404
+        ) == 1
+
+    def test_metrics_endpoint_renders_request_histogram(self):
+        client = TestClient(app)
+
+        client.get("/health")
+        body = client.get("/metrics").text
+
+        assert 'http_request_duration_seconds_count{method="GET",path="/health",status="200"} 1' in body
+
+
+class TestNodeMetrics:
+    def test_node_durations_are_observed_by_outcome(self):
+        ok = instrument_node("find_movies", lambda state: {})
+
+        def fail(state):
+            raise RuntimeError("boom")
+
+        failing = instrument_node("evaluate", fail)
+
+        ok({})
+        with pytest.raises(RuntimeError):
+            failing({})
+
+        assert _count(WORKFLOW_NODE_SECONDS, node="find_movies", outcome="ok") == 1
+        assert _count(WORKFLOW_NODE_SECONDS, node="evaluate", outcome="error") == 1
+
+    def _workflow(self, mock_input_agent, mock_movies_responder, mock_system_responder,
+                  mock_movie_finder, stub_recommendation_writer, mock_evaluator):
+        mock_input_agent.decide.return_value = InputDecision(
+            route="movies",
+            constraints=Constraints(genres=["sci-fi"]),
+            needs_clarification=False,
+            needs_recommendation=True,
+            rag_query=None,
+        )
+        mock_movie_finder.find_movies.return_value = [
+            make_movie(str(i), title, genres=["Sci-Fi"], rating=8.0)
+            for i, title in enumerate(["Inception", "The Matrix", "Alien", "Dune"])
+        ]
+        return MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=mock_movie_finder,
+            recommendation_writer=stub_recommendation_writer,
+            evaluator=mock_evaluator,
+        )
+
+    def test_run_records_nodes_verdicts_and_retries(
+        self, mock_input_agent, mock_movies_responder, mock_system_responder,
+        mock_movie_finder, stub_recommendation_writer, mock_evaluator,
+    ):
+        mock_evaluator.evaluate.side_effect = [
+            EvaluationResult(passed=False, score=0.2, feedback="off-topic"),
+            EvaluationResult(passed=True, score=0.9, feedback="great"),
+        ]
+        workflow = self._workflow(
+            mock_input_agent, mock_movies_responder, mock_system_responder,
+            mock_movie_finder, stub_recommendation_writer, mock_evaluator,
+        )
+
+        workflow.invoke("Recommend a sci-fi movie")
+
+        for node in ("orchestrate", "find_movies", "respond"):
+            assert _count(WORKFLOW_NODE_SECONDS, node=node, outcome="ok") == 1
+        assert _count(WORKFLOW_NODE_SECONDS, node="write_recommendation", outcome="ok") == 2
+        assert _count(WORKFLOW_NODE_SECONDS, node="evaluate", outcome="ok") == 2
+        assert _count(WORKFLOW_RUN_SECONDS, route="movies") == 1
+        assert EVALUATOR_VERDICTS.labels(result="passed").value == 1
+        assert EVALUATOR_VERDICTS.labels(result="failed").value == 1
+        assert EVALUATOR_PASS_RATIO.labels().value == 0.5
+        _, total, count = WORKFLOW_RETRIES.labels().snapshot()
+        assert (total, count) == (1, 1)
+
+    def test_exhausted_retries_are_observed_once(
+        self, mock_input_agent, mock_movies_responder, mock_system_responder,
+        mock_movie_finder, stub_recommendation_writer, mock_evaluator,
+    ):
+        mock_evaluator.evaluate.return_value = EvaluationResult(
+            passed=False, score=0.1, feedback="always bad"
+        )
+        workflow = self._workflow(
+            mock_input_agent, mock_movies_responder, mock_system_responder,
+            mock_movie_finder, stub_recommendation_writer, mock_evaluator,
+        )
+
+        workflow.invoke("Recommend a sci-fi movie")
+
+        _, total, count = WORKFLOW_RETRIES.labels().snapshot()
+        assert (total, count) == (MAX_RETRIES, 1)
+        assert EVALUATOR_PASS_RATIO.labels().value == 0
+
+
+class TestTMDBMetrics:
+    def test_requests_are_counted_per_endpoint_and_status(self):
+        client = TMDBClient(api_key="test-key")
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"results": [{"id": 287}]}
+        request = httpx.Request("GET", "https://api.themoviedb.org/3/movie/603")
+        limited = httpx.Response(429, request=request)
+
+        with patch.object(httpx.Client, "get", return_value=ok):
+            client.search_person("Brad Pitt")
+        with patch.object(httpx.Client, "get", return_value=limited):
+            client.get_movie_details(603)
+        with patch.object(httpx.Client, "get", side_effect=httpx.ConnectError("down")):
+            client.get_movie_details(604)
+
+        assert TMDB_REQUESTS.labels(endpoint="/search/person", status="200").value == 1
+        assert TMDB_REQUESTS.labels(endpoint="/movie/{id}", status="429").value == 1
+        assert TMDB_REQUESTS.labels(endpoint="/movie/{id}", status="error").value == 1
+        assert _count(TMDB_LATENCY, endpoint="/movie/{id}") == 2
+
+
+class TestCacheHitRatios:
+    def test_shared_cache_hit_ratio(self, tmp_path):
+        cache = SharedCache(str(tmp_path / "shared.db"))
+        cache.set("tmdb", "k", 1)
+
+        for key in ("k", "k", "k", "missing"):
+            cache.get("tmdb", key)
+
+        assert SHARED_CACHE_HIT_RATIO.labels(namespace="tmdb").value == 0.75
+
+    def test_batch_memo_hit_ratio(self):
+        memo = BatchMemo()
+
+        memo.get_or_compute("rag", "q", lambda: 1)
+        memo.get_or_compute("rag", "q", lambda: 1)
+
+        assert BATCH_MEMO_HIT_RATIO.labels(namespace="rag").value == 0.5
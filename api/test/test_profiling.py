@@ -0,0 +1,175 @@
+"""Tests for per-node CPU accounting and the /debug/profile endpoints."""
+
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.llm.workflow.nodes import instrument_node
+from app.main import app
+from app.observability.metrics import REGISTRY
+from app.observability.profiling import (
+    NODE_CPU_SECONDS,
+    CPUProfile,
+    ProfileInProgressError,
+    SamplingProfiler,
+    _capture_lock,
+    capture_cpu_profile,
+    profile_node,
+)
+from app.observability.tracing import record_spans
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+    routes.cleanup_workflow()
+
+
+@pytest.fixture
+def profiling_client():
+    routes.initialize_workflow(profile_max_seconds=5.0)
+    return TestClient(app)
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(200))
+
+
+def _run_in_thread(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestProfileNode:
+    def test_records_cpu_time_per_node(self):
+        with profile_node("find_movies"):
+            _spin(0.05)
+
+        assert NODE_CPU_SECONDS.labels(node="find_movies").value > 0.02
+
+    def test_instrumented_nodes_set_cpu_on_their_span(self):
+        node = instrument_node("evaluate", lambda state: _spin(0.02) or {})
+
+        with record_spans() as recorder:
+            node({})
+
+        (span,) = recorder.spans
+        assert span.attributes["workflow.node.cpu_seconds"] > 0
+
+
+class TestSamplingProfiler:
+    def test_stacks_of_threads_in_a_node_start_with_the_node(self):
+        def busy_node():
+            with profile_node("write_recommendation"):
+                _spin(0.3)
+
+        thread = _run_in_thread(busy_node)
+        profile = capture_cpu_profile(0.2, interval_seconds=0.005)
+        thread.join()
+
+        assert profile.ticks > 0
+        assert "write_recommendation" in profile.by_node()
+        stack = next(s for s in profile.stacks if "_spin" in s)
+        assert stack.startswith("node:write_recommendation;")
+        own = CPUProfile(stacks=collections.Counter({
+            s: n for s, n in profile.stacks.items()
+            if s.startswith("node:write_recommendation;")
+        }))
+        (top,) = own.top_functions(1)
+        assert "test_profiling.py" in top["function"]
+        assert top["total_samples"] >= top["self_samples"] > 0
+
+    def test_blocked_threads_are_skipped_unless_asked_for(self):
+        event = threading.Event()
+        thread = _run_in_thread(event.wait)
+        try:
+            busy = SamplingProfiler()
+            busy.sample()
+            idle = SamplingProfiler(include_idle=True)
+            idle.sample()
+        finally:
+            event.set()
+            thread.join()
+
+        assert not any("Event.wait" in stack for stack in busy.profile.stacks)
+        assert any("Event.wait" in stack for stack in idle.profile.stacks)
+
+    def test_idle_executor_workers_are_skipped(self):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(time.sleep, 0).result()
+            time.sleep(0.01)
+            profiler = SamplingProfiler()
+            profiler.sample()
+
+        assert not any("_worker (" in s.rsplit(";", 1)[-1] for s in profiler.profile.stacks)
+
+    def test_only_one_capture_at_a_time(self):
+        with _capture_lock:
+            with pytest.raises(ProfileInProgressError):
+                capture_cpu_profile(0.01)
+
+
+class TestProfileEndpoints:
+    def test_disabled_by_default(self):
+        client = TestClient(app)
+
+        assert client.get("/debug/profile/cpu?seconds=0.1").status_code == 404
+        assert client.get("/debug/profile/memory?seconds=0.1").status_code == 404
+
+    def test_cpu_profile_as_collapsed_stacks(self, profiling_client):
+        thread = _run_in_thread(_spin, 0.4)
+        r = profiling_client.get("/debug/profile/cpu?seconds=0.2&interval_ms=5")
+        thread.join()
+
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        lines = r.text.splitlines()
+        assert any("_spin (test_profiling.py)" in line for line in lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            assert stack and int(count) > 0
+
+    def test_cpu_profile_as_json(self, profiling_client):
+        r = profiling_client.get("/debug/profile/cpu?seconds=0.05&format=json")
+
+        body = r.json()
+        assert set(body) >= {"samples", "ticks", "by_node", "top_functions", "stacks"}
+
+    def test_memory_profile_reports_growth(self, profiling_client):
+        retained = []
+
+        def allocate():
+            for _ in range(200):
+                retained.append(bytearray(10_000))
+                time.sleep(0.001)
+
+        thread = _run_in_thread(allocate)
+        r = profiling_client.get("/debug/profile/memory?seconds=0.5")
+        thread.join()
+
+        body = r.json()
+        assert body["growth_bytes"] > 0
+        assert any(
+            "test_profiling.py" in row["location"] for row in body["top_allocations"]
+        )
+
+    def test_rejects_captures_longer_than_the_maximum(self, profiling_client):
+        r = profiling_client.get("/debug/profile/cpu?seconds=10")
+
+        assert r.status_code == 422
+
+    def test_concurrent_capture_conflicts(self, profiling_client):
+        with _capture_lock:
+            r = profiling_client.get("/debug/profile/memory?seconds=0.1")
+
+        assert r.status_code == 409
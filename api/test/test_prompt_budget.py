@@ -0,0 +1,160 @@
+"""Tests for prompt budgets and the static-first prompt layout."""
+
+from unittest.mock import MagicMock
+
+from langchain_openai import AzureChatOpenAI
+
+from app.llm.evaluator_agent import EVALUATOR_TASK_INSTRUCTION, LLMEvaluatorAgent
+from app.llm.prompt_budget import (
+    PromptBudget,
+    PromptSection,
+    approximate_token_count,
+    assemble_prompt,
+    budget_for_agent,
+    format_movie_block,
+    truncate_to_tokens,
+)
+from app.llm.rag_agent import RAG_TASK_INSTRUCTIONS, LLMRAGAssistantAgent
+from app.llm.recommendation_agent import (
+    WRITER_TASK_INSTRUCTION,
+    LLMRecommendationWriterAgent,
+)
+from app.schemas.domain import DraftRecommendation, RetrievedContext
+from app.schemas.orchestrator import Constraints
+
+from conftest import make_movie
+
+
+class TestTruncateToTokens:
+    def test_short_text_is_unchanged(self):
+        assert truncate_to_tokens("A short overview.", 50) == "A short overview."
+
+    def test_long_text_fits_limit_and_ends_with_ellipsis(self):
+        text = "word " * 200
+
+        result = truncate_to_tokens(text, 20)
+
+        assert approximate_token_count(result) <= 20
+        assert result.endswith("…")
+
+    def test_non_positive_limit_returns_empty(self):
+        assert truncate_to_tokens("anything", 0) == ""
+
+
+class TestAssemblePrompt:
+    def test_static_sections_come_first(self):
+        prompt = assemble_prompt([
+            PromptSection("dynamic"),
+            PromptSection("static", static=True),
+        ])
+
+        assert prompt == "static\n\ndynamic"
+
+    def test_empty_sections_are_dropped(self):
+        assert assemble_prompt([PromptSection("a"), PromptSection(""), PromptSection("b")]) == "a\n\nb"
+
+    def test_compresses_largest_compressible_section_to_budget(self):
+        keep = "Keep me intact."
+        prompt = assemble_prompt(
+            [
+                PromptSection(keep),
+                PromptSection("x " * 400, compressible=True),
+            ],
+            PromptBudget(max_prompt_tokens=60),
+        )
+
+        assert prompt.startswith(keep)
+        assert approximate_token_count(prompt) <= 60
+
+    def test_never_truncates_non_compressible_sections(self):
+        text = "y " * 200
+
+        assert assemble_prompt([PromptSection(text)], PromptBudget(max_prompt_tokens=10)) == text
+
+
+class TestFormatMovieBlock:
+    def test_omits_empty_fields(self):
+        block = format_movie_block(make_movie("1", "Mystery", genres=[]))
+
+        assert block == "- title: Mystery"
+
+    def test_truncates_overview_to_budget(self):
+        movie = make_movie("1", "Epic", overview="long " * 300)
+
+        block = format_movie_block(movie, PromptBudget(overview_tokens=20))
+
+        overview = block.split("- overview: ")[1]
+        assert approximate_token_count(overview) <= 20
+
+
+class TestBudgetForAgent:
+    def test_overrides_merge_with_defaults(self):
+        assert budget_for_agent("rag", {"rag": 123}).max_prompt_tokens == 123
+        assert budget_for_agent("writer", {"rag": 123}).max_prompt_tokens == 600
+        assert budget_for_agent("unknown").max_prompt_tokens is None
+
+
+class TestAgentPromptLayout:
+    def test_writer_prompt_starts_with_static_instruction(self):
+        llm = MagicMock(spec=AzureChatOpenAI)
+        llm.invoke.return_value = MagicMock(content="Watch it.")
+        writer = LLMRecommendationWriterAgent(llm)
+
+        writer.write("Something", Constraints(), [make_movie("1", "Alien", genres=["Horror"])])
+
+        human = llm.invoke.call_args[0][0][1].content
+        assert human.startswith(WRITER_TASK_INSTRUCTION)
+        assert "Rejected titles" not in human
+        assert "User constraints" not in human
+        assert "unknown" not in human
+
+    def test_evaluator_keeps_draft_text_under_tight_budget(self):
+        llm = MagicMock(spec=AzureChatOpenAI)
+        structured = MagicMock()
+        llm.with_structured_output.return_value = structured
+        evaluator = LLMEvaluatorAgent(llm, PromptBudget(max_prompt_tokens=40))
+        draft = DraftRecommendation(
+            movie=make_movie("1", "Arrival", genres=["Sci-Fi"], overview="aliens " * 200),
+            recommendation_text="Arrival is a thoughtful sci-fi pick.",
+            reasoning="fits",
+        )
+
+        human = evaluator._build_prompt("sci-fi", Constraints(), draft, None)
+
+        assert human.startswith(EVALUATOR_TASK_INSTRUCTION)
+        assert "Arrival is a thoughtful sci-fi pick." in human
+        assert "- title: Arrival" in human
+        assert "aliens " * 50 not in human
+
+    def test_rag_contexts_share_context_budget(self):
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content="Answer")
+        agent = LLMRAGAssistantAgent(llm, PromptBudget(context_tokens=120))
+        contexts = [
+            RetrievedContext(
+                content=f"chunk{i} " + "detail " * 200,
+                source="rag",
+                relevance_score=0.5,
+                metadata={"title": f"Doc {i}", "source_file": f"doc{i}.md"},
+            )
+            for i in range(3)
+        ]
+
+        agent.answer("How?", contexts)
+
+        human = llm.invoke.call_args[0][0][1].content
+        assert human.startswith(RAG_TASK_INSTRUCTIONS)
+        assert all(f"doc{i}.md" in human for i in range(3))
+        docs = human.split("## Retrieved Documentation\n")[1]
+        assert approximate_token_count(docs) <= 130
+
+
+class TestPromptTokensBenchmark:
+    def test_reports_each_agent(self, capsys):
+        from bench.prompt_tokens import run
+
+        run()
+
+        out = capsys.readouterr().out
+        for agent in ("writer", "evaluator", "rag"):
+            assert agent in out
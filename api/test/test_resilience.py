@@ -0,0 +1,353 @@
+"""Tests for request deadlines, hedged LLM calls and deadline-aware nodes."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.factory import configure_hedging
+from app.llm.client import ResilientAzureChatOpenAI
+from app.llm.workflow import MovieNightWorkflow
+from app.llm.workflow.nodes import (
+    create_evaluate_node,
+    create_rag_respond_node,
+    create_write_recommendation_node,
+)
+from app.main import app
+from app.resilience import (
+    Deadline,
+    DeadlineExceeded,
+    LatencyTracker,
+    deadline_from_state,
+    deadline_scope,
+    get_current_deadline,
+    hedged_call,
+    set_hedge_workers,
+)
+from app.resilience.hedging import DEFAULT_HEDGE_WORKERS
+from app.schemas.domain import DraftRecommendation, RetrievedContext
+from app.schemas.orchestrator import Constraints
+from app.settings import Settings
+
+from conftest import make_movie
+
+
+def _chat_model(**kwargs) -> ResilientAzureChatOpenAI:
+    return ResilientAzureChatOpenAI(
+        azure_endpoint="https://example.openai.azure.com/",
+        api_key="key",
+        api_version="2024-08-01-preview",
+        azure_deployment="gpt-4o",
+        **kwargs,
+    )
+
+
+class TestDeadline:
+    def test_remaining_and_expiry(self):
+        deadline = Deadline.after(10)
+
+        assert 9 < deadline.remaining() <= 10
+        assert deadline.has_at_least(5)
+        assert not deadline.expired()
+        assert Deadline(time.time() - 1).expired()
+
+    def test_cap_limits_timeout_to_remaining_time(self):
+        deadline = Deadline.after(2)
+
+        assert deadline.cap(30) <= 2
+        assert deadline.cap(1) == 1
+        assert deadline.cap(None) <= 2
+
+    def test_cap_raises_once_expired(self):
+        with pytest.raises(DeadlineExceeded):
+            Deadline(time.time() - 1).cap(10)
+
+    def test_scope_sets_and_resets_current_deadline(self):
+        deadline = Deadline.after(5)
+
+        with deadline_scope(deadline):
+            assert get_current_deadline() is deadline
+        assert get_current_deadline() is None
+
+    def test_from_state(self):
+        assert deadline_from_state({"deadline_at": None}) is None
+        assert deadline_from_state({"deadline_at": 123.0}) == Deadline(123.0)
+
+
+class TestLatencyTracker:
+    def test_uses_initial_delay_until_enough_samples(self):
+        tracker = LatencyTracker(initial_delay=4.0, min_samples=3)
+        tracker.observe(1.0)
+
+        assert tracker.hedge_delay() == 4.0
+
+    def test_delay_follows_quantile(self):
+        tracker = LatencyTracker(quantile=0.9, min_delay=0.0, min_samples=10)
+        for i in range(1, 11):
+            tracker.observe(float(i))
+
+        assert tracker.hedge_delay() == 10.0
+
+    def test_delay_has_lower_bound(self):
+        tracker = LatencyTracker(min_delay=0.5, min_samples=1)
+        tracker.observe(0.01)
+
+        assert tracker.hedge_delay() == 0.5
+
+
+class TestHedgedCall:
+    def test_fast_call_is_not_hedged(self):
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return "ok"
+
+        assert hedged_call(fn, LatencyTracker(initial_delay=1.0)) == "ok"
+        assert len(calls) == 1
+
+    def test_slow_primary_loses_to_hedge(self):
+        release = threading.Event()
+        calls = []
+        lock = threading.Lock()
+
+        def fn():
+            with lock:
+                calls.append(1)
+                first = len(calls) == 1
+            if first:
+                release.wait(2)
+                return "primary"
+            return "hedge"
+
+        try:
+            result = hedged_call(fn, LatencyTracker(initial_delay=0.05))
+        finally:
+            release.set()
+
+        assert result == "hedge"
+        assert len(calls) == 2
+
+    def test_max_wait_bounds_the_call(self):
+        release = threading.Event()
+
+        def fn():
+            release.wait(2)
+            return "late"
+
+        try:
+            with pytest.raises(TimeoutError):
+                hedged_call(fn, LatencyTracker(initial_delay=0.05), max_wait=0.2)
+        finally:
+            release.set()
+
+    def test_calls_see_caller_context(self):
+        deadline = Deadline.after(5)
+
+        with deadline_scope(deadline):
+            seen = hedged_call(get_current_deadline, LatencyTracker())
+
+        assert seen is deadline
+
+    def test_pool_size_bounds_concurrent_calls(self):
+        release = threading.Event()
+        lock = threading.Lock()
+        running = {"now": 0, "max": 0}
+
+        def fn():
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+            release.wait(2)
+            with lock:
+                running["now"] -= 1
+            return "ok"
+
+        set_hedge_workers(2)
+        callers = [
+            threading.Thread(target=hedged_call, args=(fn, LatencyTracker(initial_delay=5.0)))
+            for _ in range(4)
+        ]
+        try:
+            for caller in callers:
+                caller.start()
+            time.sleep(0.2)
+            assert running["max"] == 2
+        finally:
+            release.set()
+            for caller in callers:
+                caller.join(2)
+            set_hedge_workers(DEFAULT_HEDGE_WORKERS)
+
+
+class TestConfigureHedging:
+    @pytest.mark.parametrize(
+        ("overrides", "workers"),
+        [
+            ({"admission_max_concurrency": 4}, 8),
+            ({"admission_max_concurrency": 0}, DEFAULT_HEDGE_WORKERS),
+            ({"admission_max_concurrency": 4, "llm_hedge_max_workers": 3}, 3),
+        ],
+    )
+    def test_pool_is_sized_from_settings(self, overrides, workers):
+        settings = Settings(
+            azure_openai_endpoint="https://example.openai.azure.com/",
+            azure_openai_api_key="key",
+            azure_openai_api_version="2024-08-01-preview",
+            azure_openai_deployment="gpt-4o",
+            **overrides,
+        )
+
+        with patch("app.factory.set_hedge_workers") as set_workers:
+            configure_hedging(settings)
+
+        set_workers.assert_called_once_with(workers)
+
+
+class TestResilientChatModel:
+    def test_timeout_is_capped_at_deadline(self):
+        model = _chat_model(timeout=30)
+        kwargs: dict = {}
+
+        with deadline_scope(Deadline.after(2)):
+            model._apply_deadline(kwargs)
+
+        assert kwargs["timeout"] <= 2
+
+    def test_no_deadline_leaves_timeout_alone(self):
+        model = _chat_model(timeout=30)
+        kwargs: dict = {}
+
+        model._apply_deadline(kwargs)
+
+        assert kwargs == {}
+
+    def test_expired_deadline_fails_fast(self):
+        model = _chat_model()
+
+        with deadline_scope(Deadline(time.time() - 1)), pytest.raises(DeadlineExceeded):
+            model._apply_deadline({})
+
+
+def _draft() -> DraftRecommendation:
+    return DraftRecommendation(
+        movie=make_movie("1", "Arrival", genres=["Sci-Fi"], runtime_minutes=116),
+        recommendation_text="Arrival is a thoughtful pick.",
+        reasoning="fits",
+    )
+
+
+class TestDeadlineAwareNodes:
+    def test_writer_falls_back_to_deterministic_text(self, mock_recommendation_writer):
+        node = create_write_recommendation_node(mock_recommendation_writer)
+
+        result = node({
+            "user_message": "sci-fi",
+            "constraints": Constraints(),
+            "candidate_movies": [make_movie("1", "Arrival", genres=["Sci-Fi"])],
+            "rejected_titles": [],
+            "deadline_at": time.time() + 1,
+        })
+
+        mock_recommendation_writer.write.assert_not_called()
+        assert result["draft_recommendation"].movie.title == "Arrival"
+        assert result["degraded_nodes"] == ["write_recommendation"]
+
+    def test_writer_uses_llm_with_time_to_spare(self, mock_recommendation_writer):
+        mock_recommendation_writer.write.return_value = _draft()
+        node = create_write_recommendation_node(mock_recommendation_writer)
+
+        result = node({
+            "user_message": "sci-fi",
+            "candidate_movies": [make_movie("1", "Arrival")],
+            "deadline_at": time.time() + 60,
+        })
+
+        mock_recommendation_writer.write.assert_called_once()
+        assert "degraded_nodes" not in result
+
+    def test_evaluator_runs_constraint_checks_only(self, mock_evaluator):
+        node = create_evaluate_node(mock_evaluator)
+
+        result = node({
+            "user_message": "sci-fi",
+            "constraints": Constraints(),
+            "draft_recommendation": _draft(),
+            "degraded_nodes": ["write_recommendation"],
+            "deadline_at": time.time() + 1,
+        })
+
+        mock_evaluator.evaluate.assert_not_called()
+        assert result["evaluation_result"].passed is True
+        assert result["degraded_nodes"] == ["write_recommendation", "evaluate"]
+
+    def test_rag_answers_from_context_excerpts(self, mock_rag_agent):
+        node = create_rag_respond_node(mock_rag_agent)
+        contexts = [RetrievedContext(content="The app uses TMDB.", source="rag")]
+
+        result = node({
+            "user_message": "How does it work?",
+            "retrieved_contexts": contexts,
+            "deadline_at": time.time() + 1,
+        })
+
+        mock_rag_agent.answer.assert_not_called()
+        assert "The app uses TMDB." in result["final_response"]
+        assert result["degraded_nodes"] == ["rag_respond"]
+
+    def test_rag_failure_before_deadline_propagates(self, mock_rag_agent):
+        mock_rag_agent.answer.side_effect = RuntimeError("boom")
+        node = create_rag_respond_node(mock_rag_agent)
+
+        with pytest.raises(RuntimeError):
+            node({
+                "user_message": "How does it work?",
+                "retrieved_contexts": [],
+                "deadline_at": time.time() + 60,
+            })
+
+    def test_rag_failure_after_deadline_degrades(self, mock_rag_agent, monkeypatch):
+        monkeypatch.setattr("app.llm.workflow.nodes.MIN_LLM_NODE_SECONDS", 0.0)
+
+        def answer(**_):
+            time.sleep(0.1)
+            raise RuntimeError("timed out")
+
+        mock_rag_agent.answer.side_effect = answer
+        node = create_rag_respond_node(mock_rag_agent)
+
+        result = node({
+            "user_message": "How does it work?",
+            "retrieved_contexts": [],
+            "deadline_at": time.time() + 0.05,
+        })
+
+        assert result["degraded_nodes"] == ["rag_respond"]
+
+
+class TestChatDeadline:
+    def test_chat_passes_deadline_and_reports_degraded_nodes(self):
+        mock_workflow = MagicMock(spec=MovieNightWorkflow)
+        mock_workflow.invoke.return_value = {
+            "final_response": "Arrival is a thoughtful pick.",
+            "route": "movies",
+            "constraints": Constraints(),
+            "retrieved_contexts": [],
+            "retry_count": 0,
+            "rejected_titles": [],
+            "degraded_nodes": ["evaluate"],
+        }
+
+        with (
+            patch("app.api.routes.workflow", mock_workflow),
+            patch("app.api.routes.deadline_seconds", 12.0),
+        ):
+            client = TestClient(app, raise_server_exceptions=False)
+            r = client.post("/chat", json={"message": "sci-fi"})
+
+        assert r.status_code == 200
+        assert r.json()["debug"]["degraded_nodes"] == ["evaluate"]
+        deadline = mock_workflow.invoke.call_args.kwargs["deadline"]
+        assert 11 < deadline.remaining() <= 12
@@ -0,0 +1,274 @@
+"""Tests for conversation sessions and follow-up refinements."""
+
+import time
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.idempotency import ChatDeduplicator
+from app.llm.workflow import MovieNightWorkflow
+from app.llm.workflow.nodes import create_find_movies_node, create_input_orchestrate_node
+from app.main import app
+from app.schemas.domain import DraftRecommendation
+from app.schemas.orchestrator import Constraints, InputDecision, MovieSearchQuery
+from app.sessions import (
+    InMemorySessionStore,
+    SessionState,
+    SessionTurn,
+    SQLiteSessionStore,
+    merge_constraints,
+    summarize_turns,
+)
+
+from conftest import make_movie, open_connections
+
+CANDIDATES = [
+    make_movie("1", "Interstellar", genres=["Sci-Fi"], runtime_minutes=169),
+    make_movie("2", "Arrival", genres=["Sci-Fi"], runtime_minutes=116),
+    make_movie("3", "Moon", genres=["Sci-Fi"], runtime_minutes=97),
+]
+
+
+def _session_after_first_request() -> SessionState:
+    session = SessionState(session_id="abc")
+    session.record_turn(
+        "A sci-fi movie",
+        {
+            "route": "movies",
+            "final_response": "Try Interstellar.",
+            "constraints": Constraints(genres=["sci-fi"]),
+            "search_query": MovieSearchQuery(),
+            "candidate_movies": CANDIDATES,
+            "rejected_titles": [],
+            "draft_recommendation": DraftRecommendation(
+                movie=CANDIDATES[0], recommendation_text="Try Interstellar."
+            ),
+        },
+    )
+    return session
+
+
+class TestSessionState:
+    def test_record_turn_keeps_movie_request(self):
+        session = _session_after_first_request()
+
+        assert [t.role for t in session.turns] == ["user", "assistant"]
+        assert session.constraints.genres == ["sci-fi"]
+        assert len(session.candidate_movies) == 3
+        assert session.last_recommendation == "Interstellar"
+        assert "Last recommended movie: Interstellar" in session.history_text()
+
+    def test_rag_turn_keeps_previous_movie_request(self):
+        session = _session_after_first_request()
+
+        session.record_turn(
+            "How does this work?", {"route": "rag", "final_response": "It uses TMDB."}
+        )
+
+        assert session.constraints.genres == ["sci-fi"]
+        assert len(session.turns) == 4
+
+    def test_compact_summarizes_old_turns(self):
+        session = SessionState(
+            session_id="abc",
+            turns=[SessionTurn(role="user", content=f"message {i}") for i in range(5)],
+        )
+
+        session.compact(max_turns=2)
+
+        assert [t.content for t in session.turns] == ["message 3", "message 4"]
+        assert session.summary.splitlines() == [
+            "User: message 0",
+            "User: message 1",
+            "User: message 2",
+        ]
+
+    def test_summary_is_bounded(self):
+        turns = [SessionTurn(role="assistant", content="x" * 200) for _ in range(50)]
+
+        summary = summarize_turns("", turns)
+
+        assert len(summary) <= 1200
+        assert all(len(line) <= 131 for line in summary.splitlines())
+
+    def test_merge_constraints(self):
+        merged = merge_constraints(
+            Constraints(genres=["sci-fi"], min_runtime_minutes=90),
+            Constraints(max_runtime_minutes=120),
+        )
+
+        assert merged == Constraints(
+            genres=["sci-fi"], max_runtime_minutes=120, min_runtime_minutes=90
+        )
+
+
+class TestInMemorySessionStore:
+    def test_round_trip_returns_copy(self):
+        store = InMemorySessionStore()
+        session = _session_after_first_request()
+        store.save(session)
+
+        loaded = store.get("abc")
+        loaded.turns.clear()
+
+        assert len(store.get("abc").turns) == 2
+
+    def test_evicts_least_recently_used(self):
+        store = InMemorySessionStore(max_sessions=2)
+        for session_id in ("a", "b"):
+            store.save(SessionState(session_id=session_id))
+        store.get("a")
+        store.save(SessionState(session_id="c"))
+
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert len(store) == 2
+
+    def test_expires_idle_sessions(self):
+        store = InMemorySessionStore(ttl_seconds=60)
+        store.save(SessionState(session_id="a", updated_at=time.time() - 120))
+
+        assert store.get("a") is None
+
+
+class TestSQLiteSessionStore:
+    def test_round_trip(self, tmp_path):
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        store.save(_session_after_first_request())
+
+        loaded = SQLiteSessionStore(str(tmp_path / "sessions.db")).get("abc")
+
+        assert loaded.last_recommendation == "Interstellar"
+        assert loaded.candidate_movies[1].title == "Arrival"
+
+    def test_expires_and_deletes(self, tmp_path):
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+        store.save(SessionState(session_id="old", updated_at=time.time() - 120))
+        store.save(SessionState(session_id="new"))
+        store.delete("new")
+
+        assert store.get("old") is None
+        assert store.get("new") is None
+
+    def test_closes_its_connections(self, tmp_path, sqlite_connections):
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        store.save(_session_after_first_request())
+        store.get("abc")
+        store.delete("abc")
+
+        assert len(sqlite_connections) == 4
+        assert open_connections(sqlite_connections) == 0
+
+
+class TestRefinementNodes:
+    def test_refinement_merges_previous_request(self, mock_input_agent):
+        mock_input_agent.decide.return_value = InputDecision(
+            route="movies",
+            constraints=Constraints(max_runtime_minutes=120),
+            is_refinement=True,
+        )
+        session = _session_after_first_request()
+        node = create_input_orchestrate_node(mock_input_agent)
+
+        result = node({"user_message": "something shorter", "session": session})
+
+        history = mock_input_agent.decide.call_args.kwargs["history"]
+        assert "User: A sci-fi movie" in history
+        assert result["is_refinement"] is True
+        assert result["constraints"] == Constraints(
+            genres=["sci-fi"], max_runtime_minutes=120
+        )
+        assert result["rejected_titles"] == ["Interstellar"]
+
+    def test_new_request_is_not_merged(self, mock_input_agent):
+        mock_input_agent.decide.return_value = InputDecision(
+            route="movies", constraints=Constraints(genres=["comedy"])
+        )
+        node = create_input_orchestrate_node(mock_input_agent)
+
+        result = node({
+            "user_message": "a comedy instead",
+            "session": _session_after_first_request(),
+        })
+
+        assert "is_refinement" not in result
+        assert result["constraints"].genres == ["comedy"]
+
+    def test_find_movies_reuses_cached_candidates(self, mock_movie_finder):
+        node = create_find_movies_node(mock_movie_finder)
+
+        result = node({
+            "constraints": Constraints(genres=["sci-fi"], max_runtime_minutes=120),
+            "search_query": MovieSearchQuery(),
+            "rejected_titles": ["Interstellar"],
+            "is_refinement": True,
+            "session": _session_after_first_request(),
+        })
+
+        mock_movie_finder.find_movies.assert_not_called()
+        assert [m.title for m in result["candidate_movies"]] == ["Arrival", "Moon"]
+
+    def test_find_movies_searches_when_genres_change(self, mock_movie_finder):
+        mock_movie_finder.find_movies.return_value = []
+        node = create_find_movies_node(mock_movie_finder)
+
+        node({
+            "constraints": Constraints(genres=["comedy"]),
+            "search_query": MovieSearchQuery(),
+            "rejected_titles": ["Interstellar"],
+            "is_refinement": True,
+            "session": _session_after_first_request(),
+        })
+
+        mock_movie_finder.find_movies.assert_called_once()
+
+
+class TestChatSessions:
+    def test_chat_loads_and_saves_session(self):
+        seen_turns = []
+        run_keys = []
+
+        def invoke(message, deadline=None, session=None, run_key=None):
+            run_keys.append(run_key)
+            seen_turns.append([t.content for t in session.turns])
+            return {
+                "final_response": "Try Arrival.",
+                "route": "movies",
+                "constraints": Constraints(genres=["sci-fi"]),
+                "candidate_movies": CANDIDATES,
+                "retrieved_contexts": [],
+                "retry_count": 0,
+                "rejected_titles": [],
+            }
+
+        mock_workflow = MagicMock(spec=MovieNightWorkflow)
+        mock_workflow.invoke.side_effect = invoke
+        store = InMemorySessionStore()
+
+        with (
+            patch.object(routes, "workflow", mock_workflow),
+            patch.object(routes, "session_store", store),
+            patch.object(routes, "deduplicator", ChatDeduplicator(ttl_seconds=0)),
+        ):
+            client = TestClient(app, raise_server_exceptions=False)
+            client.post("/chat", json={"message": "sci-fi", "session_id": "s1"})
+            client.post("/chat", json={"message": "Shorter ", "session_id": "s1"})
+            client.post("/chat", json={"message": "shorter", "session_id": "s1"})
+
+        assert seen_turns[:2] == [[], ["sci-fi", "Try Arrival."]]
+        assert len(store.get("s1").turns) == 6
+        assert run_keys == [None, None, None]
+
+    def test_chat_without_session_id_has_no_session(self):
+        mock_workflow = MagicMock(spec=MovieNightWorkflow)
+        mock_workflow.invoke.return_value = {"final_response": "Hi", "route": "rag"}
+
+        with (
+            patch.object(routes, "workflow", mock_workflow),
+            patch.object(routes, "session_store", InMemorySessionStore()),
+        ):
+            client = TestClient(app, raise_server_exceptions=False)
+            client.post("/chat", json={"message": "hello"})
+
+        assert mock_workflow.invoke.call_args.kwargs["session"] is None
@@ -0,0 +1,264 @@
+"""Tests for multi-worker serving: the shared cache, preloading and /workers."""
+
+import gc
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import AzureChatOpenAI
+
+from app.api import routes
+from app.cache import SharedCache
+from app.cache.store import SHARED_CACHE_LOOKUPS
+from app.integrations.tmdb_client import TMDBClient
+from app.llm.client import ResilientAzureChatOpenAI
+from app.main import app
+from app.observability.metrics import REGISTRY
+from app.observability.usage import SERVED_FROM
+from app.observability.process import WorkerReporter, memory_usage
+from app.rag.retriever import get_shared_retriever
+from app.serving import preload_shared_state
+
+from conftest import open_connections
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+    routes.cleanup_workflow()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "shared.db"), ttl_seconds=60)
+
+
+class TestSharedCache:
+    def test_round_trips_json_values(self, cache):
+        assert cache.get("tmdb", "k") is None
+
+        cache.set("tmdb", "k", {"results": [{"id": 287}]})
+
+        assert cache.get("tmdb", "k") == {"results": [{"id": 287}]}
+        assert cache.get("llm", "k") is None
+
+    def test_counts_hits_and_misses_per_namespace(self, cache):
+        cache.set("tmdb", "k", 1)
+        cache.get("tmdb", "k")
+        cache.get("tmdb", "other")
+        cache.get("llm", "k")
+
+        assert cache.stats() == {
+            "tmdb": {"hits": 1, "misses": 1},
+            "llm": {"hits": 0, "misses": 1},
+        }
+        assert SHARED_CACHE_LOOKUPS.labels(namespace="tmdb", result="hit").value == 1
+
+    def test_expired_entries_are_missing(self, tmp_path):
+        cache = SharedCache(str(tmp_path / "shared.db"), ttl_seconds=0.05)
+        cache.set("tmdb", "k", 1)
+
+        time.sleep(0.1)
+
+        assert cache.get("tmdb", "k") is None
+
+    def test_closes_its_connections(self, tmp_path, sqlite_connections):
+        cache = SharedCache(str(tmp_path / "shared.db"), ttl_seconds=60)
+        cache.set("tmdb", "k", 1)
+        cache.get("tmdb", "k")
+        cache.clear("tmdb")
+
+        assert sqlite_connections
+        assert open_connections(sqlite_connections) == 0
+
+    def test_uses_write_ahead_logging(self, cache):
+        with cache._connect() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_entries_are_shared_with_other_processes(self, cache):
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from app.cache import SharedCache; "
+                f"SharedCache({cache.path!r}).set('tmdb', 'k', {{'from': 'child'}})",
+            ],
+            cwd=API_DIR,
+            check=True,
+        )
+
+        assert cache.get("tmdb", "k") == {"from": "child"}
+
+    def test_clear_namespace(self, cache):
+        cache.set("tmdb", "k", 1)
+        cache.set("llm", "k", 2)
+
+        cache.clear("tmdb")
+
+        assert cache.get("tmdb", "k") is None
+        assert cache.get("llm", "k") == 2
+
+
+class TestTMDBSharedCache:
+    def test_response_is_reused_by_other_clients(self, cache):
+        response = MagicMock()
+        response.json.return_value = {"results": [{"id": 287}]}
+
+        with patch.object(httpx.Client, "get", return_value=response) as mock_get:
+            first = TMDBClient(api_key="test-key", cache=cache)
+            second = TMDBClient(api_key="test-key", cache=cache)
+
+            assert first.search_person("Brad Pitt") == 287
+            assert second.search_person("Brad Pitt") == 287
+
+        mock_get.assert_called_once()
+        assert cache.stats()["tmdb"] == {"hits": 1, "misses": 1}
+
+    def test_failed_requests_are_not_cached(self, cache):
+        client = TMDBClient(api_key="test-key", cache=cache)
+
+        response = MagicMock()
+        response.json.return_value = {"results": [{"id": 287}]}
+
+        with patch.object(httpx.Client, "get", side_effect=httpx.ConnectError("down")):
+            assert client.search_person("Brad Pitt") is None
+        with patch.object(httpx.Client, "get", return_value=response) as mock_get:
+            assert client.search_person("Brad Pitt") == 287
+
+        mock_get.assert_called_once()
+        assert cache.stats()["tmdb"] == {"hits": 0, "misses": 2}
+
+
+def _chat_model(**kwargs) -> ResilientAzureChatOpenAI:
+    return ResilientAzureChatOpenAI(
+        azure_endpoint="https://example.openai.azure.com/",
+        api_key="key",
+        api_version="2024-08-01-preview",
+        azure_deployment="gpt-4o",
+        **kwargs,
+    )
+
+
+def _result() -> ChatResult:
+    message = AIMessage(
+        content="comedy",
+        usage_metadata={"input_tokens": 100, "output_tokens": 5, "total_tokens": 105},
+    )
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class TestLLMResponseCache:
+    def test_temperature_zero_completions_are_reused_without_usage(self, cache):
+        messages = [HumanMessage(content="Classify: a funny movie")]
+
+        with patch.object(AzureChatOpenAI, "_generate", return_value=_result()) as upstream:
+            first = _chat_model(temperature=0.0, response_cache=cache)._generate(messages)
+            second = _chat_model(temperature=0.0, response_cache=cache)._generate(messages)
+
+        upstream.assert_called_once()
+        assert first.generations[0].message.usage_metadata is not None
+        assert second.generations[0].message.content == "comedy"
+        assert second.generations[0].message.usage_metadata is None
+        assert SERVED_FROM not in (first.generations[0].generation_info or {})
+        assert second.generations[0].generation_info[SERVED_FROM] == "cache"
+
+    def test_sampled_completions_are_not_cached(self, cache):
+        model = _chat_model(temperature=0.7, response_cache=cache)
+        messages = [HumanMessage(content="Write a pitch")]
+
+        with patch.object(AzureChatOpenAI, "_generate", return_value=_result()) as upstream:
+            model._generate(messages)
+            model._generate(messages)
+
+        assert upstream.call_count == 2
+        assert cache.stats() == {}
+
+    def test_deployments_do_not_share_answers(self, cache):
+        messages = [HumanMessage(content="Classify: a funny movie")]
+        mini = _chat_model(temperature=0.0, response_cache=cache)
+        large = _chat_model(temperature=0.0, response_cache=cache)
+        large.deployment_name = "gpt-4o-large"
+
+        with patch.object(AzureChatOpenAI, "_generate", return_value=_result()) as upstream:
+            mini._generate(messages)
+            large._generate(messages)
+
+        assert upstream.call_count == 2
+
+
+class TestPreloading:
+    def test_shared_retriever_is_built_once(self):
+        assert get_shared_retriever() is get_shared_retriever()
+
+    def test_preload_builds_index_and_freezes_objects(self):
+        try:
+            summary = preload_shared_state()
+
+            assert summary["documents"] > 0
+            assert gc.get_freeze_count() > 0
+        finally:
+            gc.unfreeze()
+
+
+class TestWorkerReports:
+    def test_memory_usage_reports_rss(self):
+        usage = memory_usage()
+
+        assert usage["rss"] > 0
+        if "private" in usage:
+            assert 0 < usage["private"] <= usage["rss"]
+
+    def test_workers_without_shared_cache_reports_this_process(self):
+        client = TestClient(app)
+
+        workers = client.get("/workers").json()["workers"]
+
+        assert len(workers) == 1
+        assert workers[0]["rss_bytes"] > 0
+
+    def test_workers_lists_reports_with_hit_rates(self, cache):
+        cache.set("tmdb", "k", 1)
+        cache.get("tmdb", "k")
+        cache.get("tmdb", "missing")
+        WorkerReporter(cache).report()
+        cache.record_worker(1, {"rss_bytes": 1024, "private_bytes": None, "cache": {}})
+        routes.initialize_workflow(cache=cache)
+        client = TestClient(app)
+
+        workers = {w["pid"]: w for w in client.get("/workers").json()["workers"]}
+
+        assert set(workers) == {1, os.getpid()}
+        assert workers[os.getpid()]["cache"]["tmdb"] == {
+            "hits": 1,
+            "misses": 1,
+            "hit_rate": 0.5,
+        }
+        assert workers[1]["rss_bytes"] == 1024
+
+    def test_stale_reports_are_dropped(self, cache):
+        cache.record_worker(1, {"rss_bytes": 1024})
+
+        assert cache.workers(max_age_seconds=60) != []
+        time.sleep(0.05)
+        assert cache.workers(max_age_seconds=0.01) == []
+
+    def test_reporter_thread_reports_until_stopped(self, cache):
+        reporter = WorkerReporter(cache, interval_seconds=0.01)
+
+        reporter.start()
+        time.sleep(0.05)
+        reporter.stop()
+
+        assert len(cache.workers(max_age_seconds=60)) == 1
@@ -0,0 +1,171 @@
+"""Tests for lazy workflow construction, readiness and import-time cost."""
+
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.readiness import WorkflowLoader
+from app.llm.workflow import MovieNightWorkflow
+from app.main import app
+from app.settings import Settings
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+# Modules that only the workflow build may import.
+HEAVY_MODULES = ("langchain_openai", "openai", "langgraph", "app.factory")
+IMPORT_BUDGET_SECONDS = 1.0
+
+BASE_SETTINGS = {
+    "azure_openai_endpoint": "https://example.openai.azure.com/",
+    "azure_openai_api_key": "key",
+    "azure_openai_api_version": "2024-08-01-preview",
+    "azure_openai_deployment": "gpt-4o",
+}
+
+
+def _import_times(module: str) -> dict[str, float]:
+    """Cumulative import time in seconds of every module loaded by ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+def _mock_workflow() -> MagicMock:
+    wf = MagicMock(spec=MovieNightWorkflow)
+    wf.invoke.return_value = {"final_response": "Try Airplane!", "route": "movies"}
+    return wf
+
+
+@pytest.fixture(autouse=True)
+def reset_routes():
+    yield
+    routes.cleanup_workflow()
+
+
+class TestImportTime:
+    def test_main_does_not_import_workflow_dependencies(self):
+        times = _import_times("app.main")
+
+        assert [m for m in HEAVY_MODULES if m in times] == []
+
+    def test_main_imports_within_budget(self):
+        assert _import_times("app.main")["app.main"] < IMPORT_BUDGET_SECONDS
+
+
+class TestWorkflowLoader:
+    def test_builds_once_and_reports_steps(self):
+        factory = MagicMock(
+            side_effect=lambda progress: (progress("agents"), _mock_workflow())[1]
+        )
+        loader = WorkflowLoader(factory)
+        assert loader.status().status == "cold"
+
+        assert loader.get() is loader.get()
+
+        factory.assert_called_once()
+        status = loader.status()
+        assert status.status == "ready"
+        assert status.completed_steps == ["agents"]
+        assert status.elapsed_seconds is not None
+
+    def test_failed_build_is_retried(self):
+        factory = MagicMock(side_effect=[RuntimeError("no credentials"), _mock_workflow()])
+        loader = WorkflowLoader(factory)
+
+        with pytest.raises(RuntimeError):
+            loader.get()
+        assert loader.status().status == "failed"
+        assert loader.status().error == "no credentials"
+
+        loader.get()
+        assert loader.status().status == "ready"
+
+
+class TestReadiness:
+    def test_health_answers_while_warming_up(self):
+        release = threading.Event()
+
+        def factory(progress):
+            progress("imports")
+            release.wait(5)
+            return _mock_workflow()
+
+        loader = WorkflowLoader(factory)
+        routes.initialize_workflow(loader=loader)
+        warmup = loader.start_warmup()
+        client = TestClient(app, raise_server_exceptions=False)
+
+        try:
+            assert client.get("/health").status_code == 200
+            r = client.get("/ready")
+            assert r.status_code == 503
+            assert r.json()["status"] == "warming"
+            assert r.json()["completed_steps"] == ["imports"]
+        finally:
+            release.set()
+            warmup.join(5)
+
+        r = client.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["status"] == "ready"
+
+    def test_chat_builds_workflow_on_first_use(self):
+        factory = MagicMock(side_effect=lambda progress: _mock_workflow())
+        routes.initialize_workflow(loader=WorkflowLoader(factory))
+        client = TestClient(app, raise_server_exceptions=False)
+
+        r = client.post("/chat", json={"message": "a comedy"})
+
+        assert r.status_code == 200
+        assert r.json()["reply"] == "Try Airplane!"
+        factory.assert_called_once()
+
+    def test_chat_returns_503_when_build_fails(self):
+        factory = MagicMock(side_effect=RuntimeError("no credentials"))
+        routes.initialize_workflow(loader=WorkflowLoader(factory))
+        client = TestClient(app, raise_server_exceptions=False)
+
+        r = client.post("/chat", json={"message": "a comedy"})
+
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "5"
+        assert client.get("/ready").json()["status"] == "failed"
+
+    def test_not_ready_without_workflow(self):
+        client = TestClient(app, raise_server_exceptions=False)
+
+        r = client.get("/ready")
+
+        assert r.status_code == 503
+        assert r.json()["status"] == "cold"
+
+    def test_lifespan_warms_up_in_background(self):
+        settings = Settings(**BASE_SETTINGS, session_store="none")
+        build = MagicMock(side_effect=lambda settings, progress, **kwargs: _mock_workflow())
+
+        with (
+            patch("app.main.get_settings", return_value=settings),
+            patch("app.main.build_workflow", build),
+        ):
+            with TestClient(app) as client:
+                routes.workflow_loader.get()
+                assert client.get("/ready").json()["status"] == "ready"
+
+        build.assert_called_once()
@@ -0,0 +1,183 @@
+"""Tests for per-agent model settings and adaptive escalation."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_openai import AzureChatOpenAI
+
+from app.agents import MoviesResponder, SystemResponder
+from app.llm.client import create_chat_model
+from app.llm.evaluator_agent import LLMEvaluatorAgent
+from app.llm.input_agent import InputOrchestratorAgent
+from app.llm.tiering import EscalationPolicy
+from app.llm.workflow import MovieNightWorkflow
+from app.factory import create_escalation_model
+from app.schemas.domain import DraftRecommendation, EvaluationResult
+from app.schemas.orchestrator import Constraints, InputDecision
+from app.settings import AgentModelSettings, Settings
+
+from conftest import make_movie
+
+BASE_SETTINGS = {
+    "azure_openai_endpoint": "https://example.openai.azure.com/",
+    "azure_openai_api_key": "key",
+    "azure_openai_api_version": "2024-08-01-preview",
+    "azure_openai_deployment": "gpt-4o",
+}
+
+
+def _structured_llm(*results):
+    """Build a chat model mock whose structured output returns ``results``."""
+    llm = MagicMock(spec=AzureChatOpenAI)
+    structured = MagicMock()
+    structured.invoke.side_effect = list(results)
+    llm.with_structured_output.return_value = structured
+    return llm, structured
+
+
+def _decision(confidence: float | None) -> InputDecision:
+    return InputDecision(route="movies", confidence=confidence)
+
+
+def _verdict(score: float, passed: bool = True) -> EvaluationResult:
+    return EvaluationResult(passed=passed, score=score, feedback="ok")
+
+
+def _draft() -> DraftRecommendation:
+    return DraftRecommendation(
+        movie=make_movie("1", "Arrival", genres=["Sci-Fi"], runtime_minutes=116),
+        recommendation_text="Arrival is a thoughtful pick.",
+        reasoning="fits",
+    )
+
+
+class TestAgentModelSettings:
+    def test_nested_env_vars_configure_agent_models(self, monkeypatch):
+        monkeypatch.setenv("AGENT_MODELS__INPUT__DEPLOYMENT", "gpt-4o-mini")
+        monkeypatch.setenv("AGENT_MODELS__INPUT__TIMEOUT", "5")
+
+        settings = Settings(**BASE_SETTINGS)
+
+        assert settings.model_for_agent("input").deployment == "gpt-4o-mini"
+        assert settings.model_for_agent("input").timeout == 5.0
+        assert settings.model_for_agent("writer") == AgentModelSettings()
+
+    def test_create_chat_model_applies_agent_overrides(self):
+        settings = Settings(
+            **BASE_SETTINGS,
+            max_tokens=800,
+            agent_models={"input": {"deployment": "gpt-4o-mini", "max_tokens": 200, "timeout": 4}},
+        )
+
+        model = create_chat_model(settings, temperature=0.0, agent="input")
+
+        assert model.deployment_name == "gpt-4o-mini"
+        assert model.max_tokens == 200
+        assert model.request_timeout == 4
+        assert model.callbacks[0].model == "gpt-4o-mini"
+
+    def test_explicit_deployment_wins_over_agent_override(self):
+        settings = Settings(
+            **BASE_SETTINGS, agent_models={"input": {"deployment": "gpt-4o-mini"}}
+        )
+
+        model = create_chat_model(settings, agent="input", deployment="gpt-4o")
+
+        assert model.deployment_name == "gpt-4o"
+
+    def test_escalation_model_only_for_tiered_agents(self):
+        settings = Settings(
+            **BASE_SETTINGS, agent_models={"evaluator": {"deployment": "gpt-4o-mini"}}
+        )
+
+        assert create_escalation_model(settings, "input", 0.0) is None
+        escalation = create_escalation_model(settings, "evaluator", 0.0)
+        assert escalation.deployment_name == "gpt-4o"
+
+
+class TestEscalationPolicy:
+    @pytest.mark.parametrize(
+        ("confidence", "expected"),
+        [(0.3, "low_confidence"), (0.9, None), (None, None)],
+    )
+    def test_decision_reasons(self, confidence, expected):
+        assert EscalationPolicy().decision_escalation_reason(_decision(confidence)) == expected
+
+    @pytest.mark.parametrize(
+        ("verdict", "expected"),
+        [
+            (_verdict(0.72), "borderline_score"),
+            (_verdict(0.95), None),
+            (_verdict(0.1, passed=False), None),
+            (_verdict(0.95, passed=False), "inconsistent_verdict"),
+        ],
+    )
+    def test_evaluation_reasons(self, verdict, expected):
+        assert EscalationPolicy().evaluation_escalation_reason(verdict) == expected
+
+
+class TestInputAgentEscalation:
+    def test_low_confidence_is_repeated_on_large_model(self):
+        small, small_structured = _structured_llm(_decision(0.2))
+        large, large_structured = _structured_llm(_decision(0.95))
+        agent = InputOrchestratorAgent(small, escalation_llm=large)
+
+        decision = agent.decide("something")
+
+        assert decision.confidence == 0.95
+        small_structured.invoke.assert_called_once()
+        large_structured.invoke.assert_called_once()
+
+    def test_confident_decision_stays_on_small_model(self):
+        small, _ = _structured_llm(_decision(0.9))
+        large, large_structured = _structured_llm()
+        agent = InputOrchestratorAgent(small, escalation_llm=large)
+
+        agent.decide("A comedy")
+
+        large_structured.invoke.assert_not_called()
+
+    def test_escalation_failure_keeps_small_decision(self):
+        small, _ = _structured_llm(_decision(0.2))
+        large, _ = _structured_llm(RuntimeError("timeout"))
+        agent = InputOrchestratorAgent(small, escalation_llm=large)
+
+        assert agent.decide("something").confidence == 0.2
+
+
+class TestEvaluatorEscalation:
+    def test_borderline_score_is_rejudged_by_large_model(self):
+        small, _ = _structured_llm(_verdict(0.72))
+        large, large_structured = _structured_llm(_verdict(0.4, passed=False))
+        evaluator = LLMEvaluatorAgent(small, escalation_llm=large)
+
+        result = evaluator.evaluate("sci-fi", Constraints(), _draft())
+
+        assert result.passed is False
+        large_structured.invoke.assert_called_once()
+
+    def test_clear_verdict_stays_on_small_model(self):
+        small, _ = _structured_llm(_verdict(0.95))
+        large, large_structured = _structured_llm()
+        evaluator = LLMEvaluatorAgent(small, escalation_llm=large)
+
+        assert evaluator.evaluate("sci-fi", Constraints(), _draft()).score == 0.95
+        large_structured.invoke.assert_not_called()
+
+    def test_workflow_pass_threshold_is_used_for_escalation(self):
+        small, _ = _structured_llm(_verdict(0.45, passed=False))
+        large, large_structured = _structured_llm(_verdict(0.3, passed=False))
+        evaluator = LLMEvaluatorAgent(small, escalation_llm=large)
+
+        MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=MagicMock(spec=MoviesResponder),
+            system_responder=MagicMock(spec=SystemResponder),
+            input_agent=MagicMock(spec=InputOrchestratorAgent),
+            evaluator=evaluator,
+            pass_threshold=0.5,
+        )
+        result = evaluator.evaluate("sci-fi", Constraints(), _draft())
+
+        assert result.score == 0.3
+        large_structured.invoke.assert_called_once()
@@ -0,0 +1,139 @@
+"""Tests for the per-request timing breakdown returned in debug.timings."""
+
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.llm.workflow import MovieNightWorkflow
+from app.main import app
+from app.observability.timings import summarize_timings
+from app.observability.tracing import record_spans, start_span
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import Constraints, InputDecision
+
+from conftest import make_movie
+
+
+class TestSummarizeTimings:
+    def test_classifies_nodes_llm_calls_and_tmdb_requests(self):
+        with record_spans() as recorder:
+            with start_span("find_movies", {"workflow.node": "find_movies"}) as root:
+                with start_span("GET /search/person", {"tmdb.endpoint": "/search/person"}):
+                    pass
+                with start_span(
+                    "GET /search/person",
+                    {"tmdb.endpoint": "/search/person", "tmdb.cache_hit": True},
+                ):
+                    pass
+                with start_span("GET /discover/movie", {"tmdb.endpoint": "/discover/movie"}) as s:
+                    s.set_attribute("tmdb.shared", True)
+                with start_span(
+                    "chat gpt-4o-mini",
+                    {
+                        "gen_ai.operation.name": "chat",
+                        "gen_ai.request.model": "gpt-4o-mini",
+                        "gen_ai.usage.input_tokens": 100,
+                        "gen_ai.usage.output_tokens": 20,
+                        "llm.agent": "writer",
+                        "workflow.node": "find_movies",
+                    },
+                    kind="client",
+                ):
+                    pass
+                root.set_attribute("workflow.node.cpu_seconds", 0.00012)
+
+        timings = summarize_timings(
+            recorder.spans, root.start_time, root.duration_seconds, retries=2
+        )
+
+        assert timings["nodes"] == {
+            "find_movies": {
+                "runs": 1,
+                "seconds": round(root.duration_seconds, 4),
+                "cpu_seconds": 0.0001,
+            }
+        }
+        assert timings["tmdb"]["requests"] == 3
+        assert timings["tmdb"]["upstream_calls"] == 1
+        assert timings["tmdb"]["cache_hits"] == 1
+        assert timings["tmdb"]["shared"] == 1
+        (call,) = timings["llm_calls"]
+        assert call["model"] == "gpt-4o-mini"
+        assert (call["prompt_tokens"], call["completion_tokens"]) == (100, 20)
+        assert call["node"] == "find_movies"
+        assert timings["retries"] == 2
+
+        waterfall = timings["waterfall"]
+        assert [row["name"] for row in waterfall][0] == "find_movies"
+        assert [row["depth"] for row in waterfall] == [0, 1, 1, 1, 1]
+        assert all(row["start_seconds"] >= 0 for row in waterfall)
+
+    def test_spans_outside_the_recorder_are_ignored(self):
+        with start_span("before"):
+            pass
+        with record_spans() as recorder:
+            pass
+
+        assert recorder.spans == []
+
+
+class TestWorkflowTimings:
+    def test_invoke_returns_timings_with_retries(
+        self, mock_input_agent, mock_movies_responder, mock_system_responder,
+        mock_movie_finder, stub_recommendation_writer, mock_evaluator,
+    ):
+        mock_input_agent.decide.return_value = InputDecision(
+            route="movies",
+            constraints=Constraints(genres=["sci-fi"]),
+            needs_clarification=False,
+            needs_recommendation=True,
+            rag_query=None,
+        )
+        mock_movie_finder.find_movies.return_value = [
+            make_movie("1", "Inception", genres=["Sci-Fi"], rating=8.8),
+            make_movie("2", "The Matrix", genres=["Sci-Fi"], rating=8.7),
+        ]
+        mock_evaluator.evaluate.side_effect = [
+            EvaluationResult(passed=False, score=0.2, feedback="off-topic"),
+            EvaluationResult(passed=True, score=0.9, feedback="great"),
+        ]
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=mock_movie_finder,
+            recommendation_writer=stub_recommendation_writer,
+            evaluator=mock_evaluator,
+        )
+
+        timings = workflow.invoke("Recommend a sci-fi movie")["timings"]
+
+        assert timings["retries"] == 1
+        assert timings["nodes"]["write_recommendation"]["runs"] == 2
+        assert timings["nodes"]["evaluate"]["runs"] == 2
+        assert set(timings["nodes"]) == {
+            "orchestrate", "find_movies", "write_recommendation", "evaluate", "respond",
+        }
+        names = [row["name"] for row in timings["waterfall"]]
+        assert names[0] == "orchestrate"
+        assert names[-1] == "respond"
+        assert timings["total_seconds"] >= sum(
+            node["seconds"] for node in timings["nodes"].values()
+        ) - 0.01
+
+    def test_chat_response_includes_timings(self):
+        wf = MagicMock(spec=MovieNightWorkflow)
+        wf.invoke.return_value = {
+            "final_response": "Try Airplane!",
+            "route": "movies",
+            "timings": {"total_seconds": 1.5, "waterfall": [], "retries": 0},
+        }
+        routes.initialize_workflow(wf)
+        try:
+            r = TestClient(app).post("/chat", json={"message": "a comedy"})
+        finally:
+            routes.cleanup_workflow()
+
+        assert r.json()["debug"]["timings"]["total_seconds"] == 1.5
@@ -0,0 +1,280 @@
+"""Tests for distributed tracing: spans, W3C propagation and exporters."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.api import routes
+from app.cache import SharedCache
+from app.integrations.tmdb_client import TMDBClient
+from app.llm.workflow import MovieNightWorkflow
+from app.main import app
+from app.observability.tracing import (
+    InMemorySpanExporter,
+    OTLPSpanExporter,
+    SpanContext,
+    current_span,
+    parse_traceparent,
+    set_span_exporters,
+    start_span,
+)
+from app.observability.usage import UsageCallbackHandler, node_scope
+from app.schemas.orchestrator import Constraints, InputDecision
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    set_span_exporters([exporter])
+    yield exporter
+    set_span_exporters([])
+    routes.cleanup_workflow()
+
+
+class TestTraceparent:
+    def test_parses_valid_header(self):
+        context = parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+        assert context == SpanContext(TRACE_ID, PARENT_ID, sampled=True)
+        assert context.traceparent == f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+    @pytest.mark.parametrize(
+        "header",
+        [
+            None,
+            "",
+            "garbage",
+            f"01-{TRACE_ID}-{PARENT_ID}-01",
+            f"00-{'0' * 32}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{'0' * 16}-01",
+        ],
+    )
+    def test_rejects_invalid_header(self, header):
+        assert parse_traceparent(header) is None
+
+
+class TestSpans:
+    def test_nested_spans_share_the_trace(self, exporter):
+        with start_span("outer") as outer:
+            with start_span("inner", {"k": 1}) as inner:
+                assert current_span() is inner
+
+        assert current_span() is None
+        assert [span.name for span in exporter.spans] == ["inner", "outer"]
+        assert inner.context.trace_id == outer.context.trace_id
+        assert inner.parent_span_id == outer.context.span_id
+        assert outer.parent_span_id is None
+        assert inner.attributes == {"k": 1}
+        assert inner.duration_seconds <= outer.duration_seconds
+
+    def test_exception_marks_span_failed(self, exporter):
+        with pytest.raises(ValueError):
+            with start_span("work"):
+                raise ValueError("boom")
+
+        (span,) = exporter.spans
+        assert span.status == "error"
+        assert span.status_message == "boom"
+
+    def test_unsampled_parent_is_not_exported(self, exporter):
+        parent = SpanContext(TRACE_ID, PARENT_ID, sampled=False)
+
+        with start_span("work", parent=parent):
+            pass
+
+        assert exporter.spans == []
+
+
+def _movies_workflow(mock_input_agent, mock_movies_responder, mock_system_responder,
+                     stub_movie_finder):
+    mock_input_agent.decide.return_value = InputDecision(
+        route="movies",
+        constraints=Constraints(genres=["comedy"]),
+        needs_clarification=False,
+        needs_recommendation=False,
+        rag_query=None,
+    )
+    mock_movies_responder.respond.return_value = "Try Airplane!"
+    return MovieNightWorkflow(
+        orchestrator=None,
+        movies_responder=mock_movies_responder,
+        system_responder=mock_system_responder,
+        input_agent=mock_input_agent,
+        movie_finder=stub_movie_finder,
+    )
+
+
+class TestRequestTracing:
+    def test_chat_continues_the_callers_trace(
+        self, exporter, mock_input_agent, mock_movies_responder,
+        mock_system_responder, stub_movie_finder,
+    ):
+        routes.initialize_workflow(
+            _movies_workflow(
+                mock_input_agent, mock_movies_responder,
+                mock_system_responder, stub_movie_finder,
+            )
+        )
+        client = TestClient(app)
+
+        r = client.post(
+            "/chat",
+            json={"message": "a comedy"},
+            headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+        )
+
+        assert r.status_code == 200
+        (server,) = exporter.by_name("POST /chat")
+        assert server.kind == "server"
+        assert server.context.trace_id == TRACE_ID
+        assert server.parent_span_id == PARENT_ID
+        assert server.attributes["http.route"] == "/chat"
+        assert server.attributes["http.response.status_code"] == 200
+        assert server.attributes["chat.route"] == "movies"
+        assert r.headers["traceparent"] == server.context.traceparent
+
+        nodes = {span.name: span for span in exporter.spans if "workflow.node" in span.attributes}
+        assert {"orchestrate", "find_movies", "respond"} <= set(nodes)
+        for span in nodes.values():
+            assert span.context.trace_id == TRACE_ID
+            assert span.parent_span_id == server.context.span_id
+
+    def test_request_without_header_starts_a_trace(self, exporter):
+        client = TestClient(app)
+
+        r = client.get("/health")
+
+        (server,) = exporter.by_name("GET /health")
+        assert server.parent_span_id is None
+        assert parse_traceparent(r.headers["traceparent"]) == server.context
+
+    def test_batch_items_are_traced_under_the_request(
+        self, exporter, mock_input_agent, mock_movies_responder,
+        mock_system_responder, stub_movie_finder,
+    ):
+        routes.initialize_workflow(
+            _movies_workflow(
+                mock_input_agent, mock_movies_responder,
+                mock_system_responder, stub_movie_finder,
+            )
+        )
+        client = TestClient(app)
+
+        r = client.post("/chat/batch", json={"messages": ["a comedy", "a drama"]})
+
+        assert r.status_code == 200
+        (server,) = exporter.by_name("POST /chat/batch")
+        items = exporter.by_name("batch_item")
+        assert len(items) == 2
+        assert {item.parent_span_id for item in items} == {server.context.span_id}
+
+
+class TestClientSpans:
+    def test_llm_call_span_carries_model_and_tokens(self, exporter):
+        message = AIMessage(
+            content="hi",
+            usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150},
+            response_metadata={"model_name": "gpt-4o-mini"},
+        )
+        model = GenericFakeChatModel(
+            messages=iter([message]),
+            callbacks=[UsageCallbackHandler(agent="writer", model="deployment")],
+        )
+
+        with start_span("respond") as node, node_scope("respond"):
+            model.invoke("hello")
+
+        (span,) = exporter.by_name("chat deployment")
+        assert span.kind == "client"
+        assert span.parent_span_id == node.context.span_id
+        assert span.attributes["llm.agent"] == "writer"
+        assert span.attributes["workflow.node"] == "respond"
+        assert span.attributes["gen_ai.response.model"] == "gpt-4o-mini"
+        assert span.attributes["gen_ai.usage.input_tokens"] == 120
+        assert span.attributes["gen_ai.usage.output_tokens"] == 30
+
+    def test_tmdb_span_records_status_size_and_cache_hit(self, exporter, tmp_path):
+        cache = SharedCache(str(tmp_path / "shared.db"))
+        client = TMDBClient(api_key="test-key", cache=cache)
+        request = httpx.Request("GET", "https://api.themoviedb.org/3/search/person")
+        response = httpx.Response(200, json={"results": [{"id": 287}]}, request=request)
+
+        with patch.object(httpx.Client, "get", return_value=response):
+            client.search_person("Brad Pitt")
+            client.search_person("Brad Pitt")
+
+        first, second = exporter.by_name("GET /search/person")
+        assert first.kind == "client"
+        assert first.attributes["tmdb.endpoint"] == "/search/person"
+        assert first.attributes["tmdb.cache_hit"] is False
+        assert first.attributes["http.response.status_code"] == 200
+        assert first.attributes["http.response.body.size"] == len(response.content)
+        assert second.attributes["tmdb.cache_hit"] is True
+        assert "http.response.status_code" not in second.attributes
+
+
+class TestOTLPSpanExporter:
+    def test_posts_spans_as_otlp_json(self):
+        received = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            received.append((request.url.path, json.loads(request.content)))
+            return httpx.Response(200)
+
+        otlp = OTLPSpanExporter(
+            "http://collector:4318",
+            service_name="test-api",
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            flush_interval_seconds=60,
+        )
+        set_span_exporters([otlp])
+        try:
+            parent = SpanContext(TRACE_ID, PARENT_ID)
+            with start_span("work", {"n": 3, "ok": True, "ratio": 0.5}, parent=parent):
+                pass
+        finally:
+            set_span_exporters([])
+            otlp.shutdown()
+
+        (path, payload), = received
+        assert path == "/v1/traces"
+        resource_spans = payload["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "test-api"}}
+        ]
+        (span,) = resource_spans["scopeSpans"][0]["spans"]
+        assert span["traceId"] == TRACE_ID
+        assert span["parentSpanId"] == PARENT_ID
+        assert span["name"] == "work"
+        assert span["status"] == {"code": 1}
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+        assert {"key": "n", "value": {"intValue": "3"}} in span["attributes"]
+        assert {"key": "ok", "value": {"boolValue": True}} in span["attributes"]
+        assert {"key": "ratio", "value": {"doubleValue": 0.5}} in span["attributes"]
+
+    def test_overflow_and_failed_sends_are_dropped_quietly(self):
+        client = MagicMock()
+        client.post.side_effect = httpx.ConnectError("down")
+        otlp = OTLPSpanExporter(
+            "http://collector:4318", client=client, flush_interval_seconds=60, max_queue=1
+        )
+        set_span_exporters([otlp])
+        try:
+            with start_span("first"):
+                pass
+            with start_span("second"):
+                pass
+        finally:
+            set_span_exporters([])
+        otlp.shutdown()
+
+        assert otlp.dropped == 1
+        client.post.assert_called_once()
@@ -0,0 +1,226 @@
+"""Tests for token usage accounting and the Prometheus metrics registry."""
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from app.api.routes import _enrich_trace_metadata
+from app.llm.client import create_chat_model
+from app.llm.recommendation_agent import LLMRecommendationWriterAgent
+from app.llm.workflow import MovieNightWorkflow, build_debug_info
+from app.main import app
+from app.observability.metrics import Counter, Histogram, MetricsRegistry
+from app.observability.usage import (
+    LLM_CALLS,
+    SERVED_FROM,
+    LLMCallUsage,
+    UsageCallbackHandler,
+    UsageLedger,
+    estimate_cost,
+    node_scope,
+    usage_ledger,
+)
+from app.schemas.orchestrator import Constraints, InputDecision
+from app.settings import Settings
+
+
+def _usage_message(content: str, prompt: int, completion: int, cached: int = 0) -> AIMessage:
+    return AIMessage(
+        content=content,
+        usage_metadata={
+            "input_tokens": prompt,
+            "output_tokens": completion,
+            "total_tokens": prompt + completion,
+            "input_token_details": {"cache_read": cached},
+        },
+        response_metadata={"model_name": "gpt-4o-mini"},
+    )
+
+
+def _fake_model(*messages: AIMessage, agent: str = "writer", pricing=None):
+    return GenericFakeChatModel(
+        messages=iter(messages),
+        callbacks=[UsageCallbackHandler(agent=agent, model="deployment", pricing=pricing)],
+    )
+
+
+class TestEstimateCost:
+    def test_no_pricing_is_free(self):
+        assert estimate_cost(None, 1000, 1000) == 0.0
+
+    def test_cached_tokens_use_cached_price(self):
+        pricing = {"prompt": 2.0, "completion": 8.0, "cached_prompt": 1.0}
+        cost = estimate_cost(pricing, 1_000_000, 500_000, cached_tokens=400_000)
+        assert cost == pytest.approx(0.6 * 2.0 + 0.4 * 1.0 + 0.5 * 8.0)
+
+
+class TestUsageCallbackHandler:
+    def test_records_call_in_active_ledger_with_node(self):
+        model = _fake_model(_usage_message("hi", 120, 30, cached=100))
+
+        with usage_ledger() as ledger, node_scope("write_recommendation"):
+            model.invoke("hello")
+
+        [call] = ledger.calls
+        assert call.node == "write_recommendation"
+        assert call.agent == "writer"
+        assert call.model == "gpt-4o-mini"
+        assert (call.prompt_tokens, call.completion_tokens, call.cached_tokens) == (120, 30, 100)
+        assert call.latency_seconds >= 0.0
+
+    def test_unattributed_without_node_scope(self):
+        model = _fake_model(_usage_message("hi", 10, 5))
+
+        with usage_ledger() as ledger:
+            model.invoke("hello")
+
+        assert ledger.calls[0].node == "unattributed"
+
+    def test_cost_uses_response_model_pricing(self):
+        model = _fake_model(
+            _usage_message("hi", 1_000_000, 0),
+            pricing={"gpt-4o-mini": {"prompt": 0.15, "completion": 0.6}},
+        )
+
+        with usage_ledger() as ledger:
+            model.invoke("hello")
+
+        assert ledger.calls[0].cost_usd == pytest.approx(0.15)
+
+    def test_results_not_made_upstream_skip_call_metrics(self):
+        handler = UsageCallbackHandler(agent="writer", model="deployment")
+        message = _usage_message("hi", 0, 0)
+        response = LLMResult(generations=[[ChatGeneration(
+            message=message, generation_info={SERVED_FROM: "cache"},
+        )]])
+        labels = {"node": "unattributed", "agent": "writer", "model": "gpt-4o-mini"}
+        calls_before = LLM_CALLS.labels(**labels).value
+
+        with usage_ledger() as ledger:
+            run_id = uuid4()
+            handler.on_chat_model_start({}, [], run_id=run_id)
+            handler.on_llm_end(response, run_id=run_id)
+
+        assert ledger.calls[0].served_from == "cache"
+        assert LLM_CALLS.labels(**labels).value == calls_before
+
+
+class TestUsageLedger:
+    def test_summary_groups_by_node_agent_and_model(self):
+        ledger = UsageLedger()
+        ledger.record(LLMCallUsage("orchestrate", "input", "mini", 100, 10))
+        ledger.record(LLMCallUsage("evaluate", "evaluator", "mini", 200, 20, cached_tokens=150))
+        ledger.record(LLMCallUsage("evaluate", "evaluator", "mini", 50, 5))
+
+        summary = ledger.summary()
+
+        assert summary["llm_calls"] == 3
+        assert summary["total_tokens"] == 385
+        assert summary["cached_tokens"] == 150
+        assert summary["by_node"]["evaluate"]["llm_calls"] == 2
+        assert summary["by_agent"]["input"]["prompt_tokens"] == 100
+        assert summary["by_model"]["mini"]["completion_tokens"] == 35
+        assert len(summary["calls"]) == 3
+
+
+class TestWorkflowUsage:
+    def test_invoke_aggregates_usage_by_node(
+        self, mock_input_agent, mock_movies_responder, mock_system_responder,
+        stub_movie_finder, stub_evaluator,
+    ):
+        mock_input_agent.decide.return_value = InputDecision(
+            route="movies", constraints=Constraints(genres=["comedy"])
+        )
+        writer = LLMRecommendationWriterAgent(
+            _fake_model(_usage_message("Watch Superbad.", 300, 40))
+        )
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=writer,
+            evaluator=stub_evaluator,
+        )
+
+        result = workflow.invoke("A comedy")
+
+        usage = result["token_usage"]
+        assert usage["llm_calls"] == 1
+        assert usage["by_node"]["write_recommendation"]["prompt_tokens"] == 300
+
+    def test_usage_flows_into_debug_info_and_trace_metadata(self):
+        ledger = UsageLedger()
+        ledger.record(LLMCallUsage("evaluate", "evaluator", "mini", 80, 20, cost_usd=0.01))
+        result = {"route": "movies", "token_usage": ledger.summary()}
+
+        debug = build_debug_info(result)
+        trace_meta: dict = {}
+        _enrich_trace_metadata(trace_meta, result)
+
+        assert debug.token_usage["total_tokens"] == 100
+        assert trace_meta["prompt_tokens"] == 80
+        assert trace_meta["cost_usd"] == 0.01
+        assert trace_meta["tokens_by_node"] == {"evaluate": 100}
+
+
+class TestCreateChatModel:
+    def test_attaches_usage_handler_per_agent(self):
+        settings = Settings(
+            azure_openai_endpoint="https://example.openai.azure.com/",
+            azure_openai_api_key="key",
+            azure_openai_api_version="2024-08-01-preview",
+            azure_openai_deployment="gpt-4o",
+            llm_pricing={"gpt-4o": {"prompt": 2.5, "completion": 10.0}},
+        )
+
+        model = create_chat_model(settings, temperature=0.0, agent="evaluator")
+
+        [handler] = model.callbacks
+        assert isinstance(handler, UsageCallbackHandler)
+        assert handler.agent == "evaluator"
+        assert handler.model == "gpt-4o"
+
+
+class TestMetricsRegistry:
+    def test_renders_counters_and_histograms(self):
+        registry = MetricsRegistry()
+        counter = Counter("demo_total", "Demo counter", ["node"], registry=registry)
+        histogram = Histogram("demo_seconds", "Demo latency", buckets=(0.1, 1.0), registry=registry)
+
+        counter.labels(node="evaluate").inc(3)
+        histogram.observe(0.5)
+
+        text = registry.render()
+        assert '# TYPE demo_total counter' in text
+        assert 'demo_total{node="evaluate"} 3' in text
+        assert 'demo_seconds_bucket{le="0.1"} 0' in text
+        assert 'demo_seconds_bucket{le="1"} 1' in text
+        assert 'demo_seconds_bucket{le="+Inf"} 1' in text
+        assert "demo_seconds_count 1" in text
+
+    def test_rejects_wrong_labels_and_negative_increments(self):
+        registry = MetricsRegistry()
+        counter = Counter("demo_total", "Demo counter", ["node"], registry=registry)
+
+        with pytest.raises(ValueError):
+            counter.labels(agent="x")
+        with pytest.raises(ValueError):
+            counter.labels(node="x").inc(-1)
+
+    def test_metrics_endpoint_exposes_llm_counters(self):
+        with usage_ledger(), node_scope("orchestrate"):
+            _fake_model(_usage_message("ok", 7, 3), agent="input").invoke("hi")
+
+        with patch("app.api.routes.workflow", MagicMock()):
+            r = TestClient(app).get("/metrics")
+
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        assert 'llm_prompt_tokens_total{node="orchestrate",agent="input",model="gpt-4o-mini"}' in r.text
@@ -99,7 +99,7 @@ class TestInputOrchestrateNode:
         assert result["needs_recommendation"] is True
         assert result["rag_query"] is None
         assert "final_response" not in result
-        mock_input_agent.decide.assert_called_once_with("Recommend a comedy")
+        mock_input_agent.decide.assert_called_once_with("Recommend a comedy", history=None)
 
     def test_input_orchestrate_routes_to_rag(self, mock_input_agent):
         mock_input_agent.decide.return_value = InputDecision(
@@ -494,6 +494,28 @@ class TestEvaluateNode:
         assert result["rejected_titles"] == ["Weak"]
         assert result["draft_recommendation"] is None
 
+    def test_uses_the_configured_threshold_and_retry_limit(self, mock_evaluator):
+        draft = DraftRecommendation(
+            movie=make_movie("1", "Decent", genres=["Action"]),
+            recommendation_text="Some text.",
+        )
+        mock_evaluator.evaluate.return_value = EvaluationResult(
+            passed=True, score=0.5, feedback="fine"
+        )
+
+        lenient = create_evaluate_node(mock_evaluator, pass_threshold=0.4)
+        single_try = create_evaluate_node(mock_evaluator, max_retries=1)
+        state = {
+            "user_message": "recommend",
+            "constraints": Constraints(),
+            "draft_recommendation": draft,
+            "rejected_titles": [],
+            "retry_count": 0,
+        }
+
+        assert "retry_count" not in lenient(state)
+        assert single_try({**state, "draft_recommendation": None}) == {"retry_count": 1}
+
     def test_does_not_duplicate_rejected_title(self, mock_evaluator):
         movie = make_movie("1", "Already Here", genres=["Action"])
         draft = DraftRecommendation(
@@ -1,14 +1,23 @@
-"""Unit tests for workflow routing functions."""
+"""Unit tests for workflow routing functions and per-route graphs."""
 
+from unittest.mock import MagicMock, patch
+
+import pytest
 from langgraph.graph import END
 
+from app.batch import create_stub_workflow
+from app.llm.input_agent import StubInputOrchestratorAgent
+from app.llm.movie_finder_agent import StubMovieFinderAgent
 from app.llm.state import MAX_RETRIES
 from app.llm.workflow import (
+    MovieNightWorkflow,
+    create_route_after_evaluate,
     route_after_evaluate,
     route_after_orchestrate,
     should_respond,
 )
 from app.schemas.domain import DraftRecommendation, EvaluationResult
+from app.schemas.orchestrator import Constraints, InputDecision
 
 from conftest import make_movie
 
@@ -86,3 +95,102 @@ class TestRouteAfterEvaluate:
             "retry_count": MAX_RETRIES,
         }
         assert route_after_evaluate(state) == "respond"
+
+    def test_retry_limit_is_configurable(self):
+        state = {
+            "draft_recommendation": None,
+            "evaluation_result": EvaluationResult(
+                passed=False, score=0.1, feedback="bad"
+            ),
+            "retry_count": MAX_RETRIES,
+        }
+        assert create_route_after_evaluate(MAX_RETRIES + 1)(state) == "write_recommendation"
+        assert create_route_after_evaluate(1)({**state, "retry_count": 1}) == "respond"
+
+
+SAMPLE_MESSAGES = {
+    "movies": "A comedy under 120 minutes",
+    "hybrid": "How does this app pick a good horror movie?",
+    "rag": "How does the app rank movies?",
+}
+
+
+class TestRouteGraphs:
+    def test_route_steps_with_all_agents(self):
+        workflow = create_stub_workflow()
+
+        assert workflow._route_steps("movies") == [
+            "find_movies", "write_recommendation", "evaluate", "respond"
+        ]
+        assert workflow._route_steps("hybrid") == [
+            "find_movies", "rag_retrieve_hybrid", "write_recommendation",
+            "evaluate", "respond",
+        ]
+        assert workflow._route_steps("rag") == ["rag_retrieve", "rag_respond"]
+
+    def test_route_steps_without_optional_agents(self, mock_movies_responder, mock_system_responder):
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=StubInputOrchestratorAgent(),
+            movie_finder=StubMovieFinderAgent(),
+        )
+
+        assert workflow._route_steps("movies") == ["find_movies", "respond"]
+        assert workflow._route_steps("hybrid") == ["find_movies", "respond"]
+        assert workflow._route_steps("rag") == ["respond"]
+
+    @pytest.mark.parametrize("route", SAMPLE_MESSAGES)
+    def test_routed_run_matches_full_graph(self, route):
+        workflow = create_stub_workflow()
+        message = SAMPLE_MESSAGES[route]
+
+        routed = workflow.invoke(message)
+        full = workflow._graph.invoke(workflow._initial_state(message))
+
+        assert routed["route"] == full["route"] == route
+        assert routed["final_response"] == full["final_response"]
+        assert routed["retrieved_contexts"] == full["retrieved_contexts"]
+
+    def test_invoke_skips_full_graph_for_known_routes(self):
+        workflow = create_stub_workflow()
+
+        with patch.object(workflow, "_graph") as full_graph:
+            result = workflow.invoke(SAMPLE_MESSAGES["movies"])
+
+        full_graph.invoke.assert_not_called()
+        assert result["final_response"]
+
+    def test_clarification_goes_through_full_graph(self, mock_movies_responder, mock_system_responder):
+        input_agent = MagicMock()
+        input_agent.decide.return_value = InputDecision(
+            route="movies",
+            constraints=Constraints(),
+            needs_clarification=True,
+            clarification_question="What mood are you in?",
+        )
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=input_agent,
+            movie_finder=StubMovieFinderAgent(),
+        )
+
+        result = workflow.invoke("something")
+
+        assert result["route"] == "clarification"
+        assert result["final_response"] == "What mood are you in?"
+        input_agent.decide.assert_called_once()
+
+
+class TestGraphOverheadBenchmark:
+    def test_reports_each_route(self, capsys):
+        from bench.graph_overhead import run
+
+        results = run(iterations=2)
+
+        assert set(results) == {"movies", "hybrid", "rag"}
+        assert all(set(times) == {"direct", "routed", "full"} for times in results.values())
+        assert "overhead" in capsys.readouterr().out
@@ -0,0 +1,365 @@
+"""Tests for the optimistic stream-then-verify workflow path."""
+
+import contextvars
+import json
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.llm.recommendation_agent import (
+    DraftStream,
+    LLMRecommendationWriterAgent,
+    StubRecommendationWriterAgent,
+)
+from app.llm.state import MAX_RETRIES
+from app.llm.workflow import RETRY_EXHAUSTED_FALLBACK_MESSAGE, MovieNightWorkflow
+from app.main import app
+from app.observability.usage import get_current_ledger
+from app.resilience import Deadline, get_current_deadline
+from app.schemas.chat import StreamEvent
+from app.schemas.domain import EvaluationResult
+from app.schemas.orchestrator import Constraints, InputDecision
+
+from conftest import make_movie
+
+
+class ChunkedStubWriter(StubRecommendationWriterAgent):
+    """Stub writer that streams its deterministic text word by word."""
+
+    def write_stream(self, user_message, constraints, candidates, rejected_titles=None):
+        stream = super().write_stream(
+            user_message, constraints, candidates, rejected_titles
+        )
+        if stream is None:
+            return None
+        text = "".join(stream.chunks)
+        stream.chunks = iter(word + " " for word in text.split())
+        return stream
+
+
+def _events(workflow: MovieNightWorkflow, message: str) -> list[StreamEvent]:
+    return list(workflow.stream(message))
+
+
+def _movies_decision() -> InputDecision:
+    return InputDecision(
+        route="movies",
+        constraints=Constraints(genres=["sci-fi"]),
+        needs_recommendation=True,
+    )
+
+
+def _fail(score: float = 0.2) -> EvaluationResult:
+    return EvaluationResult(passed=False, score=score, feedback="Too generic.")
+
+
+def _pass() -> EvaluationResult:
+    return EvaluationResult(passed=True, score=0.9, feedback="Great.")
+
+
+class TestWorkflowStream:
+    def test_movies_route_streams_tokens_then_verified_final(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        stub_evaluator,
+    ):
+        mock_input_agent.decide.return_value = _movies_decision()
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=ChunkedStubWriter(),
+            evaluator=stub_evaluator,
+        )
+
+        events = _events(workflow, "A sci-fi movie")
+        kinds = [e.event for e in events]
+
+        assert kinds[0] == "route"
+        assert events[0].route == "movies"
+        assert kinds.count("token") > 1
+        assert kinds[-1] == "final"
+        assert "retracted" not in kinds
+
+        streamed = "".join(e.text for e in events if e.event == "token").strip()
+        assert events[-1].verified is True
+        assert events[-1].reply == streamed
+        mock_input_agent.decide.assert_called_once()
+
+    def test_failed_evaluation_retracts_and_streams_retry(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        mock_evaluator,
+    ):
+        mock_input_agent.decide.return_value = _movies_decision()
+        mock_evaluator.evaluate.side_effect = [_fail(), _pass()]
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=ChunkedStubWriter(),
+            evaluator=mock_evaluator,
+        )
+
+        events = _events(workflow, "A sci-fi movie")
+        kinds = [e.event for e in events]
+
+        retract_at = kinds.index("retracted")
+        assert "token" in kinds[:retract_at]
+        assert "token" in kinds[retract_at + 1:]
+        assert events[retract_at].reason == "Too generic."
+
+        final = events[-1]
+        assert final.verified is True
+        assert events[retract_at].title not in final.reply
+
+        retry_text = "".join(
+            e.text for e in events[retract_at + 1:] if e.event == "token"
+        ).strip()
+        assert final.reply == retry_text
+
+    def test_retries_exhausted_returns_fallback_unverified(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        mock_evaluator,
+    ):
+        mock_input_agent.decide.return_value = _movies_decision()
+        mock_evaluator.evaluate.return_value = _fail()
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=ChunkedStubWriter(),
+            evaluator=mock_evaluator,
+        )
+
+        events = _events(workflow, "A sci-fi movie")
+
+        assert [e.event for e in events].count("retracted") == MAX_RETRIES
+        assert events[-1].reply == RETRY_EXHAUSTED_FALLBACK_MESSAGE
+        assert events[-1].verified is False
+
+    def test_interrupted_stream_is_replaced_with_deterministic_text(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        stub_evaluator,
+    ):
+        mock_input_agent.decide.return_value = _movies_decision()
+        movie = make_movie("1", "Arrival", genres=["Sci-Fi"], rating=7.9)
+
+        def broken_chunks():
+            yield "Arrival is "
+            raise RuntimeError("connection reset")
+
+        writer = MagicMock(spec=LLMRecommendationWriterAgent)
+        writer.write_stream.return_value = DraftStream(
+            movie=movie, reasoning="", chunks=broken_chunks()
+        )
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=writer,
+            evaluator=stub_evaluator,
+        )
+
+        events = _events(workflow, "A sci-fi movie")
+        kinds = [e.event for e in events]
+
+        assert kinds[:4] == ["route", "token", "retracted", "token"]
+        assert "**Arrival**" in events[-1].reply
+        assert events[-1].verified is True
+
+    def test_rag_route_runs_graph_without_second_orchestration(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        mock_rag_retriever,
+        stub_rag_agent,
+    ):
+        mock_input_agent.decide.return_value = InputDecision(
+            route="rag",
+            needs_recommendation=False,
+            rag_query="How does this work?",
+        )
+        mock_rag_retriever.retrieve.return_value = []
+        workflow = MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=ChunkedStubWriter(),
+            rag_retriever=mock_rag_retriever,
+            rag_agent=stub_rag_agent,
+        )
+
+        events = _events(workflow, "How does this work?")
+
+        assert [e.event for e in events] == ["route", "final"]
+        assert events[0].route == "rag"
+        assert "knowledge base" in events[-1].reply
+        mock_input_agent.decide.assert_called_once()
+
+
+class TestStreamBudget:
+    def _workflow(self, mock_input_agent, mock_movies_responder, mock_system_responder,
+                  stub_movie_finder, stub_evaluator, writer):
+        mock_input_agent.decide.return_value = _movies_decision()
+        return MovieNightWorkflow(
+            orchestrator=None,
+            movies_responder=mock_movies_responder,
+            system_responder=mock_system_responder,
+            input_agent=mock_input_agent,
+            movie_finder=stub_movie_finder,
+            recommendation_writer=writer,
+            evaluator=stub_evaluator,
+        )
+
+    def test_writer_runs_under_the_request_deadline_and_ledger(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        stub_evaluator,
+    ):
+        seen = []
+
+        class RecordingWriter(ChunkedStubWriter):
+            def write_stream(self, *args, **kwargs):
+                seen.append((get_current_deadline(), get_current_ledger()))
+                return super().write_stream(*args, **kwargs)
+
+        workflow = self._workflow(
+            mock_input_agent, mock_movies_responder, mock_system_responder,
+            stub_movie_finder, stub_evaluator, RecordingWriter(),
+        )
+        deadline = Deadline.after(30)
+
+        # Resume each event in a fresh context, as a streaming response does.
+        stream = workflow.stream("A sci-fi movie", deadline=deadline)
+        events = []
+        while True:
+            try:
+                events.append(contextvars.copy_context().run(next, stream))
+            except StopIteration:
+                break
+
+        assert events[-1].event == "final"
+        ((seen_deadline, seen_ledger),) = seen
+        assert seen_deadline is deadline
+        assert seen_ledger is not None
+
+    def test_deterministic_text_is_streamed_when_short_on_time(
+        self,
+        mock_input_agent,
+        mock_movies_responder,
+        mock_system_responder,
+        stub_movie_finder,
+        stub_evaluator,
+    ):
+        writer = MagicMock(spec=LLMRecommendationWriterAgent)
+        workflow = self._workflow(
+            mock_input_agent, mock_movies_responder, mock_system_responder,
+            stub_movie_finder, stub_evaluator, writer,
+        )
+
+        events = list(workflow.stream("A sci-fi movie", deadline=Deadline.after(1)))
+
+        writer.write_stream.assert_not_called()
+        assert events[-1].event == "final"
+        assert events[-1].reply
+
+
+class TestLLMWriterStream:
+    def test_streams_llm_chunks(self):
+        llm = MagicMock()
+        llm.stream.return_value = [MagicMock(content="Watch "), MagicMock(content="Alien.")]
+        writer = LLMRecommendationWriterAgent(llm)
+
+        stream = writer.write_stream(
+            "horror", Constraints(), [make_movie("1", "Alien", genres=["Horror"])]
+        )
+
+        assert stream.movie.title == "Alien"
+        assert list(stream.chunks) == ["Watch ", "Alien."]
+
+    def test_failure_before_first_token_falls_back_to_deterministic(self):
+        llm = MagicMock()
+        llm.stream.side_effect = RuntimeError("timeout")
+        writer = LLMRecommendationWriterAgent(llm)
+
+        stream = writer.write_stream(
+            "horror", Constraints(), [make_movie("1", "Alien", genres=["Horror"])]
+        )
+
+        chunks = list(stream.chunks)
+        assert len(chunks) == 1
+        assert "**Alien**" in chunks[0]
+
+
+class TestChatStreamEndpoint:
+    def test_streams_ndjson_events(self):
+        mock_workflow = MagicMock(spec=MovieNightWorkflow)
+        mock_workflow.stream.return_value = iter([
+            StreamEvent(event="route", route="movies"),
+            StreamEvent(event="token", text="Hello"),
+            StreamEvent(event="final", route="movies", reply="Hello", verified=True),
+        ])
+
+        with patch("app.api.routes.workflow", mock_workflow):
+            client = TestClient(app, raise_server_exceptions=False)
+            r = client.post("/chat/stream", json={"message": "A comedy"})
+
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert [line["event"] for line in lines] == ["route", "token", "final"]
+        assert lines[-1]["verified"] is True
+        assert "reason" not in lines[0]
+        assert isinstance(mock_workflow.stream.call_args.kwargs["deadline"], Deadline)
+
+    def test_failure_mid_stream_emits_error_event(self):
+        def events():
+            yield StreamEvent(event="route", route="movies")
+            raise RuntimeError("boom")
+
+        mock_workflow = MagicMock(spec=MovieNightWorkflow)
+        mock_workflow.stream.return_value = events()
+
+        with patch("app.api.routes.workflow", mock_workflow):
+            client = TestClient(app, raise_server_exceptions=False)
+            r = client.post("/chat/stream", json={"message": "A comedy"})
+
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert lines[-1]["event"] == "error"
+
+    def test_stream_without_workflow_returns_500(self):
+        with patch("app.api.routes.workflow", None):
+            client = TestClient(app, raise_server_exceptions=False)
+            r = client.post("/chat/stream", json={"message": "A comedy"})
+
+        assert r.status_code == 500
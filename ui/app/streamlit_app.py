@@ -1,5 +1,8 @@
 import os
+import secrets
+import uuid
 
+import altair as alt
 import requests
 import streamlit as st
 
@@ -36,6 +39,61 @@ with st.sidebar:
     st.caption(f"Backend: {BACKEND_URL}")
 
 
+def new_traceparent() -> str:
+    """Start a W3C trace for a request, so the backend's spans join it."""
+    return f"00-{secrets.token_hex(16)}-{secrets.token_hex(8)}-01"
+
+
+def render_timings(timings: dict) -> None:
+    """Render where a request spent its time, with a waterfall of its spans."""
+    st.markdown(f"**Timings:** {timings.get('total_seconds', 0):.2f}s total")
+
+    tmdb = timings.get("tmdb") or {}
+    llm_calls = timings.get("llm_calls") or []
+    summary = [
+        f"- LLM calls: {len(llm_calls)} "
+        f"({sum(c.get('latency_seconds', 0) for c in llm_calls):.2f}s, "
+        f"{sum(c.get('prompt_tokens', 0) + c.get('completion_tokens', 0) for c in llm_calls)} tokens)",
+        f"- TMDB requests: {tmdb.get('requests', 0)} ({tmdb.get('seconds', 0):.2f}s, "
+        f"{tmdb.get('upstream_calls', 0)} upstream, {tmdb.get('cache_hits', 0)} cache hits, "
+        f"{tmdb.get('shared', 0)} shared)",
+        f"- Retries: {timings.get('retries', 0)}",
+    ]
+    st.markdown("\n".join(summary))
+
+    waterfall = timings.get("waterfall") or []
+    if not waterfall:
+        return
+    rows = [
+        {
+            "span": f"{i:02d} {'  ' * span['depth']}{span['name']}",
+            "kind": span["kind"],
+            "start": span["start_seconds"],
+            "end": span["start_seconds"] + span["duration_seconds"],
+            "seconds": span["duration_seconds"],
+            "status": span["status"],
+        }
+        for i, span in enumerate(waterfall)
+    ]
+    chart = (
+        alt.Chart(alt.Data(values=rows))
+        .mark_bar()
+        .encode(
+            x=alt.X("start:Q", title="seconds"),
+            x2="end:Q",
+            y=alt.Y("span:N", sort=None, title=None),
+            color=alt.Color("kind:N", legend=alt.Legend(orient="bottom")),
+            tooltip=["span:N", "seconds:Q", "status:N"],
+        )
+        .properties(height=max(120, 22 * len(rows)))
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+    if llm_calls:
+        with st.expander(f"LLM calls ({len(llm_calls)})"):
+            st.dataframe(llm_calls, use_container_width=True)
+
+
 def render_debug_panel(debug_data: dict) -> None:
     """Render formatted debug information."""
     route = debug_data.get("route")
@@ -66,6 +124,9 @@ def render_debug_panel(debug_data: dict) -> None:
                 st.markdown(f"- Min runtime: {min_runtime} min")
 
     if debug:
+        if debug_data.get("trace_id"):
+            st.markdown(f"**Trace ID:** `{debug_data['trace_id']}`")
+
         if debug.get("rag_query"):
             st.markdown(f"**RAG Query:** `{debug['rag_query']}`")
 
@@ -117,9 +178,14 @@ def render_debug_panel(debug_data: dict) -> None:
             if rejected:
                 st.markdown(f"**Rejected titles:** {', '.join(rejected)}")
 
+        if debug.get("timings"):
+            render_timings(debug["timings"])
+
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
 
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
@@ -139,9 +205,11 @@ if prompt := st.chat_input("What would you like to watch tonight?"):
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
             try:
+                traceparent = new_traceparent()
                 r = requests.post(
                     f"{BACKEND_URL}/chat",
-                    json={"message": prompt},
+                    json={"message": prompt, "session_id": st.session_state.session_id},
+                    headers={"traceparent": traceparent},
                     timeout=60,
                 )
 
@@ -158,6 +226,7 @@ if prompt := st.chat_input("What would you like to watch tonight?"):
                         "route": route,
                         "constraints": constraints,
                         "debug": debug,
+                        "trace_id": traceparent.split("-")[1],
                     }
 
                     if show_debug: